@@ -7,7 +7,7 @@ import logging
 from pathlib import Path
 from dotenv import load_dotenv
 from sqlalchemy import event
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Engine, make_url
 import sqlite3
 from sqlalchemy.exc import SQLAlchemyError
 from flask_migrate import Migrate
@@ -20,7 +20,7 @@ load_dotenv(dotenv_path=_env_file, override=True)
 from flask import Flask
 from flask_cors import CORS
 from models import db
-from config import Config
+from config import Config, get_engine_options, normalize_database_url
 from controllers.material_controller import material_bp, material_global_bp
 from controllers.reference_file_controller import reference_file_bp
 from controllers.settings_controller import settings_bp
@@ -60,8 +60,11 @@ def create_app():
     instance_dir = os.path.join(backend_dir, 'instance')
     os.makedirs(instance_dir, exist_ok=True)
     
+    # DATABASE_URL 未设置时使用 instance/database.db（SQLite）
     db_path = os.path.join(instance_dir, 'database.db')
-    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    database_url = normalize_database_url(os.getenv('DATABASE_URL') or f'sqlite:///{db_path}')
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = get_engine_options(database_url)
     
     # Ensure upload folder exists
     project_root = os.path.dirname(backend_dir)
@@ -114,6 +117,15 @@ def create_app():
         # Load settings from database and sync to app.config
         _load_settings_to_config(app)
 
+    @app.before_request
+    def refresh_settings():
+        """其他进程更新了设置时，在处理请求前同步到本进程的 app.config（确认间隔内不查询数据库）"""
+        from services.settings_sync import refresh_settings_config
+        try:
+            refresh_settings_config()
+        except SQLAlchemyError as db_error:
+            logging.warning(f"Failed to refresh settings: {db_error}")
+
     # Health check endpoint
     @app.route('/health')
     def health_check():
@@ -128,7 +140,7 @@ def create_app():
         """
         from models import Settings
         try:
-            settings = Settings.get_settings()
+            settings = Settings.get_cached()
             return {'data': {'language': settings.output_language}}
         except SQLAlchemyError as db_error:
             logging.warning(f"Failed to load output language from settings: {db_error}")
@@ -193,6 +205,8 @@ def _load_settings_to_config(app):
         app.config['MAX_IMAGE_WORKERS'] = settings.max_image_workers
         logging.info(f"Loaded worker settings: desc={settings.max_description_workers}, img={settings.max_image_workers}")
 
+        app.config['SETTINGS_VERSION'] = settings.version
+
     except Exception as e:
         logging.warning(f"Could not load settings from database: {e}")
 
@@ -219,7 +233,7 @@ if __name__ == '__main__':
         f"Environment: {os.getenv('FLASK_ENV', 'development')}\n"
         f"Debug mode: {debug}\n"
         f"API Base URL: http://localhost:{port}/api\n"
-        f"Database: {app.config['SQLALCHEMY_DATABASE_URI']}\n"
+        f"Database: {make_url(app.config['SQLALCHEMY_DATABASE_URI']).render_as_string(hide_password=True)}\n"
         f"Uploads: {app.config['UPLOAD_FOLDER']}"
     )
     
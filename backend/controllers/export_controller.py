@@ -1,21 +1,102 @@
 """
 Export Controller - handles file export endpoints
 """
-from flask import Blueprint, request, current_app
+from flask import Blueprint, request, current_app, Response, send_file, stream_with_context
 from models import db, Project, Page
 from utils import error_response, not_found, bad_request, success_response
 from services import ExportService, FileService
 from services.ai_service_manager import get_ai_service
+from services.export_profiles import EXPORT_PROFILES, DEFAULT_EXPORT_PROFILE
 import os
 import io
+import hashlib
+from datetime import datetime, timedelta
+from urllib.parse import quote
 
 export_bp = Blueprint('export', __name__, url_prefix='/api/projects')
 
+EXPORT_TASK_TYPES = {'pptx': 'EXPORT_PPTX', 'pdf': 'EXPORT_PDF'}
+
+
+def _get_requested_profile() -> str:
+    """读取 ?profile=（archive / print / screen），未指定时使用 EXPORT_DEFAULT_PROFILE"""
+    return request.args.get('profile') or current_app.config.get('EXPORT_DEFAULT_PROFILE', DEFAULT_EXPORT_PROFILE)
+
+
+def _submit_export_task(project_id: str, export_type: str, filename: str, image_paths, cache_key: str,
+                        profile: str = DEFAULT_EXPORT_PROFILE):
+    """
+    提交 PPTX/PDF 后台导出任务；已有相同内容、相同文件名的导出在进行中时复用该任务
+
+    Returns:
+        task_id
+    """
+    from sqlalchemy.exc import IntegrityError
+    from models import Task
+    from services.task_manager import task_manager, export_images_task
+
+    task_type = EXPORT_TASK_TYPES[export_type]
+    # 进行中的相同导出由部分唯一索引 uq_tasks_active_dedup_key 保证唯一（跨进程有效）
+    dedup_key = hashlib.sha256(f'{cache_key}\0{filename}'.encode('utf-8')).hexdigest()
+    lease = timedelta(seconds=current_app.config.get('EXPORT_TASK_LEASE_SECONDS', 60))
+    for attempt in range(3):
+        running = Task.query.filter(
+            Task.project_id == project_id,
+            Task.task_type == task_type,
+            Task.dedup_key == dedup_key,
+            Task.status.in_(['PENDING', 'PROCESSING'])
+        ).first()
+        if running is not None:
+            # 执行该任务的进程（可能是其他 worker）会定期刷新租约；租约过期才视为中断
+            # （例如服务重启后遗留的任务），标记失败后重新提交，避免前端一直轮询
+            if not Task.expire_stale(running.id, datetime.utcnow() - lease, 'Export was interrupted, please retry'):
+                return running.id
+
+        task = Task(project_id=project_id, task_type=task_type, status='PENDING', dedup_key=dedup_key,
+                    heartbeat_at=datetime.utcnow())
+        task.set_progress({
+            "total": len(image_paths),
+            "completed": 0,
+            "failed": 0,
+            "cache_key": cache_key,
+            "filename": filename
+        })
+        db.session.add(task)
+        try:
+            db.session.commit()
+            break
+        except IntegrityError:
+            # 并发的相同请求（可能来自其他进程）已创建任务：重新查找并复用
+            db.session.rollback()
+            if attempt == 2:
+                raise
+
+    task_manager.submit_task(
+        task.id,
+        export_images_task,
+        project_id=project_id,
+        export_type=export_type,
+        filename=filename,
+        image_paths=image_paths,
+        cache_key=cache_key,
+        profile=profile,
+        file_service=FileService(current_app.config['UPLOAD_FOLDER']),
+        app=current_app._get_current_object()
+    )
+    return task.id
+
 
 @export_bp.route('/<project_id>/export/pptx', methods=['GET'])
 def export_pptx(project_id):
     """
-    GET /api/projects/{project_id}/export/pptx?filename=... - Export PPTX
+    GET /api/projects/{project_id}/export/pptx?filename=...&profile=... - Export PPTX
+    
+    profile: archive（原图，默认）/ print（300 DPI JPEG）/ screen（150 DPI JPEG，体积最小）
+    
+    页数超过 SYNC_EXPORT_MAX_PAGES 且没有可复用的缓存时提交后台任务，返回 {"task_id": ...}，
+    轮询 /api/projects/{project_id}/tasks/{task_id} 获取进度和下载链接；否则同步导出。
+    
+    带 stream=true 时直接在响应中逐页流式返回 PPTX 文件（不落盘）。
     
     Returns:
         JSON with download URL, e.g.
@@ -23,7 +104,8 @@ def export_pptx(project_id):
             "success": true,
             "data": {
                 "download_url": "/files/{project_id}/exports/xxx.pptx",
-                "download_url_absolute": "http://host:port/files/{project_id}/exports/xxx.pptx"
+                "download_url_absolute": "http://host:port/files/{project_id}/exports/xxx.pptx",
+                "cached": false
             }
         }
     """
@@ -42,11 +124,8 @@ def export_pptx(project_id):
         # Get image paths
         file_service = FileService(current_app.config['UPLOAD_FOLDER'])
         
-        image_paths = []
-        for page in pages:
-            if page.generated_image_path:
-                abs_path = file_service.get_absolute_path(page.generated_image_path)
-                image_paths.append(abs_path)
+        relative_image_paths = [page.generated_image_path for page in pages if page.generated_image_path]
+        image_paths = [file_service.get_absolute_path(path) for path in relative_image_paths]
         
         if not image_paths:
             return bad_request("No generated images found for project")
@@ -56,14 +135,36 @@ def export_pptx(project_id):
         exports_dir = file_service._get_exports_dir(project_id)
         
         # Get filename from query params or use default
+        profile = _get_requested_profile()
+        if profile not in EXPORT_PROFILES:
+            return bad_request(f"Invalid profile, expected one of: {', '.join(EXPORT_PROFILES)}")
+
         filename = request.args.get('filename', f'presentation_{project_id}.pptx')
         if not filename.endswith('.pptx'):
             filename += '.pptx'
 
         output_path = os.path.join(exports_dir, filename)
 
-        # Generate PPTX file on disk
-        ExportService.create_pptx_from_images(image_paths, output_file=output_path)
+        # Reuse the previous export when no page image changed since then
+        cache_key = FileService.get_export_cache_key(relative_image_paths, 'pptx', {'profile': profile})
+        cached = file_service.get_cached_export(project_id, filename, cache_key)
+
+        if request.args.get('stream', '').lower() in ('1', 'true'):
+            if cached:
+                return send_file(output_path, as_attachment=True, download_name=filename)
+            return Response(
+                stream_with_context(ExportService.stream_pptx_from_images(image_paths, profile=profile)),
+                mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation',
+                headers={'Content-Disposition': f"attachment; filename*=UTF-8''{quote(filename)}"}
+            )
+        if not cached and len(image_paths) > current_app.config.get('SYNC_EXPORT_MAX_PAGES', 20):
+            task_id = _submit_export_task(project_id, 'pptx', filename, image_paths, cache_key, profile)
+            return success_response(data={"task_id": task_id}, message="Export PPTX task created")
+
+        if not cached:
+            # Generate PPTX file on disk
+            ExportService.create_pptx_from_images(image_paths, output_file=output_path, profile=profile)
+            file_service.record_export(project_id, filename, cache_key)
 
         # Build download URLs
         download_path = f"/files/{project_id}/exports/{filename}"
@@ -74,6 +175,7 @@ def export_pptx(project_id):
             data={
                 "download_url": download_path,
                 "download_url_absolute": download_url_absolute,
+                "cached": cached,
             },
             message="Export PPTX task created"
         )
@@ -85,7 +187,14 @@ def export_pptx(project_id):
 @export_bp.route('/<project_id>/export/pdf', methods=['GET'])
 def export_pdf(project_id):
     """
-    GET /api/projects/{project_id}/export/pdf?filename=... - Export PDF
+    GET /api/projects/{project_id}/export/pdf?filename=...&profile=... - Export PDF
+    
+    profile: archive（原图，默认）/ print（300 DPI JPEG）/ screen（150 DPI JPEG，体积最小）
+    
+    页数超过 SYNC_EXPORT_MAX_PAGES 且没有可复用的缓存时提交后台任务，返回 {"task_id": ...}，
+    轮询 /api/projects/{project_id}/tasks/{task_id} 获取进度和下载链接；否则同步导出。
+    
+    带 stream=true 时直接在响应中逐页流式返回 PDF 文件（不落盘）。
     
     Returns:
         JSON with download URL, e.g.
@@ -93,7 +202,8 @@ def export_pdf(project_id):
             "success": true,
             "data": {
                 "download_url": "/files/{project_id}/exports/xxx.pdf",
-                "download_url_absolute": "http://host:port/files/{project_id}/exports/xxx.pdf"
+                "download_url_absolute": "http://host:port/files/{project_id}/exports/xxx.pdf",
+                "cached": false
             }
         }
     """
@@ -112,11 +222,8 @@ def export_pdf(project_id):
         # Get image paths
         file_service = FileService(current_app.config['UPLOAD_FOLDER'])
         
-        image_paths = []
-        for page in pages:
-            if page.generated_image_path:
-                abs_path = file_service.get_absolute_path(page.generated_image_path)
-                image_paths.append(abs_path)
+        relative_image_paths = [page.generated_image_path for page in pages if page.generated_image_path]
+        image_paths = [file_service.get_absolute_path(path) for path in relative_image_paths]
         
         if not image_paths:
             return bad_request("No generated images found for project")
@@ -126,14 +233,36 @@ def export_pdf(project_id):
         exports_dir = file_service._get_exports_dir(project_id)
 
         # Get filename from query params or use default
+        profile = _get_requested_profile()
+        if profile not in EXPORT_PROFILES:
+            return bad_request(f"Invalid profile, expected one of: {', '.join(EXPORT_PROFILES)}")
+
         filename = request.args.get('filename', f'presentation_{project_id}.pdf')
         if not filename.endswith('.pdf'):
             filename += '.pdf'
 
         output_path = os.path.join(exports_dir, filename)
 
-        # Generate PDF file on disk
-        ExportService.create_pdf_from_images(image_paths, output_file=output_path)
+        # Reuse the previous export when no page image changed since then
+        cache_key = FileService.get_export_cache_key(relative_image_paths, 'pdf', {'profile': profile})
+        cached = file_service.get_cached_export(project_id, filename, cache_key)
+
+        if request.args.get('stream', '').lower() in ('1', 'true'):
+            if cached:
+                return send_file(output_path, as_attachment=True, download_name=filename)
+            return Response(
+                stream_with_context(ExportService.stream_pdf_from_images(image_paths, profile=profile)),
+                mimetype='application/pdf',
+                headers={'Content-Disposition': f"attachment; filename*=UTF-8''{quote(filename)}"}
+            )
+        if not cached and len(image_paths) > current_app.config.get('SYNC_EXPORT_MAX_PAGES', 20):
+            task_id = _submit_export_task(project_id, 'pdf', filename, image_paths, cache_key, profile)
+            return success_response(data={"task_id": task_id}, message="Export PDF task created")
+
+        if not cached:
+            # Generate PDF file on disk
+            ExportService.create_pdf_from_images(image_paths, output_file=output_path, profile=profile)
+            file_service.record_export(project_id, filename, cache_key)
 
         # Build download URLs
         download_path = f"/files/{project_id}/exports/{filename}"
@@ -144,6 +273,7 @@ def export_pdf(project_id):
             data={
                 "download_url": download_path,
                 "download_url_absolute": download_url_absolute,
+                "cached": cached,
             },
             message="Export PDF task created"
         )
@@ -4,6 +4,7 @@ Material Controller - handles standalone material image generation
 from flask import Blueprint, request, current_app
 from models import db, Project, Material, Task
 from utils import success_response, error_response, not_found, bad_request
+from utils.pagination import paginate_keyset, parse_limit
 from services import FileService
 from services.ai_service_manager import get_ai_service
 from services.task_manager import task_manager, generate_material_image_task
@@ -20,6 +21,10 @@ material_global_bp = Blueprint('materials_global', __name__, url_prefix='/api/ma
 
 ALLOWED_MATERIAL_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp', '.svg'}
 
+# 素材列表分页大小（游标分页，按 updated_at, id 倒序）
+MATERIALS_PAGE_SIZE = 100
+MATERIALS_MAX_PAGE_SIZE = 500
+
 
 def _build_material_query(filter_project_id: str):
     """Build common material query with project validation."""
@@ -39,17 +44,22 @@ def _build_material_query(filter_project_id: str):
 
 def _get_materials_list(filter_project_id: str):
     """
-    Common logic to get materials list.
-    Returns (materials_list, error_response)
+    Common logic to get one page of the materials list (newest first).
+    Reads limit / cursor from the query string.
+    Returns (materials_list, next_cursor, error_response)
     """
     query, error = _build_material_query(filter_project_id)
     if error:
-        return None, error
+        return None, None, error
     
-    materials = query.order_by(Material.created_at.desc()).all()
+    limit = parse_limit(request.args.get('limit'), default=MATERIALS_PAGE_SIZE, maximum=MATERIALS_MAX_PAGE_SIZE)
+    try:
+        materials, next_cursor = paginate_keyset(query, Material, limit, request.args.get('cursor'))
+    except ValueError as e:
+        return None, None, bad_request(str(e))
     materials_list = [material.to_dict() for material in materials]
     
-    return materials_list, None
+    return materials_list, next_cursor, None
 
 
 def _handle_material_upload(default_project_id: Optional[str] = None):
@@ -271,17 +281,23 @@ def list_materials(project_id):
     """
     GET /api/projects/{project_id}/materials - List materials for a specific project
     
+    Query params:
+        - limit: page size (default: 100, max: 500)
+        - cursor: next_cursor from the previous page
+    
     Returns:
         List of material images with filename, url, and metadata for the specified project
     """
     try:
-        materials_list, error = _get_materials_list(project_id)
+        materials_list, next_cursor, error = _get_materials_list(project_id)
         if error:
             return error
         
         return success_response({
             "materials": materials_list,
-            "count": len(materials_list)
+            "count": len(materials_list),
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor
         })
     
     except Exception as e:
@@ -313,19 +329,23 @@ def list_all_materials():
           * 'all' (default): Get all materials regardless of project
           * 'none': Get only materials without a project (global materials)
           * <project_id>: Get materials for specific project
+        - limit: page size (default: 100, max: 500)
+        - cursor: next_cursor from the previous page
     
     Returns:
         List of material images with filename, url, and metadata
     """
     try:
         filter_project_id = request.args.get('project_id', 'all')
-        materials_list, error = _get_materials_list(filter_project_id)
+        materials_list, next_cursor, error = _get_materials_list(filter_project_id)
         if error:
             return error
         
         return success_response({
             "materials": materials_list,
-            "count": len(materials_list)
+            "count": len(materials_list),
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor
         })
     
     except Exception as e:
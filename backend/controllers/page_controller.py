@@ -2,7 +2,8 @@
 Page Controller - handles page-related endpoints
 """
 import logging
-from flask import Blueprint, request, current_app
+from textwrap import dedent
+from flask import Blueprint, request, current_app, Response, stream_with_context
 from models import db, Project, Page, PageImageVersion, Task
 from utils import success_response, error_response, not_found, bad_request
 from services import FileService, ProjectContext
@@ -188,6 +189,77 @@ def update_page_description(project_id, page_id):
         return error_response('SERVER_ERROR', str(e), 500)
 
 
+def _prepare_page_description(project_id: str, page_id: str, data: dict):
+    """
+    Validate the request and build the inputs for single page description generation
+    
+    Returns:
+        (error_response, None) on validation failure, otherwise
+        (None, (page, project_context, outline, page_data, language))
+    """
+    page = Page.query.get(page_id)
+    
+    if not page or page.project_id != project_id:
+        return not_found('Page'), None
+    
+    project = Project.query.get(project_id)
+    if not project:
+        return not_found('Project'), None
+    
+    force_regenerate = data.get('force_regenerate', False)
+    language = data.get('language', current_app.config.get('OUTPUT_LANGUAGE', 'zh'))
+    
+    # Check if already generated
+    if page.get_description_content() and not force_regenerate:
+        return bad_request("Description already exists. Set force_regenerate=true to regenerate"), None
+    
+    # Get outline content
+    outline_content = page.get_outline_content()
+    if not outline_content:
+        return bad_request("Page must have outline content first"), None
+    
+    # Reconstruct full outline
+    all_pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
+    outline = []
+    for p in all_pages:
+        oc = p.get_outline_content()
+        if oc:
+            page_data = oc.copy()
+            if p.part:
+                page_data['part'] = p.part
+            outline.append(page_data)
+    
+    # Get reference files content and create project context
+    from controllers.project_controller import _get_project_reference_files_content
+    reference_files_content = _get_project_reference_files_content(project_id)
+    project_context = ProjectContext(project, reference_files_content)
+    
+    page_data = outline_content.copy()
+    if page.part:
+        page_data['part'] = page.part
+    
+    return None, (page, project_context, outline, page_data, language)
+
+
+def _save_page_description(page, desc_text: str):
+    """Persist a generated description on the page"""
+    desc_content = {
+        "text": desc_text,
+        "generated_at": datetime.utcnow().isoformat()
+    }
+    
+    page.set_description_content(desc_content)
+    page.status = 'DESCRIPTION_GENERATED'
+    page.updated_at = datetime.utcnow()
+    
+    db.session.commit()
+
+
+def _sse_event(event: str, data) -> str:
+    """Format a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 @page_bp.route('/<project_id>/pages/<page_id>/generate/description', methods=['POST'])
 def generate_page_description(project_id, page_id):
     """
@@ -199,52 +271,15 @@ def generate_page_description(project_id, page_id):
     }
     """
     try:
-        page = Page.query.get(page_id)
-        
-        if not page or page.project_id != project_id:
-            return not_found('Page')
-        
-        project = Project.query.get(project_id)
-        if not project:
-            return not_found('Project')
-        
-        data = request.get_json() or {}
-        force_regenerate = data.get('force_regenerate', False)
-        language = data.get('language', current_app.config.get('OUTPUT_LANGUAGE', 'zh'))
-        
-        # Check if already generated
-        if page.get_description_content() and not force_regenerate:
-            return bad_request("Description already exists. Set force_regenerate=true to regenerate")
-        
-        # Get outline content
-        outline_content = page.get_outline_content()
-        if not outline_content:
-            return bad_request("Page must have outline content first")
-        
-        # Reconstruct full outline
-        all_pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
-        outline = []
-        for p in all_pages:
-            oc = p.get_outline_content()
-            if oc:
-                page_data = oc.copy()
-                if p.part:
-                    page_data['part'] = p.part
-                outline.append(page_data)
+        error, prepared = _prepare_page_description(project_id, page_id, request.get_json() or {})
+        if error:
+            return error
+        page, project_context, outline, page_data, language = prepared
         
         # Initialize AI service
         ai_service = get_ai_service()
         
-        # Get reference files content and create project context
-        from controllers.project_controller import _get_project_reference_files_content
-        reference_files_content = _get_project_reference_files_content(project_id)
-        project_context = ProjectContext(project, reference_files_content)
-        
         # Generate description
-        page_data = outline_content.copy()
-        if page.part:
-            page_data['part'] = page.part
-        
         desc_text = ai_service.generate_page_description(
             project_context,
             outline,
@@ -254,16 +289,7 @@ def generate_page_description(project_id, page_id):
         )
         
         # Save description
-        desc_content = {
-            "text": desc_text,
-            "generated_at": datetime.utcnow().isoformat()
-        }
-        
-        page.set_description_content(desc_content)
-        page.status = 'DESCRIPTION_GENERATED'
-        page.updated_at = datetime.utcnow()
-        
-        db.session.commit()
+        _save_page_description(page, desc_text)
         
         return success_response(page.to_dict())
     
@@ -272,6 +298,56 @@ def generate_page_description(project_id, page_id):
         return error_response('AI_SERVICE_ERROR', str(e), 503)
 
 
+@page_bp.route('/<project_id>/pages/<page_id>/generate/description/stream', methods=['POST'])
+def stream_page_description(project_id, page_id):
+    """
+    POST /api/projects/{project_id}/pages/{page_id}/generate/description/stream - Stream single page description
+    
+    Same request body as the non-streaming endpoint. Validation errors are returned
+    as regular JSON responses; otherwise the response is text/event-stream with events:
+    - delta: {"text": "<chunk>"} as the model produces text
+    - done:  the saved page (same shape as the non-streaming response data)
+    - error: {"message": "..."}; the page is left unchanged
+    """
+    try:
+        error, prepared = _prepare_page_description(project_id, page_id, request.get_json() or {})
+        if error:
+            return error
+    except Exception as e:
+        db.session.rollback()
+        return error_response('SERVER_ERROR', str(e), 500)
+    
+    page, project_context, outline, page_data, language = prepared
+    ai_service = get_ai_service()
+    
+    def generate():
+        chunks = []
+        try:
+            for chunk in ai_service.generate_page_description_stream(
+                project_context,
+                outline,
+                page_data,
+                page.order_index + 1,
+                language=language
+            ):
+                chunks.append(chunk)
+                yield _sse_event('delta', {'text': chunk})
+            
+            # 完成后才持久化，中途失败不会覆盖已有描述
+            _save_page_description(page, dedent(''.join(chunks)))
+            yield _sse_event('done', page.to_dict())
+        except Exception as e:
+            logger.error(f"Streaming description failed for page {page_id}: {e}", exc_info=True)
+            db.session.rollback()
+            yield _sse_event('error', {'message': str(e)})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @page_bp.route('/<project_id>/pages/<page_id>/generate/image', methods=['POST'])
 def generate_page_image(project_id, page_id):
     """
@@ -652,7 +728,8 @@ def set_current_image_version(project_id, page_id, version_id):
     Set a specific version as the current one
     """
     try:
-        page = Page.query.get(page_id)
+        # 锁住页面行：与同一页面的图片保存（Page.allocate_image_versions）依次进行
+        page = Page.query.with_for_update().get(page_id)
         
         if not page or page.project_id != project_id:
             return not_found('Page')
@@ -662,8 +739,8 @@ def set_current_image_version(project_id, page_id, version_id):
         if not version or version.page_id != page_id:
             return not_found('Image Version')
         
-        # Mark all versions as not current
-        PageImageVersion.query.filter_by(page_id=page_id).update({'is_current': False})
+        # Mark the previous current version as not current
+        PageImageVersion.clear_current([page_id])
         
         # Set this version as current
         version.is_current = True
@@ -1,13 +1,12 @@
 """
 Project Controller - handles project-related endpoints
 """
-import json
 import logging
 import traceback
 from datetime import datetime
 
 from flask import Blueprint, request, jsonify, current_app
-from sqlalchemy import desc
+from sqlalchemy import case, desc, func
 from sqlalchemy.orm import joinedload
 from werkzeug.exceptions import BadRequest
 
@@ -20,11 +19,15 @@ from services.task_manager import (
     generate_images_task
 )
 from utils import success_response, error_response, not_found, bad_request
+from utils.pagination import encode_cursor, paginate_keyset, parse_limit
 
 logger = logging.getLogger(__name__)
 
 project_bp = Blueprint('projects', __name__, url_prefix='/api/projects')
 
+# 页面描述生成模式：逐页请求 / 按窗口批量请求
+DESCRIPTION_GENERATION_MODES = ('per_page', 'batched')
+
 
 def _get_project_reference_files_content(project_id: str) -> list:
     """
@@ -34,7 +37,8 @@ def _get_project_reference_files_content(project_id: str) -> list:
         project_id: Project ID
         
     Returns:
-        List of dicts with 'filename' and 'content' keys
+        List of dicts with 'filename', 'content' and 'chunks' keys
+        ('chunks' is None for files parsed before chunking was introduced)
     """
     reference_files = ReferenceFile.query.filter_by(
         project_id=project_id,
@@ -46,7 +50,8 @@ def _get_project_reference_files_content(project_id: str) -> list:
         if ref_file.markdown_content:
             files_content.append({
                 'filename': ref_file.filename,
-                'content': ref_file.markdown_content
+                'content': ref_file.markdown_content,
+                'chunks': ref_file.get_content_chunks()
             })
     
     return files_content
@@ -118,34 +123,52 @@ def list_projects():
     
     Query params:
     - limit: number of projects to return (default: 50, max: 100)
-    - offset: offset for pagination (default: 0)
+    - cursor: next_cursor from the previous page (keyset pagination on updated_at, id)
+    - offset: legacy offset pagination (default: 0), ignored when cursor is given
+    - include: 'pages' to return every page in full; by default each project
+      only carries a 'summary' (page count, status histogram, thumbnail) built
+      with aggregate queries, without loading Page objects
     """
     try:
         # Parameter validation
-        limit = request.args.get('limit', 50, type=int)
-        offset = request.args.get('offset', 0, type=int)
-        
-        # Enforce limits to prevent performance issues
-        limit = min(max(1, limit), 100)  # Between 1-100
-        offset = max(0, offset)  # Non-negative
-        
-        # Fetch limit + 1 items to check for more pages efficiently
-        # This avoids a second database query
-        projects_with_extra = Project.query\
-            .options(joinedload(Project.pages))\
-            .order_by(desc(Project.updated_at))\
-            .limit(limit + 1)\
-            .offset(offset)\
-            .all()
-        
-        # Check if there are more items beyond the current page
-        has_more = len(projects_with_extra) > limit
-        # Return only the requested limit
-        projects = projects_with_extra[:limit]
+        limit = parse_limit(request.args.get('limit'), default=50, maximum=100)
+        offset = max(0, request.args.get('offset', 0, type=int))
+        cursor = request.args.get('cursor')
+        include_pages = 'pages' in request.args.get('include', '').split(',')
+        
+        query = Project.query
+        if include_pages:
+            query = query.options(joinedload(Project.pages))
+        
+        if cursor or not offset:
+            try:
+                projects, next_cursor = paginate_keyset(query, Project, limit, cursor)
+            except ValueError as e:
+                return bad_request(str(e))
+            has_more = next_cursor is not None
+        else:
+            # Fetch limit + 1 items to check for more pages efficiently
+            projects_with_extra = query\
+                .order_by(desc(Project.updated_at), desc(Project.id))\
+                .limit(limit + 1)\
+                .offset(offset)\
+                .all()
+            has_more = len(projects_with_extra) > limit
+            projects = projects_with_extra[:limit]
+            next_cursor = encode_cursor(projects[-1].updated_at, projects[-1].id) if has_more else None
+        
+        if include_pages:
+            projects_data = [project.to_dict(include_pages=True) for project in projects]
+        else:
+            summaries = _get_project_summaries([project.id for project in projects])
+            projects_data = [
+                {**project.to_dict(), 'summary': summaries[project.id]} for project in projects
+            ]
         
         return success_response({
-            'projects': [project.to_dict(include_pages=True) for project in projects],
+            'projects': projects_data,
             'has_more': has_more,
+            'next_cursor': next_cursor,
             'limit': limit,
             'offset': offset
         })
@@ -155,6 +178,100 @@ def list_projects():
         return error_response('SERVER_ERROR', str(e), 500)
 
 
+def _format_timestamp(value):
+    """Format a naive UTC datetime like Project.to_dict does"""
+    if not value:
+        return None
+    return value.isoformat() + 'Z' if not value.tzinfo else value.isoformat()
+
+
+def _get_project_summaries(project_ids: list) -> dict:
+    """
+    Per-project page summaries for the history list
+    
+    Two queries regardless of the page count: a GROUP BY over (project, status)
+    for the counts, and a windowed query that picks each project's first page
+    (for the title) and first page with an image (for the thumbnail). Only the
+    title is extracted from the first page's outline_content (in SQL).
+    
+    Returns:
+        Dict of project_id -> {
+            'page_count', 'page_status_counts', 'image_count', 'description_count',
+            'first_page_title', 'thumbnail_url', 'thumbnail_updated_at', 'pages_updated_at'
+        }
+    """
+    summaries = {
+        project_id: {
+            'page_count': 0,
+            'page_status_counts': {},
+            'image_count': 0,
+            'description_count': 0,
+            'first_page_title': None,
+            'thumbnail_url': None,
+            'thumbnail_updated_at': None,
+            'pages_updated_at': None,
+        }
+        for project_id in project_ids
+    }
+    if not project_ids:
+        return summaries
+    
+    has_image = case((Page.generated_image_path.isnot(None), 1), else_=0)
+    has_description = case((Page.description_content.isnot(None), 1), else_=0)
+    counts = db.session.query(
+        Page.project_id,
+        Page.status,
+        func.count(Page.id),
+        func.sum(has_image),
+        func.sum(has_description),
+        func.max(Page.updated_at)
+    ).filter(Page.project_id.in_(project_ids)).group_by(Page.project_id, Page.status).all()
+    
+    pages_updated_at = {}
+    for project_id, status, count, image_count, description_count, updated_at in counts:
+        summary = summaries[project_id]
+        summary['page_count'] += count
+        summary['page_status_counts'][status] = count
+        summary['image_count'] += int(image_count or 0)
+        summary['description_count'] += int(description_count or 0)
+        if updated_at and (project_id not in pages_updated_at or updated_at > pages_updated_at[project_id]):
+            pages_updated_at[project_id] = updated_at
+    for project_id, updated_at in pages_updated_at.items():
+        summaries[project_id]['pages_updated_at'] = _format_timestamp(updated_at)
+    
+    ranked = db.session.query(
+        Page.id.label('page_id'),
+        func.row_number().over(
+            partition_by=Page.project_id, order_by=(Page.order_index, Page.id)
+        ).label('page_rank'),
+        func.row_number().over(
+            partition_by=Page.project_id,
+            order_by=(Page.generated_image_path.is_(None), Page.order_index, Page.id)
+        ).label('image_rank')
+    ).filter(Page.project_id.in_(project_ids)).subquery()
+    
+    first_pages = db.session.query(
+        Page.project_id,
+        ranked.c.page_rank,
+        case((ranked.c.page_rank == 1, Page.outline_content['title'].as_string())),
+        Page.generated_image_path,
+        Page.updated_at
+    ).join(ranked, ranked.c.page_id == Page.id).filter(
+        (ranked.c.page_rank == 1)
+        | ((ranked.c.image_rank == 1) & Page.generated_image_path.isnot(None))
+    ).all()
+    
+    for project_id, page_rank, title, image_path, updated_at in first_pages:
+        summary = summaries[project_id]
+        if page_rank == 1:
+            summary['first_page_title'] = title
+        if image_path and summary['thumbnail_url'] is None:
+            summary['thumbnail_url'] = f'/files/{project_id}/pages/{image_path.split("/")[-1]}'
+            summary['thumbnail_updated_at'] = _format_timestamp(updated_at)
+    
+    return summaries
+
+
 @project_bp.route('', methods=['POST'])
 def create_project():
     """
@@ -273,6 +390,12 @@ def update_project(project_id):
         if 'template_style' in data:
             project.template_style = data['template_style']
         
+        # Update description_generation_mode if provided
+        if 'description_generation_mode' in data:
+            if data['description_generation_mode'] not in DESCRIPTION_GENERATION_MODES:
+                return bad_request(f"description_generation_mode must be one of: {', '.join(DESCRIPTION_GENERATION_MODES)}")
+            project.description_generation_mode = data['description_generation_mode']
+        
         # Update page order if provided
         if 'pages_order' in data:
             pages_order = data['pages_order']
@@ -393,28 +516,18 @@ def generate_outline(project_id):
         # Flatten outline to pages
         pages_data = ai_service.flatten_outline(outline)
         
-        # Delete existing pages (using ORM session to trigger cascades)
-        # Note: Cannot use bulk delete as it bypasses ORM cascades for PageImageVersion
-        old_pages = Page.query.filter_by(project_id=project_id).all()
-        for old_page in old_pages:
-            db.session.delete(old_page)
-        
-        # Create pages from outline
-        pages_list = []
-        for i, page_data in enumerate(pages_data):
-            page = Page(
-                project_id=project_id,
-                order_index=i,
-                part=page_data.get('part'),
-                status='DRAFT'
-            )
-            page.set_outline_content({
-                'title': page_data.get('title'),
-                'points': page_data.get('points', [])
-            })
-            
-            db.session.add(page)
-            pages_list.append(page)
+        # Replace existing pages (set-based delete of pages and image versions, bulk insert)
+        pages_list = Page.replace_project_pages(project_id, [
+            {
+                'part': page_data.get('part'),
+                'outline_content': {
+                    'title': page_data.get('title'),
+                    'points': page_data.get('points', [])
+                },
+                'status': 'DRAFT',
+            }
+            for page_data in pages_data
+        ])
         
         # Update project status
         project.status = 'OUTLINE_GENERATED'
@@ -426,7 +539,7 @@ def generate_outline(project_id):
         
         # Return pages
         return success_response({
-            'pages': [page.to_dict() for page in pages_list]
+            'pages': pages_list
         })
     
     except Exception as e:
@@ -501,36 +614,23 @@ def generate_from_description(project_id):
             pages_data = pages_data[:min_count]
             page_descriptions = page_descriptions[:min_count]
         
-        # Step 4: Delete existing pages (using ORM session to trigger cascades)
-        old_pages = Page.query.filter_by(project_id=project_id).all()
-        for old_page in old_pages:
-            db.session.delete(old_page)
-        
-        # Step 5: Create pages with both outline and description
-        pages_list = []
-        for i, (page_data, page_desc) in enumerate(zip(pages_data, page_descriptions)):
-            page = Page(
-                project_id=project_id,
-                order_index=i,
-                part=page_data.get('part'),
-                status='DESCRIPTION_GENERATED'  # 直接设置为已生成描述
-            )
-            
-            # Set outline content
-            page.set_outline_content({
-                'title': page_data.get('title'),
-                'points': page_data.get('points', [])
-            })
-            
-            # Set description content
-            desc_content = {
-                "text": page_desc,
-                "generated_at": datetime.utcnow().isoformat()
+        # Step 4 & 5: Replace existing pages with pages holding both outline and description
+        generated_at = datetime.utcnow().isoformat()
+        pages_list = Page.replace_project_pages(project_id, [
+            {
+                'part': page_data.get('part'),
+                'outline_content': {
+                    'title': page_data.get('title'),
+                    'points': page_data.get('points', [])
+                },
+                'description_content': {
+                    "text": page_desc,
+                    "generated_at": generated_at
+                },
+                'status': 'DESCRIPTION_GENERATED',  # 直接设置为已生成描述
             }
-            page.set_description_content(desc_content)
-            
-            db.session.add(page)
-            pages_list.append(page)
+            for page_data, page_desc in zip(pages_data, page_descriptions)
+        ])
         
         # Update project status
         project.status = 'DESCRIPTIONS_GENERATED'
@@ -542,7 +642,7 @@ def generate_from_description(project_id):
         
         # Return pages
         return success_response({
-            'pages': [page.to_dict() for page in pages_list],
+            'pages': pages_list,
             'status': 'DESCRIPTIONS_GENERATED'
         })
     
@@ -560,7 +660,8 @@ def generate_descriptions(project_id):
     Request body:
     {
         "max_workers": 5,
-        "language": "zh"  # output language: zh, en, ja, auto
+        "language": "zh",  # output language: zh, en, ja, auto
+        "mode": "batched"  # optional, overrides project.description_generation_mode
     }
     """
     try:
@@ -588,6 +689,10 @@ def generate_descriptions(project_id):
         # 从配置中读取默认并发数，如果请求中提供了则使用请求的值
         max_workers = data.get('max_workers', current_app.config.get('MAX_DESCRIPTION_WORKERS', 5))
         language = data.get('language', current_app.config.get('OUTPUT_LANGUAGE', 'zh'))
+        mode = data.get('mode') or project.description_generation_mode or 'per_page'
+        if mode not in DESCRIPTION_GENERATION_MODES:
+            return bad_request(f"mode must be one of: {', '.join(DESCRIPTION_GENERATION_MODES)}")
+        batch_size = current_app.config.get('DESCRIPTION_BATCH_SIZE', 6)
         
         # Create task
         task = Task(
@@ -624,7 +729,9 @@ def generate_descriptions(project_id):
             outline,
             max_workers,
             app,
-            language
+            language,
+            mode,
+            batch_size
         )
         
         # Update project status
@@ -833,69 +940,61 @@ def refine_outline(project_id):
         pages_data = ai_service.flatten_outline(refined_outline)
         
         # 在删除旧页面之前，先保存已有的页面描述（按标题匹配）
-        old_pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
+        # 只查询需要的列，不加载旧页面 ORM 对象
+        old_pages = db.session.query(
+            Page.outline_content, Page.description_content, Page.status
+        ).filter_by(project_id=project_id).order_by(Page.order_index).all()
         descriptions_map = {}  # {title: description_content}
         old_status_map = {}  # {title: status} 用于保留状态
         
-        for old_page in old_pages:
-            old_outline = old_page.get_outline_content()
+        for old_outline, old_description, old_status in old_pages:
             if old_outline and old_outline.get('title'):
                 title = old_outline.get('title')
-                if old_page.description_content:
-                    descriptions_map[title] = old_page.description_content
+                if old_description:
+                    descriptions_map[title] = old_description
                 # 如果旧页面已经有描述，保留状态
-                if old_page.status in ['DESCRIPTION_GENERATED', 'IMAGE_GENERATED']:
-                    old_status_map[title] = old_page.status
-        
-        # Delete existing pages (using ORM session to trigger cascades)
-        for old_page in old_pages:
-            db.session.delete(old_page)
+                if old_status in ['DESCRIPTION_GENERATED', 'IMAGE_GENERATED']:
+                    old_status_map[title] = old_status
         
-        # Create pages from refined outline
-        pages_list = []
-        has_descriptions = False
+        # Build pages from refined outline
+        new_pages = []
         preserved_count = 0
         new_count = 0
         
-        for i, page_data in enumerate(pages_data):
-            page = Page(
-                project_id=project_id,
-                order_index=i,
-                part=page_data.get('part'),
-                status='DRAFT'
-            )
-            page.set_outline_content({
-                'title': page_data.get('title'),
-                'points': page_data.get('points', [])
-            })
+        for page_data in pages_data:
+            page = {
+                'part': page_data.get('part'),
+                'outline_content': {
+                    'title': page_data.get('title'),
+                    'points': page_data.get('points', [])
+                },
+                'status': 'DRAFT',
+            }
             
             # 尝试匹配并恢复已有的描述
             title = page_data.get('title')
             if title in descriptions_map:
                 # 恢复描述内容
-                page.description_content = descriptions_map[title]
+                page['description_content'] = descriptions_map[title]
                 # 恢复状态（如果有）
-                if title in old_status_map:
-                    page.status = old_status_map[title]
-                else:
-                    page.status = 'DESCRIPTION_GENERATED'
-                has_descriptions = True
+                page['status'] = old_status_map.get(title, 'DESCRIPTION_GENERATED')
                 preserved_count += 1
             else:
                 # 新页面或标题改变的页面，描述为空
                 # 这包括：新增的页面、合并的页面、标题改变的页面
-                page.status = 'DRAFT'
                 new_count += 1
             
-            db.session.add(page)
-            pages_list.append(page)
+            new_pages.append(page)
+        
+        # Replace existing pages (set-based delete of pages and image versions, bulk insert)
+        pages_list = Page.replace_project_pages(project_id, new_pages)
         
         logger.info(f"描述匹配完成: 保留了 {preserved_count} 个页面的描述, {new_count} 个页面需要重新生成描述")
         
         # Update project status
         # 如果所有页面都有描述，保持 DESCRIPTION_GENERATED 状态
         # 否则降级为 OUTLINE_GENERATED
-        if has_descriptions and all(p.description_content for p in pages_list):
+        if preserved_count and all(page['description_content'] for page in pages_list):
             project.status = 'DESCRIPTIONS_GENERATED'
         else:
             project.status = 'OUTLINE_GENERATED'
@@ -907,7 +1006,7 @@ def refine_outline(project_id):
         
         # Return pages
         return success_response({
-            'pages': [page.to_dict() for page in pages_list],
+            'pages': pages_list,
             'message': '大纲修改成功'
         })
     
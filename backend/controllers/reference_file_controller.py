@@ -2,6 +2,7 @@
 Reference File Controller - handles file upload and parsing
 """
 import os
+import hashlib
 import logging
 import re
 import uuid
@@ -11,16 +12,25 @@ from pathlib import Path
 from config import Config
 from datetime import datetime
 from urllib.parse import unquote
-import threading
 
 from models import db, ReferenceFile, Project
 from utils.response import success_response, error_response, bad_request, not_found
+from utils.pagination import paginate_keyset, parse_limit
 from services.file_parser_service import FileParserService
+from services.task_manager import task_manager
+from services.reference_index import chunk_markdown
 
 logger = logging.getLogger(__name__)
 
 reference_file_bp = Blueprint('reference_file', __name__)
 
+# 上传/哈希时每次读取的块大小，避免大文件整体读入内存
+_STREAM_CHUNK_SIZE = 1024 * 1024
+
+# 参考文件列表分页大小（游标分页，按 updated_at, id 倒序）
+REFERENCE_FILES_PAGE_SIZE = 100
+REFERENCE_FILES_MAX_PAGE_SIZE = 500
+
 
 def _allowed_file(filename: str, allowed_extensions: set) -> bool:
     """Check if file extension is allowed"""
@@ -35,6 +45,69 @@ def _get_file_type(filename: str) -> str:
     return 'unknown'
 
 
+def _save_stream_with_hash(stream, dest_path: Path) -> tuple[int, str]:
+    """
+    Stream an upload to disk in chunks while computing its sha256 in the same pass
+    
+    Data is written to a temporary ``.part`` file and renamed on success,
+    so a failed upload never leaves a half-written file behind.
+    
+    Returns:
+        (file_size, sha256 hex digest)
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    tmp_path = dest_path.with_name(dest_path.name + '.part')
+    try:
+        with open(tmp_path, 'wb') as f:
+            while True:
+                chunk = stream.read(_STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        os.replace(tmp_path, dest_path)
+    except Exception:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+    return size, hasher.hexdigest()
+
+
+def _hash_file(file_path: Path) -> str:
+    """Compute sha256 of an existing file in chunks"""
+    hasher = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_STREAM_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _find_parsed_duplicate(content_hash: str, exclude_id: str = None):
+    """Find a completed reference file with identical content whose parse result can be reused"""
+    if not content_hash:
+        return None
+    query = ReferenceFile.query.filter(
+        ReferenceFile.content_hash == content_hash,
+        ReferenceFile.parse_status == 'completed',
+        ReferenceFile.markdown_content.isnot(None)
+    )
+    if exclude_id:
+        query = query.filter(ReferenceFile.id != exclude_id)
+    return query.order_by(ReferenceFile.updated_at.desc()).first()
+
+
+def _copy_parse_result(target: ReferenceFile, source: ReferenceFile):
+    """Reuse the parse result of an identical file"""
+    target.parse_status = 'completed'
+    target.markdown_content = source.markdown_content
+    target.content_chunks = source.content_chunks
+    target.mineru_batch_id = source.mineru_batch_id
+    target.error_message = None
+    target.updated_at = datetime.utcnow()
+
+
 def _parse_file_async(file_id: str, file_path: str, filename: str, app):
     """
     Parse file asynchronously in background
@@ -81,6 +154,10 @@ def _parse_file_async(file_id: str, file_path: str, filename: str, app):
             else:
                 reference_file.parse_status = 'completed'
                 reference_file.markdown_content = markdown_content
+                # 解析完成时切分 chunk，供生成 prompt 时按相关性检索
+                reference_file.set_content_chunks(
+                    chunk_markdown(markdown_content, current_app.config.get('REFERENCE_CHUNK_TOKENS', Config.REFERENCE_CHUNK_TOKENS))
+                )
                 if failed_image_count > 0:
                     logger.warning(f"File parsing completed: {filename}, but {failed_image_count} images failed to generate captions")
                 else:
@@ -181,9 +258,8 @@ def upload_reference_file():
         unique_filename = f"{unique_id}_{filename}"
         file_path = reference_files_dir / unique_filename
         
-        # Save file
-        file.save(str(file_path))
-        file_size = os.path.getsize(file_path)
+        # Save file - 分块写盘并同时计算 sha256
+        file_size, content_hash = _save_stream_with_hash(file.stream, file_path)
         
         # Create database record
         reference_file = ReferenceFile(
@@ -192,9 +268,16 @@ def upload_reference_file():
             file_path=str(file_path.relative_to(upload_folder)),
             file_size=file_size,
             file_type=file_type,
+            content_hash=content_hash,
             parse_status='pending'
         )
         
+        # 相同内容的文件已解析完成时直接复用解析结果
+        duplicate = _find_parsed_duplicate(content_hash)
+        if duplicate:
+            _copy_parse_result(reference_file, duplicate)
+            logger.info(f"Reusing parse result of identical file {duplicate.id} for {original_filename}")
+        
         db.session.add(reference_file)
         db.session.commit()
         
@@ -277,27 +360,40 @@ def list_project_reference_files(project_id):
     - 'global' or 'none': List only global files (not associated with any project)
     - project_id: List files for specific project
     
+    Query params:
+    - limit: page size (default: 100, max: 500)
+    - cursor: next_cursor from the previous page (newest first)
+    
     Returns:
-        List of reference files
+        One page of reference files, with has_more / next_cursor
     """
     try:
         # Special case: 'all' means list all files
         if project_id == 'all':
-            reference_files = ReferenceFile.query.all()
+            query = ReferenceFile.query
         # Special case: 'global' or 'none' means list global files (not associated with any project)
         elif project_id in ['global', 'none']:
-            reference_files = ReferenceFile.query.filter_by(project_id=None).all()
+            query = ReferenceFile.query.filter_by(project_id=None)
         else:
             # Verify project exists
             project = Project.query.get(project_id)
             if not project:
                 return not_found('Project')
             
-            reference_files = ReferenceFile.query.filter_by(project_id=project_id).all()
+            query = ReferenceFile.query.filter_by(project_id=project_id)
+        
+        limit = parse_limit(request.args.get('limit'), default=REFERENCE_FILES_PAGE_SIZE,
+                            maximum=REFERENCE_FILES_MAX_PAGE_SIZE)
+        try:
+            reference_files, next_cursor = paginate_keyset(query, ReferenceFile, limit, request.args.get('cursor'))
+        except ValueError as e:
+            return bad_request(str(e))
         
         # 列表查询时不包含 markdown_content 和失败计数，加快响应速度
         return success_response({
-            'files': [f.to_dict(include_content=False) for f in reference_files]
+            'files': [f.to_dict(include_content=False) for f in reference_files],
+            'has_more': next_cursor is not None,
+            'next_cursor': next_cursor
         })
         
     except Exception as e:
@@ -318,19 +414,24 @@ def trigger_file_parse(file_id):
         if not reference_file:
             return not_found('Reference file')
         
-        # 如果正在解析，直接返回
-        if reference_file.parse_status == 'parsing':
+        # 解析任务已在队列中或正在执行（无论状态是 pending 还是 parsing），直接返回；
+        # 状态为 parsing 但任务已不在队列中时视为中断，允许重新解析
+        if task_manager.is_task_active(file_id):
             return success_response({
                 'file': reference_file.to_dict(),
                 'message': 'File is already being parsed'
             })
         
+        # 仅首次解析时复用相同内容文件的结果；用户主动重新解析时仍然重新解析
+        allow_reuse = reference_file.parse_status == 'pending'
+        
         # 如果解析完成或失败，可以重新解析
-        if reference_file.parse_status in ['completed', 'failed']:
+        if reference_file.parse_status in ['completed', 'failed', 'parsing']:
             reference_file.parse_status = 'pending'
             reference_file.error_message = None
             # 清空之前的解析结果，以便重新解析
             reference_file.markdown_content = None
+            reference_file.content_chunks = None
             reference_file.mineru_batch_id = None
             db.session.commit()
         
@@ -341,13 +442,35 @@ def trigger_file_parse(file_id):
         if not file_path.exists():
             return error_response('FILE_NOT_FOUND', f'File not found: {file_path}', 404)
         
-        # 启动异步解析
-        thread = threading.Thread(
-            target=_parse_file_async,
-            args=(reference_file.id, str(file_path), reference_file.filename, current_app._get_current_object())
+        # 旧数据没有哈希时补算一次
+        if not reference_file.content_hash:
+            reference_file.content_hash = _hash_file(file_path)
+            db.session.commit()
+        
+        if allow_reuse:
+            duplicate = _find_parsed_duplicate(reference_file.content_hash, exclude_id=reference_file.id)
+            if duplicate:
+                _copy_parse_result(reference_file, duplicate)
+                db.session.commit()
+                logger.info(f"Reusing parse result of identical file {duplicate.id} for {reference_file.filename}")
+                return success_response({
+                    'file': reference_file.to_dict(),
+                    'message': 'Parse result reused from identical file'
+                })
+        
+        # 启动异步解析（使用共享任务队列，以文件ID作为任务ID）；并发的重复请求已提交时不再提交
+        submitted = task_manager.submit_task(
+            reference_file.id,
+            _parse_file_async,
+            str(file_path),
+            reference_file.filename,
+            current_app._get_current_object()
         )
-        thread.daemon = True
-        thread.start()
+        if not submitted:
+            return success_response({
+                'file': reference_file.to_dict(),
+                'message': 'File is already being parsed'
+            })
         
         logger.info(f"Triggered parsing for file: {reference_file.filename} (ID: {file_id})")
         
@@ -6,6 +6,7 @@ from models import db, Settings
 from utils import success_response, error_response, bad_request
 from datetime import datetime, timezone
 from config import Config
+from services.settings_sync import sync_settings_to_config
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +22,7 @@ def get_settings():
     GET /api/settings - Get application settings
     """
     try:
-        settings = Settings.get_settings()
+        settings = Settings.get_cached()
         return success_response(settings.to_dict())
     except Exception as e:
         logger.error(f"Error getting settings: {str(e)}")
@@ -124,10 +125,12 @@ def update_settings():
                 return bad_request("Output language must be 'zh', 'en', 'ja', or 'auto'")
 
         settings.updated_at = datetime.now(timezone.utc)
+        settings.version = Settings.version + 1
         db.session.commit()
+        Settings.invalidate_cache()
 
         # Sync to app.config
-        _sync_settings_to_config(settings)
+        sync_settings_to_config(settings)
 
         logger.info("Settings updated successfully")
         return success_response(
@@ -179,11 +182,13 @@ def reset_settings():
         settings.max_description_workers = Config.MAX_DESCRIPTION_WORKERS
         settings.max_image_workers = Config.MAX_IMAGE_WORKERS
         settings.updated_at = datetime.now(timezone.utc)
+        settings.version = Settings.version + 1
 
         db.session.commit()
+        Settings.invalidate_cache()
 
         # Sync to app.config
-        _sync_settings_to_config(settings)
+        sync_settings_to_config(settings)
 
         logger.info("Settings reset to defaults")
         return success_response(
@@ -198,96 +203,3 @@ def reset_settings():
             f"Failed to reset settings: {str(e)}",
             500,
         )
-
-
-def _sync_settings_to_config(settings: Settings):
-    """Sync settings to Flask app config and clear AI service cache if needed"""
-    # Track if AI-related settings changed
-    ai_config_changed = False
-    
-    # Sync AI provider format (always sync, has default value)
-    if settings.ai_provider_format:
-        old_format = current_app.config.get("AI_PROVIDER_FORMAT")
-        if old_format != settings.ai_provider_format:
-            ai_config_changed = True
-            logger.info(f"AI provider format changed: {old_format} -> {settings.ai_provider_format}")
-        current_app.config["AI_PROVIDER_FORMAT"] = settings.ai_provider_format
-    
-    # Sync API configuration (sync to both GOOGLE_* and OPENAI_* to ensure DB settings override env vars)
-    if settings.api_base_url is not None:
-        old_base = current_app.config.get("GOOGLE_API_BASE")
-        if old_base != settings.api_base_url:
-            ai_config_changed = True
-            logger.info(f"API base URL changed: {old_base} -> {settings.api_base_url}")
-        current_app.config["GOOGLE_API_BASE"] = settings.api_base_url
-        current_app.config["OPENAI_API_BASE"] = settings.api_base_url
-    else:
-        # Remove overrides, fall back to env variables or defaults
-        if "GOOGLE_API_BASE" in current_app.config or "OPENAI_API_BASE" in current_app.config:
-            ai_config_changed = True
-            logger.info("API base URL cleared, falling back to defaults")
-        current_app.config.pop("GOOGLE_API_BASE", None)
-        current_app.config.pop("OPENAI_API_BASE", None)
-
-    if settings.api_key is not None:
-        old_key = current_app.config.get("GOOGLE_API_KEY")
-        # Only compare existence, not actual value for security
-        if (old_key is None) != (settings.api_key is None):
-            ai_config_changed = True
-            logger.info("API key updated")
-        current_app.config["GOOGLE_API_KEY"] = settings.api_key
-        current_app.config["OPENAI_API_KEY"] = settings.api_key
-    else:
-        # Remove overrides, fall back to env variables or defaults
-        if "GOOGLE_API_KEY" in current_app.config or "OPENAI_API_KEY" in current_app.config:
-            ai_config_changed = True
-            logger.info("API key cleared, falling back to defaults")
-        current_app.config.pop("GOOGLE_API_KEY", None)
-        current_app.config.pop("OPENAI_API_KEY", None)
-    
-    # Check model changes
-    if settings.text_model is not None:
-        old_model = current_app.config.get("TEXT_MODEL")
-        if old_model != settings.text_model:
-            ai_config_changed = True
-            logger.info(f"Text model changed: {old_model} -> {settings.text_model}")
-        current_app.config["TEXT_MODEL"] = settings.text_model
-    
-    if settings.image_model is not None:
-        old_model = current_app.config.get("IMAGE_MODEL")
-        if old_model != settings.image_model:
-            ai_config_changed = True
-            logger.info(f"Image model changed: {old_model} -> {settings.image_model}")
-        current_app.config["IMAGE_MODEL"] = settings.image_model
-
-    # Sync image generation settings
-    current_app.config["DEFAULT_RESOLUTION"] = settings.image_resolution
-    current_app.config["DEFAULT_ASPECT_RATIO"] = settings.image_aspect_ratio
-
-    # Sync worker settings
-    current_app.config["MAX_DESCRIPTION_WORKERS"] = settings.max_description_workers
-    current_app.config["MAX_IMAGE_WORKERS"] = settings.max_image_workers
-    logger.info(f"Updated worker settings: desc={settings.max_description_workers}, img={settings.max_image_workers}")
-
-    # Sync MinerU settings (optional, fall back to Config defaults if None)
-    if settings.mineru_api_base:
-        current_app.config["MINERU_API_BASE"] = settings.mineru_api_base
-        logger.info(f"Updated MINERU_API_BASE to: {settings.mineru_api_base}")
-    if settings.mineru_token is not None:
-        current_app.config["MINERU_TOKEN"] = settings.mineru_token
-        logger.info("Updated MINERU_TOKEN from settings")
-    if settings.image_caption_model:
-        current_app.config["IMAGE_CAPTION_MODEL"] = settings.image_caption_model
-        logger.info(f"Updated IMAGE_CAPTION_MODEL to: {settings.image_caption_model}")
-    if settings.output_language:
-        current_app.config["OUTPUT_LANGUAGE"] = settings.output_language
-        logger.info(f"Updated OUTPUT_LANGUAGE to: {settings.output_language}")
-    
-    # Clear AI service cache if AI-related configuration changed
-    if ai_config_changed:
-        try:
-            from services.ai_service_manager import clear_ai_service_cache
-            clear_ai_service_cache()
-            logger.warning("AI configuration changed - AIService cache cleared. New providers will be created on next request.")
-        except Exception as e:
-            logger.error(f"Failed to clear AI service cache: {e}")
@@ -37,6 +37,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         compare_type=True,
+        render_as_batch=url.startswith('sqlite'),
     )
 
     with context.begin_transaction():
@@ -57,6 +58,8 @@ def run_migrations_online() -> None:
             connection=connection,
             target_metadata=target_metadata,
             compare_type=True,
+            # SQLite 不支持大部分 ALTER TABLE，自动生成的迁移使用 batch 模式（复制表）；PostgreSQL 直接 ALTER
+            render_as_batch=connection.dialect.name == 'sqlite',
         )
 
         with context.begin_transaction():
@@ -0,0 +1,51 @@
+"""add content_hash to reference_files
+
+Revision ID: 005_reference_file_hash
+Revises: 004_add_template_style
+Create Date: 2026-01-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '005_reference_file_hash'
+down_revision = '004_add_template_style'
+branch_labels = None
+depends_on = None
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    """检查列是否存在"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    """检查索引是否存在"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return index_name in [idx['name'] for idx in inspector.get_indexes(table_name)]
+
+
+def upgrade() -> None:
+    """
+    Add content_hash (sha256 of the uploaded file) to reference_files.
+    Files with the same hash reuse an already completed parse result.
+    
+    Idempotent: checks column and index before adding.
+    """
+    if not _column_exists('reference_files', 'content_hash'):
+        op.add_column('reference_files', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    
+    if not _index_exists('reference_files', 'ix_reference_files_content_hash'):
+        op.create_index('ix_reference_files_content_hash', 'reference_files', ['content_hash'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reference_files_content_hash', table_name='reference_files')
+    op.drop_column('reference_files', 'content_hash')
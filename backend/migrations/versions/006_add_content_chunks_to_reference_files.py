@@ -0,0 +1,40 @@
+"""add content_chunks to reference_files
+
+Revision ID: 006_reference_file_chunks
+Revises: 005_reference_file_hash
+Create Date: 2026-01-08 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '006_reference_file_chunks'
+down_revision = '005_reference_file_hash'
+branch_labels = None
+depends_on = None
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    """检查列是否存在"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def upgrade() -> None:
+    """
+    Add content_chunks (JSON list of markdown chunks) to reference_files.
+    Existing rows stay NULL and are chunked on the fly when used.
+    
+    Idempotent: checks column before adding.
+    """
+    if not _column_exists('reference_files', 'content_chunks'):
+        op.add_column('reference_files', sa.Column('content_chunks', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('reference_files', 'content_chunks')
@@ -0,0 +1,41 @@
+"""add description_generation_mode to projects
+
+Revision ID: 007_description_mode
+Revises: 006_reference_file_chunks
+Create Date: 2026-01-12 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '007_description_mode'
+down_revision = '006_reference_file_chunks'
+branch_labels = None
+depends_on = None
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    """检查列是否存在"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def upgrade() -> None:
+    """
+    Add description_generation_mode (per_page|batched) to projects.
+    Existing projects keep the per-page behaviour.
+    
+    Idempotent: checks column before adding.
+    """
+    if not _column_exists('projects', 'description_generation_mode'):
+        op.add_column('projects', sa.Column('description_generation_mode', sa.String(length=20),
+                                            nullable=False, server_default='per_page'))
+
+
+def downgrade() -> None:
+    op.drop_column('projects', 'description_generation_mode')
@@ -0,0 +1,43 @@
+"""add editable export cache columns to page_image_versions
+
+Revision ID: 008_image_version_export_cache
+Revises: 007_description_mode
+Create Date: 2026-01-14 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '008_image_version_export_cache'
+down_revision = '007_description_mode'
+branch_labels = None
+depends_on = None
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    """检查列是否存在"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def upgrade() -> None:
+    """
+    Add clean_background_path / mineru_layout to page_image_versions so the
+    editable PPTX export can reuse per-slide results for unchanged images.
+    
+    Idempotent: checks columns before adding.
+    """
+    if not _column_exists('page_image_versions', 'clean_background_path'):
+        op.add_column('page_image_versions', sa.Column('clean_background_path', sa.String(length=500), nullable=True))
+    if not _column_exists('page_image_versions', 'mineru_layout'):
+        op.add_column('page_image_versions', sa.Column('mineru_layout', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('page_image_versions', 'mineru_layout')
+    op.drop_column('page_image_versions', 'clean_background_path')
@@ -0,0 +1,49 @@
+"""add (updated_at, id) indexes for keyset pagination
+
+Revision ID: 009_keyset_pagination_indexes
+Revises: 008_image_version_export_cache
+Create Date: 2026-01-16 00:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '009_keyset_pagination_indexes'
+down_revision = '008_image_version_export_cache'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_projects_updated_at_id', 'projects', ['updated_at', 'id']),
+    ('ix_materials_updated_at_id', 'materials', ['updated_at', 'id']),
+    ('ix_materials_project_id_updated_at_id', 'materials', ['project_id', 'updated_at', 'id']),
+    ('ix_reference_files_updated_at_id', 'reference_files', ['updated_at', 'id']),
+    ('ix_reference_files_project_id_updated_at_id', 'reference_files', ['project_id', 'updated_at', 'id']),
+]
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    """检查索引是否存在"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return index_name in [idx['name'] for idx in inspector.get_indexes(table_name)]
+
+
+def upgrade() -> None:
+    """
+    Add composite indexes backing the cursor pagination of the project,
+    material and reference file lists (ORDER BY updated_at DESC, id DESC).
+    
+    Idempotent: checks indexes before adding.
+    """
+    for index_name, table_name, columns in INDEXES:
+        if not _index_exists(table_name, index_name):
+            op.create_index(index_name, table_name, columns)
+
+
+def downgrade() -> None:
+    for index_name, table_name, _ in reversed(INDEXES):
+        op.drop_index(index_name, table_name=table_name)
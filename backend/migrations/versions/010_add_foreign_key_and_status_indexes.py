@@ -0,0 +1,53 @@
+"""add indexes for per-project and status lookups
+
+Revision ID: 010_fk_status_indexes
+Revises: 009_keyset_pagination_indexes
+Create Date: 2026-01-18 00:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '010_fk_status_indexes'
+down_revision = '009_keyset_pagination_indexes'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_pages_project_id_order_index', 'pages', ['project_id', 'order_index']),
+    ('ix_tasks_project_id_task_type_status', 'tasks', ['project_id', 'task_type', 'status']),
+    ('ix_reference_files_project_id_parse_status', 'reference_files', ['project_id', 'parse_status']),
+    ('ix_page_image_versions_page_id_is_current', 'page_image_versions', ['page_id', 'is_current']),
+]
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    """检查索引是否存在"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return index_name in [idx['name'] for idx in inspector.get_indexes(table_name)]
+
+
+def upgrade() -> None:
+    """
+    Add composite indexes for the hot per-project / per-page filters:
+    pages by project (ordered by order_index), running tasks of a project,
+    completed reference files of a project and the current image version
+    of a page.
+    
+    Materials are already covered by ix_materials_project_id_updated_at_id
+    (migration 009).
+    
+    Idempotent: checks indexes before adding.
+    """
+    for index_name, table_name, columns in INDEXES:
+        if not _index_exists(table_name, index_name):
+            op.create_index(index_name, table_name, columns)
+
+
+def downgrade() -> None:
+    for index_name, table_name, _ in reversed(INDEXES):
+        op.drop_index(index_name, table_name=table_name)
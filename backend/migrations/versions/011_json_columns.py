@@ -0,0 +1,94 @@
+"""store outline/description/progress as JSON
+
+Revision ID: 011_json_columns
+Revises: 010_fk_status_indexes
+Create Date: 2026-01-20 00:00:00.000000
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '011_json_columns'
+down_revision = '010_fk_status_indexes'
+branch_labels = None
+depends_on = None
+
+
+JSON_COLUMNS = [
+    ('pages', 'outline_content'),
+    ('pages', 'description_content'),
+    ('tasks', 'progress'),
+]
+
+
+def _column_type(table_name: str, column_name: str):
+    """获取列的当前类型"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    for col in inspector.get_columns(table_name):
+        if col['name'] == column_name:
+            return col['type']
+    return None
+
+
+def _clear_invalid_json(table_name: str, column_name: str) -> None:
+    """
+    把无法解析的旧值置为 NULL（旧代码读取时同样当作 None），
+    否则 JSON 列在加载行 / 转换类型时会报错
+    """
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        op.execute(
+            f"UPDATE {table_name} SET {column_name} = NULL "
+            f"WHERE {column_name} IS NOT NULL AND json_valid({column_name}) = 0"
+        )
+        return
+
+    table = sa.table(table_name, sa.column('id', sa.String), sa.column(column_name, sa.Text))
+    invalid_ids = []
+    for row_id, value in bind.execute(sa.select(table.c.id, table.c[column_name])
+                                      .where(table.c[column_name].isnot(None))):
+        try:
+            json.loads(value)
+        except ValueError:
+            invalid_ids.append(row_id)
+    if invalid_ids:
+        bind.execute(table.update().where(table.c.id.in_(invalid_ids)).values({column_name: None}))
+
+
+def upgrade() -> None:
+    """
+    Store Page.outline_content / Page.description_content / Task.progress
+    as JSON so they are decoded once per row load and progress counters can
+    be incremented in SQL.
+
+    - PostgreSQL: ALTER COLUMN ... TYPE JSONB
+    - SQLite: the JSON type is stored as text (JSON1), the existing TEXT
+      columns already hold JSON text, so only invalid values are cleared
+      (avoids a copy-table batch migration of pages / tasks)
+
+    Idempotent: skips columns that are already JSONB.
+    """
+    bind = op.get_bind()
+    for table_name, column_name in JSON_COLUMNS:
+        if isinstance(_column_type(table_name, column_name), postgresql.JSONB):
+            continue
+        _clear_invalid_json(table_name, column_name)
+        if bind.dialect.name == 'postgresql':
+            op.alter_column(table_name, column_name, type_=postgresql.JSONB(),
+                            postgresql_using=f'{column_name}::jsonb')
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    for table_name, column_name in reversed(JSON_COLUMNS):
+        op.alter_column(table_name, column_name, type_=sa.Text(),
+                        postgresql_using=f'{column_name}::text')
@@ -0,0 +1,139 @@
+"""per-page image version counter and version uniqueness
+
+Revision ID: 012_image_version_counter
+Revises: 011_json_columns
+Create Date: 2026-01-22 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '012_image_version_counter'
+down_revision = '011_json_columns'
+branch_labels = None
+depends_on = None
+
+
+pages = sa.table('pages', sa.column('id', sa.String), sa.column('image_version_counter', sa.Integer))
+versions = sa.table(
+    'page_image_versions',
+    sa.column('id', sa.String),
+    sa.column('page_id', sa.String),
+    sa.column('version_number', sa.Integer),
+    sa.column('is_current', sa.Boolean),
+    sa.column('created_at', sa.DateTime),
+)
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    """检查列是否存在"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    """检查索引是否存在"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return index_name in [idx['name'] for idx in inspector.get_indexes(table_name)]
+
+
+def _renumber_duplicate_versions() -> None:
+    """并发保存留下的重复版本号：保留最早的一条，其余依次改为该页面最大版本号之后的新版本号"""
+    bind = op.get_bind()
+    duplicated_pages = [row[0] for row in bind.execute(
+        sa.select(versions.c.page_id)
+        .group_by(versions.c.page_id, versions.c.version_number)
+        .having(sa.func.count() > 1)
+    )]
+    if not duplicated_pages:
+        return
+
+    rows = bind.execute(
+        sa.select(versions.c.id, versions.c.page_id, versions.c.version_number)
+        .where(versions.c.page_id.in_(set(duplicated_pages)))
+        .order_by(versions.c.page_id, versions.c.version_number, versions.c.created_at, versions.c.id)
+    ).all()
+    max_versions = {}
+    for _, page_id, version_number in rows:
+        max_versions[page_id] = max(max_versions.get(page_id, 0), version_number)
+    seen = set()
+    for version_id, page_id, version_number in rows:
+        if (page_id, version_number) not in seen:
+            seen.add((page_id, version_number))
+            continue
+        max_versions[page_id] += 1
+        bind.execute(versions.update().where(versions.c.id == version_id)
+                     .values(version_number=max_versions[page_id]))
+
+
+def _keep_single_current_version() -> None:
+    """同一页面有多个当前版本时，只保留版本号最大的一个"""
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(versions.c.id, versions.c.page_id)
+        .where(versions.c.is_current == sa.true())
+        .order_by(versions.c.page_id, versions.c.version_number.desc())
+    ).all()
+    seen, stale_ids = set(), []
+    for version_id, page_id in rows:
+        if page_id in seen:
+            stale_ids.append(version_id)
+        seen.add(page_id)
+    if stale_ids:
+        bind.execute(versions.update().where(versions.c.id.in_(stale_ids)).values(is_current=False))
+
+
+def upgrade() -> None:
+    """
+    Allocate image version numbers from a per-page counter
+    (pages.image_version_counter, incremented with UPDATE ... RETURNING)
+    instead of MAX(version_number), and enforce:
+
+    - unique (page_id, version_number)
+    - at most one current version per page (partial unique index on
+      is_current), so demoting the current version touches a single row
+
+    Existing duplicates left by concurrent saves are repaired first.
+    The new unique index supersedes ix_page_image_versions_page_id_is_current.
+
+    Idempotent: checks columns / indexes before adding, the counter
+    backfill only raises counters.
+    """
+    if not _column_exists('pages', 'image_version_counter'):
+        op.add_column('pages', sa.Column('image_version_counter', sa.Integer(), nullable=False,
+                                         server_default='0'))
+
+    _renumber_duplicate_versions()
+    _keep_single_current_version()
+
+    max_version = (
+        sa.select(sa.func.max(versions.c.version_number))
+        .where(versions.c.page_id == pages.c.id)
+        .scalar_subquery()
+    )
+    op.get_bind().execute(
+        pages.update().where(pages.c.image_version_counter < max_version)
+        .values(image_version_counter=max_version)
+    )
+
+    if not _index_exists('page_image_versions', 'uq_page_image_versions_page_id_version_number'):
+        op.create_index('uq_page_image_versions_page_id_version_number', 'page_image_versions',
+                        ['page_id', 'version_number'], unique=True)
+    if not _index_exists('page_image_versions', 'uq_page_image_versions_current'):
+        op.create_index('uq_page_image_versions_current', 'page_image_versions', ['page_id'], unique=True,
+                        sqlite_where=sa.text('is_current = 1'), postgresql_where=sa.text('is_current'))
+    if _index_exists('page_image_versions', 'ix_page_image_versions_page_id_is_current'):
+        op.drop_index('ix_page_image_versions_page_id_is_current', table_name='page_image_versions')
+
+
+def downgrade() -> None:
+    op.create_index('ix_page_image_versions_page_id_is_current', 'page_image_versions', ['page_id', 'is_current'])
+    op.drop_index('uq_page_image_versions_current', table_name='page_image_versions')
+    op.drop_index('uq_page_image_versions_page_id_version_number', table_name='page_image_versions')
+    op.drop_column('pages', 'image_version_counter')
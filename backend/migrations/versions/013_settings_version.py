@@ -0,0 +1,41 @@
+"""add version to settings
+
+Revision ID: 013_settings_version
+Revises: 012_image_version_counter
+Create Date: 2026-01-24 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '013_settings_version'
+down_revision = '012_image_version_counter'
+branch_labels = None
+depends_on = None
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    """检查列是否存在"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def upgrade() -> None:
+    """
+    Add settings.version, incremented on every settings update / reset.
+    Each process caches the settings row and only re-reads it when the
+    version changes (Settings.get_cached).
+
+    Idempotent: checks if column exists before adding.
+    """
+    if not _column_exists('settings', 'version'):
+        op.add_column('settings', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    op.drop_column('settings', 'version')
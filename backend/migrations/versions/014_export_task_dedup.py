@@ -0,0 +1,59 @@
+"""add dedup key to tasks for export deduplication
+
+Revision ID: 014_export_task_dedup
+Revises: 013_settings_version
+Create Date: 2026-01-26 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '014_export_task_dedup'
+down_revision = '013_settings_version'
+branch_labels = None
+depends_on = None
+
+
+ACTIVE_STATUS = "status IN ('PENDING', 'PROCESSING')"
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    """检查列是否存在"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    """检查索引是否存在"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return index_name in [idx['name'] for idx in inspector.get_indexes(table_name)]
+
+
+def upgrade() -> None:
+    """
+    Add tasks.dedup_key and a partial unique index on
+    (project_id, task_type, dedup_key) for PENDING / PROCESSING tasks, so
+    concurrent identical export requests - also from different worker
+    processes - cannot both create a task.
+
+    Existing tasks keep a NULL dedup_key (NULLs never conflict).
+
+    Idempotent: checks column / index before adding.
+    """
+    if not _column_exists('tasks', 'dedup_key'):
+        op.add_column('tasks', sa.Column('dedup_key', sa.String(length=64), nullable=True))
+    if not _index_exists('tasks', 'uq_tasks_active_dedup_key'):
+        op.create_index('uq_tasks_active_dedup_key', 'tasks', ['project_id', 'task_type', 'dedup_key'],
+                        unique=True, sqlite_where=sa.text(ACTIVE_STATUS),
+                        postgresql_where=sa.text(ACTIVE_STATUS))
+
+
+def downgrade() -> None:
+    op.drop_index('uq_tasks_active_dedup_key', table_name='tasks')
+    op.drop_column('tasks', 'dedup_key')
@@ -0,0 +1,42 @@
+"""add heartbeat lease to tasks
+
+Revision ID: 015_task_heartbeat
+Revises: 014_export_task_dedup
+Create Date: 2026-01-27 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '015_task_heartbeat'
+down_revision = '014_export_task_dedup'
+branch_labels = None
+depends_on = None
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    """检查列是否存在"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def upgrade() -> None:
+    """
+    Add tasks.heartbeat_at, renewed periodically by the process running an
+    export task. Another worker only treats an in-flight export as
+    interrupted once this lease has expired (EXPORT_TASK_LEASE_SECONDS),
+    instead of checking its own executor.
+
+    Idempotent: checks if column exists before adding.
+    """
+    if not _column_exists('tasks', 'heartbeat_at'):
+        op.add_column('tasks', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('tasks', 'heartbeat_at')
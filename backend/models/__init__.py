@@ -1,20 +1,15 @@
 """Database models package"""
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.postgresql import JSONB
 
-# 创建 SQLAlchemy 实例，配置 SQLite 连接选项
-db = SQLAlchemy(
-    engine_options={
-        'connect_args': {
-            'check_same_thread': False,  # 允许跨线程使用（仅SQLite）
-            'timeout': 30,  # 数据库锁定超时（秒）- SQLite特定
-        },
-        'pool_pre_ping': True,  # 连接前检查，确保连接有效
-        'pool_recycle': 3600,  # 1小时回收连接，释放文件句柄
-        'pool_size': 5,  # SQLite连接池不需要太大（建议5-10）
-        'max_overflow': 10,  # 溢出连接数（SQLite受文件锁限制，不宜过大）
-        'pool_timeout': 30,  # 获取连接的超时时间（秒）
-    }
-)
+# 创建 SQLAlchemy 实例
+# 引擎参数按数据库方言在 config.get_engine_options 中生成（SQLite 连接参数不能传给 PostgreSQL 驱动），
+# 由 create_app 写入 SQLALCHEMY_ENGINE_OPTIONS
+db = SQLAlchemy()
+
+# JSON 列类型：SQLite 为 JSON1（文本存储），PostgreSQL 为 JSONB；Python None 存为 SQL NULL
+# 值在加载行时解码一次，读取属性不再重复 json.loads
+JSONType = db.JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), 'postgresql')
 
 from .project import Project
 from .page import Page
@@ -11,6 +11,11 @@ class Material(db.Model):
     Material model - represents a material image
     """
     __tablename__ = 'materials'
+    # 列表按 (updated_at, id) 做游标分页
+    __table_args__ = (
+        db.Index('ix_materials_updated_at_id', 'updated_at', 'id'),
+        db.Index('ix_materials_project_id_updated_at_id', 'project_id', 'updated_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=True)  # Can be null, for global materials not belonging to a project
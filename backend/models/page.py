@@ -2,9 +2,11 @@
 Page model
 """
 import uuid
-import json
 from datetime import datetime
-from . import db
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm.attributes import flag_modified
+from . import db, JSONType
+from .page_image_version import PageImageVersion
 
 
 class Page(db.Model):
@@ -12,15 +14,21 @@ class Page(db.Model):
     Page model - represents a single PPT page/slide
     """
     __tablename__ = 'pages'
+    # 按项目取页面列表（ORDER BY order_index）
+    __table_args__ = (
+        db.Index('ix_pages_project_id_order_index', 'project_id', 'order_index'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=False)
     order_index = db.Column(db.Integer, nullable=False)
     part = db.Column(db.String(200), nullable=True)  # Optional section name
-    outline_content = db.Column(db.Text, nullable=True)  # JSON string
-    description_content = db.Column(db.Text, nullable=True)  # JSON string
+    outline_content = db.Column(JSONType, nullable=True)  # {"title": ..., "points": [...]}
+    description_content = db.Column(JSONType, nullable=True)  # {"text": ...} 或 {"text_content": [...], ...}
     generated_image_path = db.Column(db.String(500), nullable=True)
     status = db.Column(db.String(50), nullable=False, default='DRAFT')
+    # 已分配的最大图片版本号（只增不减，删除版本后也不会复用），见 allocate_image_versions
+    image_version_counter = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -31,36 +39,93 @@ class Page(db.Model):
                                      order_by='PageImageVersion.version_number.desc()')
     
     def get_outline_content(self):
-        """Parse outline_content from JSON string"""
-        if self.outline_content:
-            try:
-                return json.loads(self.outline_content)
-            except json.JSONDecodeError:
-                return None
-        return None
+        """Get outline_content (decoded once when the row is loaded)"""
+        return self.outline_content or None
     
     def set_outline_content(self, data):
-        """Set outline_content as JSON string"""
-        if data:
-            self.outline_content = json.dumps(data, ensure_ascii=False)
-        else:
-            self.outline_content = None
+        """Set outline_content"""
+        self.outline_content = data or None
+        # 调用方可能修改了 get_outline_content() 返回的同一个对象，显式标记为已修改
+        flag_modified(self, 'outline_content')
     
     def get_description_content(self):
-        """Parse description_content from JSON string"""
-        if self.description_content:
-            try:
-                return json.loads(self.description_content)
-            except json.JSONDecodeError:
-                return None
-        return None
+        """Get description_content (decoded once when the row is loaded)"""
+        return self.description_content or None
     
     def set_description_content(self, data):
-        """Set description_content as JSON string"""
-        if data:
-            self.description_content = json.dumps(data, ensure_ascii=False)
+        """Set description_content"""
+        self.description_content = data or None
+        flag_modified(self, 'description_content')
+    
+    @classmethod
+    def allocate_image_versions(cls, page_ids):
+        """
+        Allocate the next image version number for each page (single UPDATE ... RETURNING).
+        
+        image_version_counter 原地加一并返回新值：并发的生成 / 编辑不会拿到相同的版本号，
+        也不需要扫描 page_image_versions 求 MAX。UPDATE 会锁住页面行直到事务结束，
+        同一页面的版本写入因此依次进行；调用方负责 commit。
+        
+        Returns:
+            {page_id: version_number}，不存在的页面不在结果中
+        """
+        if not page_ids:
+            return {}
+        # updated_at 保持不变：分配版本号本身不算页面修改
+        stmt = (
+            update(cls.__table__)
+            .where(cls.id.in_(page_ids))
+            .values(image_version_counter=cls.image_version_counter + 1, updated_at=cls.updated_at)
+        )
+        if db.session.get_bind().dialect.update_returning:
+            rows = db.session.execute(stmt.returning(cls.id, cls.image_version_counter))
         else:
-            self.description_content = None
+            # 不支持 RETURNING 的数据库：同一事务内已持有行锁，再读回新值
+            db.session.execute(stmt)
+            rows = db.session.query(cls.id, cls.image_version_counter).filter(cls.id.in_(page_ids))
+        return {page_id: version for page_id, version in rows}
+    
+    @classmethod
+    def replace_project_pages(cls, project_id, pages):
+        """
+        Replace all pages of a project with set-based SQL.
+        
+        旧页面的图片版本和旧页面各用一条 DELETE 删除（不再逐个 db.session.delete 触发级联），
+        新页面用一次 executemany 插入；调用方负责 commit。
+        
+        Args:
+            project_id: 项目ID
+            pages: 按页面顺序的字典列表，键为 part / outline_content / description_content / status
+        
+        Returns:
+            新页面的 to_dict() 结果（由插入的数据直接生成，不需要重新加载 ORM 对象）
+        """
+        old_page_ids = select(cls.id).where(cls.project_id == project_id).scalar_subquery()
+        versions_table = PageImageVersion.__table__
+        db.session.execute(delete(versions_table).where(versions_table.c.page_id.in_(old_page_ids)))
+        db.session.execute(delete(cls.__table__).where(cls.__table__.c.project_id == project_id))
+        
+        now = datetime.utcnow()
+        rows = [
+            {
+                'id': str(uuid.uuid4()),
+                'project_id': project_id,
+                'order_index': i,
+                'part': page.get('part'),
+                'outline_content': page.get('outline_content') or None,
+                'description_content': page.get('description_content') or None,
+                'generated_image_path': None,
+                'status': page.get('status', 'DRAFT'),
+                'image_version_counter': 0,
+                'created_at': now,
+                'updated_at': now,
+            }
+            for i, page in enumerate(pages)
+        ]
+        if rows:
+            db.session.execute(insert(cls.__table__), rows)
+        # 未加入会话的临时对象，只用来生成与 to_dict() 一致的返回结构
+        return [cls(**row).to_dict() for row in rows]
     
     def to_dict(self, include_versions=False):
         """Convert to dictionary"""
@@ -2,7 +2,9 @@
 Page Image Version model - stores historical versions of generated images
 """
 import uuid
+import json
 from datetime import datetime
+from sqlalchemy import update
 from . import db
 
 
@@ -11,17 +13,41 @@ class PageImageVersion(db.Model):
     Page Image Version model - represents a historical version of a page's generated image
     """
     __tablename__ = 'page_image_versions'
+    __table_args__ = (
+        # 同一页面的版本号不能重复；也用于按版本号列出页面的历史版本
+        db.Index('uq_page_image_versions_page_id_version_number', 'page_id', 'version_number', unique=True),
+        # 部分唯一索引：每个页面最多一个当前版本，取消当前版本只需更新这一行
+        db.Index('uq_page_image_versions_current', 'page_id', unique=True,
+                 sqlite_where=db.text('is_current = 1'), postgresql_where=db.text('is_current')),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     page_id = db.Column(db.String(36), db.ForeignKey('pages.id'), nullable=False, index=True)
     image_path = db.Column(db.String(500), nullable=False)
     version_number = db.Column(db.Integer, nullable=False)  # 版本号，从1开始递增
     is_current = db.Column(db.Boolean, nullable=False, default=False)  # 是否为当前使用的版本
+    # 可编辑导出缓存：由该版本图片派生的结果，图片不变则可直接复用
+    clean_background_path = db.Column(db.String(500), nullable=True)  # 去除文字后的干净背景（相对上传目录）
+    mineru_layout = db.Column(db.Text, nullable=True)  # JSON: {items, page_size, mineru_dir}
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
     # Relationships
     page = db.relationship('Page', back_populates='image_versions')
     
+    @classmethod
+    def clear_current(cls, page_ids):
+        """
+        Mark the current version of each page as not current.
+        
+        只更新 is_current 为真的行（每个页面最多一行，走部分唯一索引），不再改写页面的全部历史版本；
+        调用方负责 commit。
+        """
+        db.session.execute(
+            update(cls)
+            .where(cls.page_id.in_(page_ids), cls.is_current == True)  # noqa: E712
+            .values(is_current=False)
+        )
+    
     def to_dict(self):
         """Convert to dictionary"""
         # Get project_id from page relationship
@@ -41,6 +67,22 @@ class PageImageVersion(db.Model):
             'created_at': created_at_str,
         }
     
+    def get_mineru_layout(self):
+        """Parse mineru_layout from JSON string"""
+        if self.mineru_layout:
+            try:
+                return json.loads(self.mineru_layout)
+            except json.JSONDecodeError:
+                return None
+        return None
+    
+    def set_mineru_layout(self, data):
+        """Set mineru_layout as JSON string"""
+        if data is not None:
+            self.mineru_layout = json.dumps(data, ensure_ascii=False)
+        else:
+            self.mineru_layout = None
+    
     def __repr__(self):
         return f'<PageImageVersion {self.id}: page={self.page_id}, version={self.version_number}, current={self.is_current}>'
 
@@ -11,6 +11,10 @@ class Project(db.Model):
     Project model - represents a PPT project
     """
     __tablename__ = 'projects'
+    # 列表按 (updated_at, id) 做游标分页
+    __table_args__ = (
+        db.Index('ix_projects_updated_at_id', 'updated_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     idea_prompt = db.Column(db.Text, nullable=True)
@@ -20,6 +24,8 @@ class Project(db.Model):
     creation_type = db.Column(db.String(20), nullable=False, default='idea')  # idea|outline|descriptions
     template_image_path = db.Column(db.String(500), nullable=True)
     template_style = db.Column(db.Text, nullable=True)  # 风格描述文本（无模板模式）
+    description_generation_mode = db.Column(db.String(20), nullable=False, default='per_page',
+                                            server_default='per_page')  # per_page|batched
     status = db.Column(db.String(50), nullable=False, default='DRAFT')
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -53,6 +59,7 @@ class Project(db.Model):
             'creation_type': self.creation_type,
             'template_image_url': f'/files/{self.id}/template/{self.template_image_path.split("/")[-1]}' if self.template_image_path else None,
             'template_style': self.template_style,
+            'description_generation_mode': self.description_generation_mode,
             'status': self.status,
             'created_at': created_at_str,
             'updated_at': updated_at_str,
@@ -2,6 +2,7 @@
 Reference File model - stores uploaded reference files and their parsed content
 """
 import uuid
+import json
 from datetime import datetime
 from . import db
 
@@ -11,6 +12,13 @@ class ReferenceFile(db.Model):
     Reference File model - represents an uploaded reference file
     """
     __tablename__ = 'reference_files'
+    __table_args__ = (
+        # 列表按 (updated_at, id) 做游标分页
+        db.Index('ix_reference_files_updated_at_id', 'updated_at', 'id'),
+        db.Index('ix_reference_files_project_id_updated_at_id', 'project_id', 'updated_at', 'id'),
+        # 按项目取已解析完成的文件
+        db.Index('ix_reference_files_project_id_parse_status', 'project_id', 'parse_status'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=True)  # Can be null for global files
@@ -18,8 +26,10 @@ class ReferenceFile(db.Model):
     file_path = db.Column(db.String(500), nullable=False)  # Path relative to upload folder
     file_size = db.Column(db.Integer, nullable=False)  # File size in bytes
     file_type = db.Column(db.String(50), nullable=False)  # pdf, docx, pptx, etc.
+    content_hash = db.Column(db.String(64), nullable=True, index=True)  # sha256 of file content, used to reuse parse results
     parse_status = db.Column(db.String(50), nullable=False, default='pending')  # pending|parsing|completed|failed
     markdown_content = db.Column(db.Text, nullable=True)  # Parsed markdown with enhanced image descriptions
+    content_chunks = db.Column(db.Text, nullable=True)  # JSON list of markdown chunks for retrieval
     error_message = db.Column(db.Text, nullable=True)  # Error message if parsing failed
     mineru_batch_id = db.Column(db.String(100), nullable=True)  # Mineru service batch ID
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -57,6 +67,22 @@ class ReferenceFile(db.Model):
         
         return result
     
+    def get_content_chunks(self):
+        """Parse content_chunks from JSON string"""
+        if self.content_chunks:
+            try:
+                return json.loads(self.content_chunks)
+            except json.JSONDecodeError:
+                return None
+        return None
+    
+    def set_content_chunks(self, data):
+        """Set content_chunks as JSON string"""
+        if data is not None:
+            self.content_chunks = json.dumps(data, ensure_ascii=False)
+        else:
+            self.content_chunks = None
+    
     def count_failed_image_captions(self) -> int:
         """
         Count images in markdown that don't have alt text (failed to generate captions)
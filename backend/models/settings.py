@@ -1,7 +1,26 @@
 """Settings model"""
+import threading
+import time
 from datetime import datetime, timezone
+from flask import current_app
 from . import db
 
+# 设置快照缓存在 app.extensions 中（每个 app 对应各自的数据库）
+_CACHE_KEY = 'settings_cache'
+# 只在加载 / 失效时持有，读取快照不加锁
+_cache_lock = threading.Lock()
+
+
+class _CachedSettings:
+    """设置快照：版本号、上次确认版本号的时间（time.monotonic）和只读的 Settings 副本"""
+
+    __slots__ = ('version', 'checked_at', 'settings')
+
+    def __init__(self, version, checked_at, settings):
+        self.version = version
+        self.checked_at = checked_at
+        self.settings = settings
+
 
 class Settings(db.Model):
     """
@@ -25,6 +44,8 @@ class Settings(db.Model):
     mineru_token = db.Column(db.String(500), nullable=True)  # MinerU API Token（覆盖 Config.MINERU_TOKEN）
     image_caption_model = db.Column(db.String(100), nullable=True)  # 图片识别模型（覆盖 Config.IMAGE_CAPTION_MODEL）
     output_language = db.Column(db.String(10), nullable=False, default='zh')  # 输出语言偏好（zh, en, ja, auto）
+    # 每次更新 / 重置设置时加一，其他进程据此判断缓存的设置是否过期（见 get_cached）
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
@@ -57,7 +78,7 @@ class Settings(db.Model):
         - 首次创建时，用 Config（也就是 .env）里的值初始化，作为“系统默认值”
         - 之后所有读写都只走数据库，env 只影响初始化/重置逻辑
         """
-        settings = Settings.query.first()
+        settings = db.session.get(Settings, 1)
         if not settings:
             # 延迟导入，避免循环依赖
             from config import Config
@@ -91,5 +112,45 @@ class Settings(db.Model):
             db.session.commit()
         return settings
 
+    @staticmethod
+    def get_cached():
+        """
+        Get a read-only snapshot of the settings (cached per process).
+
+        - 快照在有效期内直接返回，不查询数据库、不加锁
+        - 超过 SETTINGS_VERSION_CHECK_INTERVAL 秒后只读取 version 列确认一次，
+          其他进程更新了设置（version 变化）才重新加载整行
+        - 本进程更新设置后调用 invalidate_cache()，下次读取立即重新加载
+        - 同步到 app.config 见 services.settings_sync.refresh_settings_config（每个请求前调用）
+
+        返回的对象不在会话中，只能读取：修改设置请使用 get_settings()。
+        """
+        cached = current_app.extensions.get(_CACHE_KEY)
+        interval = current_app.config.get('SETTINGS_VERSION_CHECK_INTERVAL', 5)
+        if cached is not None and time.monotonic() - cached.checked_at < interval:
+            return cached.settings
+
+        with _cache_lock:
+            cached = current_app.extensions.get(_CACHE_KEY)
+            if cached is not None:
+                if time.monotonic() - cached.checked_at < interval:
+                    return cached.settings
+                version = db.session.query(Settings.version).filter_by(id=1).scalar()
+                if version == cached.version:
+                    current_app.extensions[_CACHE_KEY] = _CachedSettings(version, time.monotonic(), cached.settings)
+                    return cached.settings
+
+            settings = Settings.get_settings()
+            # 不加入会话的副本：请求结束、会话关闭后仍可读取，线程之间共享也不会触发加载
+            snapshot = Settings(**{column.key: getattr(settings, column.key) for column in Settings.__table__.columns})
+            current_app.extensions[_CACHE_KEY] = _CachedSettings(settings.version, time.monotonic(), snapshot)
+            return snapshot
+
+    @staticmethod
+    def invalidate_cache():
+        """丢弃当前 app 的设置快照（更新 / 重置设置并提交后调用）"""
+        with _cache_lock:
+            current_app.extensions.pop(_CACHE_KEY, None)
+
     def __repr__(self):
         return f'<Settings id={self.id}>'
@@ -2,9 +2,9 @@
 Task model for tracking async operations
 """
 import uuid
-import json
 from datetime import datetime
-from . import db
+from sqlalchemy.orm.attributes import flag_modified
+from . import db, JSONType
 
 
 class Task(db.Model):
@@ -12,37 +12,57 @@ class Task(db.Model):
     Task model - tracks asynchronous generation tasks
     """
     __tablename__ = 'tasks'
+    # 按项目/类型查找进行中的任务；同一项目同一导出（dedup_key）最多一个进行中的任务
+    __table_args__ = (
+        db.Index('ix_tasks_project_id_task_type_status', 'project_id', 'task_type', 'status'),
+        db.Index('uq_tasks_active_dedup_key', 'project_id', 'task_type', 'dedup_key', unique=True,
+                 sqlite_where=db.text("status IN ('PENDING', 'PROCESSING')"),
+                 postgresql_where=db.text("status IN ('PENDING', 'PROCESSING')")),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=False)
     task_type = db.Column(db.String(50), nullable=False)  # GENERATE_DESCRIPTIONS|GENERATE_IMAGES
     status = db.Column(db.String(50), nullable=False, default='PENDING')
-    progress = db.Column(db.Text, nullable=True)  # JSON string: {"total": 10, "completed": 5, "failed": 0}
+    progress = db.Column(JSONType, nullable=True)  # {"total": 10, "completed": 5, "failed": 0, ...}
     error_message = db.Column(db.Text, nullable=True)
+    dedup_key = db.Column(db.String(64), nullable=True)  # 相同导出请求的去重键，见 export_controller
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # 租约：执行中的任务定期刷新，过期视为中断
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime, nullable=True)
     
     # Relationships
     project = db.relationship('Project', back_populates='tasks')
     
+    # 进度计数在数据库中原地累加，不读出整个 progress 再写回
+    _INCREMENT_PROGRESS_SQL = {
+        'sqlite': (
+            "UPDATE tasks SET progress = json_set(coalesce(progress, '{}'), "
+            "'$.completed', coalesce(json_extract(progress, '$.completed'), 0) + :completed, "
+            "'$.failed', coalesce(json_extract(progress, '$.failed'), 0) + :failed) "
+            "WHERE id = :task_id"
+        ),
+        'postgresql': (
+            "UPDATE tasks SET progress = coalesce(progress, '{}'::jsonb) || jsonb_build_object("
+            "'completed', coalesce((progress->>'completed')::int, 0) + CAST(:completed AS INTEGER), "
+            "'failed', coalesce((progress->>'failed')::int, 0) + CAST(:failed AS INTEGER)) "
+            "WHERE id = :task_id"
+        ),
+    }
+    
     def get_progress(self):
-        """Parse progress from JSON string"""
-        if self.progress:
-            try:
-                return json.loads(self.progress)
-            except json.JSONDecodeError:
-                return {"total": 0, "completed": 0, "failed": 0}
+        """Get progress (a copy, so callers can modify it and pass it back to set_progress)"""
+        if isinstance(self.progress, dict):
+            return dict(self.progress)
         return {"total": 0, "completed": 0, "failed": 0}
     
     def set_progress(self, data):
-        """Set progress as JSON string"""
-        if data:
-            self.progress = json.dumps(data)
-        else:
-            self.progress = None
+        """Set progress"""
+        self.progress = data or None
+        flag_modified(self, 'progress')
     
     def update_progress(self, completed=None, failed=None):
-        """Update progress incrementally"""
+        """Update progress counters to absolute values"""
         prog = self.get_progress()
         if completed is not None:
             prog['completed'] = completed
@@ -50,6 +70,62 @@ class Task(db.Model):
             prog['failed'] = failed
         self.set_progress(prog)
     
+    @classmethod
+    def increment_progress(cls, task_id, completed=0, failed=0):
+        """
+        Increment the completed / failed counters of a task in place (single UPDATE).
+        
+        并发的工作线程各自累加，不会互相覆盖；调用方负责 commit。
+        已加载到当前会话中的 Task 对象不会自动刷新（commit 后重新加载即可）。
+        """
+        sql = cls._INCREMENT_PROGRESS_SQL.get(db.session.get_bind().dialect.name)
+        if sql is None:
+            # 其他数据库：行锁 + 读改写
+            task = cls.query.filter_by(id=task_id).with_for_update().first()
+            if task:
+                prog = task.get_progress()
+                prog['completed'] = prog.get('completed', 0) + completed
+                prog['failed'] = prog.get('failed', 0) + failed
+                task.set_progress(prog)
+            return
+        db.session.execute(db.text(sql), {'task_id': task_id, 'completed': completed, 'failed': failed})
+    
+    @classmethod
+    def refresh_heartbeat(cls, task_id) -> bool:
+        """
+        Renew the lease of a running task (single UPDATE, commits).
+        
+        Returns:
+            False if the task is no longer PENDING / PROCESSING (e.g. marked as interrupted)
+        """
+        result = db.session.execute(
+            db.update(cls)
+            .where(cls.id == task_id, cls.status.in_(['PENDING', 'PROCESSING']))
+            .values(heartbeat_at=datetime.utcnow())
+        )
+        db.session.commit()
+        return result.rowcount > 0
+    
+    @classmethod
+    def expire_stale(cls, task_id, lease_expired_before: datetime, error_message: str) -> bool:
+        """
+        Mark a PENDING / PROCESSING task as FAILED if its lease expired before the given time.
+        
+        条件更新：持有者在此期间刷新了租约时不做修改（不依赖本进程的执行状态，跨进程安全）。
+        无论是否修改都会 commit，不在会话中留下写事务。
+        
+        Returns:
+            True if the task was marked as FAILED
+        """
+        lease = db.func.coalesce(cls.heartbeat_at, cls.created_at)
+        result = db.session.execute(
+            db.update(cls)
+            .where(cls.id == task_id, cls.status.in_(['PENDING', 'PROCESSING']), lease < lease_expired_before)
+            .values(status='FAILED', error_message=error_message, completed_at=datetime.utcnow())
+        )
+        db.session.commit()
+        return result.rowcount > 0
+    
     def to_dict(self):
         """Convert to dictionary"""
         return {
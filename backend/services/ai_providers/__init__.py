@@ -25,9 +25,10 @@ Environment Variables:
         VERTEX_LOCATION: GCP region (default: us-central1)
         GOOGLE_APPLICATION_CREDENTIALS: Path to service account JSON file
 """
+import hashlib
 import os
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
 from .text import TextProvider, GenAITextProvider, OpenAITextProvider
 from .image import ImageProvider, GenAIImageProvider, OpenAIImageProvider
@@ -37,7 +38,7 @@ logger = logging.getLogger(__name__)
 __all__ = [
     'TextProvider', 'GenAITextProvider', 'OpenAITextProvider',
     'ImageProvider', 'GenAIImageProvider', 'OpenAIImageProvider',
-    'get_text_provider', 'get_image_provider', 'get_provider_format'
+    'get_text_provider', 'get_image_provider', 'get_provider_format', 'get_provider_fingerprint'
 ]
 
 
@@ -71,36 +72,61 @@ def get_provider_format() -> str:
 def _get_config_value(key: str, default: str = None) -> str:
     """
     Helper to get config value with priority: app.config > env var > default
+
+    app.config 中的值即使是空字符串也优先（数据库设置可以用空值覆盖环境变量）
     """
     try:
         from flask import current_app
-        if current_app and hasattr(current_app, 'config'):
-            # Check if key exists in config (even if value is empty string)
-            # This allows database settings to override env vars even with empty values
-            if key in current_app.config:
-                config_value = current_app.config.get(key)
-                # Return the value even if it's empty string (user explicitly set it)
-                if config_value is not None:
-                    logger.debug(f"[CONFIG] Using {key} from app.config")
-                    return str(config_value)
-            else:
-                logger.debug(f"[CONFIG] Key {key} not found in app.config, checking env var")
-    except RuntimeError as e:
+        config_value = current_app.config.get(key)
+        if config_value is not None:
+            return str(config_value)
+    except RuntimeError:
         # Not in Flask application context, fallback to env var
-        logger.debug(f"[CONFIG] Not in Flask context for {key}: {e}")
-    # Fallback to environment variable or default
+        pass
     env_value = os.getenv(key)
     if env_value is not None:
-        logger.debug(f"[CONFIG] Using {key} from environment")
         return env_value
-    if default is not None:
-        logger.debug(f"[CONFIG] Using {key} default: {default}")
-        return default
-    logger.debug(f"[CONFIG] No value found for {key}, returning None")
-    return None
+    return default
+
+
+# 已解析的 Provider 配置：((app, SETTINGS_VERSION), config)
+# 设置更新后 settings_sync.sync_settings_to_config 写入新的 SETTINGS_VERSION，下次调用重新解析；读取不加锁
+_provider_config_cache = None
+
+
+def clear_provider_config_cache():
+    """丢弃已解析的 Provider 配置（直接修改 app.config、没有更新 SETTINGS_VERSION 时调用）"""
+    global _provider_config_cache
+    _provider_config_cache = None
+
+
+def _provider_config_key():
+    """当前 app 与设置版本号；不在应用上下文中（配置只来自环境变量）时返回 None，不缓存"""
+    try:
+        from flask import current_app
+        return current_app._get_current_object(), current_app.config.get('SETTINGS_VERSION')
+    except RuntimeError:
+        return None
 
 
 def _get_provider_config() -> Dict[str, Any]:
+    """
+    Get provider configuration, resolved once per settings version
+
+    See _resolve_provider_config for the resolution rules.
+    """
+    global _provider_config_cache
+    key = _provider_config_key()
+    cached = _provider_config_cache
+    if key is not None and cached is not None and cached[0] == key:
+        return dict(cached[1])
+    config = _resolve_provider_config()
+    if key is not None:
+        _provider_config_cache = (key, config)
+    return dict(config)
+
+
+def _resolve_provider_config() -> Dict[str, Any]:
     """
     Get provider configuration based on AI_PROVIDER_FORMAT
 
@@ -173,6 +199,25 @@ def _get_provider_config() -> Dict[str, Any]:
         }
 
 
+def get_provider_fingerprint(model: str) -> Tuple:
+    """
+    Identify the provider get_text_provider / get_image_provider would build for a model
+
+    指纹相同的 Provider 可以直接复用（客户端和连接池保持预热）；API Key 只以哈希参与比较。
+
+    Returns:
+        (format, api_base, api_key 哈希, vertex project_id, vertex location, model)
+
+    Raises:
+        ValueError: If required configuration is not set
+    """
+    config = _get_provider_config()
+    api_key = config.get('api_key')
+    key_hash = hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16] if api_key else None
+    return (config['format'], config.get('api_base'), key_hash,
+            config.get('project_id'), config.get('location'), model)
+
+
 def get_text_provider(model: str = "gemini-3-flash-preview") -> TextProvider:
     """
     Factory function to get text generation provider based on configuration
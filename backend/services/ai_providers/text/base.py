@@ -2,6 +2,7 @@
 Abstract base class for text generation providers
 """
 from abc import ABC, abstractmethod
+from typing import Iterator, Optional
 
 
 class TextProvider(ABC):
@@ -20,3 +21,55 @@ class TextProvider(ABC):
             Generated text content
         """
         pass
+    
+    def generate_text_stream(self, prompt: str, thinking_budget: int = 1000) -> Iterator[str]:
+        """
+        Generate text incrementally, yielding chunks as they are produced
+        
+        Providers without streaming support yield the complete text once.
+        
+        Args:
+            prompt: The input prompt for text generation
+            thinking_budget: Budget for thinking/reasoning (provider-specific)
+            
+        Yields:
+            Text chunks (concatenated they form the full response)
+        """
+        yield self.generate_text(prompt, thinking_budget=thinking_budget)
+    
+    def create_prompt_cache(self, prefix: str, ttl_seconds: int = 900) -> Optional[str]:
+        """
+        Create a provider-side cache for a prompt prefix shared by many calls
+        
+        Providers without explicit caching return None; callers then just send
+        prefix + suffix, which still benefits from automatic prefix caching
+        on providers that support it.
+        
+        Args:
+            prefix: Stable prompt prefix
+            ttl_seconds: Cache lifetime
+            
+        Returns:
+            Cache handle to pass to generate_text_with_prefix, or None
+        """
+        return None
+    
+    def generate_text_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 1000,
+                                  cache_name: Optional[str] = None) -> str:
+        """
+        Generate text from a shared prefix and a call-specific suffix
+        
+        Args:
+            prefix: Stable prompt prefix (identical across calls)
+            suffix: Call-specific remainder of the prompt
+            thinking_budget: Budget for thinking/reasoning (provider-specific)
+            cache_name: Handle returned by create_prompt_cache, if any
+            
+        Returns:
+            Generated text content
+        """
+        return self.generate_text(prefix + suffix, thinking_budget=thinking_budget)
+    
+    def delete_prompt_cache(self, cache_name: str) -> None:
+        """Release a cache created by create_prompt_cache"""
+        pass
@@ -6,6 +6,7 @@ Supports two modes:
 - Vertex AI: Uses GCP service account authentication
 """
 import logging
+from typing import Iterator, Optional
 from google import genai
 from google.genai import types
 from tenacity import retry, stop_after_attempt, wait_exponential
@@ -86,3 +87,70 @@ class GenAITextProvider(TextProvider):
             ),
         )
         return response.text
+    
+    def generate_text_stream(self, prompt: str, thinking_budget: int = 1000) -> Iterator[str]:
+        """
+        Stream text using Google GenAI SDK
+        
+        Not wrapped in retry: chunks may already have been delivered to the caller.
+        """
+        stream = self.client.models.generate_content_stream(
+            model=self.model,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget),
+            ),
+        )
+        for chunk in stream:
+            if chunk.text:
+                yield chunk.text
+    
+    def create_prompt_cache(self, prefix: str, ttl_seconds: int = 900) -> Optional[str]:
+        """
+        Create an explicit context cache for a shared prompt prefix
+        
+        Returns None when caching is unavailable (model unsupported, prefix
+        below the minimum cacheable size, proxy without cache API, ...).
+        """
+        try:
+            cache = self.client.caches.create(
+                model=self.model,
+                config=types.CreateCachedContentConfig(
+                    contents=[prefix],
+                    ttl=f"{int(ttl_seconds)}s",
+                ),
+            )
+            logger.info(f"Created GenAI context cache {cache.name} for model {self.model}")
+            return cache.name
+        except Exception as e:
+            logger.warning(f"GenAI context cache unavailable, falling back to full prompts: {e}")
+            return None
+    
+    def generate_text_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 1000,
+                                  cache_name: Optional[str] = None) -> str:
+        """
+        Generate text using a cached prefix when available
+        
+        If the cached content has expired or been rejected, the full prompt is sent instead.
+        """
+        if cache_name:
+            try:
+                response = self.client.models.generate_content(
+                    model=self.model,
+                    contents=suffix,
+                    config=types.GenerateContentConfig(
+                        cached_content=cache_name,
+                        thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget),
+                    ),
+                )
+                return response.text
+            except Exception as e:
+                logger.warning(f"Generation with context cache {cache_name} failed, retrying without cache: {e}")
+        return self.generate_text(prefix + suffix, thinking_budget=thinking_budget)
+    
+    def delete_prompt_cache(self, cache_name: str) -> None:
+        """Delete an explicit context cache (it would otherwise expire with its TTL)"""
+        try:
+            self.client.caches.delete(name=cache_name)
+        except Exception as e:
+            logger.warning(f"Failed to delete GenAI context cache {cache_name}: {e}")
@@ -2,6 +2,7 @@
 OpenAI SDK implementation for text generation
 """
 import logging
+from typing import Iterator
 from openai import OpenAI
 from .base import TextProvider
 from config import get_config
@@ -39,6 +40,11 @@ class OpenAITextProvider(TextProvider):
             
         Returns:
             Generated text
+        
+        Note:
+            OpenAI-compatible APIs cache prompt prefixes automatically, so callers
+            sharing a prefix rely on the base generate_text_with_prefix, which keeps
+            the shared prefix at the start of the message.
         """
         response = self.client.chat.completions.create(
             model=self.model,
@@ -47,3 +53,25 @@ class OpenAITextProvider(TextProvider):
             ]
         )
         return response.choices[0].message.content
+    
+    def generate_text_stream(self, prompt: str, thinking_budget: int = 1000) -> Iterator[str]:
+        """
+        Stream text using OpenAI SDK
+        
+        Args:
+            prompt: The input prompt
+            thinking_budget: Not used in OpenAI format, kept for interface compatibility
+            
+        Yields:
+            Text chunks as they arrive
+        """
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
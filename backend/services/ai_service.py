@@ -8,7 +8,7 @@ import json
 import re
 import logging
 import requests
-from typing import List, Dict, Optional, Union
+from typing import Iterator, List, Dict, Optional, Union
 from textwrap import dedent
 from PIL import Image
 from tenacity import retry, stop_after_attempt, retry_if_exception_type
@@ -16,6 +16,9 @@ from .prompts import (
     get_outline_generation_prompt,
     get_outline_parsing_prompt,
     get_page_description_prompt,
+    get_page_description_prompt_prefix,
+    get_page_description_prompt_suffix,
+    get_batch_page_descriptions_prompt_suffix,
     get_image_generation_prompt,
     get_image_edit_prompt,
     get_description_to_outline_prompt,
@@ -24,19 +27,49 @@ from .prompts import (
     get_descriptions_refinement_prompt
 )
 from .ai_providers import get_text_provider, get_image_provider, TextProvider, ImageProvider
+from .reference_index import ReferenceIndex, estimate_tokens
 from config import get_config
 
 logger = logging.getLogger(__name__)
 
 
+def _get_app_config(key: str, default):
+    """优先从 Flask app.config 读取配置，不在应用上下文中时使用默认值"""
+    try:
+        from flask import current_app, has_app_context
+        if has_app_context():
+            return current_app.config.get(key, default)
+    except ImportError:
+        pass
+    return default
+
+
+def _get_config_int(key: str, default: int) -> int:
+    """读取整数配置，非法值时使用默认值"""
+    try:
+        return int(_get_app_config(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class PromptPrefix:
+    """多次调用共享的 prompt 前缀，以及可选的服务端缓存句柄"""
+    
+    def __init__(self, text: str, cache_name: Optional[str] = None):
+        self.text = text
+        self.cache_name = cache_name
+
+
 class ProjectContext:
     """项目上下文数据类，统一管理 AI 需要的所有项目信息"""
     
-    def __init__(self, project_or_dict, reference_files_content: Optional[List[Dict[str, str]]] = None):
+    def __init__(self, project_or_dict, reference_files_content: Optional[List[Dict[str, str]]] = None,
+                 reference_token_budget: Optional[int] = None):
         """
         Args:
             project_or_dict: 项目对象（Project model）或项目字典（project.to_dict()）
             reference_files_content: 参考文件内容列表
+            reference_token_budget: 单个 prompt 中参考文件内容的 token 上限，None 则读取配置
         """
         # 支持直接传入 Project 对象，避免 to_dict() 调用，提升性能
         if hasattr(project_or_dict, 'idea_prompt'):
@@ -53,6 +86,24 @@ class ProjectContext:
             self.creation_type = project_or_dict.get('creation_type', 'idea')
         
         self.reference_files_content = reference_files_content or []
+        
+        # 在构造时（通常处于请求上下文中）确定预算，后台线程中无需再访问 app.config
+        if reference_token_budget is None:
+            reference_token_budget = _get_config_int('REFERENCE_TOKEN_BUDGET', get_config().REFERENCE_TOKEN_BUDGET)
+        self.reference_token_budget = reference_token_budget
+        self._reference_index = None
+    
+    def select_reference_files(self, query: str) -> List[Dict[str, str]]:
+        """
+        按查询选出放入 prompt 的参考文件内容（不超过 reference_token_budget）
+        
+        索引在首次调用时构建，同一上下文的后续调用（如逐页生成描述）直接复用。
+        """
+        if not self.reference_files_content:
+            return []
+        if self._reference_index is None:
+            self._reference_index = ReferenceIndex(self.reference_files_content)
+        return self._reference_index.select(query, self.reference_token_budget)
     
     def to_dict(self) -> Dict:
         """转换为字典，方便传递"""
@@ -157,13 +208,15 @@ class AIService:
         retry=retry_if_exception_type((json.JSONDecodeError, ValueError)),
         reraise=True
     )
-    def generate_json(self, prompt: str, thinking_budget: int = 1000) -> Union[Dict, List]:
+    def generate_json(self, prompt: str, thinking_budget: int = 1000,
+                      prompt_prefix: Optional[PromptPrefix] = None) -> Union[Dict, List]:
         """
         生成并解析JSON，如果解析失败则重新生成
         
         Args:
-            prompt: 生成提示词
+            prompt: 生成提示词（有 prompt_prefix 时为前缀之后的部分）
             thinking_budget: 思考预算
+            prompt_prefix: 可选的共享前缀（可能已在服务端缓存）
             
         Returns:
             解析后的JSON对象（字典或列表）
@@ -172,7 +225,12 @@ class AIService:
             json.JSONDecodeError: JSON解析失败（重试3次后仍失败）
         """
         # 调用AI生成文本
-        response_text = self.text_provider.generate_text(prompt, thinking_budget=thinking_budget)
+        if prompt_prefix is not None:
+            response_text = self.text_provider.generate_text_with_prefix(
+                prompt_prefix.text, prompt, thinking_budget=thinking_budget, cache_name=prompt_prefix.cache_name
+            )
+        else:
+            response_text = self.text_provider.generate_text(prompt, thinking_budget=thinking_budget)
         
         # 清理响应文本：移除markdown代码块标记和多余空白
         cleaned_text = response_text.strip().strip("```json").strip("```").strip()
@@ -273,8 +331,45 @@ class AIService:
                 pages.append(item)
         return pages
     
+    def prepare_page_description_prefix(self, project_context: ProjectContext,
+                                        outline: List[Dict]) -> PromptPrefix:
+        """
+        Build the prompt prefix shared by all pages of a deck and cache it provider-side
+        
+        The cache is only created when enabled and the prefix is large enough to
+        be worth it; otherwise the prefix is simply prepended to each page prompt.
+        Call release_prompt_prefix() when the deck is done.
+        
+        Args:
+            project_context: 项目上下文对象，包含所有原始信息
+            outline: Complete outline
+        
+        Returns:
+            PromptPrefix to pass to generate_page_description
+        """
+        config = get_config()
+        prefix = PromptPrefix(get_page_description_prompt_prefix(project_context, outline))
+        
+        if not _get_app_config('PROMPT_CACHE_ENABLED', config.PROMPT_CACHE_ENABLED):
+            return prefix
+        if estimate_tokens(prefix.text) < _get_config_int('PROMPT_CACHE_MIN_TOKENS', config.PROMPT_CACHE_MIN_TOKENS):
+            return prefix
+        
+        prefix.cache_name = self.text_provider.create_prompt_cache(
+            prefix.text,
+            ttl_seconds=_get_config_int('PROMPT_CACHE_TTL_SECONDS', config.PROMPT_CACHE_TTL_SECONDS)
+        )
+        return prefix
+    
+    def release_prompt_prefix(self, prefix: Optional[PromptPrefix]):
+        """Release the provider-side cache of a shared prefix, if any"""
+        if prefix and prefix.cache_name:
+            self.text_provider.delete_prompt_cache(prefix.cache_name)
+            prefix.cache_name = None
+    
     def generate_page_description(self, project_context: ProjectContext, outline: List[Dict], 
-                                 page_outline: Dict, page_index: int, language='zh') -> str:
+                                 page_outline: Dict, page_index: int, language='zh',
+                                 prompt_prefix: Optional[PromptPrefix] = None) -> str:
         """
         Generate description for a single page
         Based on demo.py gen_desc() logic
@@ -284,12 +379,20 @@ class AIService:
             outline: Complete outline
             page_outline: Outline for this specific page
             page_index: Page number (1-indexed)
+            prompt_prefix: Shared prefix from prepare_page_description_prefix (batch generation)
         
         Returns:
             Text description for the page
         """
         part_info = f"\nThis page belongs to: {page_outline['part']}" if 'part' in page_outline else ""
         
+        if prompt_prefix is not None:
+            suffix = get_page_description_prompt_suffix(page_outline, page_index, part_info, language)
+            response_text = self.text_provider.generate_text_with_prefix(
+                prompt_prefix.text, suffix, thinking_budget=1000, cache_name=prompt_prefix.cache_name
+            )
+            return dedent(response_text)
+        
         desc_prompt = get_page_description_prompt(
             project_context=project_context,
             outline=outline,
@@ -303,6 +406,91 @@ class AIService:
         
         return dedent(response_text)
     
+    def generate_page_description_stream(self, project_context: ProjectContext, outline: List[Dict],
+                                         page_outline: Dict, page_index: int,
+                                         language='zh') -> Iterator[str]:
+        """
+        Stream the description for a single page
+        
+        Same prompt as generate_page_description; yields text chunks as the model
+        produces them. Callers should dedent() the joined text before saving.
+        
+        Args:
+            project_context: 项目上下文对象，包含所有原始信息
+            outline: Complete outline
+            page_outline: Outline for this specific page
+            page_index: Page number (1-indexed)
+        
+        Yields:
+            Text chunks of the description
+        """
+        part_info = f"\nThis page belongs to: {page_outline['part']}" if 'part' in page_outline else ""
+        
+        desc_prompt = get_page_description_prompt(
+            project_context=project_context,
+            outline=outline,
+            page_outline=page_outline,
+            page_index=page_index,
+            part_info=part_info,
+            language=language
+        )
+        
+        yield from self.text_provider.generate_text_stream(desc_prompt, thinking_budget=1000)
+    
+    def generate_page_descriptions_batch(self, project_context: ProjectContext, outline: List[Dict],
+                                         pages: List[Dict], language='zh',
+                                         prompt_prefix: Optional[PromptPrefix] = None) -> Dict[int, str]:
+        """
+        Generate descriptions for a window of pages in a single structured call
+        
+        Args:
+            project_context: 项目上下文对象，包含所有原始信息
+            outline: Complete outline
+            pages: List of {'page_index', 'page_outline'} (page_index is 1-indexed)
+            prompt_prefix: Shared prefix from prepare_page_description_prefix
+        
+        Returns:
+            Dict of page_index -> description text. Pages missing from the response
+            or with an unusable entry are left out so the caller can retry them one by one.
+        
+        Raises:
+            json.JSONDecodeError / ValueError: response could not be parsed after retries
+        """
+        if prompt_prefix is None:
+            prompt_prefix = PromptPrefix(get_page_description_prompt_prefix(project_context, outline))
+        
+        batch_pages = [
+            {
+                'page_index': page['page_index'],
+                'page_outline': page['page_outline'],
+                'part': page['page_outline'].get('part') if isinstance(page['page_outline'], dict) else None
+            }
+            for page in pages
+        ]
+        suffix = get_batch_page_descriptions_prompt_suffix(batch_pages, language)
+        result = self.generate_json(suffix, thinking_budget=1000, prompt_prefix=prompt_prefix)
+        
+        if not isinstance(result, list):
+            raise ValueError(f"Expected JSON array for batch descriptions, got {type(result).__name__}")
+        
+        expected = {page['page_index'] for page in pages}
+        descriptions = {}
+        for item in result:
+            if not isinstance(item, dict):
+                continue
+            try:
+                page_index = int(item.get('page_index'))
+            except (TypeError, ValueError):
+                continue
+            description = item.get('description')
+            if page_index in expected and isinstance(description, str) and description.strip():
+                descriptions[page_index] = dedent(description)
+        
+        missing = expected - descriptions.keys()
+        if missing:
+            logger.warning(f"Batch description response missing pages {sorted(missing)}")
+        return descriptions
+    
     def generate_outline_text(self, outline: List[Dict]) -> str:
         """
         Convert outline to text format for prompts
@@ -10,163 +10,189 @@ Benefits:
 - Better resource management
 - Thread-safe for Flask multi-threaded environment
 
+Providers are registered by config fingerprint (format, base URL, API key hash,
+model; see ai_providers.get_provider_fingerprint). When settings change:
+
+- only providers whose fingerprint changed are rebuilt, the others (and their
+  HTTP connection pools) stay warm
+- the new AIService is built in a background thread and swapped in atomically;
+  requests that arrive meanwhile wait for the swap instead of using stale config
+- the replaced providers are dropped from the registry but not closed: tasks
+  that already hold the old AIService finish with it, and the clients are
+  released with the last reference
+
 Usage:
     from services.ai_service_manager import get_ai_service
-    
+
     # In your controller
     ai_service = get_ai_service()
     outline = ai_service.generate_outline(project_context)
 """
 
 import logging
+import threading
+import weakref
 from threading import Lock
-from typing import Optional
+from typing import Optional, Tuple
 from flask import current_app, has_app_context
 from .ai_service import AIService
-from .ai_providers import get_text_provider, get_image_provider, TextProvider, ImageProvider
+from .ai_providers import (
+    get_text_provider, get_image_provider, get_provider_fingerprint, clear_provider_config_cache,
+)
 
 logger = logging.getLogger(__name__)
 
-# Global singleton instance
-_ai_service_instance: Optional[AIService] = None
+# 当前的 AIService：(text 指纹, image 指纹, AIService)，整体替换，读取不加锁
+_active: Optional[Tuple[tuple, tuple, AIService]] = None
+# 构建 / 切换 AIService 时持有
 _lock = Lock()
 
-# Provider cache to avoid re-initialization when models don't change
-_text_provider_cache: dict = {}
-_image_provider_cache: dict = {}
-_cache_lock = Lock()
+# Provider 注册表 {指纹: Provider}，只保留当前 AIService 使用的 Provider
+_text_providers: dict = {}
+_image_providers: dict = {}
+# 已被替换、可能仍被进行中的任务使用的 Provider（弱引用，只用于监控）
+_draining = weakref.WeakSet()
 
 
-def _get_cached_text_provider(model: str) -> TextProvider:
-    """
-    Get or create a cached text provider instance
-    
-    Args:
-        model: Model name to use
-        
-    Returns:
-        Cached or new TextProvider instance
-    """
-    with _cache_lock:
-        if model not in _text_provider_cache:
-            logger.info(f"Creating new TextProvider for model: {model}")
-            _text_provider_cache[model] = get_text_provider(model=model)
-        else:
-            logger.debug(f"Reusing cached TextProvider for model: {model}")
-        return _text_provider_cache[model]
+def _configured_models() -> Tuple[str, str]:
+    """当前配置的 (文本模型, 图片模型)：Flask app.config 优先，否则使用 Config 默认值"""
+    from config import get_config
+    config = get_config()
+    if has_app_context() and current_app and hasattr(current_app, "config"):
+        return (current_app.config.get("TEXT_MODEL", config.TEXT_MODEL),
+                current_app.config.get("IMAGE_MODEL", config.IMAGE_MODEL))
+    return config.TEXT_MODEL, config.IMAGE_MODEL
 
 
-def _get_cached_image_provider(model: str) -> ImageProvider:
-    """
-    Get or create a cached image provider instance
-    
-    Args:
-        model: Model name to use
-        
-    Returns:
-        Cached or new ImageProvider instance
-    """
-    with _cache_lock:
-        if model not in _image_provider_cache:
-            logger.info(f"Creating new ImageProvider for model: {model}")
-            _image_provider_cache[model] = get_image_provider(model=model)
-        else:
-            logger.debug(f"Reusing cached ImageProvider for model: {model}")
-        return _image_provider_cache[model]
+def _retire(registry: dict, keep: Optional[tuple] = None):
+    """把注册表中指纹不是 keep 的 Provider 移出注册表（调用方需持有 _lock）"""
+    for fingerprint in [fp for fp in registry if fp != keep]:
+        _draining.add(registry.pop(fingerprint))
+
+
+def _build(text_model: str, image_model: str, text_fp: tuple, image_fp: tuple) -> AIService:
+    """按指纹复用或新建 Provider，创建 AIService 并切换（调用方需持有 _lock）"""
+    global _active
+
+    text_provider = _text_providers.get(text_fp)
+    if text_provider is None:
+        logger.info(f"Creating new TextProvider for model: {text_model}")
+        text_provider = get_text_provider(model=text_model)
+    else:
+        logger.debug(f"Reusing cached TextProvider for model: {text_model}")
+
+    image_provider = _image_providers.get(image_fp)
+    if image_provider is None:
+        logger.info(f"Creating new ImageProvider for model: {image_model}")
+        image_provider = get_image_provider(model=image_model)
+    else:
+        logger.debug(f"Reusing cached ImageProvider for model: {image_model}")
+
+    service = AIService(text_provider=text_provider, image_provider=image_provider)
+    _active = (text_fp, image_fp, service)
+
+    _retire(_text_providers, keep=text_fp)
+    _retire(_image_providers, keep=image_fp)
+    _text_providers[text_fp] = text_provider
+    _image_providers[image_fp] = image_provider
+
+    logger.info(f"AIService swapped in with models: text={text_model}, image={image_model}")
+    return service
 
 
 def get_ai_service(force_new: bool = False) -> AIService:
     """
     Get the singleton AIService instance with optimized provider caching
-    
+
     This function creates and returns a singleton AIService instance that reuses
     AI providers (TextProvider and ImageProvider) across requests, significantly
     reducing initialization overhead.
-    
+
     Args:
         force_new: If True, forces creation of a new instance (useful for testing)
-        
+
     Returns:
         AIService singleton instance with cached providers
-        
+
     Note:
-        The providers are cached per model name. If TEXT_MODEL or IMAGE_MODEL
-        changes in Flask config, new providers will be created automatically.
+        The providers are cached per config fingerprint. If the provider format,
+        API base / key or TEXT_MODEL / IMAGE_MODEL changes in Flask config, only
+        the affected provider is rebuilt.
     """
-    global _ai_service_instance
-    
-    if force_new:
-        with _lock:
+    text_model, image_model = _configured_models()
+    text_fp = get_provider_fingerprint(text_model)
+    image_fp = get_provider_fingerprint(image_model)
+
+    active = _active
+    if not force_new and active is not None and active[0] == text_fp and active[1] == image_fp:
+        return active[2]
+
+    with _lock:
+        # Double-check: another thread (e.g. refresh_ai_service) may have swapped meanwhile
+        active = _active
+        if not force_new and active is not None and active[0] == text_fp and active[1] == image_fp:
+            return active[2]
+        if force_new:
             logger.info("Force creating new AIService instance")
-            _ai_service_instance = None
-    
-    if _ai_service_instance is None:
-        with _lock:
-            # Double-check locking pattern
-            if _ai_service_instance is None:
-                logger.info("Initializing AIService singleton with provider caching")
-                
-                # Get model names from Flask config or use defaults
-                from config import get_config
-                config = get_config()
-                
-                if has_app_context() and current_app and hasattr(current_app, "config"):
-                    text_model = current_app.config.get("TEXT_MODEL", config.TEXT_MODEL)
-                    image_model = current_app.config.get("IMAGE_MODEL", config.IMAGE_MODEL)
-                else:
-                    text_model = config.TEXT_MODEL
-                    image_model = config.IMAGE_MODEL
-                
-                # Get cached providers
-                text_provider = _get_cached_text_provider(text_model)
-                image_provider = _get_cached_image_provider(image_model)
-                
-                # Create AIService with cached providers
-                _ai_service_instance = AIService(
-                    text_provider=text_provider,
-                    image_provider=image_provider
-                )
-                
-                logger.info(f"AIService singleton created with models: text={text_model}, image={image_model}")
-    
-    return _ai_service_instance
+            _retire(_text_providers)
+            _retire(_image_providers)
+        return _build(text_model, image_model, text_fp, image_fp)
+
+
+def refresh_ai_service(app) -> threading.Thread:
+    """
+    Rebuild the AIService for the current settings in a background thread
+
+    设置更新后调用：新的 Provider 在后台构建好后再切换，未变化的 Provider 直接复用。
+
+    Returns:
+        The started thread (tests can join it)
+    """
+    def build():
+        with app.app_context():
+            try:
+                get_ai_service()
+            except Exception as e:
+                # 配置不完整（例如清空了 API Key）时，下次请求调用 get_ai_service 会返回同样的错误
+                logger.warning(f"Failed to rebuild AIService after settings change: {e}")
+
+    thread = threading.Thread(target=build, name='ai-service-refresh', daemon=True)
+    thread.start()
+    return thread
 
 
 def clear_ai_service_cache():
     """
-    Clear the AIService singleton and provider cache
-    
+    Clear the AIService singleton and provider registry
+
     This is useful when:
-    - Configuration changes (API keys, endpoints, models)
     - Testing scenarios requiring fresh instances
     - Memory cleanup needed
-    
-    Note:
-    - Uses nested locks to ensure atomic cache clearing operation
-    - Prevents race conditions where new instances could be created
-      with stale cached providers during the clearing process
+
+    Configuration changes don't need this: get_ai_service / refresh_ai_service
+    compare config fingerprints and only rebuild the providers that changed.
     """
-    global _ai_service_instance
-    
+    global _active
+
     with _lock:
-        _ai_service_instance = None
-        logger.info("AIService singleton cache cleared")
-        with _cache_lock:
-            _text_provider_cache.clear()
-            _image_provider_cache.clear()
-            logger.info("Provider cache cleared")
+        _active = None
+        _retire(_text_providers)
+        _retire(_image_providers)
+        clear_provider_config_cache()
+        logger.info("AIService singleton and provider cache cleared")
 
 
 def get_provider_cache_info() -> dict:
     """
     Get information about cached providers (for debugging/monitoring)
-    
+
     Returns:
         Dictionary with cache statistics
     """
-    with _cache_lock:
+    with _lock:
         return {
-            "text_providers": list(_text_provider_cache.keys()),
-            "image_providers": list(_image_provider_cache.keys()),
-            "total_cached": len(_text_provider_cache) + len(_image_provider_cache)
+            "text_providers": [fingerprint[-1] for fingerprint in _text_providers],
+            "image_providers": [fingerprint[-1] for fingerprint in _image_providers],
+            "total_cached": len(_text_providers) + len(_image_providers),
+            "draining": len(_draining),
         }
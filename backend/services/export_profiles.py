@@ -0,0 +1,134 @@
+"""
+Export Profiles - 导出时的图片优化档位
+
+原图通常是 2K/4K PNG，直接打包会让 PPTX/PDF 达到数百 MB。导出档位按
+10 × 5.625 英寸的幻灯片尺寸把图片缩放到目标 DPI 并重新压缩为 JPEG，
+在共享进程池（services.process_pool）中并行处理，打包时按页序依次取用。
+
+- archive: 原图不做处理（默认，与之前的导出一致）
+- print:   300 DPI，JPEG 质量 90
+- screen:  150 DPI，JPEG 质量 80
+"""
+import os
+import shutil
+import tempfile
+import logging
+from concurrent.futures import wait
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional, Tuple
+
+from PIL import Image
+
+from services.process_pool import get_process_pool
+
+logger = logging.getLogger(__name__)
+
+SLIDE_WIDTH_INCHES = 10
+SLIDE_HEIGHT_INCHES = 5.625
+
+
+class ExportProfile:
+    """导出图片优化档位"""
+
+    def __init__(self, name: str, dpi: Optional[int] = None, jpeg_quality: int = 85):
+        """
+        Args:
+            name: 档位名
+            dpi: 目标 DPI（None 表示保持原图）
+            jpeg_quality: 重新压缩的 JPEG 质量
+        """
+        self.name = name
+        self.dpi = dpi
+        self.jpeg_quality = jpeg_quality
+
+    @property
+    def passthrough(self) -> bool:
+        """是否直接使用原图"""
+        return self.dpi is None
+
+    def max_size(self) -> Tuple[int, int]:
+        """幻灯片尺寸在目标 DPI 下的最大像素尺寸"""
+        return round(SLIDE_WIDTH_INCHES * self.dpi), round(SLIDE_HEIGHT_INCHES * self.dpi)
+
+
+EXPORT_PROFILES = {
+    'archive': ExportProfile('archive'),
+    'print': ExportProfile('print', dpi=300, jpeg_quality=90),
+    'screen': ExportProfile('screen', dpi=150, jpeg_quality=80),
+}
+
+DEFAULT_EXPORT_PROFILE = 'archive'
+
+
+def get_export_profile(name: Optional[str]) -> ExportProfile:
+    """
+    按名称获取导出档位（None 为默认档位）
+
+    Raises:
+        ValueError: 未知的档位名
+    """
+    profile = EXPORT_PROFILES.get(name or DEFAULT_EXPORT_PROFILE)
+    if profile is None:
+        raise ValueError(f"Unknown export profile: {name}. Expected one of {', '.join(EXPORT_PROFILES)}")
+    return profile
+
+
+def optimize_image(image_path: str, output_path: str, max_width: int, max_height: int, quality: int) -> str:
+    """
+    缩放（只缩小不放大）并重新压缩为 JPEG；在进程池中运行
+
+    Returns:
+        output_path
+    """
+    with Image.open(image_path) as img:
+        img.draft('RGB', (max_width, max_height))  # JPEG 可在解码时直接降采样
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            rgba = img.convert('RGBA')
+            converted = Image.new('RGB', rgba.size, (255, 255, 255))
+            converted.paste(rgba, mask=rgba.split()[3])
+        else:
+            converted = img.convert('RGB')
+    converted.thumbnail((max_width, max_height), Image.LANCZOS)
+    converted.save(output_path, format='JPEG', quality=quality, optimize=True)
+    return output_path
+
+
+@contextmanager
+def optimized_images(image_paths: Iterable[str], profile: ExportProfile) -> Iterator[Iterable[str]]:
+    """
+    按档位准备导出用的图片
+
+    所有图片立即提交到共享进程池并行处理；返回的可迭代对象按页序等待各自的结果，
+    打包可以在第一页处理完成后就开始。不存在的图片原样返回（由 writer 跳过）。
+    退出时删除临时文件。
+
+    Usage:
+        with optimized_images(paths, get_export_profile('screen')) as export_paths:
+            write_pdf_from_images(export_paths, output)
+    """
+    if profile.passthrough:
+        yield image_paths
+        return
+
+    image_paths = list(image_paths)
+    max_width, max_height = profile.max_size()
+    work_dir = tempfile.mkdtemp(prefix=f'export_{profile.name}_')
+    futures = []
+    try:
+        pool = get_process_pool()
+        futures = [
+            pool.submit(optimize_image, path, os.path.join(work_dir, f'{index}.jpg'),
+                        max_width, max_height, profile.jpeg_quality)
+            if os.path.exists(path) else None
+            for index, path in enumerate(image_paths)
+        ]
+        logger.info(f"Optimizing {len(image_paths)} images for '{profile.name}' export "
+                    f"({max_width}x{max_height}, JPEG q{profile.jpeg_quality})")
+        yield (future.result() if future else path for future, path in zip(futures, image_paths))
+    finally:
+        # 打包中途失败时取消未开始的任务，并等待进行中的任务写完再删除目录（进程池是共享的，不关闭）
+        for future in futures:
+            if future:
+                future.cancel()
+        wait([future for future in futures if future])
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -6,15 +6,17 @@ import os
 import json
 import logging
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple
 from textwrap import dedent
-from pptx import Presentation
-from pptx.util import Inches
 from PIL import Image
 import io
 import tempfile
-import img2pdf
+from itertools import repeat
 from services.prompts import get_clean_background_prompt
+from services.pptx_stream_writer import write_pptx_from_images, iter_pptx_from_images, pptx_bytes_from_images
+from services.pdf_stream_writer import write_pdf_from_images, iter_pdf_from_images
+from services.export_profiles import get_export_profile, optimized_images
+from services.process_pool import get_process_pool
 
 logger = logging.getLogger(__name__)
 
@@ -77,177 +79,113 @@ class ExportService:
             return None
     
     @staticmethod
-    def create_pptx_from_images(image_paths: List[str], output_file: str = None) -> bytes:
+    def create_pptx_from_images(image_paths: List[str], output_file: str = None,
+                                progress_callback: Optional[Callable[[int], None]] = None,
+                                profile: Optional[str] = None) -> bytes:
         """
         Create PPTX file from image paths
         Based on demo.py create_pptx_from_images()
         
+        Slides are streamed into the zip one image at a time (see pptx_stream_writer),
+        so memory does not grow with the number of slides.
+        
         Args:
             image_paths: List of absolute paths to images
             output_file: Optional output file path (if None, returns bytes)
+            progress_callback: Optional callback(processed_count) called after each image
+            profile: Export profile name (see export_profiles); None keeps the original images
         
         Returns:
             PPTX file as bytes if output_file is None
         """
-        # Create presentation
-        prs = Presentation()
-        
-        # Set slide dimensions to 16:9 (width 10 inches, height 5.625 inches)
-        prs.slide_width = Inches(10)
-        prs.slide_height = Inches(5.625)
-        
-        # Add each image as a slide
-        for image_path in image_paths:
-            if not os.path.exists(image_path):
-                logger.warning(f"Image not found: {image_path}")
-                continue
-            
-            # Add blank slide layout (layout 6 is typically blank)
-            blank_slide_layout = prs.slide_layouts[6]
-            slide = prs.slides.add_slide(blank_slide_layout)
-            
-            # Add image to fill entire slide
-            slide.shapes.add_picture(
-                image_path,
-                left=0,
-                top=0,
-                width=prs.slide_width,
-                height=prs.slide_height
-            )
+        # 16:9 slides (width 10 inches, height 5.625 inches), one full-slide image per slide
+        with optimized_images(image_paths, get_export_profile(profile)) as export_paths:
+            if output_file:
+                write_pptx_from_images(export_paths, output_file, progress_callback=progress_callback)
+                return None
+            return pptx_bytes_from_images(export_paths, progress_callback=progress_callback)
+    
+    @staticmethod
+    def stream_pptx_from_images(image_paths: List[str], profile: Optional[str] = None) -> Iterator[bytes]:
+        """
+        Generate a PPTX as byte chunks (one slide at a time) for streaming HTTP responses
         
-        # Save or return bytes
-        if output_file:
-            prs.save(output_file)
-            return None
-        else:
-            # Save to bytes
-            pptx_bytes = io.BytesIO()
-            prs.save(pptx_bytes)
-            pptx_bytes.seek(0)
-            return pptx_bytes.getvalue()
+        Args:
+            image_paths: List of absolute paths to images
+            profile: Export profile name (see export_profiles); None keeps the original images
+        
+        Returns:
+            Iterator of PPTX file chunks
+        """
+        export_profile = get_export_profile(profile)
+        with optimized_images(image_paths, export_profile) as export_paths:
+            yield from iter_pptx_from_images(export_paths)
     
     @staticmethod
-    def create_pdf_from_images(image_paths: List[str], output_file: str = None) -> Optional[bytes]:
+    def create_pdf_from_images(image_paths: List[str], output_file: str = None,
+                               progress_callback: Optional[Callable[[int], None]] = None,
+                               profile: Optional[str] = None) -> Optional[bytes]:
         """
-        Create PDF file from image paths using img2pdf (low memory usage)
+        Create PDF file from image paths
+        
+        Pages are appended one at a time (see pdf_stream_writer): JPEG and plain
+        RGB/grayscale PNG data is copied without decoding, other images are
+        converted one page at a time, so peak memory is about one page.
 
         Args:
             image_paths: List of absolute paths to images
             output_file: Optional output file path (if None, returns bytes)
+            progress_callback: Optional callback(processed_count) called after each image
+            profile: Export profile name (see export_profiles); None keeps the original images
 
         Returns:
             PDF file as bytes if output_file is None, otherwise None
         """
-        # Validate images exist and log warnings for missing files
-        valid_paths = []
-        for p in image_paths:
-            if os.path.exists(p):
-                valid_paths.append(p)
-            else:
-                logger.warning(f"Image not found and will be skipped for PDF export: {p}")
-
+        export_profile = get_export_profile(profile)
+        valid_paths = [p for p in image_paths if os.path.exists(p)]
         if not valid_paths:
             raise ValueError("No valid images found for PDF export")
 
-        try:
-            logger.info(f"Using img2pdf for PDF export ({len(valid_paths)} pages, low memory mode)")
-
-            # Set page layout: 16:9 aspect ratio (10 inches × 5.625 inches)
-            layout_fun = img2pdf.get_layout_fun(
-                pagesize=(img2pdf.in_to_pt(10), img2pdf.in_to_pt(5.625))
-            )
-
-            # Convert images to PDF
-            pdf_bytes = img2pdf.convert(valid_paths, layout_fun=layout_fun)
-
+        logger.info(f"Writing PDF export incrementally ({len(valid_paths)} pages, profile={export_profile.name})")
+        
+        # 16:9 pages (10 inches × 5.625 inches)
+        with optimized_images(image_paths, export_profile) as export_paths:
             if output_file:
-                with open(output_file, "wb") as f:
-                    f.write(pdf_bytes)
+                write_pdf_from_images(export_paths, output_file, progress_callback=progress_callback)
                 return None
-            else:
-                return pdf_bytes
-        except (img2pdf.ImageOpenError, ValueError, IOError) as e:
-            logger.warning(f"img2pdf conversion failed: {e}. Falling back to Pillow (high memory usage).")
-            return ExportService.create_pdf_from_images_pillow(valid_paths, output_file)
+            buffer = io.BytesIO()
+            write_pdf_from_images(export_paths, buffer, progress_callback=progress_callback)
+            return buffer.getvalue()
 
     @staticmethod
-    def create_pdf_from_images_pillow(image_paths: List[str], output_file: str = None) -> Optional[bytes]:
+    def stream_pdf_from_images(image_paths: List[str], profile: Optional[str] = None) -> Iterator[bytes]:
         """
-        Create PDF file from image paths using Pillow (original method)
-
-        Note: This method loads all images into memory at once.
-        For large projects (50+ pages with 20MB/page), use create_pdf_from_images instead.
-
+        Generate a PDF as byte chunks (one page at a time) for streaming HTTP responses
+        
         Args:
             image_paths: List of absolute paths to images
-            output_file: Optional output file path (if None, returns bytes)
-
+            profile: Export profile name (see export_profiles); None keeps the original images
+        
         Returns:
-            PDF file as bytes if output_file is None, otherwise None
+            Iterator of PDF file chunks
         """
-        images = []
-
-        # Load all images
-        for image_path in image_paths:
-            if not os.path.exists(image_path):
-                logger.warning(f"Image not found: {image_path}")
-                continue
-
-            img = Image.open(image_path)
-
-            # Convert to RGB if necessary (PDF requires RGB)
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-
-            images.append(img)
-
-        if not images:
-            raise ValueError("No valid images found for PDF export")
-
-        # Save as PDF
-        if output_file:
-            images[0].save(
-                output_file,
-                save_all=True,
-                append_images=images[1:],
-                format='PDF'
-            )
-            return None
-        else:
-            # Save to bytes
-            pdf_bytes = io.BytesIO()
-            images[0].save(
-                pdf_bytes,
-                save_all=True,
-                append_images=images[1:],
-                format='PDF'
-            )
-            pdf_bytes.seek(0)
-            return pdf_bytes.getvalue()
+        export_profile = get_export_profile(profile)
+        with optimized_images(image_paths, export_profile) as export_paths:
+            yield from iter_pdf_from_images(export_paths)
     
     @staticmethod
-    def create_editable_pptx_from_mineru(
-        mineru_result_dir: str,
-        output_file: str = None,
-        slide_width_pixels: int = 1920,
-        slide_height_pixels: int = 1080,
-        background_images: List[str] = None
-    ) -> bytes:
+    def load_mineru_pages(mineru_result_dir: str) -> Dict[int, Dict[str, Any]]:
         """
-        Create editable PPTX file from MinerU parsing results
+        Load per-page layout items from a MinerU result directory
         
         Args:
-            mineru_result_dir: Directory containing MinerU results (content_list.json, images/, etc.)
-            output_file: Optional output file path (if None, returns bytes)
-            slide_width_pixels: Original slide width in pixels (default: 1920)
-            slide_height_pixels: Original slide height in pixels (default: 1080)
-            background_images: Optional list of background image paths (one per page)
+            mineru_result_dir: Directory containing MinerU results (content_list.json, layout.json, images/)
         
         Returns:
-            PPTX file as bytes if output_file is None
+            Dict of page_idx -> {'items': [...], 'page_size': [w, h] or None}.
+            page_size is None when layout.json is unavailable and content_list
+            coordinates are used as-is.
         """
-        from utils.pptx_builder import PPTXBuilder
-        
         mineru_dir = Path(mineru_result_dir)
         
         # Find content_list.json file
@@ -270,36 +208,20 @@ class ExportService:
         # Load layout.json for accurate coordinates
         layout_file = mineru_dir / 'layout.json'
         layout_data = None
-        actual_page_width = slide_width_pixels
-        actual_page_height = slide_height_pixels
-        use_layout_coords = False
         
         if layout_file.exists():
             try:
                 with open(layout_file, 'r', encoding='utf-8') as f:
                     layout_data = json.load(f)
-                    if 'pdf_info' in layout_data and len(layout_data['pdf_info']) > 0:
-                        page_size = layout_data['pdf_info'][0].get('page_size')
-                        if page_size and len(page_size) == 2:
-                            actual_page_width, actual_page_height = page_size
-                            use_layout_coords = True
-                            logger.info(f"✓ Using layout.json for accurate coordinates: {actual_page_width}x{actual_page_height}")
-                        else:
-                            logger.warning("page_size not found in layout.json")
-                    else:
-                        logger.warning("pdf_info not found in layout.json")
+                if not layout_data.get('pdf_info'):
+                    logger.warning("pdf_info not found in layout.json")
+                    layout_data = None
             except Exception as e:
                 logger.warning(f"Failed to read layout.json: {e}")
+                layout_data = None
         else:
             logger.warning(f"layout.json not found, using content_list coordinates")
         
-        logger.info(f"Target slide dimensions: {slide_width_pixels}x{slide_height_pixels}")
-        logger.info(f"Actual page dimensions: {actual_page_width}x{actual_page_height}")
-        
-        # Log first few items for debugging
-        for i, item in enumerate(content_list[:3]):
-            logger.debug(f"Sample item {i}: type={item.get('type')}, bbox={item.get('bbox')}, text={item.get('text', '')[:50] if 'text' in item else 'N/A'}")
-        
         # Build text_level map from content_list (for font sizing)
         text_level_map = {}
         for item in content_list:
@@ -307,18 +229,18 @@ class ExportService:
                 text = item['text'].strip()
                 text_level_map[text] = item.get('text_level')
         
-        logger.info(f"Built text_level map with {len(text_level_map)} entries")
-        
         # Group content by page
-        pages_content = {}
+        pages = {}
         
-        if use_layout_coords and layout_data:
+        if layout_data:
             # Use layout.json for accurate coordinates
             logger.info("Using layout.json coordinates (accurate)")
+            first_page_size = layout_data['pdf_info'][0].get('page_size')
             
             for page_info in layout_data['pdf_info']:
                 page_idx = page_info.get('page_idx', 0)
-                pages_content[page_idx] = []
+                page_size = page_info.get('page_size') or first_page_size
+                items = []
                 
                 for block in page_info.get('para_blocks', []):
                     block_type = block.get('type', 'text')
@@ -333,12 +255,11 @@ class ExportService:
                             for span in line.get('spans', []):
                                 if span.get('type') == 'text' and span.get('content'):
                                     text = span['content'].strip()
-                                    text_level = text_level_map.get(text)
                                     
-                                    pages_content[page_idx].append({
+                                    items.append({
                                         'type': block_type,
                                         'text': text,
-                                        'text_level': text_level,
+                                        'text_level': text_level_map.get(text),
                                         'bbox': bbox,  # Use layout bbox (accurate!)
                                         'page_idx': page_idx
                                     })
@@ -360,12 +281,17 @@ class ExportService:
                                 break
                         
                         if img_path:
-                            pages_content[page_idx].append({
+                            items.append({
                                 'type': block_type,
                                 'img_path': 'images/' + img_path if not img_path.startswith('images/') else img_path,
                                 'bbox': bbox,  # Block-level bbox (accurate!)
                                 'page_idx': page_idx
                             })
+                
+                pages[page_idx] = {
+                    'items': items,
+                    'page_size': list(page_size) if page_size and len(page_size) == 2 else None
+                }
         
         else:
             # Fallback to content_list.json
@@ -373,147 +299,316 @@ class ExportService:
             
             for item in content_list:
                 page_idx = item.get('page_idx', 0)
-                if page_idx not in pages_content:
-                    pages_content[page_idx] = []
-                pages_content[page_idx].append(item)
-        
-        total_extracted = sum(len(items) for items in pages_content.values())
-        logger.info(f"Grouped {total_extracted} items into {len(pages_content)} pages")
-        
-        # Calculate scale factors (from actual page size to target slide size)
-        scale_x = slide_width_pixels / actual_page_width
-        scale_y = slide_height_pixels / actual_page_height
+                pages.setdefault(page_idx, {'items': [], 'page_size': None})['items'].append(item)
         
-        logger.info(f"Scale factors: X={scale_x:.4f} ({slide_width_pixels}/{actual_page_width}), Y={scale_y:.4f} ({slide_height_pixels}/{actual_page_height})")
-        
-        if scale_x == 1.0 and scale_y == 1.0:
-            logger.info("✓ No scaling needed - using accurate layout.json coordinates!")
+        total_extracted = sum(len(page['items']) for page in pages.values())
+        logger.info(f"Grouped {total_extracted} items into {len(pages)} pages")
+        return pages
+    
+    @staticmethod
+    def create_editable_pptx_builder(slide_width_pixels: int = 1920, slide_height_pixels: int = 1080):
+        """Create an empty PPTXBuilder sized for the slides"""
+        from utils.pptx_builder import PPTXBuilder
         
-        # Create PPTX builder
         builder = PPTXBuilder()
         builder.create_presentation()
         builder.setup_presentation_size(slide_width_pixels, slide_height_pixels)
+        return builder
+    
+    @staticmethod
+    def build_editable_slide_spec(
+        page_layout: Optional[Dict[str, Any]],
+        mineru_dir: str,
+        slide_width_pixels: int,
+        slide_height_pixels: int
+    ) -> Dict[str, Any]:
+        """
+        Compute the shapes of one editable slide without touching python-pptx
         
-        # Process each page
-        for page_idx in sorted(pages_content.keys()):
-            logger.info(f"Processing page {page_idx}")
-            slide = builder.add_blank_slide()
-            
-            # Add background image if provided (should be first, behind everything)
-            if background_images and page_idx < len(background_images):
-                bg_image_path = background_images[page_idx]
-                if bg_image_path and os.path.exists(bg_image_path):
-                    logger.info(f"Adding background image for page {page_idx}: {bg_image_path}")
-                    try:
-                        # Add background image to fill entire slide
-                        slide.shapes.add_picture(
-                            bg_image_path,
-                            left=0,
-                            top=0,
-                            width=builder.prs.slide_width,
-                            height=builder.prs.slide_height
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to add background image: {str(e)}")
-                else:
-                    logger.warning(f"Background image not found or not provided for page {page_idx}")
-            
-            page_items = pages_content[page_idx]
-            
-            # Separate items by type
-            text_items = []
-            image_items = []
-            table_count = 0
-            
-            for item in page_items:
-                item_type = item.get('type', '')
-                
-                if item_type in ['text', 'title', 'header', 'footer']:
-                    text_items.append(item)
-                elif item_type in ['image', 'table']:
-                    # Both image and table items can have img_path
-                    # Tables are rendered as images by MinerU
-                    if item.get('img_path'):
-                        image_items.append(item)
-                        if item_type == 'table':
-                            table_count += 1
-            
-            # Add MinerU extracted images (on top of background, behind text)
-            for img_item in image_items:
-                ExportService._add_mineru_image_to_slide(
-                    builder, slide, img_item, mineru_dir, scale_x, scale_y
-                )
+        Scaling, font fitting, table parsing and image resolution happen here; the
+        result is a plain (picklable) spec, so pages can be computed in a process
+        pool and only add_editable_slide_from_spec has to run serially.
+        
+        Args:
+            page_layout: {'items': [...], 'page_size': [w, h] or None} from load_mineru_pages (None = no items)
+            mineru_dir: MinerU result directory the items' img_path are relative to
+            slide_width_pixels: Slide width in pixels
+            slide_height_pixels: Slide height in pixels
+        
+        Returns:
+            {'shapes': [...], 'text_count', 'image_count', 'table_count', 'scale': [x, y]};
+            each shape is a dict with 'type' in text/image/table/placeholder and a pixel 'bbox'
+        """
+        from utils.pptx_builder import PPTXBuilder
+        
+        page_layout = page_layout or {'items': [], 'page_size': None}
+        
+        # Calculate scale factors (from actual page size to target slide size)
+        page_size = page_layout.get('page_size')
+        if page_size:
+            scale_x = slide_width_pixels / page_size[0]
+            scale_y = slide_height_pixels / page_size[1]
+        else:
+            scale_x = scale_y = 1.0
+        
+        # Separate items by type
+        text_items = []
+        image_items = []
+        table_count = 0
+        
+        for item in page_layout.get('items', []):
+            item_type = item.get('type', '')
             
-            # Add text elements
-            for text_item in text_items:
-                ExportService._add_mineru_text_to_slide(
-                    builder, slide, text_item, scale_x, scale_y
+            if item_type in ['text', 'title', 'header', 'footer']:
+                text_items.append(item)
+            elif item_type in ['image', 'table']:
+                # Both image and table items can have img_path
+                # Tables are rendered as images by MinerU
+                if item.get('img_path'):
+                    image_items.append(item)
+                    if item_type == 'table':
+                        table_count += 1
+        
+        shapes = []
+        # MinerU extracted images (on top of background, behind text)
+        for img_item in image_items:
+            shape = ExportService._mineru_image_shape(img_item, Path(mineru_dir), scale_x, scale_y)
+            if shape:
+                shapes.append(shape)
+        
+        # Text elements (font sizes of the whole slide are fitted in one batch)
+        text_shapes = [
+            shape for shape in (ExportService._mineru_text_shape(text_item, scale_x, scale_y)
+                                for text_item in text_items)
+            if shape
+        ]
+        font_sizes = PPTXBuilder().calculate_font_sizes(
+            [shape['bbox'] for shape in text_shapes],
+            [shape['text'] for shape in text_shapes],
+            [shape['text_level'] for shape in text_shapes]
+        )
+        for shape, font_size in zip(text_shapes, font_sizes):
+            shape['font_size'] = font_size
+        shapes.extend(text_shapes)
+        
+        return {
+            'shapes': shapes,
+            'text_count': len(text_items),
+            'image_count': len(image_items),
+            'table_count': table_count,
+            'scale': [scale_x, scale_y],
+        }
+    
+    @staticmethod
+    def build_editable_slide_specs(
+        layouts: List[Tuple[str, Optional[Dict[str, Any]]]],
+        slide_width_pixels: int,
+        slide_height_pixels: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Compute slide specs for several pages in the shared export process pool
+        
+        Args:
+            layouts: List of (mineru_dir, page_layout), one per slide
+            slide_width_pixels: Slide width in pixels
+            slide_height_pixels: Slide height in pixels
+        
+        Returns:
+            Slide specs in the same order as layouts
+        """
+        if len(layouts) <= 1:
+            return [
+                ExportService.build_editable_slide_spec(layout, mineru_dir, slide_width_pixels, slide_height_pixels)
+                for mineru_dir, layout in layouts
+            ]
+        return list(get_process_pool().map(
+            ExportService.build_editable_slide_spec,
+            [layout for _, layout in layouts],
+            [mineru_dir for mineru_dir, _ in layouts],
+            repeat(slide_width_pixels),
+            repeat(slide_height_pixels),
+        ))
+    
+    @staticmethod
+    def add_editable_slide_from_spec(builder, spec: Dict[str, Any], background_image: Optional[str] = None):
+        """
+        Append one editable slide from a spec produced by build_editable_slide_spec
+        
+        Args:
+            builder: PPTXBuilder from create_editable_pptx_builder
+            spec: Slide spec
+            background_image: Optional full-slide background image path
+        """
+        slide = builder.add_blank_slide()
+        
+        # Add background image if provided (should be first, behind everything)
+        if background_image and os.path.exists(background_image):
+            try:
+                # Add background image to fill entire slide
+                slide.shapes.add_picture(
+                    background_image,
+                    left=0,
+                    top=0,
+                    width=builder.prs.slide_width,
+                    height=builder.prs.slide_height
                 )
-            
-            has_background = background_images and page_idx < len(background_images) and background_images[page_idx]
-            logger.info(f"Page {page_idx}: background={'✓' if has_background else '✗'}, {len(text_items)} texts, {len(image_items)} images (including {table_count} tables)")
-        
-        # Log summary
-        total_items = len(content_list)
-        total_with_images = len([item for item in content_list if item.get('img_path')])
-        total_text = len([item for item in content_list if item.get('type') in ['text', 'title', 'header', 'footer']])
-        title_count = len([item for item in content_list if item.get('text_level') == 1])
-        body_count = total_text - title_count
-        
-        bg_count = len(background_images) if background_images else 0
-        
-        logger.info(f"Completed processing {len(pages_content)} pages:")
-        logger.info(f"  - Background images: {bg_count}")
-        logger.info(f"  - Total MinerU items: {total_items}")
-        logger.info(f"  - Text items: {total_text} (titles: {title_count}, body: {body_count})")
-        logger.info(f"  - Image items: {total_with_images}")
-        logger.info(f"All text uses dynamic font sizing based on bbox dimensions")
-        
-        # Save or return bytes
+            except Exception as e:
+                logger.error(f"Failed to add background image: {str(e)}")
+        else:
+            logger.warning(f"Background image not found or not provided: {background_image}")
+        
+        for shape in spec['shapes']:
+            shape_type = shape['type']
+            try:
+                if shape_type == 'text':
+                    # Note: text_level is only used for bold styling, not font size calculation
+                    builder.add_text_element(
+                        slide=slide,
+                        text=shape['text'],
+                        bbox=shape['bbox'],
+                        text_level=shape['text_level'],
+                        font_size=shape['font_size']
+                    )
+                elif shape_type == 'table':
+                    builder.add_table_element(
+                        slide=slide,
+                        html_table=None,
+                        bbox=shape['bbox'],
+                        table_data=shape['rows']
+                    )
+                elif shape_type == 'image':
+                    builder.add_image_element(
+                        slide=slide,
+                        image_path=shape['image_path'],
+                        bbox=shape['bbox']
+                    )
+                else:
+                    builder.add_image_placeholder(slide, shape['bbox'])
+            except Exception as e:
+                logger.error(f"Failed to add {shape_type} element: {str(e)}")
+        
+        scale_x, scale_y = spec['scale']
+        logger.info(f"Slide {len(builder.prs.slides)}: background={'✓' if background_image else '✗'}, "
+                    f"{spec['text_count']} texts, {spec['image_count']} images "
+                    f"(including {spec['table_count']} tables), scale {scale_x:.3f}x{scale_y:.3f}")
+        return slide
+    
+    @staticmethod
+    def add_editable_slide(
+        builder,
+        page_layout: Optional[Dict[str, Any]],
+        mineru_dir: str,
+        slide_width_pixels: int,
+        slide_height_pixels: int,
+        background_image: Optional[str] = None
+    ):
+        """
+        Append one editable slide built from a MinerU page layout
+        
+        Args:
+            builder: PPTXBuilder from create_editable_pptx_builder
+            page_layout: {'items': [...], 'page_size': [w, h] or None} from load_mineru_pages (None = no items)
+            mineru_dir: MinerU result directory the items' img_path are relative to
+            slide_width_pixels: Slide width in pixels
+            slide_height_pixels: Slide height in pixels
+            background_image: Optional full-slide background image path
+        """
+        spec = ExportService.build_editable_slide_spec(
+            page_layout, mineru_dir, slide_width_pixels, slide_height_pixels
+        )
+        return ExportService.add_editable_slide_from_spec(builder, spec, background_image)
+    
+    @staticmethod
+    def save_editable_pptx(builder, output_file: str = None) -> Optional[bytes]:
+        """Save the builder to output_file, or return the PPTX bytes if output_file is None"""
         if output_file:
             builder.save(output_file)
             return None
-        else:
-            # Save to bytes
-            pptx_bytes = io.BytesIO()
-            builder.get_presentation().save(pptx_bytes)
-            pptx_bytes.seek(0)
-            return pptx_bytes.getvalue()
+        # Save to bytes
+        pptx_bytes = io.BytesIO()
+        builder.get_presentation().save(pptx_bytes)
+        pptx_bytes.seek(0)
+        return pptx_bytes.getvalue()
     
     @staticmethod
-    def _add_mineru_text_to_slide(builder, slide, text_item: Dict[str, Any], scale_x: float = 1.0, scale_y: float = 1.0):
+    def create_editable_pptx_from_mineru(
+        mineru_result_dir: str,
+        output_file: str = None,
+        slide_width_pixels: int = 1920,
+        slide_height_pixels: int = 1080,
+        background_images: List[str] = None
+    ) -> bytes:
         """
-        Add text item from MinerU to slide
+        Create editable PPTX file from MinerU parsing results
         
         Args:
-            builder: PPTXBuilder instance
-            slide: Target slide
-            text_item: Text item from MinerU content_list
-            scale_x: X-axis scale factor
-            scale_y: Y-axis scale factor
+            mineru_result_dir: Directory containing MinerU results (content_list.json, images/, etc.)
+            output_file: Optional output file path (if None, returns bytes)
+            slide_width_pixels: Original slide width in pixels (default: 1920)
+            slide_height_pixels: Original slide height in pixels (default: 1080)
+            background_images: Optional list of background image paths (one per page)
+        
+        Returns:
+            PPTX file as bytes if output_file is None
         """
-        text = text_item.get('text', '').strip()
-        if not text:
-            return
+        pages = ExportService.load_mineru_pages(mineru_result_dir)
         
-        bbox = text_item.get('bbox')
-        if not bbox or len(bbox) != 4:
-            logger.warning(f"Invalid bbox for text item: {text_item}")
-            return
+        logger.info(f"Target slide dimensions: {slide_width_pixels}x{slide_height_pixels}")
+        
+        builder = ExportService.create_editable_pptx_builder(slide_width_pixels, slide_height_pixels)
+        
+        # Compute every page's shapes in parallel, then assemble the slides in order
+        page_indices = sorted(pages.keys())
+        specs = ExportService.build_editable_slide_specs(
+            [(mineru_result_dir, pages[page_idx]) for page_idx in page_indices],
+            slide_width_pixels, slide_height_pixels
+        )
+        for page_idx, spec in zip(page_indices, specs):
+            background = None
+            if background_images and page_idx < len(background_images):
+                background = background_images[page_idx]
+            ExportService.add_editable_slide_from_spec(builder, spec, background)
         
-        original_bbox = bbox.copy()
+        logger.info(f"Completed processing {len(pages)} pages")
         
-        # Apply scale factors to bbox
+        return ExportService.save_editable_pptx(builder, output_file)
+    
+    @staticmethod
+    def _scale_bbox(bbox: List[float], scale_x: float, scale_y: float) -> List[int]:
+        """Apply scale factors to a MinerU bbox"""
         x0, y0, x1, y1 = bbox
-        bbox = [
+        scaled = [
             int(x0 * scale_x),
             int(y0 * scale_y),
             int(x1 * scale_x),
             int(y1 * scale_y)
         ]
-        
         if scale_x != 1.0 or scale_y != 1.0:
-            logger.debug(f"Text bbox scaled: {original_bbox} -> {bbox} (scale: {scale_x:.3f}x{scale_y:.3f})")
+            logger.debug(f"Item bbox scaled: {bbox} -> {scaled} (scale: {scale_x:.3f}x{scale_y:.3f})")
+        return scaled
+    
+    @staticmethod
+    def _mineru_text_shape(text_item: Dict[str, Any], scale_x: float = 1.0,
+                           scale_y: float = 1.0) -> Optional[Dict[str, Any]]:
+        """
+        Shape spec for a MinerU text item (None if the item is empty or invalid);
+        font_size is filled in by build_editable_slide_spec
+        
+        Args:
+            text_item: Text item from MinerU content_list
+            scale_x: X-axis scale factor
+            scale_y: Y-axis scale factor
+        """
+        text = text_item.get('text', '').strip()
+        if not text:
+            return None
+        
+        bbox = text_item.get('bbox')
+        if not bbox or len(bbox) != 4:
+            logger.warning(f"Invalid bbox for text item: {text_item}")
+            return None
+        
+        bbox = ExportService._scale_bbox(bbox, scale_x, scale_y)
         
         # Determine text level (only used for styling like bold, NOT for font size)
         # Font size is purely calculated from bbox dimensions
@@ -526,80 +621,58 @@ class ExportService:
         else:
             level = 'default'
         
-        # Add text element
-        # Note: text_level is only used for bold styling, not font size calculation
-        try:
-            builder.add_text_element(
-                slide=slide,
-                text=text,
-                bbox=bbox,
-                text_level=level  # For styling (bold) only, not font size
-            )
-        except Exception as e:
-            logger.error(f"Failed to add text element: {str(e)}")
+        return {
+            'type': 'text',
+            'text': text,
+            'bbox': bbox,
+            'text_level': level,
+        }
     
     @staticmethod
-    def _add_mineru_image_to_slide(
-        builder,
-        slide,
+    def _mineru_image_shape(
         image_item: Dict[str, Any],
         mineru_dir: Path,
         scale_x: float = 1.0,
         scale_y: float = 1.0
-    ):
+    ) -> Optional[Dict[str, Any]]:
         """
-        Add image or table item from MinerU to slide
+        Shape spec for a MinerU image or table item (None if the item is invalid)
         
         Args:
-            builder: PPTXBuilder instance
-            slide: Target slide
             image_item: Image/table item from MinerU content_list
             mineru_dir: MinerU result directory
             scale_x: X-axis scale factor
             scale_y: Y-axis scale factor
         """
+        from utils.pptx_builder import HTMLTableParser
+        
         bbox = image_item.get('bbox')
         if not bbox or len(bbox) != 4:
             logger.warning(f"Invalid bbox for image item: {image_item}")
-            return
-        
-        original_bbox = bbox.copy()
-        
-        # Apply scale factors to bbox
-        x0, y0, x1, y1 = bbox
-        bbox = [
-            int(x0 * scale_x),
-            int(y0 * scale_y),
-            int(x1 * scale_x),
-            int(y1 * scale_y)
-        ]
+            return None
         
-        if scale_x != 1.0 or scale_y != 1.0:
-            logger.debug(f"Item bbox scaled: {original_bbox} -> {bbox} (scale: {scale_x:.3f}x{scale_y:.3f})")
+        bbox = ExportService._scale_bbox(bbox, scale_x, scale_y)
         
         # Check if this is a table with HTML data
         html_table = image_item.get('html_table')
         item_type = image_item.get('type', 'image')
         
         if html_table and item_type == 'table':
-            # Add editable table from HTML
+            # Editable table from HTML
             try:
-                builder.add_table_element(
-                    slide=slide,
-                    html_table=html_table,
-                    bbox=bbox
-                )
-                logger.info(f"Added editable table at bbox {bbox}")
-                return  # Table added successfully
+                rows = HTMLTableParser.parse_html_table(html_table)
+                if rows and rows[0]:
+                    return {'type': 'table', 'bbox': bbox, 'rows': rows}
+                logger.warning("Empty table data, falling back to image")
             except Exception as e:
-                logger.error(f"Failed to add table: {str(e)}, falling back to image")
+                logger.error(f"Failed to parse table: {str(e)}, falling back to image")
                 # Fall through to add as image instead
         
         # Add as image (either image type or table fallback)
         img_path_str = image_item.get('img_path', '')
         if not img_path_str:
             logger.warning(f"No img_path in item: {image_item}")
-            return
+            return None
         
         # Try to find the image file
         # MinerU may store images in 'images/' subdirectory
@@ -609,25 +682,9 @@ class ExportService:
             mineru_dir / Path(img_path_str).name,
         ]
         
-        image_path = None
         for path in possible_paths:
             if path.exists():
-                image_path = str(path)
-                break
-        
-        if not image_path:
-            logger.warning(f"Image file not found: {img_path_str}")
-            # Add placeholder
-            builder.add_image_placeholder(slide, bbox)
-            return
+                return {'type': 'image', 'bbox': bbox, 'image_path': str(path)}
         
-        # Add image element
-        try:
-            builder.add_image_element(
-                slide=slide,
-                image_path=image_path,
-                bbox=bbox
-            )
-        except Exception as e:
-            logger.error(f"Failed to add image element: {str(e)}")
-
+        logger.warning(f"Image file not found: {img_path_str}")
+        return {'type': 'placeholder', 'bbox': bbox}
@@ -9,7 +9,7 @@ import zipfile
 import io
 import base64
 import requests
-from typing import Optional, List
+from typing import Optional, List, Callable, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from PIL import Image
 from markitdown import MarkItDown
@@ -50,11 +50,14 @@ def _get_ai_provider_format(provider_format: str = None) -> str:
 class FileParserService:
     """Service for parsing files using MinerU and enhancing with image captions"""
     
+    # MinerU 任务状态轮询间隔（秒）
+    POLL_INTERVAL_SECONDS = 2
+    
     def __init__(self, mineru_token: str, mineru_api_base: str = "https://mineru.net",
                  google_api_key: str = "", google_api_base: str = "",
                  openai_api_key: str = "", openai_api_base: str = "",
                  image_caption_model: str = "gemini-3-flash-preview",
-                 provider_format: str = None):
+                 provider_format: str = None, mineru_storage_dir: Optional[str] = None):
         """
         Initialize the file parser service
         
@@ -67,11 +70,13 @@ class FileParserService:
             openai_api_base: OpenAI API base URL
             image_caption_model: Model to use for image captioning
             provider_format: AI provider format ('gemini' or 'openai'). If not provided, reads from environment variable.
+            mineru_storage_dir: Directory to extract MinerU results into (default: <project_root>/uploads/mineru_files)
         """
         self.mineru_token = mineru_token
         self.mineru_api_base = mineru_api_base
         self.get_upload_url_api = f"{mineru_api_base}/api/v4/file-urls/batch"
         self.get_result_api_template = f"{mineru_api_base}/api/v4/extract-results/batch/{{}}"
+        self.mineru_storage_dir = mineru_storage_dir
         
         # Store config for lazy initialization
         self._google_api_key = google_api_key
@@ -272,15 +277,119 @@ class FileParserService:
             logger.error(error_msg, exc_info=True)
             return None, None, None, error_msg, 0
     
+    def parse_batch(self, files: List[Tuple[str, str]],
+                    on_result: Optional[Callable[[int, Optional[str], Optional[str]], None]] = None,
+                    max_workers: int = 4, max_wait_time: int = 600) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        Parse several files with MinerU as separate tasks of a single batch
+        
+        Files are uploaded concurrently and each result is downloaded as soon as
+        its task finishes, so one slow file does not hold back the others.
+        Only the raw MinerU output is extracted (no image captioning); callers
+        read layout data from the extracted directory.
+        
+        Args:
+            files: List of (file_path, filename); filenames must be unique within the batch
+            on_result: Optional callback(index, extract_id, error_message) invoked (from a
+                worker thread) as soon as each file finishes
+            max_workers: Maximum concurrent uploads/downloads
+            max_wait_time: Maximum seconds to wait for the whole batch
+        
+        Returns:
+            List of (extract_id, error_message) in the same order as files
+        """
+        results: List[Optional[Tuple[Optional[str], Optional[str]]]] = [None] * len(files)
+        
+        def finish(index: int, extract_id: Optional[str], error: Optional[str]):
+            results[index] = (extract_id, error)
+            if on_result:
+                on_result(index, extract_id, error)
+        
+        if not files:
+            return []
+        
+        batch_id, upload_urls, error = self._get_upload_urls([filename for _, filename in files])
+        if error:
+            for index in range(len(files)):
+                finish(index, None, error)
+            return results
+        
+        logger.info(f"MinerU batch {batch_id}: uploading {len(files)} files...")
+        
+        def download(index: int, zip_url: str):
+            _, extract_id, error = self._download_markdown(zip_url)
+            finish(index, extract_id, error)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            upload_errors = list(executor.map(
+                lambda args: self._upload_file(*args),
+                [(file_path, url) for (file_path, _), url in zip(files, upload_urls)]
+            ))
+            for index, upload_error in enumerate(upload_errors):
+                if upload_error:
+                    finish(index, None, upload_error)
+            
+            pending = {files[i][1]: i for i in range(len(files)) if results[i] is None}
+            headers = {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.mineru_token}"
+            }
+            result_url = self.get_result_api_template.format(batch_id)
+            start_time = time.time()
+            
+            while pending:
+                if time.time() - start_time > max_wait_time:
+                    for index in pending.values():
+                        finish(index, None, f"Parsing timeout after {max_wait_time} seconds")
+                    break
+                
+                try:
+                    response = requests.get(result_url, headers=headers, timeout=30)
+                    response.raise_for_status()
+                    task_info = response.json()
+                    
+                    if task_info.get("code") != 0:
+                        error_msg = f"Failed to query task status: {task_info.get('msg')}"
+                        logger.error(error_msg)
+                        for index in pending.values():
+                            finish(index, None, error_msg)
+                        break
+                    
+                    for extract_result in task_info["data"]["extract_result"]:
+                        index = pending.get(extract_result.get("file_name"))
+                        if index is None:
+                            continue
+                        state = extract_result.get("state")
+                        if state == "done":
+                            del pending[extract_result["file_name"]]
+                            executor.submit(download, index, extract_result["full_zip_url"])
+                        elif state == "failed":
+                            del pending[extract_result["file_name"]]
+                            finish(index, None, f"File parsing failed: {extract_result.get('err_msg', 'Unknown error')}")
+                    
+                except requests.exceptions.RequestException as e:
+                    logger.warning(f"Network error while polling batch result: {str(e)}, retrying...")
+                
+                if pending:
+                    logger.debug(f"MinerU batch {batch_id}: {len(pending)} files still parsing, waiting...")
+                    time.sleep(self.POLL_INTERVAL_SECONDS)
+        
+        return results
+    
     def _get_upload_url(self, filename: str) -> tuple[Optional[str], Optional[str], Optional[str]]:
         """Get upload URL from MinerU"""
+        batch_id, upload_urls, error = self._get_upload_urls([filename])
+        return batch_id, (upload_urls[0] if upload_urls else None), error
+    
+    def _get_upload_urls(self, filenames: List[str]) -> tuple[Optional[str], Optional[List[str]], Optional[str]]:
+        """Get upload URLs for one batch of files from MinerU"""
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.mineru_token}"
         }
         
         upload_data = {
-            "files": [{"name": filename}],
+            "files": [{"name": filename} for filename in filenames],
             "model_version": "vlm"  # or "pipeline"
         }
         
@@ -300,8 +409,8 @@ class FileParserService:
                 return None, None, error_msg
             
             batch_id = result["data"]["batch_id"]
-            upload_url = result["data"]["file_urls"][0]
-            return batch_id, upload_url, None
+            upload_urls = result["data"]["file_urls"]
+            return batch_id, upload_urls, None
             
         except requests.exceptions.RequestException as e:
             error_msg = f"Network error while requesting upload URL: {str(e)}"
@@ -374,11 +483,11 @@ class FileParserService:
                     return None, None, error_msg
                 else:
                     logger.debug(f"Current task status: {task_status}, waiting...")
-                    time.sleep(2)  # Wait 2 seconds before next poll
+                    time.sleep(self.POLL_INTERVAL_SECONDS)
                     
             except requests.exceptions.RequestException as e:
                 logger.warning(f"Network error while polling result: {str(e)}, retrying...")
-                time.sleep(2)
+                time.sleep(self.POLL_INTERVAL_SECONDS)
     
     def _download_markdown(self, zip_url: str) -> tuple[Optional[str], Optional[str], Optional[str]]:
         """Download and extract markdown from result zip, save images to local server
@@ -405,7 +514,10 @@ class FileParserService:
             project_root = backend_dir.parent
             
             # Create directory for mineru extracts
-            mineru_storage = project_root / 'uploads' / 'mineru_files' / extract_id
+            if self.mineru_storage_dir:
+                mineru_storage = Path(self.mineru_storage_dir) / extract_id
+            else:
+                mineru_storage = project_root / 'uploads' / 'mineru_files' / extract_id
             mineru_storage.mkdir(parents=True, exist_ok=True)
             
             logger.info(f"Extracting ZIP to: {mineru_storage}")
@@ -2,14 +2,24 @@
 File Service - handles all file operations
 """
 import os
+import json
 import uuid
+import shutil
+import hashlib
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Optional, List, Dict, Any
 from werkzeug.utils import secure_filename
 from PIL import Image
 from models import Project
 from models import db
 
+# 导出缓存清单在 exports/ 目录中的文件名
+EXPORT_MANIFEST_NAME = '.export_manifest.json'
+
+# 保护导出缓存清单的读改写（同一进程内多个请求/任务线程）
+_export_manifest_lock = threading.Lock()
+
 
 class FileService:
     """Service for file management"""
@@ -43,6 +53,12 @@ class FileService:
         exports_dir.mkdir(exist_ok=True, parents=True)
         return exports_dir
 
+    def _get_export_cache_dir(self, project_id: str) -> Path:
+        """Get export cache directory for project (derived per-slide artifacts reused across exports)"""
+        cache_dir = self._get_project_dir(project_id) / "export_cache"
+        cache_dir.mkdir(exist_ok=True, parents=True)
+        return cache_dir
+
     def _get_materials_dir(self, project_id: str) -> Path:
         """Get materials directory for project (for standalone generated assets)"""
         materials_dir = self._get_project_dir(project_id) / "materials"
@@ -112,6 +128,34 @@ class FileService:
         # Return relative path
         return filepath.relative_to(self.upload_folder).as_posix()
 
+    @staticmethod
+    def get_clean_background_filename(page_id: str, version_number: int,
+                                      aspect_ratio: str, resolution: str) -> str:
+        """Filename of a cached clean background (encodes the generation parameters)"""
+        aspect = aspect_ratio.replace(':', 'x')
+        return f"{page_id}_v{version_number}_clean_{aspect}_{resolution}.png"
+
+    def save_clean_background(self, source_path: str, project_id: str, page_id: str,
+                              version_number: int, aspect_ratio: str, resolution: str) -> str:
+        """
+        Move a generated clean background into the project's export cache
+
+        Args:
+            source_path: Temporary file produced by ExportService.generate_clean_background
+            project_id: Project ID
+            page_id: Page ID
+            version_number: Image version the background was derived from
+            aspect_ratio: Aspect ratio used for generation
+            resolution: Resolution used for generation
+
+        Returns:
+            Relative file path from upload folder
+        """
+        filename = self.get_clean_background_filename(page_id, version_number, aspect_ratio, resolution)
+        filepath = self._get_export_cache_dir(project_id) / filename
+        shutil.move(source_path, str(filepath))
+        return filepath.relative_to(self.upload_folder).as_posix()
+
     def save_material_image(self, image: Image.Image, project_id: Optional[str],
                             image_format: str = 'PNG') -> str:
         """
@@ -164,6 +208,113 @@ class FileService:
             return True
         return False
     
+    @staticmethod
+    def get_export_cache_key(image_paths: List[str], export_type: str,
+                             options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Cache key of an export artifact
+        
+        Args:
+            image_paths: Ordered relative paths of the current page images (versioned filenames)
+            export_type: Export type, e.g. 'pptx' or 'pdf'
+            options: Export options that affect the output
+        
+        Returns:
+            SHA-256 hex digest
+        """
+        payload = json.dumps({'images': list(image_paths), 'type': export_type, 'options': options or {}},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _read_export_manifest(self, project_id: str) -> Dict[str, Dict[str, Any]]:
+        manifest_path = self._get_exports_dir(project_id) / EXPORT_MANIFEST_NAME
+        if not manifest_path.exists():
+            return {}
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+    
+    def _write_export_manifest(self, project_id: str, manifest: Dict[str, Dict[str, Any]]):
+        manifest_path = self._get_exports_dir(project_id) / EXPORT_MANIFEST_NAME
+        tmp_path = manifest_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+    
+    @staticmethod
+    def _export_entry_valid(filepath: Path, entry: Dict[str, Any]) -> bool:
+        """文件仍是登记时的那份产物（未被删除或被其他导出覆盖）"""
+        if not filepath.is_file():
+            return False
+        stat = filepath.stat()
+        return stat.st_size == entry.get('size') and stat.st_mtime_ns == entry.get('mtime_ns')
+    
+    def get_cached_export(self, project_id: str, filename: str, cache_key: str) -> bool:
+        """
+        Make exports/<filename> hold a previously built artifact for cache_key, if any
+        
+        A hit under another filename is hard-linked to the requested name
+        (copied only where the filesystem can't link).
+        
+        Args:
+            project_id: Project ID
+            filename: Requested export filename
+            cache_key: Key from get_export_cache_key
+        
+        Returns:
+            True if exports/<filename> is ready, False if the caller has to build it
+        """
+        exports_dir = self._get_exports_dir(project_id)
+        with _export_manifest_lock:
+            manifest = self._read_export_manifest(project_id)
+        
+        entry = manifest.get(filename)
+        if entry and entry.get('key') == cache_key and self._export_entry_valid(exports_dir / filename, entry):
+            return True
+        
+        for other_name, other_entry in manifest.items():
+            source = exports_dir / other_name
+            if other_name != filename and other_entry.get('key') == cache_key \
+                    and self._export_entry_valid(source, other_entry):
+                self._link_or_copy(source, exports_dir / filename)
+                self.record_export(project_id, filename, cache_key)
+                return True
+        
+        return False
+    
+    @staticmethod
+    def _link_or_copy(source: Path, target: Path):
+        """把 source 放到 target：优先硬链接（不复制数据），链接失败时才复制"""
+        # 先链接到临时名再替换，target 已存在时也能原子地换成新文件
+        temp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            os.link(source, temp)
+        except OSError:
+            shutil.copyfile(source, temp)
+        try:
+            os.replace(temp, target)
+        except OSError:
+            temp.unlink(missing_ok=True)
+            raise
+    
+    def record_export(self, project_id: str, filename: str, cache_key: str):
+        """Register exports/<filename> as the artifact for cache_key"""
+        filepath = self._get_exports_dir(project_id) / filename
+        stat = filepath.stat()
+        with _export_manifest_lock:
+            manifest = self._read_export_manifest(project_id)
+            manifest[filename] = {'key': cache_key, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            self._write_export_manifest(project_id, manifest)
+    
+    def invalidate_export_cache(self, project_id: str):
+        """Forget all cached export artifacts of a project (files are kept)"""
+        manifest_path = self._get_project_dir(project_id) / "exports" / EXPORT_MANIFEST_NAME
+        with _export_manifest_lock:
+            if manifest_path.exists():
+                manifest_path.unlink()
+    
     def get_file_url(self, project_id: Optional[str], file_type: str, filename: str) -> str:
         """
         Generate file URL for frontend access
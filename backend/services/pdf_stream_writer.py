@@ -0,0 +1,313 @@
+"""
+Streaming PDF writer - 逐页追加图片的 PDF 写入
+
+img2pdf.convert() 会先在内存中拼出整个 PDF，Pillow 方案更是同时解码所有图片。
+这里按页直接把图片对象写入文件或响应流：
+
+- JPEG 原样写入（DCTDecode），不解码；
+- 8 位、非隔行的 RGB/灰度 PNG 直接拷贝 IDAT 压缩数据（FlateDecode + PNG predictor），不解码；
+- 其他图片（带透明通道、调色板、16 位等）才解码转换，一次只处理一页。
+
+峰值内存约为一页图片，与页数无关。页面布局与之前的 img2pdf 导出一致：
+10 × 5.625 英寸页面，图片等比缩放后居中。
+"""
+import io
+import os
+import struct
+import zlib
+import logging
+from typing import Iterable, Iterator, Optional, Callable, List
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# 16:9 页面（10 英寸 × 5.625 英寸），单位 pt
+DEFAULT_PAGE_WIDTH = 720.0
+DEFAULT_PAGE_HEIGHT = 405.0
+
+_COPY_CHUNK_SIZE = 1024 * 1024
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_JPEG_COLORSPACES = {'RGB': '/DeviceRGB', 'L': '/DeviceGray', 'CMYK': '/DeviceCMYK'}
+
+
+def _fmt(value: float) -> str:
+    return f'{value:.4f}'.rstrip('0').rstrip('.')
+
+
+class _CountingWriter:
+    """记录已写入字节数（用于 xref 偏移），输出流可以不支持 seek/tell"""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.offset = 0
+
+    def write(self, data: bytes):
+        self.fileobj.write(data)
+        self.offset += len(data)
+
+
+def _read_png_header(path: str):
+    """
+    读取 PNG IHDR，返回 (width, height, bit_depth, color_type, interlace)；不是 PNG 时返回 None
+    """
+    with open(path, 'rb') as f:
+        if f.read(8) != _PNG_SIGNATURE:
+            return None
+        length, chunk_type = struct.unpack('>I4s', f.read(8))
+        if chunk_type != b'IHDR' or length != 13:
+            return None
+        width, height, bit_depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', f.read(13))
+        return width, height, bit_depth, color_type, interlace
+
+
+def _iter_png_idat(path: str) -> Iterator[bytes]:
+    """按块读取 PNG 的 IDAT 数据（zlib 压缩流）"""
+    with open(path, 'rb') as f:
+        f.read(8)
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return
+            length, chunk_type = struct.unpack('>I4s', header)
+            if chunk_type == b'IDAT':
+                remaining = length
+                while remaining:
+                    data = f.read(min(remaining, _COPY_CHUNK_SIZE))
+                    if not data:
+                        raise ValueError(f'Truncated PNG: {path}')
+                    remaining -= len(data)
+                    yield data
+                f.read(4)  # CRC
+            else:
+                f.seek(length + 4, io.SEEK_CUR)
+                if chunk_type == b'IEND':
+                    return
+
+
+def _iter_file(path: str) -> Iterator[bytes]:
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(_COPY_CHUNK_SIZE)
+            if not data:
+                return
+            yield data
+
+
+class StreamingPDFWriter:
+    """
+    逐页写入图片 PDF 的 writer
+
+    Usage:
+        with StreamingPDFWriter('deck.pdf') as writer:
+            for path in image_paths:
+                writer.add_image_page(path)
+    """
+
+    def __init__(self, output, page_width: float = DEFAULT_PAGE_WIDTH,
+                 page_height: float = DEFAULT_PAGE_HEIGHT):
+        """
+        Args:
+            output: 输出文件路径，或可写的文件对象（可以不支持 seek，例如 HTTP 响应流）
+            page_width: 页面宽度（pt）
+            page_height: 页面高度（pt）
+        """
+        self._owns_file = isinstance(output, (str, os.PathLike))
+        self._file = open(output, 'wb') if self._owns_file else output
+        self._out = _CountingWriter(self._file)
+        self.page_width = page_width
+        self.page_height = page_height
+        self.page_count = 0
+        # 对象 1 = Catalog，对象 2 = Pages（收尾时写入）
+        self._offsets: List[Optional[int]] = [None, None]
+        self._page_ids: List[int] = []
+        self._closed = False
+        self._out.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def _new_object_id(self) -> int:
+        self._offsets.append(None)
+        return len(self._offsets)
+
+    def _begin_object(self, object_id: int):
+        self._offsets[object_id - 1] = self._out.offset
+        self._out.write(f'{object_id} 0 obj\n'.encode('ascii'))
+
+    def _write_object(self, object_id: int, body: str):
+        self._begin_object(object_id)
+        self._out.write(body.encode('latin-1') + b'\nendobj\n')
+
+    def _write_stream(self, object_id: int, dictionary: str, chunks: Iterable[bytes]):
+        """写入流对象；长度写成间接对象，数据可以边读边写"""
+        length_id = self._new_object_id()
+        self._begin_object(object_id)
+        self._out.write(f'<< {dictionary} /Length {length_id} 0 R >>\nstream\n'.encode('latin-1'))
+        length = 0
+        for chunk in chunks:
+            self._out.write(chunk)
+            length += len(chunk)
+        self._out.write(b'\nendstream\nendobj\n')
+        self._write_object(length_id, str(length))
+
+    def add_image_page(self, image_path: str) -> bool:
+        """
+        追加一页图片（等比缩放并居中）
+
+        Returns:
+            False if the image does not exist (page skipped)
+        """
+        if not os.path.exists(image_path):
+            logger.warning(f"Image not found and will be skipped for PDF export: {image_path}")
+            return False
+
+        image_id = self._new_object_id()
+        width, height = self._write_image(image_id, image_path)
+
+        scale = min(self.page_width / width, self.page_height / height)
+        draw_width, draw_height = width * scale, height * scale
+        x = (self.page_width - draw_width) / 2
+        y = (self.page_height - draw_height) / 2
+        content = f'q {_fmt(draw_width)} 0 0 {_fmt(draw_height)} {_fmt(x)} {_fmt(y)} cm /Im0 Do Q'.encode('ascii')
+
+        content_id = self._new_object_id()
+        self._write_stream(content_id, '', [content])
+
+        page_id = self._new_object_id()
+        self._write_object(page_id, (
+            f'<< /Type /Page /Parent 2 0 R '
+            f'/MediaBox [0 0 {_fmt(self.page_width)} {_fmt(self.page_height)}] '
+            f'/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>'
+        ))
+        self._page_ids.append(page_id)
+        self.page_count += 1
+        return True
+
+    def _write_image(self, object_id: int, image_path: str) -> tuple:
+        """写入图片 XObject，返回像素尺寸"""
+        png = _read_png_header(image_path)
+        if png is not None:
+            width, height, bit_depth, color_type, interlace = png
+            if bit_depth == 8 and color_type in (0, 2) and interlace == 0:
+                colors = 3 if color_type == 2 else 1
+                self._write_stream(object_id, (
+                    f'/Type /XObject /Subtype /Image /Width {width} /Height {height} '
+                    f'/ColorSpace {"/DeviceRGB" if colors == 3 else "/DeviceGray"} /BitsPerComponent 8 '
+                    f'/Filter /FlateDecode '
+                    f'/DecodeParms << /Predictor 15 /Colors {colors} /BitsPerComponent 8 /Columns {width} >>'
+                ), _iter_png_idat(image_path))
+                return width, height
+
+        with Image.open(image_path) as img:
+            if img.format == 'JPEG' and img.mode in _JPEG_COLORSPACES:
+                width, height = img.size
+                decode = ' /Decode [1 0 1 0 1 0 1 0]' if img.mode == 'CMYK' else ''
+                self._write_stream(object_id, (
+                    f'/Type /XObject /Subtype /Image /Width {width} /Height {height} '
+                    f'/ColorSpace {_JPEG_COLORSPACES[img.mode]} /BitsPerComponent 8{decode} /Filter /DCTDecode'
+                ), _iter_file(image_path))
+                return width, height
+
+            # 需要解码转换的图片：透明通道铺白底，其余转为 RGB
+            if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+                rgba = img.convert('RGBA')
+                converted = Image.new('RGB', rgba.size, (255, 255, 255))
+                converted.paste(rgba, mask=rgba.split()[3])
+            else:
+                converted = img.convert('RGB')
+
+        width, height = converted.size
+        raw = converted.tobytes()
+        converted.close()
+        self._write_stream(object_id, (
+            f'/Type /XObject /Subtype /Image /Width {width} /Height {height} '
+            f'/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /FlateDecode'
+        ), [zlib.compress(raw, 6)])
+        return width, height
+
+    def close(self):
+        """写入页面树、Catalog、xref 和 trailer"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            kids = ' '.join(f'{page_id} 0 R' for page_id in self._page_ids)
+            self._write_object(2, f'<< /Type /Pages /Kids [{kids}] /Count {self.page_count} >>')
+            self._write_object(1, '<< /Type /Catalog /Pages 2 0 R >>')
+
+            xref_offset = self._out.offset
+            lines = [f'xref\n0 {len(self._offsets) + 1}\n', '0000000000 65535 f \n']
+            lines.extend(f'{offset:010d} 00000 n \n' for offset in self._offsets)
+            lines.append(f'trailer\n<< /Size {len(self._offsets) + 1} /Root 1 0 R >>\n'
+                         f'startxref\n{xref_offset}\n%%EOF\n')
+            self._out.write(''.join(lines).encode('ascii'))
+        finally:
+            if self._owns_file:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # 出错时不写 xref，只关闭文件（调用方负责删除不完整的文件）
+            self._closed = True
+            if self._owns_file:
+                self._file.close()
+        return False
+
+
+class _ChunkSink:
+    """不可 seek 的写入端，供生成器按页取出数据"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def write_pdf_from_images(image_paths: Iterable[str], output,
+                          progress_callback: Optional[Callable[[int], None]] = None,
+                          page_width: float = DEFAULT_PAGE_WIDTH,
+                          page_height: float = DEFAULT_PAGE_HEIGHT) -> int:
+    """
+    将图片逐页写入 PDF
+
+    Args:
+        image_paths: 按页序排列的图片路径（不存在的图片会被跳过）
+        output: 输出文件路径或可写文件对象
+        progress_callback: Optional callback(processed_count) called after each image
+        page_width: 页面宽度（pt）
+        page_height: 页面高度（pt）
+
+    Returns:
+        写入的页数
+    """
+    with StreamingPDFWriter(output, page_width, page_height) as writer:
+        for index, image_path in enumerate(image_paths, 1):
+            if writer.add_image_page(image_path) and progress_callback:
+                progress_callback(index)
+        return writer.page_count
+
+
+def iter_pdf_from_images(image_paths: Iterable[str],
+                         page_width: float = DEFAULT_PAGE_WIDTH,
+                         page_height: float = DEFAULT_PAGE_HEIGHT) -> Iterator[bytes]:
+    """
+    以字节块形式逐页生成 PDF，可直接作为 HTTP 流式响应体
+    """
+    sink = _ChunkSink()
+    with StreamingPDFWriter(sink, page_width, page_height) as writer:
+        for image_path in image_paths:
+            writer.add_image_page(image_path)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    yield sink.drain()
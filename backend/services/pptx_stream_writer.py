@@ -0,0 +1,297 @@
+"""
+Streaming PPTX writer - 纯图片 PPTX 的流式写入
+
+python-pptx 会把所有图片 blob 保存在内存中直到 prs.save()，导出大量高分辨率
+图片时内存随页数线性增长。这里直接把幻灯片 XML 和图片逐个写入 zip 流
+（磁盘文件或 HTTP 响应），每张图片写完即释放，内存占用与页数无关。
+
+母版、版式、主题等公共部件取自 python-pptx 自带的默认模板，
+与 ExportService 之前生成的文件结构一致（每页使用空白版式并铺满一张图片）。
+"""
+import io
+import os
+import logging
+import tempfile
+import zipfile
+from typing import Iterable, Iterator, Optional, Callable, Dict
+from xml.sax.saxutils import quoteattr
+
+import pptx
+from lxml import etree
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# 16:9（10 英寸 × 5.625 英寸），单位 EMU
+DEFAULT_SLIDE_WIDTH = 9144000
+DEFAULT_SLIDE_HEIGHT = 5143500
+
+_TEMPLATE_PATH = os.path.join(os.path.dirname(pptx.__file__), 'templates', 'default.pptx')
+_BLANK_LAYOUT = 'slideLayout7.xml'  # 默认模板中的 "Blank" 版式（prs.slide_layouts[6]）
+
+# 收尾时才能确定内容的部件
+_DEFERRED_PARTS = ('[Content_Types].xml', 'ppt/presentation.xml', 'ppt/_rels/presentation.xml.rels')
+
+_NS = {
+    'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+    'ct': 'http://schemas.openxmlformats.org/package/2006/content-types',
+}
+_RT_SLIDE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/slide'
+_RT_SLIDE_LAYOUT = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/slideLayout'
+_RT_IMAGE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/image'
+_CT_SLIDE = 'application/vnd.openxmlformats-officedocument.presentationml.slide+xml'
+
+# PIL 格式 -> (扩展名, content type)；其他格式转为 PNG
+_IMAGE_TYPES = {
+    'PNG': ('png', 'image/png'),
+    'JPEG': ('jpeg', 'image/jpeg'),
+    'GIF': ('gif', 'image/gif'),
+    'BMP': ('bmp', 'image/bmp'),
+    'TIFF': ('tiff', 'image/tiff'),
+}
+
+_SLIDE_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<p:sld xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+    'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main">'
+    '<p:cSld><p:spTree>'
+    '<p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr>'
+    '<p:grpSpPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="0" cy="0"/>'
+    '<a:chOff x="0" y="0"/><a:chExt cx="0" cy="0"/></a:xfrm></p:grpSpPr>'
+    '<p:pic><p:nvPicPr><p:cNvPr id="2" name="Picture 1" descr={descr}/>'
+    '<p:cNvPicPr><a:picLocks noChangeAspect="1"/></p:cNvPicPr><p:nvPr/></p:nvPicPr>'
+    '<p:blipFill><a:blip r:embed="rId2"/><a:stretch><a:fillRect/></a:stretch></p:blipFill>'
+    '<p:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+    '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></p:spPr></p:pic>'
+    '</p:spTree></p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sld>'
+)
+
+_SLIDE_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Id="rId1" Type="{_RT_SLIDE_LAYOUT}" Target="../slideLayouts/{_BLANK_LAYOUT}"/>'
+    f'<Relationship Id="rId2" Type="{_RT_IMAGE}" Target="../media/{{media_name}}"/>'
+    '</Relationships>'
+)
+
+
+class StreamingPPTXWriter:
+    """
+    逐页写入纯图片 PPTX 的 writer
+
+    Usage:
+        with StreamingPPTXWriter('deck.pptx') as writer:
+            for path in image_paths:
+                writer.add_image_slide(path)
+    """
+
+    def __init__(self, output, slide_width: int = DEFAULT_SLIDE_WIDTH,
+                 slide_height: int = DEFAULT_SLIDE_HEIGHT):
+        """
+        Args:
+            output: 输出文件路径，或可写的文件对象（可以不支持 seek，例如 HTTP 响应流）
+            slide_width: 幻灯片宽度（EMU）
+            slide_height: 幻灯片高度（EMU）
+        """
+        seekable = isinstance(output, (str, os.PathLike)) or \
+            (hasattr(output, 'seekable') and output.seekable())
+        # 图片本身已压缩：可 seek 时直接存储；不可 seek 的流中存储条目需要数据描述符，
+        # 部分阅读器不支持，因此改用最低压缩级别
+        self._media_compression = (zipfile.ZIP_STORED, None) if seekable else (zipfile.ZIP_DEFLATED, 1)
+        self._zip = zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+        self.slide_width = slide_width
+        self.slide_height = slide_height
+        self.slide_count = 0
+        self._media: Dict[str, str] = {}  # 图片绝对路径 -> media 文件名（同一图片只写入一次）
+        self._media_types: Dict[str, str] = {}  # 扩展名 -> content type
+        self._closed = False
+
+        with zipfile.ZipFile(_TEMPLATE_PATH) as template:
+            self._deferred = {name: template.read(name) for name in _DEFERRED_PARTS}
+            for info in template.infolist():
+                if info.filename not in _DEFERRED_PARTS:
+                    self._zip.writestr(info.filename, template.read(info.filename))
+
+    def add_image_slide(self, image_path: str) -> bool:
+        """
+        追加一页铺满整页的图片
+
+        Returns:
+            False if the image does not exist (slide skipped)
+        """
+        if not os.path.exists(image_path):
+            logger.warning(f"Image not found: {image_path}")
+            return False
+
+        media_name = self._media.get(os.path.abspath(image_path))
+        if media_name is None:
+            media_name = self._write_media(image_path)
+            self._media[os.path.abspath(image_path)] = media_name
+
+        self.slide_count += 1
+        number = self.slide_count
+        self._zip.writestr(f'ppt/slides/slide{number}.xml', _SLIDE_XML.format(
+            descr=quoteattr(os.path.basename(image_path)), cx=self.slide_width, cy=self.slide_height
+        ))
+        self._zip.writestr(f'ppt/slides/_rels/slide{number}.xml.rels',
+                           _SLIDE_RELS_XML.format(media_name=media_name))
+        return True
+
+    def _write_media(self, image_path: str) -> str:
+        with Image.open(image_path) as img:
+            image_type = _IMAGE_TYPES.get(img.format)
+            converted_path = None
+            if image_type is None:
+                # 不支持的格式（如 WEBP）转为 PNG
+                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
+                    converted_path = tmp.name
+                img.save(converted_path, format='PNG')
+                image_type = _IMAGE_TYPES['PNG']
+
+        ext, content_type = image_type
+        self._media_types[ext] = content_type
+        media_name = f'image{len(self._media) + 1}.{ext}'
+        compress_type, compress_level = self._media_compression
+        try:
+            # ZipFile.write 按块复制文件内容，不会整体读入内存
+            self._zip.write(converted_path or image_path, f'ppt/media/{media_name}',
+                            compress_type=compress_type, compresslevel=compress_level)
+        finally:
+            if converted_path:
+                os.unlink(converted_path)
+        return media_name
+
+    def close(self):
+        """写入依赖页数的部件（presentation.xml 等）并结束 zip"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._write_deferred_parts()
+        finally:
+            self._zip.close()
+
+    def _write_deferred_parts(self):
+        slide_rids = [f'rIdS{i}' for i in range(1, self.slide_count + 1)]
+
+        presentation = etree.fromstring(self._deferred['ppt/presentation.xml'])
+        sld_sz = presentation.find('p:sldSz', _NS)
+        sld_sz.set('cx', str(self.slide_width))
+        sld_sz.set('cy', str(self.slide_height))
+        sld_sz.attrib.pop('type', None)
+        if slide_rids:
+            sld_id_lst = etree.Element(f'{{{_NS["p"]}}}sldIdLst')
+            for i, rid in enumerate(slide_rids):
+                sld_id = etree.SubElement(sld_id_lst, f'{{{_NS["p"]}}}sldId')
+                sld_id.set('id', str(256 + i))
+                sld_id.set(f'{{{_NS["r"]}}}id', rid)
+            presentation.find('p:sldMasterIdLst', _NS).addnext(sld_id_lst)
+
+        rels = etree.fromstring(self._deferred['ppt/_rels/presentation.xml.rels'])
+        for i, rid in enumerate(slide_rids, 1):
+            rel = etree.SubElement(rels, f'{{{_NS["rel"]}}}Relationship')
+            rel.set('Id', rid)
+            rel.set('Type', _RT_SLIDE)
+            rel.set('Target', f'slides/slide{i}.xml')
+
+        content_types = etree.fromstring(self._deferred['[Content_Types].xml'])
+        existing_defaults = {el.get('Extension') for el in content_types.findall('ct:Default', _NS)}
+        for ext, content_type in sorted(self._media_types.items()):
+            if ext not in existing_defaults:
+                default = etree.Element(f'{{{_NS["ct"]}}}Default')
+                default.set('Extension', ext)
+                default.set('ContentType', content_type)
+                content_types.insert(0, default)
+        for i in range(1, self.slide_count + 1):
+            override = etree.SubElement(content_types, f'{{{_NS["ct"]}}}Override')
+            override.set('PartName', f'/ppt/slides/slide{i}.xml')
+            override.set('ContentType', _CT_SLIDE)
+
+        for name, root in (('ppt/presentation.xml', presentation),
+                           ('ppt/_rels/presentation.xml.rels', rels),
+                           ('[Content_Types].xml', content_types)):
+            self._zip.writestr(name, etree.tostring(root, xml_declaration=True,
+                                                    encoding='UTF-8', standalone=True))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # 出错时不再补写部件，只关闭底层 zip（调用方负责删除不完整的文件）
+            self._closed = True
+            self._zip.close()
+        return False
+
+
+class _ChunkSink:
+    """收集 zip 输出的不可 seek 的写入端，供生成器按页取出"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def write_pptx_from_images(image_paths: Iterable[str], output,
+                           progress_callback: Optional[Callable[[int], None]] = None,
+                           slide_width: int = DEFAULT_SLIDE_WIDTH,
+                           slide_height: int = DEFAULT_SLIDE_HEIGHT) -> int:
+    """
+    将图片逐页写入 PPTX
+
+    Args:
+        image_paths: 按页序排列的图片路径（不存在的图片会被跳过）
+        output: 输出文件路径或可写文件对象
+        progress_callback: Optional callback(processed_count) called after each image
+        slide_width: 幻灯片宽度（EMU）
+        slide_height: 幻灯片高度（EMU）
+
+    Returns:
+        写入的幻灯片数
+    """
+    with StreamingPPTXWriter(output, slide_width, slide_height) as writer:
+        for index, image_path in enumerate(image_paths, 1):
+            if writer.add_image_slide(image_path) and progress_callback:
+                progress_callback(index)
+        return writer.slide_count
+
+
+def iter_pptx_from_images(image_paths: Iterable[str],
+                          slide_width: int = DEFAULT_SLIDE_WIDTH,
+                          slide_height: int = DEFAULT_SLIDE_HEIGHT) -> Iterator[bytes]:
+    """
+    以字节块形式逐页生成 PPTX，可直接作为 HTTP 流式响应体
+
+    每写完一页就产出缓冲的数据，缓冲区最多只包含一张图片。
+    """
+    sink = _ChunkSink()
+    with StreamingPPTXWriter(sink, slide_width, slide_height) as writer:
+        for image_path in image_paths:
+            writer.add_image_slide(image_path)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    yield sink.drain()
+
+
+def pptx_bytes_from_images(image_paths: Iterable[str], **kwargs) -> bytes:
+    """写入内存并返回 PPTX 字节（仅用于小文件）"""
+    buffer = io.BytesIO()
+    write_pptx_from_images(image_paths, buffer, **kwargs)
+    return buffer.getvalue()
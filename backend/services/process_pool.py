@@ -0,0 +1,61 @@
+"""
+Shared process pool for CPU-bound export work
+
+导出时的 CPU 密集型工作（export_profiles 的图片压缩、可编辑 PPTX 的版面计算）
+共用一个进程池：
+
+- 首次使用时创建，之后所有导出复用，不再每次导出创建 / 销毁一组进程
+- 使用 forkserver（不支持时 spawn）启动进程：Flask 进程中有请求线程和后台任务线程，
+  直接 fork 可能复制到被其他线程持有的锁，导致子进程死锁
+- 进程数为 min(CPU 核数, EXPORT_PROCESS_WORKERS)，与图片生成线程数无关
+
+提交到池中的函数和参数必须可以 pickle（模块级函数 / 静态方法）。
+"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = Lock()
+
+
+def _start_method() -> str:
+    """forkserver 优先（Linux / macOS），否则 spawn（Windows）"""
+    return 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    获取共享进程池（懒创建）
+
+    工作进程意外退出后池会变为 broken，此时重新创建。
+    调用方不要 shutdown 返回的池；中途退出时 cancel 自己提交的 future 即可。
+    """
+    global _pool
+    pool = _pool
+    if pool is not None and not getattr(pool, '_broken', False):
+        return pool
+
+    with _pool_lock:
+        if _pool is None or getattr(_pool, '_broken', False):
+            from config import get_config
+            max_workers = max(1, min(os.cpu_count() or 1, get_config().EXPORT_PROCESS_WORKERS))
+            method = _start_method()
+            _pool = ProcessPoolExecutor(max_workers=max_workers,
+                                        mp_context=multiprocessing.get_context(method))
+            logger.info(f"Created export process pool ({max_workers} workers, {method})")
+        return _pool
+
+
+def shutdown_process_pool(wait: bool = True):
+    """关闭共享进程池（测试 / 进程退出时使用），下次 get_process_pool 重新创建"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
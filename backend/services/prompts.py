@@ -106,6 +106,18 @@ def _format_reference_files_xml(reference_files_content: Optional[List[Dict[str,
     return '\n'.join(xml_parts)
 
 
+def _format_relevant_reference_files(project_context: 'ProjectContext', *query_parts) -> str:
+    """
+    按查询检索与当前 prompt 相关的参考文件内容并格式化为 XML
+    
+    Args:
+        project_context: 项目上下文对象
+        query_parts: 组成检索查询的文本片段（None/空值会被忽略）
+    """
+    query = '\n'.join(str(part) for part in query_parts if part)
+    return _format_reference_files_xml(project_context.select_reference_files(query))
+
+
 def get_outline_generation_prompt(project_context: 'ProjectContext', language: str = None) -> str:
     """
     生成 PPT 大纲的 prompt
@@ -117,7 +129,7 @@ def get_outline_generation_prompt(project_context: 'ProjectContext', language: s
     Returns:
         格式化后的 prompt 字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    files_xml = _format_relevant_reference_files(project_context, project_context.idea_prompt)
     idea_prompt = project_context.idea_prompt or ""
     
     prompt = (f"""\
@@ -168,7 +180,7 @@ def get_outline_parsing_prompt(project_context: 'ProjectContext', language: str
     Returns:
         格式化后的 prompt 字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    files_xml = _format_relevant_reference_files(project_context, project_context.outline_text)
     outline_text = project_context.outline_text or ""
     
     prompt = (f"""\
@@ -222,38 +234,60 @@ Now parse the outline text above into the structured format. Return only the JSO
     return final_prompt
 
 
-def get_page_description_prompt(project_context: 'ProjectContext', outline: list, 
-                                page_outline: dict, page_index: int, 
-                                part_info: str = "",
-                                language: str = None) -> str:
+def _get_page_description_original_input(project_context: 'ProjectContext') -> str:
+    """根据项目类型选择最相关的原始输入"""
+    if project_context.creation_type == 'idea' and project_context.idea_prompt:
+        return project_context.idea_prompt
+    elif project_context.creation_type == 'outline' and project_context.outline_text:
+        return f"用户提供的大纲：\n{project_context.outline_text}"
+    elif project_context.creation_type == 'descriptions' and project_context.description_text:
+        return f"用户提供的描述：\n{project_context.description_text}"
+    return project_context.idea_prompt or ""
+
+
+def _get_page_description_intro(project_context: 'ProjectContext', outline: list) -> str:
+    """页面描述 prompt 中与具体页面无关的部分：原始需求与完整大纲"""
+    original_input = _get_page_description_original_input(project_context)
+    return f"""\
+我们正在为PPT的每一页生成内容描述。
+用户的原始需求是：\n{original_input}\n
+我们已经有了完整的大纲：\n{outline}\n"""
+
+
+def get_page_description_prompt_prefix(project_context: 'ProjectContext', outline: list) -> str:
     """
-    生成单个页面描述的 prompt
+    生成页面描述 prompt 的共享前缀（整套 PPT 所有页面相同）
+    
+    前缀只包含与具体页面无关的内容（参考文件、原始需求、完整大纲），
+    参考文件按整套大纲检索，保证逐页生成时前缀逐字节一致，可被服务端缓存复用。
     
     Args:
         project_context: 项目上下文对象，包含所有原始信息
         outline: 完整大纲
+        
+    Returns:
+        前缀字符串
+    """
+    files_xml = _format_relevant_reference_files(project_context, project_context.idea_prompt, outline)
+    return files_xml + _get_page_description_intro(project_context, outline)
+
+
+def get_page_description_prompt_suffix(page_outline: dict, page_index: int,
+                                       part_info: str = "",
+                                       language: str = None) -> str:
+    """
+    生成页面描述 prompt 中与具体页面相关的后缀
+    
+    Args:
         page_outline: 当前页面的大纲
         page_index: 页面编号（从1开始）
         part_info: 可选的章节信息
         
     Returns:
-        格式化后的 prompt 字符串
+        后缀字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
-    # 根据项目类型选择最相关的原始输入
-    if project_context.creation_type == 'idea' and project_context.idea_prompt:
-        original_input = project_context.idea_prompt
-    elif project_context.creation_type == 'outline' and project_context.outline_text:
-        original_input = f"用户提供的大纲：\n{project_context.outline_text}"
-    elif project_context.creation_type == 'descriptions' and project_context.description_text:
-        original_input = f"用户提供的描述：\n{project_context.description_text}"
-    else:
-        original_input = project_context.idea_prompt or ""
-    
-    prompt = (f"""\
-我们正在为PPT的每一页生成内容描述。
-用户的原始需求是：\n{original_input}\n
-我们已经有了完整的大纲：\n{outline}\n{part_info}
+    return (f"""\
+{part_info}
 现在请为第 {page_index} 页生成描述：
 {page_outline}
 {"**除非特殊要求，第一页的内容需要保持极简，只放标题副标题以及演讲人等（输出到标题后）, 不添加任何素材。**" if page_index == 1 else ""}
@@ -281,8 +315,81 @@ def get_page_description_prompt(project_context: 'ProjectContext', outline: list
 
 {get_language_instruction(language)}
 """)
+
+
+def get_batch_page_descriptions_prompt_suffix(pages: List[Dict], language: str = None) -> str:
+    """
+    一次生成多页描述的 prompt 后缀（与 get_page_description_prompt_prefix 共用前缀）
     
-    final_prompt = files_xml + prompt
+    Args:
+        pages: 本批次页面列表，每项包含 'page_index'（从1开始）、'page_outline'，可选 'part'
+        
+    Returns:
+        后缀字符串，要求模型返回 JSON 数组
+    """
+    page_lines = []
+    for page in pages:
+        part = f"（所属章节：{page['part']}）" if page.get('part') else ""
+        page_lines.append(f"第 {page['page_index']} 页{part}：{json.dumps(page['page_outline'], ensure_ascii=False)}")
+    pages_text = "\n".join(page_lines)
+    has_first_page = any(page['page_index'] == 1 for page in pages)
+    
+    return (f"""\
+现在请一次性为以下 {len(pages)} 页分别生成描述：
+{pages_text}
+{"**除非特殊要求，第一页的内容需要保持极简，只放标题副标题以及演讲人等（输出到标题后）, 不添加任何素材。**" if has_first_page else ""}
+
+【重要提示】生成的"页面文字"部分会直接渲染到PPT页面上，因此请务必注意：
+1. 文字内容要简洁精炼，每条要点控制在15-25字以内
+2. 条理清晰，使用列表形式组织内容
+3. 避免冗长的句子和复杂的表述
+4. 确保内容可读性强，适合在演示时展示
+5. 不要包含任何额外的说明性文字或注释
+
+每页描述的格式示例：
+页面标题：原始社会：与自然共生
+
+页面文字：
+- 狩猎采集文明：人类活动规模小，对环境影响有限
+- 依赖性强：生活完全依赖自然资源的直接供给
+- 适应而非改造：通过观察学习自然，发展生存技能
+- 影响特点：局部、短期、低强度，生态可自我恢复
+
+其他页面素材（如果文件中存在请积极添加，包括markdown图片链接、公式、表格等）
+
+【关于图片】如果参考文件中包含以 /files/ 开头的本地文件URL图片（例如 /files/mineru/xxx/image.png），请将这些图片以markdown格式输出，例如：![图片描述](/files/mineru/xxx/image.png)。这些图片会被包含在PPT页面中。
+
+请只返回一个 JSON 数组，每个元素对应上面的一页，格式如下，不要包含其他文字：
+[
+    {{"page_index": 页码, "description": "页面标题：...\\n\\n页面文字：\\n- ..."}},
+    ...
+]
+{get_language_instruction(language)}
+""")
+
+
+def get_page_description_prompt(project_context: 'ProjectContext', outline: list, 
+                                page_outline: dict, page_index: int, 
+                                part_info: str = "",
+                                language: str = None) -> str:
+    """
+    生成单个页面描述的 prompt
+    
+    Args:
+        project_context: 项目上下文对象，包含所有原始信息
+        outline: 完整大纲
+        page_outline: 当前页面的大纲
+        page_index: 页面编号（从1开始）
+        part_info: 可选的章节信息
+        
+    Returns:
+        格式化后的 prompt 字符串
+    """
+    # 单页生成时按当前页检索参考文件，批量生成请使用共享前缀 + 后缀
+    files_xml = _format_relevant_reference_files(project_context, project_context.idea_prompt, page_outline)
+    final_prompt = (files_xml
+                    + _get_page_description_intro(project_context, outline)
+                    + get_page_description_prompt_suffix(page_outline, page_index, part_info, language))
     logger.debug(f"[get_page_description_prompt] Final prompt:\n{final_prompt}")
     return final_prompt
 
@@ -401,7 +508,7 @@ def get_description_to_outline_prompt(project_context: 'ProjectContext', languag
     Returns:
         格式化后的 prompt 字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    files_xml = _format_relevant_reference_files(project_context, project_context.description_text)
     description_text = project_context.description_text or ""
     
     prompt = (f"""\
@@ -534,7 +641,7 @@ def get_outline_refinement_prompt(current_outline: List[Dict], user_requirement:
     Returns:
         格式化后的 prompt 字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    files_xml = _format_relevant_reference_files(project_context, user_requirement, project_context.idea_prompt, current_outline)
     
     # 处理空大纲的情况
     if not current_outline or len(current_outline) == 0:
@@ -629,7 +736,7 @@ def get_descriptions_refinement_prompt(current_descriptions: List[Dict], user_re
     Returns:
         格式化后的 prompt 字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    files_xml = _format_relevant_reference_files(project_context, user_requirement, project_context.idea_prompt, outline)
     
     # 构建之前的修改历史记录
     previous_req_text = ""
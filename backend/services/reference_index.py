@@ -0,0 +1,219 @@
+"""
+Reference Index - 参考文件分块与检索
+
+参考文件在解析完成时切分为 chunk 并持久化，生成 prompt 时按查询用 BM25 选出
+最相关的 chunk，并控制在 token 预算之内，避免每次调用都发送全部参考文件内容。
+"""
+import math
+import re
+import logging
+import threading
+from collections import Counter
+from typing import List, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_CJK_RE = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯]')
+_TOKEN_RE = re.compile(r'[a-z0-9]+|[぀-ヿ㐀-䶿一-鿿가-힯]+')
+_HEADING_RE = re.compile(r'^#{1,6}\s')
+
+EXCERPT_SEPARATOR = '\n\n[...]\n\n'
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本 token 数：CJK 字符约 1 token/字，其他字符约 4 字符/token
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    检索用分词：英文/数字按单词切分（小写），CJK 连续片段切分为二元组
+    """
+    tokens = []
+    for match in _TOKEN_RE.findall(text.lower()):
+        if _CJK_RE.match(match):
+            if len(match) == 1:
+                tokens.append(match)
+            else:
+                tokens.extend(match[i:i + 2] for i in range(len(match) - 1))
+        else:
+            tokens.append(match)
+    return tokens
+
+
+def _split_oversized(block: str, max_tokens: int) -> List[str]:
+    """按行、必要时按字符切分超过预算的单个段落"""
+    pieces, current, current_tokens = [], [], 0
+    for line in block.split('\n'):
+        line_tokens = estimate_tokens(line)
+        if line_tokens > max_tokens:
+            # 单行过长（如无换行的长段落），按字符硬切
+            step = max(1, len(line) * max_tokens // line_tokens)
+            sub_lines = [line[i:i + step] for i in range(0, len(line), step)]
+        else:
+            sub_lines = [line]
+        for sub in sub_lines:
+            sub_tokens = estimate_tokens(sub)
+            if current and current_tokens + sub_tokens > max_tokens:
+                pieces.append('\n'.join(current))
+                current, current_tokens = [], 0
+            current.append(sub)
+            current_tokens += sub_tokens
+    if current:
+        pieces.append('\n'.join(current))
+    return pieces
+
+
+def chunk_markdown(markdown: str, max_tokens: int = 500) -> List[str]:
+    """
+    将 markdown 按段落切分为不超过 max_tokens 的 chunk
+
+    标题会开启新的 chunk，保证 chunk 尽量对应文档中的一个小节。
+    """
+    if not markdown or not markdown.strip():
+        return []
+
+    chunks, current, current_tokens = [], [], 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append('\n\n'.join(current))
+        current, current_tokens = [], 0
+
+    for block in re.split(r'\n\s*\n', markdown):
+        block = block.strip()
+        if not block:
+            continue
+        block_tokens = estimate_tokens(block)
+        if _HEADING_RE.match(block):
+            flush()
+        if block_tokens > max_tokens:
+            flush()
+            chunks.extend(_split_oversized(block, max_tokens))
+            continue
+        if current and current_tokens + block_tokens > max_tokens:
+            flush()
+        current.append(block)
+        current_tokens += block_tokens
+    flush()
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 倒排统计（纯 Python，无额外依赖）"""
+
+    def __init__(self, documents: List[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(doc) for doc in documents]
+        self.doc_lens = [len(doc) for doc in documents]
+        self.avgdl = (sum(self.doc_lens) / len(documents)) if documents else 0.0
+        df = Counter()
+        for tf in self.term_freqs:
+            df.update(tf.keys())
+        n = len(documents)
+        self.idf = {term: math.log(1 + (n - freq + 0.5) / (freq + 0.5)) for term, freq in df.items()}
+
+    def scores(self, query_tokens: List[str]) -> List[float]:
+        """计算查询对每个文档的 BM25 分数"""
+        query_terms = [t for t in set(query_tokens) if t in self.idf]
+        results = []
+        for tf, dl in zip(self.term_freqs, self.doc_lens):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * dl / self.avgdl) if self.avgdl else self.k1
+            for term in query_terms:
+                freq = tf.get(term)
+                if freq:
+                    score += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            results.append(score)
+        return results
+
+
+class ReferenceIndex:
+    """
+    一组参考文件的检索索引
+
+    构建一次后可被同一个项目上下文的多次 prompt 复用（例如逐页生成描述），
+    可在多个线程中并发调用 select。
+    """
+
+    def __init__(self, reference_files: List[Dict], chunk_tokens: int = 500):
+        """
+        Args:
+            reference_files: 参考文件列表，每项包含 'filename'、'content'，可选预先切好的 'chunks'
+            chunk_tokens: 没有预切分 chunk 时使用的切分大小
+        """
+        self.files = reference_files or []
+        self.total_tokens = sum(estimate_tokens(f.get('content', '')) for f in self.files)
+        self._entries = None  # [(file_idx, chunk_idx, text, tokens)]
+        self._bm25 = None  # 最后赋值：不为 None 时 _entries 一定已构建
+        self._chunk_tokens = chunk_tokens
+        self._build_lock = threading.Lock()
+
+    def _build(self):
+        """切分并建立 BM25 索引（只构建一次；并发调用时其他线程等待构建完成）"""
+        with self._build_lock:
+            if self._bm25 is not None:
+                return
+            entries = []
+            for file_idx, file_info in enumerate(self.files):
+                chunks = file_info.get('chunks') or chunk_markdown(file_info.get('content', ''), self._chunk_tokens)
+                for chunk_idx, text in enumerate(chunks):
+                    entries.append((file_idx, chunk_idx, text, estimate_tokens(text)))
+            bm25 = BM25Index([tokenize(e[2]) for e in entries])
+            self._entries = entries
+            self._bm25 = bm25
+
+    def select(self, query: str, token_budget: int) -> List[Dict[str, str]]:
+        """
+        选出与查询最相关、总量不超过 token_budget 的参考内容
+
+        全部内容都在预算内时原样返回；否则按 BM25 分数贪心选取 chunk，
+        并按文件内原始顺序重新拼接。
+
+        Returns:
+            List of dicts with 'filename' and 'content' keys
+        """
+        if not self.files:
+            return []
+        if token_budget is None or token_budget <= 0 or self.total_tokens <= token_budget:
+            return [{'filename': f.get('filename', 'unknown'), 'content': f.get('content', '')} for f in self.files]
+
+        if self._bm25 is None:
+            self._build()
+        entries = self._entries
+
+        scores = self._bm25.scores(tokenize(query or ''))
+        # 分数相同（含全为 0）时按文档顺序，退化为取各文件开头部分
+        ranked = sorted(range(len(entries)), key=lambda i: (-scores[i], entries[i][0], entries[i][1]))
+
+        selected, used = [], 0
+        for i in ranked:
+            tokens = entries[i][3]
+            if used + tokens > token_budget:
+                continue
+            selected.append(i)
+            used += tokens
+
+        by_file: Dict[int, List[tuple]] = {}
+        for i in selected:
+            file_idx, chunk_idx, text, _ = entries[i]
+            by_file.setdefault(file_idx, []).append((chunk_idx, text))
+
+        result = []
+        for file_idx in sorted(by_file):
+            parts = [text for _, text in sorted(by_file[file_idx])]
+            result.append({
+                'filename': self.files[file_idx].get('filename', 'unknown'),
+                'content': EXCERPT_SEPARATOR.join(parts)
+            })
+
+        logger.debug(f"Selected {len(selected)}/{len(entries)} reference chunks "
+                     f"({used}/{self.total_tokens} tokens, budget {token_budget})")
+        return result
@@ -0,0 +1,130 @@
+"""
+Settings sync - 把数据库中的设置同步到 Flask app.config
+
+设置保存在数据库中，AI Provider、模型、并发数等在运行时从 app.config 读取。
+多进程部署时每个进程有自己的 app.config：
+
+- 本进程更新设置后由 settings_controller 调用 sync_settings_to_config
+- 其他进程更新设置（settings.version 加一）后，本进程在处理请求前调用
+  refresh_settings_config，确认间隔（SETTINGS_VERSION_CHECK_INTERVAL）到期时
+  读取版本号，版本变化时重新同步；任何请求都会触发，不依赖访问设置接口
+"""
+import logging
+from flask import current_app
+from models import Settings
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_settings_config() -> Settings:
+    """
+    读取缓存的设置（Settings.get_cached），版本号与 app.config['SETTINGS_VERSION'] 不同时同步到 app.config
+
+    确认间隔内不查询数据库、不加锁，适合在每个请求前调用。
+
+    Returns:
+        Read-only settings snapshot
+    """
+    settings = Settings.get_cached()
+    if current_app.config.get("SETTINGS_VERSION") != settings.version:
+        logger.info(f"Settings version changed: {current_app.config.get('SETTINGS_VERSION')} -> {settings.version}")
+        sync_settings_to_config(settings)
+    return settings
+
+
+def sync_settings_to_config(settings: Settings):
+    """Sync settings to Flask app config and clear AI service cache if needed"""
+    # Track if AI-related settings changed
+    ai_config_changed = False
+    
+    # Sync AI provider format (always sync, has default value)
+    if settings.ai_provider_format:
+        old_format = current_app.config.get("AI_PROVIDER_FORMAT")
+        if old_format != settings.ai_provider_format:
+            ai_config_changed = True
+            logger.info(f"AI provider format changed: {old_format} -> {settings.ai_provider_format}")
+        current_app.config["AI_PROVIDER_FORMAT"] = settings.ai_provider_format
+    
+    # Sync API configuration (sync to both GOOGLE_* and OPENAI_* to ensure DB settings override env vars)
+    if settings.api_base_url is not None:
+        old_base = current_app.config.get("GOOGLE_API_BASE")
+        if old_base != settings.api_base_url:
+            ai_config_changed = True
+            logger.info(f"API base URL changed: {old_base} -> {settings.api_base_url}")
+        current_app.config["GOOGLE_API_BASE"] = settings.api_base_url
+        current_app.config["OPENAI_API_BASE"] = settings.api_base_url
+    else:
+        # Remove overrides, fall back to env variables or defaults
+        if "GOOGLE_API_BASE" in current_app.config or "OPENAI_API_BASE" in current_app.config:
+            ai_config_changed = True
+            logger.info("API base URL cleared, falling back to defaults")
+        current_app.config.pop("GOOGLE_API_BASE", None)
+        current_app.config.pop("OPENAI_API_BASE", None)
+
+    if settings.api_key is not None:
+        old_key = current_app.config.get("GOOGLE_API_KEY")
+        # Only compare existence, not actual value for security
+        if (old_key is None) != (settings.api_key is None):
+            ai_config_changed = True
+            logger.info("API key updated")
+        current_app.config["GOOGLE_API_KEY"] = settings.api_key
+        current_app.config["OPENAI_API_KEY"] = settings.api_key
+    else:
+        # Remove overrides, fall back to env variables or defaults
+        if "GOOGLE_API_KEY" in current_app.config or "OPENAI_API_KEY" in current_app.config:
+            ai_config_changed = True
+            logger.info("API key cleared, falling back to defaults")
+        current_app.config.pop("GOOGLE_API_KEY", None)
+        current_app.config.pop("OPENAI_API_KEY", None)
+    
+    # Check model changes
+    if settings.text_model is not None:
+        old_model = current_app.config.get("TEXT_MODEL")
+        if old_model != settings.text_model:
+            ai_config_changed = True
+            logger.info(f"Text model changed: {old_model} -> {settings.text_model}")
+        current_app.config["TEXT_MODEL"] = settings.text_model
+    
+    if settings.image_model is not None:
+        old_model = current_app.config.get("IMAGE_MODEL")
+        if old_model != settings.image_model:
+            ai_config_changed = True
+            logger.info(f"Image model changed: {old_model} -> {settings.image_model}")
+        current_app.config["IMAGE_MODEL"] = settings.image_model
+
+    # Sync image generation settings
+    current_app.config["DEFAULT_RESOLUTION"] = settings.image_resolution
+    current_app.config["DEFAULT_ASPECT_RATIO"] = settings.image_aspect_ratio
+
+    # Sync worker settings
+    current_app.config["MAX_DESCRIPTION_WORKERS"] = settings.max_description_workers
+    current_app.config["MAX_IMAGE_WORKERS"] = settings.max_image_workers
+    logger.info(f"Updated worker settings: desc={settings.max_description_workers}, img={settings.max_image_workers}")
+
+    # Sync MinerU settings (optional, fall back to Config defaults if None)
+    if settings.mineru_api_base:
+        current_app.config["MINERU_API_BASE"] = settings.mineru_api_base
+        logger.info(f"Updated MINERU_API_BASE to: {settings.mineru_api_base}")
+    if settings.mineru_token is not None:
+        current_app.config["MINERU_TOKEN"] = settings.mineru_token
+        logger.info("Updated MINERU_TOKEN from settings")
+    if settings.image_caption_model:
+        current_app.config["IMAGE_CAPTION_MODEL"] = settings.image_caption_model
+        logger.info(f"Updated IMAGE_CAPTION_MODEL to: {settings.image_caption_model}")
+    if settings.output_language:
+        current_app.config["OUTPUT_LANGUAGE"] = settings.output_language
+        logger.info(f"Updated OUTPUT_LANGUAGE to: {settings.output_language}")
+    
+    # 已解析的 Provider 配置按版本号缓存（services.ai_providers），版本变化后重新解析
+    current_app.config["SETTINGS_VERSION"] = settings.version
+
+    # Rebuild AI providers in the background if AI-related configuration changed
+    # (providers whose config fingerprint is unchanged stay warm; any other change,
+    # e.g. a replaced API key, is also picked up by the next get_ai_service call)
+    if ai_config_changed:
+        try:
+            from services.ai_service_manager import refresh_ai_service
+            refresh_ai_service(current_app._get_current_object())
+            logger.warning("AI configuration changed - rebuilding changed providers in the background.")
+        except Exception as e:
+            logger.error(f"Failed to refresh AI service: {e}")
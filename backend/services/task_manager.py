@@ -3,12 +3,15 @@ Task Manager - handles background tasks using ThreadPoolExecutor
 No need for Celery or Redis, uses in-memory task tracking
 """
 import logging
+import os
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Callable, List, Dict, Any
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Callable, List, Dict, Any, Optional
 from datetime import datetime
-from sqlalchemy import func
 from models import db, Task, Page, Material, PageImageVersion
+from services.task_writes import TaskWriteBuffer
+from services.process_pool import get_process_pool
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -23,15 +26,23 @@ class TaskManager:
         self.active_tasks = {}  # task_id -> Future
         self.lock = threading.Lock()
     
-    def submit_task(self, task_id: str, func: Callable, *args, **kwargs):
-        """Submit a background task"""
-        future = self.executor.submit(func, task_id, *args, **kwargs)
+    def submit_task(self, task_id: str, func: Callable, *args, **kwargs) -> bool:
+        """
+        Submit a background task
         
+        Returns:
+            False if a task with the same ID is still active (nothing is submitted)
+        """
         with self.lock:
+            if task_id in self.active_tasks:
+                logger.info(f"Task {task_id} is already active, not submitting again")
+                return False
+            future = self.executor.submit(func, task_id, *args, **kwargs)
             self.active_tasks[task_id] = future
         
         # Add callback to clean up when done and log exceptions
         future.add_done_callback(lambda f: self._task_done_callback(task_id, f))
+        return True
     
     def _task_done_callback(self, task_id: str, future):
         """Handle task completion and log any exceptions"""
@@ -43,12 +54,12 @@ class TaskManager:
         except Exception as e:
             logger.error(f"Error in task callback for {task_id}: {e}", exc_info=True)
         finally:
-            self._cleanup_task(task_id)
+            self._cleanup_task(task_id, future)
     
-    def _cleanup_task(self, task_id: str):
-        """Clean up completed task"""
+    def _cleanup_task(self, task_id: str, future=None):
+        """Clean up completed task (only if the ID still belongs to this future)"""
         with self.lock:
-            if task_id in self.active_tasks:
+            if task_id in self.active_tasks and (future is None or self.active_tasks[task_id] is future):
                 del self.active_tasks[task_id]
     
     def is_task_active(self, task_id: str) -> bool:
@@ -66,7 +77,9 @@ task_manager = TaskManager(max_workers=4)
 
 
 def save_image_with_version(image, project_id: str, page_id: str, file_service, 
-                            page_obj=None, image_format: str = 'PNG') -> tuple[str, int]:
+                            page_obj=None, image_format: str = 'PNG',
+                            write_buffer: Optional[TaskWriteBuffer] = None,
+                            version_number: Optional[int] = None) -> tuple[str, int]:
     """
     保存图片并创建历史版本记录的公共函数
     
@@ -77,36 +90,54 @@ def save_image_with_version(image, project_id: str, page_id: str, file_service,
         file_service: FileService 实例
         page_obj: Page 对象（可选，如果提供则更新页面状态）
         image_format: 图片格式，默认 PNG
+        write_buffer: 批量生成任务的写缓冲（可选）；提供时版本记录和页面更新由缓冲区合并提交，
+            本函数只保存图片文件
+        version_number: 已通过 Page.allocate_image_versions 分配的版本号（可选，批量任务开始时统一分配）
     
     Returns:
         tuple: (image_path, version_number) - 图片路径和版本号
     
     这个函数会：
-    1. 计算下一个版本号（使用 MAX 查询确保安全）
-    2. 标记所有旧版本为非当前版本
+    1. 分配下一个版本号（页面计数器原地加一，UPDATE ... RETURNING）
+    2. 把当前版本标记为非当前版本（只更新一行）
     3. 保存图片到最终位置
     4. 创建新版本记录
     5. 如果提供了 page_obj，更新页面状态和图片路径
+    6. 使该项目已缓存的导出结果失效
     """
-    # 使用 MAX 查询确保版本号安全（即使有版本被删除也不会重复）
-    max_version = db.session.query(func.max(PageImageVersion.version_number)).filter_by(page_id=page_id).scalar() or 0
-    next_version = max_version + 1
+    if version_number is None:
+        # 计数器只增不减：即使有版本被删除或并发保存，版本号也不会重复
+        version_number = Page.allocate_image_versions([page_id]).get(page_id)
+        if version_number is None:
+            raise ValueError(f"Page {page_id} not found")
+        if write_buffer is not None:
+            # 版本记录稍后由缓冲区写入，先提交分配结果，释放页面行锁
+            db.session.commit()
     
-    # 批量更新：标记所有旧版本为非当前版本（使用单条 SQL 更高效）
-    PageImageVersion.query.filter_by(page_id=page_id).update({'is_current': False})
+    if write_buffer is not None:
+        image_path = file_service.save_generated_image(
+            image, project_id, page_id,
+            version_number=version_number,
+            image_format=image_format
+        )
+        write_buffer.add_image_version(project_id, page_id, image_path, version_number)
+        return image_path, version_number
     
     # 保存图片到最终位置（使用版本号）
     image_path = file_service.save_generated_image(
         image, project_id, page_id,
-        version_number=next_version,
+        version_number=version_number,
         image_format=image_format
     )
     
+    # 标记旧的当前版本为非当前版本（图片保存成功后再改，失败时不会留下没有当前版本的页面）
+    PageImageVersion.clear_current([page_id])
+    
     # 创建新版本记录
     new_version = PageImageVersion(
         page_id=page_id,
         image_path=image_path,
-        version_number=next_version,
+        version_number=version_number,
         is_current=True
     )
     db.session.add(new_version)
@@ -120,15 +151,19 @@ def save_image_with_version(image, project_id: str, page_id: str, file_service,
     # 提交事务
     db.session.commit()
     
-    logger.debug(f"Page {page_id} image saved as version {next_version}: {image_path}")
+    # 页面图片变化后，已缓存的 PPTX/PDF 导出结果不再有效
+    file_service.invalidate_export_cache(project_id)
     
-    return image_path, next_version
+    logger.debug(f"Page {page_id} image saved as version {version_number}: {image_path}")
+    
+    return image_path, version_number
 
 
 def generate_descriptions_task(task_id: str, project_id: str, ai_service, 
                                project_context, outline: List[Dict], 
                                max_workers: int = 5, app=None,
-                               language: str = None):
+                               language: str = None, mode: str = 'per_page',
+                               batch_size: int = 6):
     """
     Background task for generating page descriptions
     Based on demo.py gen_desc() with parallel processing
@@ -144,12 +179,15 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
         max_workers: Maximum number of parallel workers
         app: Flask app instance
         language: Output language (zh, en, ja, auto)
+        mode: 'per_page' (one call per page) or 'batched' (one JSON call per window of pages)
+        batch_size: Pages per window in batched mode
     """
     if app is None:
         raise ValueError("Flask app instance must be provided")
     
     # 在整个任务中保持应用上下文
     with app.app_context():
+        prompt_prefix = None
         try:
             # 重要：在后台线程开始时就获取task和设置状态
             task = Task.query.get(task_id)
@@ -178,6 +216,9 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
             })
             db.session.commit()
             
+            # 所有页面共享的 prompt 前缀（参考文件、原始需求、完整大纲）只构建/缓存一次
+            prompt_prefix = ai_service.prepare_page_description_prefix(project_context, outline)
+            
             # Generate descriptions in parallel
             completed = 0
             failed = 0
@@ -190,13 +231,11 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                 # 关键修复：在子线程中也需要应用上下文
                 with app.app_context():
                     try:
-                        # Get singleton AI service instance
-                        from services.ai_service_manager import get_ai_service
-                        ai_service = get_ai_service()
-                        
+                        # prompt_prefix 由 ai_service 创建，必须用同一个实例使用和释放
                         desc_text = ai_service.generate_page_description(
                             project_context, outline, page_outline, page_index,
-                            language=language
+                            language=language,
+                            prompt_prefix=prompt_prefix
                         )
                         
                         # Parse description into structured format
@@ -213,39 +252,65 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                         logger.error(f"Failed to generate description for page {page_id}: {error_detail}")
                         return (page_id, None, str(e))
             
-            # Use ThreadPoolExecutor for parallel generation
+            def generate_window_desc(window):
+                """
+                Generate descriptions for a window of pages
+                批量模式下一次请求生成整个窗口；解析失败或缺失的页面单独重试
+                """
+                if len(window) == 1:
+                    return [generate_single_desc(*window[0])]
+                
+                descriptions = {}
+                with app.app_context():
+                    try:
+                        descriptions = ai_service.generate_page_descriptions_batch(
+                            project_context, outline,
+                            [{'page_index': page_index, 'page_outline': page_outline}
+                             for _, page_outline, page_index in window],
+                            language=language,
+                            prompt_prefix=prompt_prefix
+                        )
+                    except Exception as e:
+                        logger.warning(f"Batch description failed for pages "
+                                       f"{[page_index for _, _, page_index in window]}, retrying individually: {e}")
+                
+                results = []
+                for page_id, page_outline, page_index in window:
+                    if page_index in descriptions:
+                        results.append((page_id, {
+                            "text": descriptions[page_index],
+                            "generated_at": datetime.utcnow().isoformat()
+                        }, None))
+                    else:
+                        results.append(generate_single_desc(page_id, page_outline, page_index))
+                return results
+            
             # 关键：提前提取 page.id，不要传递 ORM 对象到子线程
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [
-                    executor.submit(generate_single_desc, page.id, page_data, i)
-                    for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)
-                ]
+            page_items = [(page.id, page_data, i) for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)]
+            window_size = max(1, batch_size) if mode == 'batched' else 1
+            windows = [page_items[i:i + window_size] for i in range(0, len(page_items), window_size)]
+            logger.info(f"Generating descriptions in {mode} mode: {len(page_items)} pages, {len(windows)} requests")
+            
+            # Use ThreadPoolExecutor for parallel generation
+            # 页面内容和进度写入缓冲区，定期合并为一个事务提交
+            with TaskWriteBuffer(app, task_id) as writes, \
+                    ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(generate_window_desc, window) for window in windows]
                 
                 # Process results as they complete
                 for future in as_completed(futures):
-                    page_id, desc_content, error = future.result()
-                    
-                    db.session.expire_all()
-                    
-                    # Update page in database
-                    page = Page.query.get(page_id)
-                    if page:
+                    for page_id, desc_content, error in future.result():
                         if error:
-                            page.status = 'FAILED'
+                            writes.update_page(page_id, status='FAILED')
+                            writes.add_progress(failed=1)
                             failed += 1
                         else:
-                            page.set_description_content(desc_content)
-                            page.status = 'DESCRIPTION_GENERATED'
+                            writes.update_page(page_id, description_content=desc_content,
+                                               status='DESCRIPTION_GENERATED')
+                            writes.add_progress(completed=1)
                             completed += 1
-                        
-                        db.session.commit()
                     
-                    # Update task progress
-                    task = Task.query.get(task_id)
-                    if task:
-                        task.update_progress(completed=completed, failed=failed)
-                        db.session.commit()
-                        logger.info(f"Description Progress: {completed}/{len(pages)} pages completed")
+                    logger.info(f"Description Progress: {completed}/{len(pages)} pages completed")
             
             # Mark task as completed
             task = Task.query.get(task_id)
@@ -271,6 +336,9 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                 task.error_message = str(e)
                 task.completed_at = datetime.utcnow()
                 db.session.commit()
+        
+        finally:
+            ai_service.release_prompt_prefix(prompt_prefix)
 
 
 def generate_images_task(task_id: str, project_id: str, ai_service, file_service,
@@ -314,6 +382,8 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                 "completed": 0,
                 "failed": 0
             })
+            # 一条 UPDATE ... RETURNING 为所有页面分配本次的图片版本号，与进度一起提交
+            version_numbers = Page.allocate_image_versions([page.id for page in pages])
             db.session.commit()
             
             # Generate images in parallel
@@ -335,12 +405,13 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                             raise ValueError(f"Page {page_id} not found")
                         
                         # Update page status
-                        page_obj.status = 'GENERATING'
-                        db.session.commit()
+                        writes.update_page(page_id, status='GENERATING')
                         logger.debug(f"Page {page_id} status updated to GENERATING")
                         
                         # Get description content
                         desc_content = page_obj.get_description_content()
+                        # 结束只读事务，避免在调用 AI 期间一直持有数据库读快照
+                        db.session.rollback()
                         if not desc_content:
                             raise ValueError("No description content for page")
                         
@@ -396,10 +467,10 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                         if not image:
                             raise ValueError("Failed to generate image")
                         
-                        # 优化：直接在子线程中计算版本号并保存到最终位置
-                        # 每个页面独立，使用数据库事务保证版本号原子性，避免临时文件
+                        # 使用任务开始时分配的版本号直接保存到最终位置，避免临时文件
                         image_path, next_version = save_image_with_version(
-                            image, project_id, page_id, file_service, page_obj=page_obj
+                            image, project_id, page_id, file_service, write_buffer=writes,
+                            version_number=version_numbers.get(page_id)
                         )
                         
                         return (page_id, image_path, None)
@@ -412,7 +483,9 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
             
             # Use ThreadPoolExecutor for parallel generation
             # 关键：提前提取 page.id，不要传递 ORM 对象到子线程
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # 页面状态、图片版本和进度写入缓冲区，定期合并为一个事务提交
+            with TaskWriteBuffer(app, task_id, file_service=file_service) as writes, \
+                    ThreadPoolExecutor(max_workers=max_workers) as executor:
                 futures = [
                     executor.submit(generate_single_image, page.id, page_data, i)
                     for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)
@@ -422,27 +495,16 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                 for future in as_completed(futures):
                     page_id, image_path, error = future.result()
                     
-                    db.session.expire_all()
-                    
-                    # Update page in database (主要是为了更新失败状态)
-                    page = Page.query.get(page_id)
-                    if page:
-                        if error:
-                            page.status = 'FAILED'
-                            failed += 1
-                            db.session.commit()
-                        else:
-                            # 图片已在子线程中保存并创建版本记录，这里只需要更新计数
-                            completed += 1
-                            # 刷新页面对象以获取最新状态
-                            db.session.refresh(page)
+                    if error:
+                        writes.update_page(page_id, status='FAILED')
+                        writes.add_progress(failed=1)
+                        failed += 1
+                    else:
+                        # 图片版本已在子线程中写入缓冲区，这里只需要更新计数
+                        writes.add_progress(completed=1)
+                        completed += 1
                     
-                    # Update task progress
-                    task = Task.query.get(task_id)
-                    if task:
-                        task.update_progress(completed=completed, failed=failed)
-                        db.session.commit()
-                        logger.info(f"Image Progress: {completed}/{len(pages)} pages completed")
+                    logger.info(f"Image Progress: {completed}/{len(pages)} pages completed")
             
             # Mark task as completed
             task = Task.query.get(task_id)
@@ -799,6 +861,155 @@ def generate_material_image_task(task_id: str, project_id: str, prompt: str,
                     shutil.rmtree(temp_dir, ignore_errors=True)
 
 
+@contextmanager
+def _task_lease(task_id: str, app, lease_seconds: float):
+    """
+    在后台线程中每 lease_seconds / 4 秒刷新一次任务的 heartbeat_at 租约，退出时停止
+
+    其他进程据此判断任务是否仍在执行（见 export_controller._submit_export_task），
+    单页处理时间较长时租约也不会过期。
+    """
+    stop = threading.Event()
+    
+    def renew():
+        with app.app_context():
+            while not stop.wait(lease_seconds / 4):
+                try:
+                    if not Task.refresh_heartbeat(task_id):
+                        break
+                except Exception as e:
+                    db.session.rollback()
+                    logger.warning(f"Failed to renew lease of task {task_id}: {e}")
+    
+    thread = threading.Thread(target=renew, name=f'task-lease-{task_id[:8]}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def export_images_task(task_id: str, project_id: str, export_type: str, filename: str,
+                       image_paths: List[str], cache_key: str, file_service,
+                       profile: Optional[str] = None, app=None):
+    """
+    异步导出图片版 PPTX / PDF 的后台任务（大文件导出不占用请求线程）
+    
+    先写入临时文件再替换为目标文件，下载方不会读到写了一半的文件；
+    完成后登记到导出缓存，相同内容的后续导出直接命中。
+    
+    Args:
+        task_id: 任务 ID
+        project_id: 项目 ID
+        export_type: 'pptx' 或 'pdf'
+        filename: 输出文件名（已带扩展名）
+        image_paths: 按页序排列的图片绝对路径
+        cache_key: FileService.get_export_cache_key 计算的缓存 key
+        file_service: 文件服务实例
+        profile: 导出档位（archive / print / screen，见 export_profiles）
+        app: Flask 应用实例（必须从请求上下文传递）
+    """
+    if app is None:
+        raise ValueError("Flask app instance must be provided")
+    
+    with app.app_context():
+        from services.export_service import ExportService
+        
+        output_path = os.path.join(file_service._get_exports_dir(project_id), filename)
+        partial_path = f"{output_path}.{task_id}.part"
+        total = len(image_paths)
+        
+        try:
+            task = Task.query.get(task_id)
+            if not task:
+                logger.error(f"Task {task_id} not found")
+                return
+            
+            task.status = 'PROCESSING'
+            task.heartbeat_at = datetime.utcnow()
+            progress = task.get_progress()
+            progress.update({"total": total, "completed": 0, "failed": 0,
+                             "current_step": f"Building {export_type.upper()}"})
+            task.set_progress(progress)
+            db.session.commit()
+            
+            def report_progress(completed: int):
+                task = Task.query.get(task_id)
+                prog = task.get_progress()
+                prog['completed'] = completed
+                task.set_progress(prog)
+                db.session.commit()
+            
+            with _task_lease(task_id, app, app.config.get('EXPORT_TASK_LEASE_SECONDS', 60)):
+                if export_type == 'pptx':
+                    ExportService.create_pptx_from_images(image_paths, output_file=partial_path, profile=profile,
+                                                          progress_callback=report_progress)
+                elif export_type == 'pdf':
+                    ExportService.create_pdf_from_images(image_paths, output_file=partial_path, profile=profile,
+                                                         progress_callback=report_progress)
+                else:
+                    raise ValueError(f"Unsupported export type: {export_type}")
+            
+            os.replace(partial_path, output_path)
+            file_service.record_export(project_id, filename, cache_key)
+            logger.info(f"{export_type.upper()} exported: {output_path}")
+            
+            task = Task.query.get(task_id)
+            progress = task.get_progress()
+            progress.update({
+                "completed": total,
+                "current_step": "Complete",
+                "download_url": f"/files/{project_id}/exports/{filename}",
+                "filename": filename
+            })
+            task.status = 'COMPLETED'
+            task.completed_at = datetime.utcnow()
+            task.set_progress(progress)
+            db.session.commit()
+            logger.info(f"Task {task_id} COMPLETED - {export_type.upper()} exported")
+        
+        except Exception as e:
+            import traceback
+            error_detail = traceback.format_exc()
+            logger.error(f"Task {task_id} FAILED: {error_detail}")
+            
+            task = Task.query.get(task_id)
+            if task:
+                task.status = 'FAILED'
+                task.error_message = str(e)
+                task.completed_at = datetime.utcnow()
+                db.session.commit()
+        
+        finally:
+            if os.path.exists(partial_path):
+                os.unlink(partial_path)
+
+
+def _cached_clean_background(version, file_service, aspect_ratio: str, resolution: str):
+    """返回图片版本上仍可复用的干净背景绝对路径（生成参数一致且文件存在），否则 None"""
+    if version is None or not version.clean_background_path:
+        return None
+    expected_name = file_service.get_clean_background_filename(
+        version.page_id, version.version_number, aspect_ratio, resolution
+    )
+    if os.path.basename(version.clean_background_path) != expected_name:
+        return None
+    path = file_service.get_absolute_path(version.clean_background_path)
+    return path if os.path.exists(path) else None
+
+
+def _cached_mineru_layout(version, upload_folder: str):
+    """返回图片版本上仍可复用的 (MinerU 结果目录, 页面版面)，结果目录已不存在时返回 None"""
+    cached = version.get_mineru_layout() if version is not None else None
+    if not cached or not cached.get('mineru_dir'):
+        return None
+    mineru_dir = os.path.join(upload_folder, cached['mineru_dir'])
+    if not os.path.isdir(mineru_dir):
+        return None
+    return mineru_dir, {'items': cached.get('items') or [], 'page_size': cached.get('page_size')}
+
+
 def export_editable_pptx_task(
     task_id: str,
     project_id: str,
@@ -813,11 +1024,20 @@ def export_editable_pptx_task(
     """
     异步导出可编辑 PPTX 的后台任务
     
-    该任务执行以下步骤：
-    1. 并行生成干净背景图片（移除文字和图标）
-    2. 从原始图片创建临时 PDF
-    3. 使用 MinerU 解析 PDF
-    4. 从 MinerU 结果创建可编辑 PPTX
+    各阶段按依赖关系流水线执行，而不是严格串行：
+    
+        [干净背景 x N（并行）] ───────────┐
+                                          ├─> [按页顺序组装幻灯片] -> [保存 PPTX]
+        [原始图片 -> PDF -> MinerU 解析] ─┘
+    
+    MinerU 只依赖原始图片，因此与背景生成同时进行；某一页的背景和版面都就绪后
+    立即按页序追加到 PPTX 中，总耗时约为 max(各阶段) 而非 sum(各阶段)。
+    
+    干净背景和 MinerU 版面按幻灯片缓存在其当前图片对应的 PageImageVersion 上，
+    再次导出（或只修改了部分页面后导出）时只重新处理图片有变化的幻灯片。
+    
+    MINERU_LAYOUT_MODE=per_page 时，每页（或每 MINERU_PAGES_PER_TASK 页）生成单独的 PDF，
+    作为同一 MinerU 批次中的独立任务并行解析，每组解析完成即可组装对应的幻灯片。
     
     Args:
         task_id: 任务 ID
@@ -834,17 +1054,17 @@ def export_editable_pptx_task(
         raise ValueError("Flask app instance must be provided")
     
     with app.app_context():
+        import shutil
         import tempfile
-        import os
-        from concurrent.futures import ThreadPoolExecutor, as_completed
         from services.export_service import ExportService
         from services.file_parser_service import FileParserService
         from models import Project, Page
         from PIL import Image
         
-        # 跟踪临时文件以便清理
-        clean_background_paths = []
-        tmp_pdf_path = None
+        # 跟踪临时文件以便清理（已写入导出缓存的背景不会被删除）
+        clean_background_paths = {}
+        temp_background_paths = set()
+        image_paths = []
         
         try:
             # 更新任务状态为处理中
@@ -867,149 +1087,74 @@ def export_editable_pptx_task(
                 raise ValueError("No pages found for project")
             
             # 获取图片路径
-            image_paths = []
-            for page in pages:
-                if page.generated_image_path:
-                    abs_path = file_service.get_absolute_path(page.generated_image_path)
-                    image_paths.append(abs_path)
+            slide_pages = [page for page in pages if page.generated_image_path]
+            image_paths = [file_service.get_absolute_path(page.generated_image_path) for page in slide_pages]
             
             if not image_paths:
                 raise ValueError("No generated images found for project")
             
-            # 初始化进度
-            total_steps = len(image_paths) + 3  # backgrounds + pdf + mineru + pptx
-            task.set_progress({
-                "total": total_steps,
-                "completed": 0,
-                "failed": 0,
-                "current_step": "Generating clean backgrounds"
-            })
-            db.session.commit()
-            
-            # Step 1: 并行生成干净背景图片
-            logger.info(f"Step 1: Generating clean backgrounds for {len(image_paths)} images in parallel...")
-            
-            def generate_single_background(index, original_image_path, aspect_ratio, resolution, app):
-                """为单张图片生成干净背景（在线程池中运行）"""
-                with app.app_context():
-                    logger.info(f"Processing background {index+1}/{len(image_paths)}...")
-                    # Get singleton AI service instance
-                    from services.ai_service_manager import get_ai_service
-                    ai_service = get_ai_service()
-                    
-                    clean_bg_path = ExportService.generate_clean_background(
-                        original_image_path=original_image_path,
-                        ai_service=ai_service,
-                        aspect_ratio=aspect_ratio,
-                        resolution=resolution
-                    )
-                    
-                    if clean_bg_path:
-                        logger.info(f"Clean background {index+1} generated successfully")
-                        return (index, clean_bg_path)
-                    else:
-                        logger.warning(f"Failed to generate clean background {index+1}, using original image")
-                        return (index, original_image_path)
-            
-            # 并行处理背景
-            results = {}
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = {
-                    executor.submit(generate_single_background, i, path, aspect_ratio, resolution, app): i 
-                    for i, path in enumerate(image_paths)
-                }
-                
-                for future in as_completed(futures):
-                    try:
-                        index, clean_bg_path = future.result()
-                        results[index] = clean_bg_path
-                        
-                        # 更新进度
-                        task = Task.query.get(task_id)
-                        prog = task.get_progress()
-                        prog['completed'] = index + 1
-                        task.set_progress(prog)
-                        db.session.commit()
-                    except Exception as e:
-                        index = futures[future]
-                        logger.error(f"Error generating background {index+1}: {str(e)}")
-                        results[index] = image_paths[index]
-            
-            # 按索引排序结果以保持页面顺序
-            clean_background_paths = [results[i] for i in range(len(image_paths))]
-            logger.info(f"Generated {len(clean_background_paths)} clean backgrounds")
-            
-            # 更新进度：背景生成完成
-            task = Task.query.get(task_id)
-            prog = task.get_progress()
-            prog['completed'] = len(image_paths)
-            prog['current_step'] = "Creating PDF"
-            task.set_progress(prog)
-            db.session.commit()
-            
-            # Step 2: 从原始图片创建临时 PDF
-            logger.info("Step 2: Creating PDF for MinerU parsing...")
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_pdf:
-                tmp_pdf_path = tmp_pdf.name
-            
-            logger.info(f"Creating PDF from {len(image_paths)} images...")
-            ExportService.create_pdf_from_images(image_paths, output_file=tmp_pdf_path)
-            logger.info(f"PDF created: {tmp_pdf_path}")
-            
-            # 更新进度：PDF 完成
-            task = Task.query.get(task_id)
-            prog = task.get_progress()
-            prog['completed'] = len(image_paths) + 1
-            prog['current_step'] = "Parsing with MinerU"
-            task.set_progress(prog)
-            db.session.commit()
-            
-            # Step 3: 使用 MinerU 解析 PDF
-            logger.info("Step 3: Parsing PDF with MinerU...")
-            
             mineru_token = app.config.get('MINERU_TOKEN')
             mineru_api_base = app.config.get('MINERU_API_BASE', 'https://mineru.net')
+            upload_folder = app.config['UPLOAD_FOLDER']
+            layout_mode = app.config.get('MINERU_LAYOUT_MODE', 'deck')
+            pages_per_task = max(1, int(app.config.get('MINERU_PAGES_PER_TASK', 1)))
             
             if not mineru_token:
                 raise ValueError('MinerU token not configured')
             
             parser_service = FileParserService(
                 mineru_token=mineru_token,
-                mineru_api_base=mineru_api_base
+                mineru_api_base=mineru_api_base,
+                mineru_storage_dir=os.path.join(upload_folder, 'mineru_files')
             )
             
-            batch_id, markdown_content, extract_id, error_message, failed_image_count = parser_service.parse_file(
-                file_path=tmp_pdf_path,
-                filename=f'presentation_{project_id}.pdf'
-            )
+            # 当前图片对应的版本记录（导出缓存挂在版本上，图片变化即缓存失效）
+            versions = [
+                PageImageVersion.query.filter_by(page_id=page.id, image_path=page.generated_image_path)
+                .order_by(PageImageVersion.version_number.desc()).first()
+                for page in slide_pages
+            ]
+            
+            slide_layouts = {}  # index -> (mineru_result_dir, page_layout)
+            for index, version in enumerate(versions):
+                cached_background = _cached_clean_background(version, file_service, aspect_ratio, resolution)
+                if cached_background:
+                    clean_background_paths[index] = cached_background
+                cached_layout = _cached_mineru_layout(version, upload_folder)
+                if cached_layout:
+                    slide_layouts[index] = cached_layout
+            
+            background_pending = [i for i in range(len(image_paths)) if i not in clean_background_paths]
+            layout_pending = [i for i in range(len(image_paths)) if i not in slide_layouts]
+            logger.info(f"Export cache: reusing {len(image_paths) - len(background_pending)} clean backgrounds "
+                        f"and {len(image_paths) - len(layout_pending)} layouts of {len(image_paths)} slides")
+            
+            # 每组对应一个 MinerU 任务（PDF 第 j 页对应组内第 j 张幻灯片）
+            if layout_mode == 'per_page':
+                layout_groups = [layout_pending[i:i + pages_per_task]
+                                 for i in range(0, len(layout_pending), pages_per_task)]
+            else:
+                layout_groups = [layout_pending] if layout_pending else []
             
-            if error_message or not extract_id:
-                error_msg = error_message or 'Failed to parse PDF with MinerU - no extract_id returned'
-                raise ValueError(error_msg)
-            
-            logger.info(f"MinerU parsing completed, extract_id: {extract_id}")
+            # 初始化进度
+            total_steps = len(background_pending) + len(layout_groups) + 1  # backgrounds + mineru tasks + pptx
+            
+            def update_progress(completed_steps: int, current_step: str):
+                task = Task.query.get(task_id)
+                prog = task.get_progress()
+                prog['completed'] = completed_steps
+                prog['current_step'] = current_step
+                task.set_progress(prog)
+                db.session.commit()
             
-            # 更新进度：MinerU 完成
-            task = Task.query.get(task_id)
-            prog = task.get_progress()
-            prog['completed'] = len(image_paths) + 2
-            prog['current_step'] = "Creating editable PPTX"
-            task.set_progress(prog)
+            task.set_progress({
+                "total": total_steps,
+                "completed": 0,
+                "failed": 0,
+                "current_step": "Generating clean backgrounds and parsing with MinerU"
+            })
             db.session.commit()
             
-            # Step 4: 从 MinerU 结果创建可编辑 PPTX
-            logger.info(f"Step 4: Creating editable PPTX from MinerU results: {extract_id}")
-            
-            # 获取 MinerU 结果目录
-            mineru_result_dir = os.path.join(
-                app.config['UPLOAD_FOLDER'],
-                'mineru_files',
-                extract_id
-            )
-            
-            if not os.path.exists(mineru_result_dir):
-                raise ValueError(f'MinerU result directory not found: {mineru_result_dir}')
-            
             # 确定导出目录和文件名
             exports_dir = file_service._get_exports_dir(project_id)
             if not filename.endswith('.pptx'):
@@ -1024,7 +1169,6 @@ def export_editable_pptx_task(
                         pass
                 except (IOError, PermissionError) as e:
                     logger.warning(f"File is locked: {output_path}, generating new filename")
-                    from datetime import datetime
                     base_name = filename.rsplit('.pptx', 1)[0]
                     timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
                     filename = f"{base_name}_{timestamp}.pptx"
@@ -1032,20 +1176,209 @@ def export_editable_pptx_task(
                     logger.info(f"New filename: {filename}")
             
             # 从第一张图片获取幻灯片尺寸
-            first_img = Image.open(image_paths[0])
-            slide_width, slide_height = first_img.size
-            first_img.close()
-            
-            # 使用干净背景图片生成可编辑 PPTX 文件
-            logger.info(f"Creating editable PPTX with {len(clean_background_paths)} clean background images")
-            ExportService.create_editable_pptx_from_mineru(
-                mineru_result_dir=mineru_result_dir,
-                output_file=output_path,
-                slide_width_pixels=slide_width,
-                slide_height_pixels=slide_height,
-                background_images=clean_background_paths
-            )
+            with Image.open(image_paths[0]) as first_img:
+                slide_width, slide_height = first_img.size
+            
+            def generate_single_background(index, original_image_path):
+                """阶段 A：为单张图片生成干净背景（在线程池中运行）"""
+                with app.app_context():
+                    logger.info(f"Processing background {index+1}/{len(image_paths)}...")
+                    # Get singleton AI service instance
+                    from services.ai_service_manager import get_ai_service
+                    ai_service = get_ai_service()
+                    
+                    clean_bg_path = ExportService.generate_clean_background(
+                        original_image_path=original_image_path,
+                        ai_service=ai_service,
+                        aspect_ratio=aspect_ratio,
+                        resolution=resolution
+                    )
+                    
+                    if clean_bg_path:
+                        logger.info(f"Clean background {index+1} generated successfully")
+                        return clean_bg_path
+                    else:
+                        logger.warning(f"Failed to generate clean background {index+1}, using original image")
+                        return original_image_path
+            
+            def parse_layout(indices):
+                """阶段 B：从需要解析的原始图片创建临时 PDF 并用 MinerU 解析版面"""
+                with app.app_context():
+                    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_pdf:
+                        tmp_pdf_path = tmp_pdf.name
+                    try:
+                        logger.info(f"Creating PDF from {len(indices)} images for MinerU parsing...")
+                        ExportService.create_pdf_from_images([image_paths[i] for i in indices], output_file=tmp_pdf_path)
+                        
+                        batch_id, markdown_content, extract_id, error_message, failed_image_count = parser_service.parse_file(
+                            file_path=tmp_pdf_path,
+                            filename=f'presentation_{project_id}.pdf'
+                        )
+                    finally:
+                        if os.path.exists(tmp_pdf_path):
+                            os.unlink(tmp_pdf_path)
+                    
+                    if error_message or not extract_id:
+                        raise ValueError(error_message or 'Failed to parse PDF with MinerU - no extract_id returned')
+                    
+                    logger.info(f"MinerU parsing completed, extract_id: {extract_id}")
+                    
+                    # 获取 MinerU 结果目录
+                    mineru_result_dir = os.path.join(upload_folder, 'mineru_files', extract_id)
+                    if not os.path.exists(mineru_result_dir):
+                        raise ValueError(f'MinerU result directory not found: {mineru_result_dir}')
+                    
+                    return mineru_result_dir, ExportService.load_mineru_pages(mineru_result_dir)
+            
+            def parse_layout_batch(group_futures):
+                """阶段 B（per_page）：每组图片单独生成 PDF，作为同一 MinerU 批次中的独立任务并行解析"""
+                futures = list(group_futures)
+                tmp_dir = tempfile.mkdtemp(prefix='mineru_pages_')
+                
+                def on_result(task_index, extract_id, error_message):
+                    # 在解析服务的工作线程中回调：每组完成即交给主线程组装
+                    try:
+                        if error_message or not extract_id:
+                            raise ValueError(error_message or 'Failed to parse PDF with MinerU - no extract_id returned')
+                        mineru_result_dir = os.path.join(parser_service.mineru_storage_dir, extract_id)
+                        futures[task_index].set_result(
+                            (mineru_result_dir, ExportService.load_mineru_pages(mineru_result_dir))
+                        )
+                    except Exception as e:
+                        futures[task_index].set_exception(e)
+                
+                try:
+                    with app.app_context():
+                        files = []
+                        for task_index, future in enumerate(futures):
+                            pdf_path = os.path.join(tmp_dir, f'slides_{task_index}.pdf')
+                            ExportService.create_pdf_from_images(
+                                [image_paths[i] for i in group_futures[future]], output_file=pdf_path
+                            )
+                            files.append((pdf_path, f'presentation_{project_id}_{task_index}.pdf'))
+                        
+                        logger.info(f"Submitting {len(files)} MinerU tasks for {len(layout_pending)} slides...")
+                        parser_service.parse_batch(files, on_result=on_result, max_workers=max_workers)
+                except Exception as e:
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(e)
+                finally:
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+            
+            def record_layout(group, result):
+                """PDF 第 j 页对应组内第 j 张幻灯片，同时写入版本缓存"""
+                mineru_result_dir, layout_pages = result
+                mineru_dir_rel = os.path.relpath(mineru_result_dir, upload_folder)
+                for pdf_index, index in enumerate(group):
+                    page_layout = layout_pages.get(pdf_index) or {'items': [], 'page_size': None}
+                    slide_layouts[index] = (mineru_result_dir, page_layout)
+                    if versions[index] is not None:
+                        versions[index].set_mineru_layout({**page_layout, 'mineru_dir': mineru_dir_rel})
+            
+            def record_background(index, path):
+                """记录生成的背景；成功生成的背景移入导出缓存并挂到图片版本上"""
+                version = versions[index]
+                if path != image_paths[index] and version is not None:
+                    try:
+                        relative_path = file_service.save_clean_background(
+                            path, project_id, version.page_id, version.version_number, aspect_ratio, resolution
+                        )
+                    finally:
+                        # 移入缓存失败时临时背景还在原处，在这里删除
+                        if os.path.exists(path):
+                            try:
+                                os.unlink(path)
+                            except Exception as e:
+                                logger.warning(f"Failed to clean up temporary background: {str(e)}")
+                    version.clean_background_path = relative_path
+                    path = file_service.get_absolute_path(relative_path)
+                elif path != image_paths[index]:
+                    temp_background_paths.add(path)
+                clean_background_paths[index] = path
+            
+            # 阶段 C：按页序组装幻灯片（仅在主线程中操作 builder）
+            # 版面计算（缩放、字号、表格解析、图片定位）在共享进程池中完成，builder 只做最终组装
+            builder = ExportService.create_editable_pptx_builder(slide_width, slide_height)
+            spec_executor = get_process_pool()
+            slide_specs = {}
+            next_slide = 0
+            
+            def add_ready_slides(wait: bool = False):
+                nonlocal next_slide
+                for index, (mineru_result_dir, page_layout) in slide_layouts.items():
+                    if index not in slide_specs:
+                        slide_specs[index] = spec_executor.submit(
+                            ExportService.build_editable_slide_spec,
+                            page_layout, mineru_result_dir, slide_width, slide_height
+                        )
+                while next_slide < len(image_paths) and next_slide in clean_background_paths \
+                        and next_slide in slide_specs and (wait or slide_specs[next_slide].done()):
+                    ExportService.add_editable_slide_from_spec(
+                        builder,
+                        slide_specs[next_slide].result(),
+                        clean_background_paths[next_slide]
+                    )
+                    next_slide += 1
             
+            try:
+                completed_steps = 0
+                parsed_groups = 0
+                background_futures = {}
+                executor = ThreadPoolExecutor(max_workers=max_workers + 1)
+                try:
+                    if layout_mode == 'per_page' and layout_groups:
+                        layout_futures = {Future(): group for group in layout_groups}
+                        executor.submit(parse_layout_batch, layout_futures)
+                    elif layout_groups:
+                        layout_futures = {executor.submit(parse_layout, layout_groups[0]): layout_groups[0]}
+                    else:
+                        layout_futures = {}
+                    background_futures = {
+                        executor.submit(generate_single_background, i, image_paths[i]): i
+                        for i in background_pending
+                    }
+                    
+                    add_ready_slides()
+                    for future in as_completed([*layout_futures, *background_futures]):
+                        if future in layout_futures:
+                            # MinerU 失败时整个导出失败
+                            record_layout(layout_futures[future], future.result())
+                            parsed_groups += 1
+                            step = f"MinerU parsed {parsed_groups}/{len(layout_groups)} layout tasks"
+                        else:
+                            index = background_futures[future]
+                            try:
+                                record_background(index, future.result())
+                            except Exception as e:
+                                logger.error(f"Error generating background {index+1}: {str(e)}")
+                                clean_background_paths[index] = image_paths[index]
+                            step = f"Generated {len(clean_background_paths)}/{len(image_paths)} clean backgrounds"
+                        
+                        completed_steps += 1
+                        add_ready_slides()
+                        update_progress(completed_steps, step if next_slide == 0
+                                        else f"Assembled {next_slide}/{len(image_paths)} slides")
+                finally:
+                    # 出错时不再等待尚未开始的背景生成
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    # 出错后才完成的背景同样写入缓存，下次导出可直接复用
+                    for future, index in background_futures.items():
+                        if index not in clean_background_paths and future.done() \
+                                and not future.cancelled() and future.exception() is None:
+                            try:
+                                record_background(index, future.result())
+                            except Exception as e:
+                                logger.warning(f"Failed to cache background {index+1}: {str(e)}")
+                
+                add_ready_slides(wait=True)
+            finally:
+                # 进程池是共享的：只取消本次导出尚未开始的计算
+                for future in slide_specs.values():
+                    future.cancel()
+            update_progress(completed_steps, "Saving editable PPTX")
+            
+            ExportService.save_editable_pptx(builder, output_path)
             logger.info(f"Editable PPTX created: {output_path}")
             
             # 构建下载 URL
@@ -1055,7 +1388,6 @@ def export_editable_pptx_task(
             task = Task.query.get(task_id)
             if task:
                 task.status = 'COMPLETED'
-                from datetime import datetime
                 task.completed_at = datetime.utcnow()
                 task.set_progress({
                     "total": total_steps,
@@ -1073,31 +1405,20 @@ def export_editable_pptx_task(
             error_detail = traceback.format_exc()
             logger.error(f"Task {task_id} FAILED: {error_detail}")
             
-            # 标记任务为失败
+            # 标记任务为失败（已生成的导出缓存随之保存）
             task = Task.query.get(task_id)
             if task:
                 task.status = 'FAILED'
                 task.error_message = str(e)
-                from datetime import datetime
                 task.completed_at = datetime.utcnow()
                 db.session.commit()
         
         finally:
-            # 清理临时 PDF
-            if tmp_pdf_path and os.path.exists(tmp_pdf_path):
-                try:
-                    os.unlink(tmp_pdf_path)
-                    logger.info(f"Cleaned up temporary PDF: {tmp_pdf_path}")
-                except Exception as e:
-                    logger.warning(f"Failed to clean up temporary PDF: {str(e)}")
-            
-            # 清理临时干净背景图片
-            if clean_background_paths:
-                for bg_path in clean_background_paths:
-                    # 只删除临时文件（不是原始文件）
-                    if bg_path not in image_paths and os.path.exists(bg_path):
-                        try:
-                            os.unlink(bg_path)
-                            logger.debug(f"Cleaned up temporary background: {bg_path}")
-                        except Exception as e:
-                            logger.warning(f"Failed to clean up temporary background: {str(e)}")
+            # 清理未写入缓存的临时干净背景图片（不是原始文件）
+            for bg_path in temp_background_paths:
+                if bg_path not in image_paths and os.path.exists(bg_path):
+                    try:
+                        os.unlink(bg_path)
+                        logger.debug(f"Cleaned up temporary background: {bg_path}")
+                    except Exception as e:
+                        logger.warning(f"Failed to clean up temporary background: {str(e)}")
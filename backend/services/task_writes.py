@@ -0,0 +1,198 @@
+"""
+Task write buffer - write-behind buffer for generation tasks
+
+批量生成描述/图片时，工作线程和结果处理循环不再各自提交页面状态、图片版本和进度，
+而是写入缓冲区；缓冲区每 flush_interval 秒或累计 max_events 个事件时在一个事务中写入：
+
+- 同一页面的多次字段更新合并为最后的值（例如 GENERATING 之后紧接着 COMPLETED 只写一次）
+- 进度计数累加后用一条 UPDATE 原地增加（Task.increment_progress）
+- 新图片版本批量插入，同时把这些页面原来的当前版本标记为非当前版本；
+  同一页面在一次刷新中有多个新版本时，只有版本号最大的一个作为当前版本
+
+SQLite 下每次提交都是一次 fsync，多个工作线程同时提交时还要排队等文件锁。
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Page, PageImageVersion, Task
+
+logger = logging.getLogger(__name__)
+
+
+class TaskWriteBuffer:
+    """
+    生成任务的写缓冲（线程安全）
+
+    作为上下文管理器使用：进入时启动后台刷新线程，退出时写入剩余事件。
+    需要在工作线程全部结束后再退出（即 ThreadPoolExecutor 放在 with 块内部）。
+    """
+
+    def __init__(self, app, task_id: str, file_service=None,
+                 flush_interval: Optional[float] = None, max_events: Optional[int] = None):
+        """
+        Args:
+            app: Flask app（刷新在独立的应用上下文 / 会话中进行）
+            task_id: 进度计数所属的任务
+            file_service: 写入新图片版本后用于使导出缓存失效
+            flush_interval: 刷新间隔（秒），默认 TASK_WRITE_FLUSH_INTERVAL_MS
+            max_events: 累计多少个事件立即刷新，默认 TASK_WRITE_FLUSH_EVENTS
+        """
+        self.app = app
+        self.task_id = task_id
+        self.file_service = file_service
+        self.flush_interval = flush_interval if flush_interval is not None else \
+            app.config.get('TASK_WRITE_FLUSH_INTERVAL_MS', 500) / 1000
+        self.max_events = max_events or app.config.get('TASK_WRITE_FLUSH_EVENTS', 20)
+        self.flush_count = 0
+
+        self._lock = threading.Lock()  # 保护待写入的数据
+        self._flush_lock = threading.Lock()  # 同一时间只有一个刷新
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+        self._page_updates, self._versions, self._completed, self._failed, self._events = {}, [], 0, 0, 0
+
+    def update_page(self, page_id: str, **fields):
+        """更新页面字段（同一页面的多次更新合并，后写的值覆盖先写的值）"""
+        with self._lock:
+            self._page_updates.setdefault(page_id, {}).update(fields)
+            self._record_event()
+
+    def add_image_version(self, project_id: str, page_id: str, image_path: str, version_number: int):
+        """新图片版本：设为当前版本，并更新页面的图片路径和状态"""
+        with self._lock:
+            self._versions.append({
+                'project_id': project_id,
+                'page_id': page_id,
+                'image_path': image_path,
+                'version_number': version_number,
+            })
+            self._page_updates.setdefault(page_id, {}).update(generated_image_path=image_path, status='COMPLETED')
+            self._record_event()
+
+    def add_progress(self, completed: int = 0, failed: int = 0):
+        """累加任务进度计数"""
+        with self._lock:
+            self._completed += completed
+            self._failed += failed
+            self._record_event()
+
+    def _record_event(self):
+        """调用方需持有 _lock"""
+        self._events += 1
+        if self._events >= self.max_events:
+            self._wakeup.set()
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name=f'task-writes-{self.task_id}', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        try:
+            self.flush()
+        except IntegrityError:
+            # 违反约束的图片版本已丢弃，其余放回缓冲区的更新再写一次
+            self.flush()
+        return False
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._closed:
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                # 事件已放回缓冲区，下次刷新（或退出时）重试
+                logger.error(f"Task {self.task_id}: buffered write failed, will retry: {e}", exc_info=True)
+
+    def flush(self) -> bool:
+        """
+        在一个事务中写入所有待写事件
+
+        Returns:
+            是否有数据写入
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._events:
+                    return False
+                page_updates, versions, completed, failed = \
+                    self._page_updates, self._versions, self._completed, self._failed
+                self._page_updates, self._versions, self._completed, self._failed, self._events = {}, [], 0, 0, 0
+
+            with self.app.app_context():
+                try:
+                    self._write(page_updates, versions, completed, failed)
+                    db.session.commit()
+                except IntegrityError:
+                    # 重试同一批图片版本只会再次违反约束：丢弃这些版本，页面更新和进度放回缓冲区
+                    db.session.rollback()
+                    logger.error(f"Task {self.task_id}: dropping {len(versions)} image version(s) "
+                                 f"that violate a constraint")
+                    for version in versions:
+                        page_updates.get(version['page_id'], {}).pop('generated_image_path', None)
+                    self._requeue(page_updates, [], completed, failed)
+                    raise
+                except Exception:
+                    db.session.rollback()
+                    self._requeue(page_updates, versions, completed, failed)
+                    raise
+
+            self.flush_count += 1
+            if versions and self.file_service:
+                # 页面图片变化后，已缓存的 PPTX/PDF 导出结果不再有效
+                for project_id in {version['project_id'] for version in versions}:
+                    self.file_service.invalidate_export_cache(project_id)
+            return True
+
+    def _write(self, page_updates, versions, completed, failed):
+        now = datetime.utcnow()
+        if versions:
+            # 每个页面最多一个当前版本（uq_page_image_versions_current）：取本批中版本号最大的
+            latest = {}
+            for version in versions:
+                known = latest.get(version['page_id'])
+                if known is None or version['version_number'] > known['version_number']:
+                    latest[version['page_id']] = version
+            for page_id, version in latest.items():
+                page_updates.setdefault(page_id, {})['generated_image_path'] = version['image_path']
+
+            PageImageVersion.clear_current(set(latest))
+            versions_table = PageImageVersion.__table__
+            db.session.execute(insert(versions_table), [
+                {key: value for key, value in version.items() if key != 'project_id'}
+                | {'is_current': version is latest[version['page_id']], 'created_at': now}
+                for version in versions
+            ])
+
+        # executemany 要求每组参数的键相同：按更新的字段分组
+        groups = {}
+        for page_id, fields in page_updates.items():
+            groups.setdefault(tuple(sorted(fields)), []).append({'_page_id': page_id, 'updated_at': now, **fields})
+        pages_table = Page.__table__
+        for rows in groups.values():
+            db.session.execute(update(pages_table).where(pages_table.c.id == bindparam('_page_id')), rows)
+
+        if completed or failed:
+            Task.increment_progress(self.task_id, completed=completed, failed=failed)
+
+    def _requeue(self, page_updates, versions, completed, failed):
+        """写入失败时放回缓冲区（之后记录的更新优先）"""
+        with self._lock:
+            for page_id, fields in page_updates.items():
+                self._page_updates[page_id] = {**fields, **self._page_updates.get(page_id, {})}
+            self._versions = versions + self._versions
+            self._completed += completed
+            self._failed += failed
+            self._events += 1
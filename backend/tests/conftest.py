@@ -29,19 +29,19 @@ def app():
     temp_dir = tempfile.mkdtemp()
     temp_db = os.path.join(temp_dir, 'test.db')
     
-    # 设置测试数据库路径
-    os.environ['DATABASE_URL'] = f'sqlite:///{temp_db}'
-    
-    # 现在导入app
+    # 现在导入app（导入时会用 .env 覆盖环境变量，所以数据库地址在导入之后设置）
     from app import create_app
     
+    # 设置测试数据库：默认临时 SQLite 文件；设置 TEST_DATABASE_URL 时使用该数据库（例如本地 PostgreSQL 容器）
+    external_db = os.environ.get('TEST_DATABASE_URL')
+    os.environ['DATABASE_URL'] = external_db or f'sqlite:///{temp_db}'
+    
     # 使用工厂函数创建测试应用
     test_app = create_app()
     
     # 覆盖配置
     test_app.config.update({
         'TESTING': True,
-        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{temp_db}',
         'WTF_CSRF_ENABLED': False,
         'UPLOAD_FOLDER': temp_dir,
     })
@@ -49,11 +49,19 @@ def app():
     # 创建应用上下文
     with test_app.app_context():
         from models import db
+        if external_db:
+            db.drop_all()  # 清掉上次运行遗留的表结构
         db.create_all()
     
     yield test_app
     
     # 清理
+    if external_db:
+        with test_app.app_context():
+            from models import db
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
     import shutil
     try:
         shutil.rmtree(temp_dir)
@@ -72,6 +80,12 @@ def client(app):
             for table in reversed(db.metadata.sorted_tables):
                 db.session.execute(table.delete())
             db.session.commit()
+            # 设置行已删除，丢弃进程内缓存的设置快照，并重新创建、同步到 app.config
+            # （每个请求前都会确认设置版本，提前加载避免计入测试中的查询）
+            from models import Settings
+            from services.settings_sync import refresh_settings_config
+            Settings.invalidate_cache()
+            refresh_settings_config()
             yield test_client
             db.session.rollback()
 
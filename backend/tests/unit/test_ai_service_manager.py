@@ -0,0 +1,118 @@
+"""
+AIService / Provider 注册表单元测试
+"""
+
+import gc
+from unittest.mock import patch
+
+import pytest
+from conftest import assert_success_response
+
+
+class FakeProvider:
+    """记录构建参数的假 Provider"""
+
+    def __init__(self, model):
+        self.model = model
+
+
+@pytest.fixture
+def factories(app):
+    """替换 Provider 工厂函数，记录每次构建的模型；前后清空注册表，并还原 app.config"""
+    from services.ai_service_manager import clear_ai_service_cache
+    built = {'text': [], 'image': []}
+
+    def make(kind):
+        def factory(model):
+            built[kind].append(model)
+            return FakeProvider(model)
+        return factory
+
+    clear_ai_service_cache()
+    with patch('services.ai_service_manager.get_text_provider', side_effect=make('text')), \
+         patch('services.ai_service_manager.get_image_provider', side_effect=make('image')), \
+         patch.dict(app.config, {
+             'AI_PROVIDER_FORMAT': 'gemini', 'GOOGLE_API_KEY': 'key-1', 'GOOGLE_API_BASE': '',
+             'TEXT_MODEL': 'text-a', 'IMAGE_MODEL': 'image-a', 'SETTINGS_VERSION': 1,
+         }):
+        yield built
+    clear_ai_service_cache()
+
+
+class TestProviderRegistry:
+    """按配置指纹复用 / 替换 Provider"""
+
+    def test_reuses_service_for_same_config(self, app, factories):
+        """测试配置不变时复用同一个 AIService，Provider 只构建一次"""
+        from services.ai_service_manager import get_ai_service
+        with app.app_context():
+            service = get_ai_service()
+            assert get_ai_service() is service
+
+        assert factories == {'text': ['text-a'], 'image': ['image-a']}
+
+    def test_only_changed_provider_is_rebuilt(self, app, factories):
+        """测试只修改图片模型时，文本 Provider 保持不变；旧 AIService 仍可被进行中的任务使用"""
+        from services.ai_service_manager import get_ai_service, get_provider_cache_info
+        with app.app_context():
+            in_flight = get_ai_service()
+            app.config['IMAGE_MODEL'] = 'image-b'
+            service = get_ai_service()
+
+            assert service is not in_flight
+            assert service.text_provider is in_flight.text_provider
+            assert service.image_provider.model == 'image-b'
+            assert in_flight.image_provider.model == 'image-a'
+            assert get_provider_cache_info() == {
+                'text_providers': ['text-a'], 'image_providers': ['image-b'], 'total_cached': 2, 'draining': 1,
+            }
+
+            # 进行中的任务结束、释放引用后，旧 Provider 随之释放
+            del in_flight
+            gc.collect()
+            assert get_provider_cache_info()['draining'] == 0
+
+    def test_api_key_change_rebuilds_providers(self, app, factories):
+        """测试 API Key 变化（设置版本号变化）后两个 Provider 都重新构建"""
+        from services.ai_service_manager import get_ai_service
+        with app.app_context():
+            old = get_ai_service()
+            app.config.update({'GOOGLE_API_KEY': 'key-2', 'SETTINGS_VERSION': 2})
+            new = get_ai_service()
+
+        assert new.text_provider is not old.text_provider
+        assert new.image_provider is not old.image_provider
+        assert len(factories['text']) == len(factories['image']) == 2
+
+    def test_refresh_builds_in_background(self, app, factories):
+        """测试 refresh_ai_service 在后台线程中完成切换，之后的请求直接使用新 AIService"""
+        from services.ai_service_manager import get_ai_service, refresh_ai_service
+        with app.app_context():
+            get_ai_service()
+            app.config['TEXT_MODEL'] = 'text-b'
+        refresh_ai_service(app).join(timeout=5)
+
+        assert factories['text'] == ['text-a', 'text-b']
+        with app.app_context():
+            assert get_ai_service().text_provider.model == 'text-b'
+        assert len(factories['text']) == 2
+
+    def test_settings_update_keeps_unchanged_provider_warm(self, client, app, factories):
+        """测试通过设置接口修改文本模型：后台重建文本 Provider，图片 Provider 不变"""
+        from services.ai_service_manager import get_ai_service, refresh_ai_service
+        # 先把数据库中的设置（API Key 等）同步到 app.config
+        assert_success_response(client.put('/api/settings', json={'text_model': 'text-a'}))
+        with app.app_context():
+            before = get_ai_service()
+
+        # 等待后台重建完成
+        with patch('services.ai_service_manager.refresh_ai_service',
+                   side_effect=lambda target: refresh_ai_service(target).join(timeout=5)) as refresh:
+            response = client.put('/api/settings', json={'text_model': 'text-b'})
+        assert_success_response(response)
+        refresh.assert_called_once()
+
+        with app.app_context():
+            after = get_ai_service()
+        assert after.text_provider.model == 'text-b'
+        assert after.image_provider is before.image_provider
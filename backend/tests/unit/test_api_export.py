@@ -0,0 +1,406 @@
+"""
+导出API单元测试
+"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+from conftest import assert_success_response
+
+
+@pytest.fixture
+def exportable_project(client, app):
+    """创建两页已生成图片的项目"""
+    from models import db, Project, Page
+    project = Project(idea_prompt='导出缓存', creation_type='idea', status='COMPLETED')
+    db.session.add(project)
+    db.session.flush()
+
+    for i in range(2):
+        page = Page(project_id=project.id, order_index=i, status='COMPLETED')
+        db.session.add(page)
+        db.session.flush()
+        rel_path = f'{project.id}/pages/{page.id}_v1.png'
+        abs_path = os.path.join(app.config['UPLOAD_FOLDER'], rel_path)
+        os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+        Image.new('RGB', (320, 180), color=(i * 100, 50, 50)).save(abs_path)
+        page.generated_image_path = rel_path
+    db.session.commit()
+    return project.id
+
+
+class TestExportCache:
+    """导出结果缓存测试"""
+
+    @pytest.mark.parametrize('export_type,builder', [
+        ('pptx', 'create_pptx_from_images'),
+        ('pdf', 'create_pdf_from_images'),
+    ])
+    def test_repeat_export_returns_cached_file(self, client, app, exportable_project, export_type, builder):
+        """测试页面图片未变化时直接返回已生成的文件"""
+        from services.export_service import ExportService
+        original = getattr(ExportService, builder)
+
+        with patch.object(ExportService, builder, side_effect=original) as mock_builder:
+            first = client.get(f'/api/projects/{exportable_project}/export/{export_type}?filename=deck')
+            second = client.get(f'/api/projects/{exportable_project}/export/{export_type}?filename=deck')
+            # 另一个文件名命中同一份缓存：硬链接而不是重新生成
+            renamed = client.get(f'/api/projects/{exportable_project}/export/{export_type}?filename=copy')
+
+        assert assert_success_response(first)['data']['cached'] is False
+        assert assert_success_response(second)['data']['cached'] is True
+        data = assert_success_response(renamed)['data']
+        assert data['cached'] is True
+        assert data['download_url'].endswith(f'/exports/copy.{export_type}')
+        assert mock_builder.call_count == 1
+        exports_dir = os.path.join(app.config['UPLOAD_FOLDER'], exportable_project, 'exports')
+        assert os.path.samefile(os.path.join(exports_dir, f'deck.{export_type}'),
+                                os.path.join(exports_dir, f'copy.{export_type}'))
+
+    def test_cache_hit_is_copied_when_link_fails(self, client, app, exportable_project):
+        """测试文件系统不支持硬链接时退回复制"""
+        client.get(f'/api/projects/{exportable_project}/export/pdf?filename=deck')
+
+        with patch('services.file_service.os.link', side_effect=OSError('not supported')):
+            renamed = client.get(f'/api/projects/{exportable_project}/export/pdf?filename=copy')
+
+        assert assert_success_response(renamed)['data']['cached'] is True
+        exports_dir = os.path.join(app.config['UPLOAD_FOLDER'], exportable_project, 'exports')
+        deck, copy = (os.path.join(exports_dir, name) for name in ('deck.pdf', 'copy.pdf'))
+        assert not os.path.samefile(deck, copy)
+        with open(deck, 'rb') as a, open(copy, 'rb') as b:
+            assert a.read() == b.read()
+        assert not [name for name in os.listdir(exports_dir) if name.endswith('.tmp')]
+
+    def test_new_image_version_invalidates_cache(self, client, app, exportable_project):
+        """测试 save_image_with_version 生成新版本后重新导出"""
+        from models import Page
+        from services.export_service import ExportService
+        from services.file_service import FileService
+        from services.task_manager import save_image_with_version
+
+        url = f'/api/projects/{exportable_project}/export/pptx?filename=deck'
+        assert assert_success_response(client.get(url))['data']['cached'] is False
+
+        page = Page.query.filter_by(project_id=exportable_project, order_index=0).first()
+        save_image_with_version(Image.new('RGB', (320, 180), color='black'), exportable_project, page.id,
+                                FileService(app.config['UPLOAD_FOLDER']), page_obj=page)
+
+        original = ExportService.create_pptx_from_images
+        with patch.object(ExportService, 'create_pptx_from_images', side_effect=original) as mock_builder:
+            response = client.get(url)
+
+        assert assert_success_response(response)['data']['cached'] is False
+        assert mock_builder.call_count == 1
+
+    def test_overwritten_file_is_not_served_from_cache(self, client, app, exportable_project):
+        """测试导出文件被其他操作覆盖后不再视为缓存命中"""
+        url = f'/api/projects/{exportable_project}/export/pdf?filename=deck'
+        assert_success_response(client.get(url))
+
+        output = os.path.join(app.config['UPLOAD_FOLDER'], exportable_project, 'exports', 'deck.pdf')
+        with open(output, 'ab') as f:
+            f.write(b'%% appended')
+
+        assert assert_success_response(client.get(url))['data']['cached'] is False
+
+
+class TestAsyncExport:
+    """大文件导出走后台任务测试"""
+
+    def test_large_export_is_submitted_as_task_and_deduplicated(self, client, app, exportable_project):
+        """测试超过同步阈值时提交任务，并发的相同请求复用同一任务"""
+        from models import Task
+        from services.task_manager import export_images_task
+
+        url = f'/api/projects/{exportable_project}/export/pptx?filename=deck'
+        with patch.dict(app.config, {'SYNC_EXPORT_MAX_PAGES': 1}), \
+             patch('services.task_manager.task_manager.submit_task') as mock_submit:
+            first = assert_success_response(client.get(url))['data']
+            second = assert_success_response(client.get(url))['data']
+
+        assert 'download_url' not in first
+        assert first['task_id'] == second['task_id']
+        assert mock_submit.call_count == 1
+
+        # 在当前线程中执行被提交的任务
+        task_id, func = mock_submit.call_args.args
+        assert func is export_images_task
+        func(task_id, **mock_submit.call_args.kwargs)
+
+        task = Task.query.get(task_id)
+        assert task.status == 'COMPLETED', task.error_message
+        progress = task.get_progress()
+        assert progress['completed'] == progress['total'] == 2
+        assert progress['download_url'] == f'/files/{exportable_project}/exports/deck.pptx'
+        exports_dir = os.path.join(app.config['UPLOAD_FOLDER'], exportable_project, 'exports')
+        assert os.path.exists(os.path.join(exports_dir, 'deck.pptx'))
+        assert not [name for name in os.listdir(exports_dir) if name.endswith('.part')]
+
+        # 任务结果已登记到导出缓存：再次请求直接返回文件
+        with patch.dict(app.config, {'SYNC_EXPORT_MAX_PAGES': 1}):
+            data = assert_success_response(client.get(url))['data']
+        assert data['cached'] is True
+
+
+    def _age_tasks(self, project_id, **columns):
+        """把项目任务的时间列改到租约之前"""
+        from datetime import datetime, timedelta
+        from models import db, Task
+        Task.query.filter_by(project_id=project_id).update(
+            {column: datetime.utcnow() - timedelta(minutes=5) for column in columns})
+        db.session.commit()
+
+    def test_running_export_task_is_reused(self, client, app, exportable_project):
+        """测试相同导出的任务租约未过期（可能由其他进程执行）时直接复用，不看本进程的执行状态"""
+        url = f'/api/projects/{exportable_project}/export/pdf?filename=deck'
+        with patch.dict(app.config, {'SYNC_EXPORT_MAX_PAGES': 1}), \
+             patch('services.task_manager.task_manager.submit_task') as mock_submit:
+            first = assert_success_response(client.get(url))['data']
+            self._age_tasks(exportable_project, created_at=True)
+            second = assert_success_response(client.get(url))['data']
+
+        assert first['task_id'] == second['task_id']
+        assert mock_submit.call_count == 1
+
+    def test_stale_export_task_is_failed_and_resubmitted(self, client, app, exportable_project):
+        """测试租约过期的遗留任务（例如服务重启后）被标记失败，并提交新任务"""
+        from models import db, Task
+        url = f'/api/projects/{exportable_project}/export/pdf?filename=deck'
+        with patch.dict(app.config, {'SYNC_EXPORT_MAX_PAGES': 1}), \
+             patch('services.task_manager.task_manager.submit_task') as mock_submit:
+            first = assert_success_response(client.get(url))['data']
+            self._age_tasks(exportable_project, created_at=True, heartbeat_at=True)
+            second = assert_success_response(client.get(url))['data']
+
+        assert first['task_id'] != second['task_id']
+        assert mock_submit.call_count == 2
+        db.session.expire_all()
+        stale = Task.query.get(first['task_id'])
+        assert stale.status == 'FAILED'
+        assert stale.completed_at is not None
+        assert Task.query.get(second['task_id']).status == 'PENDING'
+
+    def test_export_task_renews_lease_while_running(self, client, app, exportable_project):
+        """测试导出执行期间定期刷新 heartbeat_at；任务被标记失败后停止刷新"""
+        import time
+        from models import db, Task
+        from services.task_manager import _task_lease
+        task = Task(project_id=exportable_project, task_type='EXPORT_PDF', status='PROCESSING')
+        db.session.add(task)
+        db.session.commit()
+        self._age_tasks(exportable_project, heartbeat_at=True)
+        aged = Task.query.get(task.id).heartbeat_at
+
+        with _task_lease(task.id, app, lease_seconds=0.04):
+            time.sleep(0.1)
+        db.session.expire_all()
+        assert Task.query.get(task.id).heartbeat_at > aged
+
+        task = Task.query.get(task.id)
+        task.status = 'FAILED'
+        db.session.commit()
+        assert Task.refresh_heartbeat(task.id) is False
+
+    def test_active_export_tasks_unique_per_dedup_key(self, client, exportable_project):
+        """测试同一导出最多一个进行中的任务（数据库约束，跨进程有效）；已结束的任务不受限制"""
+        from sqlalchemy.exc import IntegrityError
+        from models import db, Task
+
+        def add(status):
+            db.session.add(Task(project_id=exportable_project, task_type='EXPORT_PDF',
+                                status=status, dedup_key='k'))
+            db.session.commit()
+
+        add('FAILED')
+        add('COMPLETED')
+        add('PENDING')
+        with pytest.raises(IntegrityError):
+            add('PROCESSING')
+        db.session.rollback()
+
+
+class TestStreamingPPTX:
+    """流式 PPTX 写入测试"""
+
+    def test_streaming_writer_output_opens_in_python_pptx(self, tmp_path):
+        """测试流式写入的文件可被 python-pptx 读取，重复图片只写入一次"""
+        import zipfile
+        from pptx import Presentation
+        from services.pptx_stream_writer import write_pptx_from_images
+
+        paths = []
+        for i in range(3):
+            path = str(tmp_path / f'{i}.png')
+            Image.new('RGB', (320, 180), color=(i * 80, 0, 0)).save(path)
+            paths.append(path)
+        output = str(tmp_path / 'deck.pptx')
+
+        count = write_pptx_from_images(paths + [paths[0], str(tmp_path / 'missing.png')], output)
+
+        assert count == 4
+        prs = Presentation(output)
+        assert (prs.slide_width, prs.slide_height) == (9144000, 5143500)
+        assert len(prs.slides) == 4
+        for slide in prs.slides:
+            (picture,) = slide.shapes
+            assert (picture.left, picture.top, picture.width, picture.height) == (0, 0, 9144000, 5143500)
+        media = [name for name in zipfile.ZipFile(output).namelist() if name.startswith('ppt/media/')]
+        assert len(media) == 3
+
+    def test_stream_response_yields_one_chunk_per_slide(self, client, app, exportable_project, tmp_path):
+        """测试 stream=true 时逐页返回 PPTX，每个块最多包含一张图片"""
+        import io
+        from pptx import Presentation
+
+        response = client.get(f'/api/projects/{exportable_project}/export/pptx?filename=deck&stream=true')
+        assert response.status_code == 200
+        assert 'attachment' in response.headers['Content-Disposition']
+        assert response.is_streamed
+
+        chunks = list(response.response)
+        assert len(chunks) >= 3  # 模板部件 + 第一页、第二页、收尾
+        prs = Presentation(io.BytesIO(b''.join(chunks)))
+        assert len(prs.slides) == 2
+        # 未写入 exports/
+        assert not os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], exportable_project, 'exports', 'deck.pptx'))
+
+
+def _assert_valid_pdf_xref(data: bytes) -> int:
+    """校验 xref 中每个偏移都指向对应对象，返回 /Pages 中的页数"""
+    import re
+    startxref = int(re.search(rb'startxref\n(\d+)\n%%EOF\n$', data).group(1))
+    xref = data[startxref:].split(b'trailer')[0].split(b'\n')
+    count = int(xref[1].split()[1])
+    for object_id in range(1, count):
+        offset = int(xref[2 + object_id].split()[0])
+        assert data[offset:].startswith(f'{object_id} 0 obj'.encode())
+    return int(re.search(rb'/Type /Pages /Kids \[[^\]]*\] /Count (\d+)', data).group(1))
+
+
+class TestStreamingPDF:
+    """增量 PDF 写入测试"""
+
+    def test_jpeg_and_png_data_are_passed_through(self, tmp_path):
+        """测试 JPEG 与普通 PNG 不解码直接写入，其他格式转换后写入"""
+        from services.pdf_stream_writer import write_pdf_from_images, _iter_png_idat
+
+        image = Image.effect_mandelbrot((320, 180), (-2, -1, 1, 1), 30).convert('RGB')
+        jpeg_path, png_path, rgba_path = (str(tmp_path / name) for name in ('a.jpg', 'b.png', 'c.png'))
+        image.save(jpeg_path, quality=90)
+        image.save(png_path)
+        image.convert('RGBA').save(rgba_path)
+        output = str(tmp_path / 'deck.pdf')
+
+        count = write_pdf_from_images([jpeg_path, png_path, rgba_path, str(tmp_path / 'missing.png')], output)
+
+        with open(output, 'rb') as f:
+            data = f.read()
+        assert count == 3
+        assert _assert_valid_pdf_xref(data) == 3
+        with open(jpeg_path, 'rb') as f:
+            assert f.read() in data
+        assert b''.join(_iter_png_idat(png_path)) in data
+        assert data.count(b'/DCTDecode') == 1
+        assert data.count(b'/Predictor 15') == 1
+        assert b'/MediaBox [0 0 720 405]' in data
+
+    def test_stream_response_returns_pdf(self, client, exportable_project):
+        """测试 stream=true 时逐页返回 PDF"""
+        response = client.get(f'/api/projects/{exportable_project}/export/pdf?filename=deck&stream=true')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/pdf'
+        data = b''.join(response.response)
+        assert data.startswith(b'%PDF-1.4')
+        assert _assert_valid_pdf_xref(data) == 2
+
+
+class TestExportProfiles:
+    """导出图片优化档位测试"""
+
+    @pytest.fixture
+    def large_image_project(self, client, app):
+        """创建两页 4K PNG 的项目"""
+        from models import db, Project, Page
+        project = Project(idea_prompt='导出档位', creation_type='idea', status='COMPLETED')
+        db.session.add(project)
+        db.session.flush()
+
+        for i in range(2):
+            page = Page(project_id=project.id, order_index=i, status='COMPLETED')
+            db.session.add(page)
+            db.session.flush()
+            rel_path = f'{project.id}/pages/{page.id}_v1.png'
+            abs_path = os.path.join(app.config['UPLOAD_FOLDER'], rel_path)
+            os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+            Image.effect_mandelbrot((3840, 2160), (-2, -1 - i * 0.1, 1, 1), 40).convert('RGBA').save(abs_path)
+            page.generated_image_path = rel_path
+        db.session.commit()
+        return project.id
+
+    def test_screen_profile_downscales_and_recompresses(self, client, app, large_image_project):
+        """测试 screen 档位把图片缩到 150 DPI 并转为 JPEG，文件明显小于原图导出"""
+        import io
+        import zipfile
+
+        exports_dir = os.path.join(app.config['UPLOAD_FOLDER'], large_image_project, 'exports')
+        for profile in ('archive', 'screen'):
+            response = client.get(f'/api/projects/{large_image_project}/export/pptx'
+                                  f'?filename={profile}&profile={profile}')
+            assert assert_success_response(response)['data']['cached'] is False
+
+        archive = os.path.join(exports_dir, 'archive.pptx')
+        screen = os.path.join(exports_dir, 'screen.pptx')
+        assert os.path.getsize(screen) * 4 < os.path.getsize(archive)
+
+        with zipfile.ZipFile(screen) as zf:
+            media = sorted(name for name in zf.namelist() if name.startswith('ppt/media/'))
+            assert len(media) == 2
+            for name in media:
+                assert name.endswith('.jpeg')
+                with Image.open(io.BytesIO(zf.read(name))) as img:
+                    assert img.format == 'JPEG'
+                    assert img.size == (1500, 844)
+
+    def test_profile_is_part_of_cache_key_and_validated(self, client, exportable_project):
+        """测试不同档位不会互相命中缓存，未知档位返回 400"""
+        url = f'/api/projects/{exportable_project}/export/pdf?filename=deck'
+        assert assert_success_response(client.get(url))['data']['cached'] is False
+        assert assert_success_response(client.get(f'{url}&profile=screen'))['data']['cached'] is False
+        assert assert_success_response(client.get(f'{url}&profile=screen'))['data']['cached'] is True
+
+        response = client.get(f'{url}&profile=tiny')
+        assert response.status_code == 400
+
+    def test_optimized_images_cleans_up_temp_files(self, tmp_path):
+        """测试优化后的临时图片在退出时删除，不存在的图片原样返回"""
+        from services.export_profiles import get_export_profile, optimized_images
+
+        source = str(tmp_path / 'a.png')
+        Image.new('RGB', (640, 360), color='red').save(source)
+        missing = str(tmp_path / 'missing.png')
+
+        with optimized_images([source, missing], get_export_profile('print')) as export_paths:
+            optimized, passthrough = list(export_paths)
+            with Image.open(optimized) as img:
+                # 只缩小不放大
+                assert (img.format, img.size) == ('JPEG', (640, 360))
+        assert passthrough == missing
+        assert not os.path.exists(optimized)
+
+    def test_optimized_images_reuse_shared_pool(self, tmp_path):
+        """测试多次导出复用同一个共享进程池，不再每次创建进程池"""
+        from services.export_profiles import get_export_profile, optimized_images
+        from services.process_pool import get_process_pool
+
+        source = str(tmp_path / 'a.png')
+        Image.new('RGB', (64, 36), color='red').save(source)
+        pool = get_process_pool()
+        with patch('services.process_pool.ProcessPoolExecutor') as new_pool:
+            for _ in range(2):
+                with optimized_images([source], get_export_profile('screen')) as export_paths:
+                    assert len(list(export_paths)) == 1
+        new_pool.assert_not_called()
+        assert get_process_pool() is pool
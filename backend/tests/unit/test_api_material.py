@@ -0,0 +1,34 @@
+"""
+素材API单元测试
+"""
+
+from datetime import datetime, timedelta
+
+from conftest import assert_success_response
+
+
+class TestMaterialList:
+    """素材列表测试"""
+    
+    def test_cursor_pagination(self, client):
+        """测试素材列表按 updated_at 倒序游标分页"""
+        from models import db, Material
+        base = datetime(2024, 1, 1)
+        materials = [Material(filename=f'm{i}.png', relative_path=f'materials/m{i}.png', url=f'/files/materials/m{i}.png',
+                              updated_at=base + timedelta(minutes=i)) for i in range(5)]
+        db.session.add_all(materials)
+        db.session.commit()
+        
+        first = assert_success_response(client.get('/api/materials?limit=3'))['data']
+        assert [m['filename'] for m in first['materials']] == ['m4.png', 'm3.png', 'm2.png']
+        assert first['has_more'] is True
+        
+        second = assert_success_response(client.get(f"/api/materials?limit=3&cursor={first['next_cursor']}"))['data']
+        assert [m['filename'] for m in second['materials']] == ['m1.png', 'm0.png']
+        assert second['has_more'] is False
+        assert second['next_cursor'] is None
+    
+    def test_invalid_cursor_returns_400(self, client):
+        """测试非法游标返回 400"""
+        response = client.get('/api/materials?cursor=%%%')
+        assert response.status_code == 400
@@ -0,0 +1,84 @@
+"""
+页面API单元测试
+"""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from conftest import assert_error_response
+
+
+@pytest.fixture
+def project_page(client):
+    """创建带一个页面的项目"""
+    from models import db, Project, Page
+    project = Project(idea_prompt='人工智能', creation_type='idea', status='OUTLINE_GENERATED')
+    db.session.add(project)
+    db.session.flush()
+    page = Page(project_id=project.id, order_index=0, status='DRAFT')
+    page.set_outline_content({'title': '封面', 'points': []})
+    db.session.add(page)
+    db.session.commit()
+    return project.id, page.id
+
+
+def _parse_sse(body: str):
+    events = []
+    for block in body.strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+class TestPageDescriptionStream:
+    """单页描述流式生成测试"""
+    
+    def test_stream_delivers_deltas_and_saves(self, client, project_page):
+        """测试流式返回增量文本，完成后保存描述"""
+        project_id, page_id = project_page
+        mock_service = MagicMock()
+        mock_service.generate_page_description_stream.return_value = iter(['页面标题：', '封面\n', '页面文字：'])
+        
+        with patch('controllers.page_controller.get_ai_service', return_value=mock_service):
+            response = client.post(f'/api/projects/{project_id}/pages/{page_id}/generate/description/stream',
+                                   json={'language': 'zh'})
+            body = response.get_data(as_text=True)
+        
+        assert response.mimetype == 'text/event-stream'
+        events = _parse_sse(body)
+        assert [e[0] for e in events] == ['delta', 'delta', 'delta', 'done']
+        assert events[-1][1]['description_content']['text'] == '页面标题：封面\n页面文字：'
+        
+        from models import Page
+        assert Page.query.get(page_id).status == 'DESCRIPTION_GENERATED'
+    
+    def test_stream_error_keeps_page_unchanged(self, client, project_page):
+        """测试生成失败时发送 error 事件且不保存"""
+        project_id, page_id = project_page
+        
+        def failing_stream(*args, **kwargs):
+            yield '部分'
+            raise RuntimeError('upstream closed')
+        
+        mock_service = MagicMock()
+        mock_service.generate_page_description_stream.side_effect = failing_stream
+        
+        with patch('controllers.page_controller.get_ai_service', return_value=mock_service):
+            response = client.post(f'/api/projects/{project_id}/pages/{page_id}/generate/description/stream', json={})
+            events = _parse_sse(response.get_data(as_text=True))
+        
+        assert events[-1] == ('error', {'message': 'upstream closed'})
+        from models import Page
+        assert Page.query.get(page_id).get_description_content() is None
+    
+    def test_stream_existing_description_rejected(self, client, project_page):
+        """测试已有描述且未要求重新生成时返回 400"""
+        project_id, page_id = project_page
+        from models import db, Page
+        page = Page.query.get(page_id)
+        page.set_description_content({'text': '已有'})
+        db.session.commit()
+        
+        response = client.post(f'/api/projects/{project_id}/pages/{page_id}/generate/description/stream', json={})
+        assert_error_response(response, 400)
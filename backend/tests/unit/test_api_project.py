@@ -122,3 +122,184 @@ class TestProjectDelete:
         
         assert response.status_code == 404
 
+
+
+class TestProjectList:
+    """项目列表测试"""
+    
+    @pytest.fixture
+    def listed_projects(self, client):
+        """两个项目：一个含 3 页（第 2 页有图片），一个没有页面"""
+        from models import db, Project, Page
+        with_pages = Project(creation_type='outline', status='GENERATING_IMAGES')
+        empty = Project(idea_prompt='空项目', creation_type='idea')
+        db.session.add_all([with_pages, empty])
+        db.session.flush()
+        
+        for i, (status, image) in enumerate([('DESCRIPTION_GENERATED', None),
+                                             ('COMPLETED', f'{with_pages.id}/pages/p1_v2.png'),
+                                             ('COMPLETED', f'{with_pages.id}/pages/p2_v1.png')]):
+            db.session.add(Page(
+                project_id=with_pages.id, order_index=i, status=status, generated_image_path=image,
+                outline_content={'title': f'第{i + 1}页', 'points': []},
+                description_content={'text': '描述'}
+            ))
+        db.session.commit()
+        return with_pages.id, empty.id
+    
+    def test_summary_mode_uses_aggregate_queries(self, client, app, listed_projects):
+        """测试默认只返回页面摘要，不加载 Page 对象，查询数与页数无关"""
+        from sqlalchemy import event
+        from models import db, Page
+        with_pages, empty = listed_projects
+        
+        statements, loaded_pages = [], []
+        on_execute = lambda *args: statements.append(args[2])  # noqa: E731
+        on_load = lambda target, context: loaded_pages.append(target)  # noqa: E731
+        event.listen(db.engine, 'before_cursor_execute', on_execute)
+        event.listen(Page, 'load', on_load)
+        try:
+            response = client.get('/api/projects')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', on_execute)
+            event.remove(Page, 'load', on_load)
+        
+        data = assert_success_response(response)
+        projects = {p['project_id']: p for p in data['data']['projects']}
+        assert 'pages' not in projects[with_pages]
+        assert loaded_pages == []
+        assert len([s for s in statements if s.lstrip().upper().startswith('SELECT')]) == 3
+        
+        summary = projects[with_pages]['summary']
+        assert summary['page_count'] == 3
+        assert summary['page_status_counts'] == {'DESCRIPTION_GENERATED': 1, 'COMPLETED': 2}
+        assert summary['image_count'] == 2
+        assert summary['description_count'] == 3
+        assert summary['first_page_title'] == '第1页'
+        assert summary['thumbnail_url'] == f'/files/{with_pages}/pages/p1_v2.png'
+        # 与 pages_updated_at / Project.to_dict 相同的 UTC 格式
+        assert summary['thumbnail_updated_at'].endswith('Z')
+        assert summary['pages_updated_at'].endswith('Z')
+        
+        assert projects[empty]['summary']['page_count'] == 0
+        assert projects[empty]['summary']['thumbnail_url'] is None
+    
+    def test_include_pages_returns_full_payload(self, client, listed_projects):
+        """测试 include=pages 返回完整页面数据"""
+        with_pages, _ = listed_projects
+        
+        data = assert_success_response(client.get('/api/projects?include=pages'))
+        
+        project = next(p for p in data['data']['projects'] if p['project_id'] == with_pages)
+        assert [page['outline_content']['title'] for page in project['pages']] == ['第1页', '第2页', '第3页']
+        assert 'summary' not in project
+    
+    def test_cursor_pagination_walks_all_projects(self, client):
+        """测试游标分页逐页返回全部项目，updated_at 相同时按 id 继续翻页，不重复不遗漏"""
+        from datetime import datetime
+        from models import db, Project
+        same_time = datetime(2024, 1, 1, 12, 0, 0)
+        projects = [Project(creation_type='idea', updated_at=same_time) for _ in range(4)]
+        projects.append(Project(creation_type='idea', updated_at=datetime(2024, 1, 2)))
+        db.session.add_all(projects)
+        db.session.commit()
+        
+        seen, cursor = [], None
+        while True:
+            url = '/api/projects?limit=2' + (f'&cursor={cursor}' if cursor else '')
+            data = assert_success_response(client.get(url))['data']
+            seen.extend(p['project_id'] for p in data['projects'])
+            cursor = data['next_cursor']
+            if not cursor:
+                assert data['has_more'] is False
+                break
+        
+        assert seen[0] == projects[-1].id
+        assert seen[1:] == sorted((p.id for p in projects[:4]), reverse=True)
+    
+    def test_invalid_cursor_returns_400(self, client):
+        """测试非法游标返回 400"""
+        response = client.get('/api/projects?cursor=not-a-cursor')
+        assert response.status_code == 400
+
+
+class TestOutlineReplacePages:
+    """大纲生成 / 修改时整体替换页面"""
+    
+    @pytest.fixture
+    def project_with_pages(self, client):
+        """一个项目：5 个页面，每页 3 个图片版本；第 1 页已有描述"""
+        from models import db, Project, Page, PageImageVersion
+        project = Project(idea_prompt='替换页面', creation_type='idea', status='COMPLETED')
+        db.session.add(project)
+        db.session.flush()
+        for i in range(5):
+            page = Page(project_id=project.id, order_index=i, status='COMPLETED' if i else 'DESCRIPTION_GENERATED')
+            page.set_outline_content({'title': f'旧第{i + 1}页', 'points': []})
+            if i == 0:
+                page.set_description_content({'text': '保留的描述'})
+            db.session.add(page)
+            db.session.flush()
+            for version in (1, 2, 3):
+                db.session.add(PageImageVersion(page_id=page.id, image_path=f'v{version}.png',
+                                                version_number=version, is_current=version == 3))
+        db.session.commit()
+        return project.id
+    
+    @staticmethod
+    def _ai_service(pages_data):
+        from unittest.mock import MagicMock
+        ai_service = MagicMock()
+        ai_service.generate_outline.return_value = pages_data
+        ai_service.refine_outline.return_value = pages_data
+        ai_service.flatten_outline.return_value = pages_data
+        return ai_service
+    
+    def test_generate_outline_replaces_pages_with_set_based_sql(self, client, project_with_pages):
+        """测试旧页面和图片版本各用一条 DELETE 删除，新页面一次插入，返回数据不重新加载页面"""
+        from unittest.mock import patch
+        from sqlalchemy import event
+        from models import db, Page, PageImageVersion
+        pages_data = [{'title': f'新第{i + 1}页', 'points': ['要点'], 'part': '第一部分'} for i in range(4)]
+        statements = []
+        
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement.split(None, 1)[0].upper())
+        
+        event.listen(db.engine, 'before_cursor_execute', on_execute)
+        try:
+            with patch('controllers.project_controller.get_ai_service', return_value=self._ai_service(pages_data)):
+                response = client.post(f'/api/projects/{project_with_pages}/generate/outline', json={})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', on_execute)
+        
+        data = assert_success_response(response)['data']
+        assert [page['outline_content']['title'] for page in data['pages']] == [f'新第{i + 1}页' for i in range(4)]
+        assert [page['order_index'] for page in data['pages']] == [0, 1, 2, 3]
+        assert all(page['status'] == 'DRAFT' and page['part'] == '第一部分' for page in data['pages'])
+        assert statements.count('DELETE') == 2
+        assert statements.count('INSERT') == 1
+        
+        db.session.expire_all()
+        pages = Page.query.filter_by(project_id=project_with_pages).order_by(Page.order_index).all()
+        assert [page.id for page in pages] == [page['page_id'] for page in data['pages']]
+        assert pages[0].get_outline_content() == {'title': '新第1页', 'points': ['要点']}
+        assert PageImageVersion.query.count() == 0
+    
+    def test_refine_outline_keeps_matching_descriptions(self, client, project_with_pages):
+        """测试修改大纲后按标题保留旧页面的描述和状态"""
+        from unittest.mock import patch
+        from models import db, Page
+        pages_data = [{'title': '旧第1页', 'points': []}, {'title': '新增页', 'points': []}]
+        
+        with patch('controllers.project_controller.get_ai_service', return_value=self._ai_service(pages_data)):
+            response = client.post(f'/api/projects/{project_with_pages}/refine/outline',
+                                   json={'user_requirement': '删减页面'})
+        
+        data = assert_success_response(response)['data']
+        assert [(page['status'], page['description_content']) for page in data['pages']] == [
+            ('DESCRIPTION_GENERATED', {'text': '保留的描述'}),
+            ('DRAFT', None),
+        ]
+        db.session.expire_all()
+        assert Page.query.filter_by(project_id=project_with_pages).count() == 2
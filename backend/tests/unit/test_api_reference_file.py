@@ -0,0 +1,159 @@
+"""
+参考文件API单元测试
+"""
+
+import io
+import hashlib
+from unittest.mock import patch
+
+import pytest
+from conftest import assert_success_response
+
+
+def _upload(client, content: bytes, filename: str = 'notes.txt'):
+    return client.post(
+        '/api/reference-files/upload',
+        data={'file': (io.BytesIO(content), filename)},
+        content_type='multipart/form-data'
+    )
+
+
+class TestReferenceFileUpload:
+    """参考文件上传测试"""
+    
+    def test_upload_records_hash_and_size(self, client):
+        """测试上传时计算文件哈希和大小"""
+        content = b'hello reference file\n' * 1000
+        response = _upload(client, content)
+        
+        data = assert_success_response(response)
+        file_info = data['data']['file']
+        assert file_info['file_size'] == len(content)
+        assert file_info['parse_status'] == 'pending'
+        
+        from models import ReferenceFile
+        record = ReferenceFile.query.get(file_info['id'])
+        assert record.content_hash == hashlib.sha256(content).hexdigest()
+    
+    def test_upload_reuses_completed_duplicate(self, client):
+        """测试相同内容的文件直接复用已完成的解析结果"""
+        content = b'# duplicated content'
+        first = assert_success_response(_upload(client, content))['data']['file']
+        
+        from models import db, ReferenceFile
+        record = ReferenceFile.query.get(first['id'])
+        record.parse_status = 'completed'
+        record.markdown_content = '# parsed markdown'
+        db.session.commit()
+        
+        second = assert_success_response(_upload(client, content, 'copy.txt'))['data']['file']
+        assert second['id'] != first['id']
+        assert second['parse_status'] == 'completed'
+        assert second['markdown_content'] == '# parsed markdown'
+    
+    def test_upload_different_content_not_reused(self, client):
+        """测试内容不同的文件不会复用解析结果"""
+        first = assert_success_response(_upload(client, b'content a'))['data']['file']
+        
+        from models import db, ReferenceFile
+        record = ReferenceFile.query.get(first['id'])
+        record.parse_status = 'completed'
+        record.markdown_content = 'a'
+        db.session.commit()
+        
+        second = assert_success_response(_upload(client, b'content b'))['data']['file']
+        assert second['parse_status'] == 'pending'
+
+
+class TestReferenceFileParse:
+    """参考文件解析触发测试"""
+    
+    def test_trigger_parse_uses_task_queue(self, client):
+        """测试解析任务提交到共享任务队列"""
+        file_info = assert_success_response(_upload(client, b'queued content'))['data']['file']
+        
+        with patch('controllers.reference_file_controller.task_manager') as mock_manager:
+            mock_manager.is_task_active.return_value = False
+            response = client.post(f"/api/reference-files/{file_info['id']}/parse")
+        
+        assert_success_response(response)
+        mock_manager.submit_task.assert_called_once()
+        assert mock_manager.submit_task.call_args[0][0] == file_info['id']
+    
+    def test_trigger_parse_reuses_duplicate(self, client):
+        """测试首次解析时复用相同内容文件的结果，不提交任务"""
+        content = b'shared content'
+        first = assert_success_response(_upload(client, content))['data']['file']
+        second = assert_success_response(_upload(client, content))['data']['file']
+        
+        from models import db, ReferenceFile
+        record = ReferenceFile.query.get(first['id'])
+        record.parse_status = 'completed'
+        record.markdown_content = 'shared markdown'
+        db.session.commit()
+        
+        with patch('controllers.reference_file_controller.task_manager') as mock_manager:
+            mock_manager.is_task_active.return_value = False
+            response = client.post(f"/api/reference-files/{second['id']}/parse")
+        
+        data = assert_success_response(response)
+        assert data['data']['file']['parse_status'] == 'completed'
+        mock_manager.submit_task.assert_not_called()
+
+    
+    def test_trigger_parse_while_queued_does_not_resubmit(self, client):
+        """测试解析任务已在队列中（状态仍为 pending）时重复触发不再提交，也不重置状态"""
+        file_info = assert_success_response(_upload(client, b'queued twice'))['data']['file']
+        
+        with patch('controllers.reference_file_controller.task_manager') as mock_manager:
+            mock_manager.is_task_active.return_value = True
+            response = client.post(f"/api/reference-files/{file_info['id']}/parse")
+        
+        data = assert_success_response(response)
+        assert data['data']['message'] == 'File is already being parsed'
+        mock_manager.submit_task.assert_not_called()
+    
+    def test_task_manager_refuses_active_task_id(self):
+        """测试相同任务ID仍在执行时不重复提交；旧任务的回调不会删除新任务的登记"""
+        import threading
+        from services.task_manager import TaskManager
+        manager = TaskManager(max_workers=2)
+        release = threading.Event()
+        try:
+            assert manager.submit_task('file-1', lambda task_id: release.wait(5)) is True
+            assert manager.submit_task('file-1', lambda task_id: None) is False
+            assert manager.is_task_active('file-1')
+            
+            # 旧 future 的清理只删除属于它自己的登记
+            stale = manager.active_tasks['file-1']
+            manager._cleanup_task('file-1', future=object())
+            assert manager.active_tasks['file-1'] is stale
+        finally:
+            release.set()
+            manager.shutdown()
+        assert not manager.is_task_active('file-1')
+
+
+class TestReferenceFileList:
+    """参考文件列表测试"""
+    
+    def test_cursor_pagination(self, client):
+        """测试参考文件列表按 updated_at 倒序游标分页"""
+        from datetime import datetime, timedelta
+        from models import db, ReferenceFile
+        base = datetime(2024, 1, 1)
+        db.session.add_all([
+            ReferenceFile(filename=f'f{i}.pdf', file_path=f'reference_files/f{i}.pdf', file_size=1, file_type='pdf',
+                          updated_at=base + timedelta(minutes=i))
+            for i in range(3)
+        ])
+        db.session.commit()
+        
+        first = assert_success_response(client.get('/api/reference-files/project/global?limit=2'))['data']
+        assert [f['filename'] for f in first['files']] == ['f2.pdf', 'f1.pdf']
+        assert first['has_more'] is True
+        
+        url = f"/api/reference-files/project/global?limit=2&cursor={first['next_cursor']}"
+        second = assert_success_response(client.get(url))['data']
+        assert [f['filename'] for f in second['files']] == ['f0.pdf']
+        assert second['next_cursor'] is None
@@ -0,0 +1,81 @@
+"""
+批量页面描述生成模式单元测试
+"""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from services.ai_service import AIService, ProjectContext
+from services.ai_providers.text.base import TextProvider
+
+
+class ScriptedTextProvider(TextProvider):
+    """批量请求返回缺少第2页的 JSON，单页请求返回固定文本"""
+    
+    def __init__(self):
+        self.prompts = []
+    
+    def generate_text(self, prompt, thinking_budget=1000):
+        self.prompts.append(prompt)
+        if '请只返回一个 JSON 数组' in prompt:
+            return '```json\n' + json.dumps([
+                {'page_index': 1, 'description': '页面标题：封面'},
+                {'page_index': 3, 'description': '页面标题：未来'},
+            ], ensure_ascii=False) + '\n```'
+        return '页面标题：单独重试'
+
+
+@pytest.fixture
+def project_with_pages(client):
+    from models import db, Project, Page, Task
+    project = Project(idea_prompt='人工智能', creation_type='idea', status='OUTLINE_GENERATED',
+                      description_generation_mode='batched')
+    db.session.add(project)
+    db.session.flush()
+    for i, title in enumerate(['封面', '起源', '未来']):
+        page = Page(project_id=project.id, order_index=i, status='DRAFT')
+        page.set_outline_content({'title': title, 'points': []})
+        db.session.add(page)
+    task = Task(project_id=project.id, task_type='GENERATE_DESCRIPTIONS', status='PENDING')
+    db.session.add(task)
+    db.session.commit()
+    return project.id, task.id
+
+
+class TestBatchedDescriptions:
+    """批量生成测试"""
+    
+    def test_batched_mode_retries_missing_pages(self, app, project_with_pages):
+        """测试批量响应缺失的页面会单独重试"""
+        from models import Page, Task
+        from services.task_manager import generate_descriptions_task
+        
+        project_id, task_id = project_with_pages
+        provider = ScriptedTextProvider()
+        service = AIService(text_provider=provider, image_provider=MagicMock())
+        outline = [{'title': '封面', 'points': []}, {'title': '起源', 'points': []}, {'title': '未来', 'points': []}]
+        
+        with patch('services.ai_service_manager.get_ai_service') as get_ai_service:
+            generate_descriptions_task(task_id, project_id, service, ProjectContext({'idea_prompt': '人工智能'}),
+                                       outline, 2, app, 'zh', 'batched', 3)
+        
+        # 前缀的创建、批量/单页请求和释放都用传入的同一个实例
+        get_ai_service.assert_not_called()
+        pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
+        texts = [p.get_description_content()['text'] for p in pages]
+        assert texts == ['页面标题：封面', '页面标题：单独重试', '页面标题：未来']
+        assert len(provider.prompts) == 2  # 1 次批量请求 + 1 次单页重试
+        assert Task.query.get(task_id).status == 'COMPLETED'
+    
+    def test_update_project_description_mode(self, client, sample_project):
+        """测试更新项目的描述生成模式"""
+        project_id = sample_project['project_id']
+        
+        response = client.put(f'/api/projects/{project_id}', json={'description_generation_mode': 'batched'})
+        assert response.status_code == 200
+        assert response.get_json()['data']['description_generation_mode'] == 'batched'
+        
+        response = client.put(f'/api/projects/{project_id}', json={'description_generation_mode': 'invalid'})
+        assert response.status_code == 400
@@ -0,0 +1,28 @@
+"""
+数据库配置单元测试
+"""
+
+from config import get_engine_options, normalize_database_url
+
+
+class TestDatabaseConfig:
+    """数据库 URL 与引擎参数测试"""
+
+    def test_postgres_urls_use_psycopg(self):
+        """测试 postgres:// 与 postgresql:// 统一使用 psycopg 驱动，其他 URL 不变"""
+        assert normalize_database_url('postgres://u:p@db:5432/app') == 'postgresql+psycopg://u:p@db:5432/app'
+        assert normalize_database_url('postgresql://u:p@db/app') == 'postgresql+psycopg://u:p@db/app'
+        assert normalize_database_url('postgresql+psycopg2://u:p@db/app') == 'postgresql+psycopg2://u:p@db/app'
+        assert normalize_database_url('sqlite:////tmp/app.db') == 'sqlite:////tmp/app.db'
+
+    def test_engine_options_by_dialect(self, monkeypatch):
+        """测试 SQLite 只使用 SQLite 连接参数，PostgreSQL 使用可配置的连接池"""
+        monkeypatch.setenv('DB_POOL_SIZE', '25')
+        sqlite_options = get_engine_options('sqlite:////tmp/app.db')
+        assert sqlite_options['connect_args']['check_same_thread'] is False
+        assert sqlite_options['pool_size'] == 5
+
+        pg_options = get_engine_options('postgresql+psycopg://u:p@db/app')
+        assert 'connect_args' not in pg_options
+        assert pg_options['pool_size'] == 25
+        assert pg_options['pool_pre_ping'] is True
@@ -0,0 +1,484 @@
+"""
+可编辑PPTX导出流水线单元测试
+"""
+
+import io
+import json
+import os
+import re
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+
+def _fake_mineru_result(page_count: int, page_size=(1920, 1080), title_prefix='Slide'):
+    """构造最小的 MinerU 解析结果：(content_list, layout)"""
+    content_list = [{'type': 'text', 'text': f'{title_prefix} {i} title', 'text_level': 1, 'page_idx': i}
+                    for i in range(page_count)]
+    layout = {'pdf_info': [{
+        'page_idx': i,
+        'page_size': list(page_size),
+        'para_blocks': [{
+            'type': 'title',
+            'bbox': [100, 100, 1200, 220],
+            'lines': [{'spans': [{'type': 'text', 'content': f'{title_prefix} {i} title'}]}]
+        }]
+    } for i in range(page_count)]}
+    return content_list, layout
+
+
+def _write_fake_mineru_result(result_dir: str, page_count: int, page_size=(1920, 1080), title_prefix='Slide'):
+    """写入最小的 MinerU 解析结果（content_list.json + layout.json）"""
+    os.makedirs(result_dir, exist_ok=True)
+    content_list, layout = _fake_mineru_result(page_count, page_size, title_prefix)
+    with open(os.path.join(result_dir, 'deck_content_list.json'), 'w', encoding='utf-8') as f:
+        json.dump(content_list, f)
+    with open(os.path.join(result_dir, 'layout.json'), 'w', encoding='utf-8') as f:
+        json.dump(layout, f)
+
+
+class _MockMinerUServer(ThreadingHTTPServer):
+    """本地模拟的 MinerU 批量解析接口（file-urls/batch、上传、extract-results、结果 zip）"""
+    
+    daemon_threads = True
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _MockMinerUHandler)
+        self.base_url = f'http://127.0.0.1:{self.server_address[1]}'
+        self.lock = threading.Lock()
+        self.batches = {}  # batch_id -> [file_name]
+        self.uploads = {}  # (batch_id, file_name) -> bytes
+        self.polls = {}  # (batch_id, file_name) -> 轮询次数
+        self.slow_files = {}  # file_name -> 需要轮询多少次才完成
+        self.finished_order = []
+
+
+class _MockMinerUHandler(BaseHTTPRequestHandler):
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send_json(self, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        names = [f['name'] for f in payload['files']]
+        with server.lock:
+            batch_id = f'batch-{len(server.batches) + 1}'
+            server.batches[batch_id] = names
+        self._send_json({'code': 0, 'data': {
+            'batch_id': batch_id,
+            'file_urls': [f'{server.base_url}/upload/{batch_id}/{name}' for name in names]
+        }})
+    
+    def do_PUT(self):
+        _, _, batch_id, name = self.path.split('/')
+        data = self.rfile.read(int(self.headers['Content-Length']))
+        with self.server.lock:
+            self.server.uploads[(batch_id, name)] = data
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+    
+    def do_GET(self):
+        server = self.server
+        if self.path.startswith('/api/v4/extract-results/batch/'):
+            batch_id = self.path.rsplit('/', 1)[-1]
+            results = []
+            with server.lock:
+                for name in server.batches[batch_id]:
+                    key = (batch_id, name)
+                    server.polls[key] = server.polls.get(key, 0) + 1
+                    done = key in server.uploads and server.polls[key] > server.slow_files.get(name, 1)
+                    if done and name not in server.finished_order:
+                        server.finished_order.append(name)
+                    results.append({
+                        'file_name': name,
+                        'state': 'done' if done else 'running',
+                        'full_zip_url': f'{server.base_url}/zip/{batch_id}/{name}' if done else ''
+                    })
+            self._send_json({'code': 0, 'data': {'batch_id': batch_id, 'extract_result': results}})
+            return
+        
+        _, _, batch_id, name = self.path.split('/')
+        with server.lock:
+            pdf_bytes = server.uploads[(batch_id, name)]
+        page_count = len(re.findall(rb'/Type\s*/Page\b', pdf_bytes))
+        stem = name.rsplit('.', 1)[0]
+        content_list, layout = _fake_mineru_result(page_count, title_prefix=stem)
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as z:
+            z.writestr('full.md', '\n\n'.join(f'# {item["text"]}' for item in content_list))
+            z.writestr(f'{stem}_content_list.json', json.dumps(content_list))
+            z.writestr('layout.json', json.dumps(layout))
+        body = buffer.getvalue()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/zip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def mock_mineru_server():
+    """启动本地模拟 MinerU 服务"""
+    from services.file_parser_service import FileParserService
+    server = _MockMinerUServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    with patch.object(FileParserService, 'POLL_INTERVAL_SECONDS', 0.01):
+        yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def project_with_images(client, app):
+    """创建带已生成图片页面的项目"""
+    from models import db, Project, Page, Task
+    project = Project(idea_prompt='导出测试', creation_type='idea', status='COMPLETED')
+    db.session.add(project)
+    db.session.flush()
+    
+    upload_folder = app.config['UPLOAD_FOLDER']
+    for i in range(3):
+        page = Page(project_id=project.id, order_index=i, status='COMPLETED')
+        db.session.add(page)
+        db.session.flush()
+        rel_path = f'{project.id}/pages/{page.id}_v1.png'
+        abs_path = os.path.join(upload_folder, rel_path)
+        os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+        Image.new('RGB', (1920, 1080), color=(i * 60, 100, 200)).save(abs_path)
+        page.generated_image_path = rel_path
+    
+    task = Task(project_id=project.id, task_type='EXPORT_EDITABLE_PPTX', status='PENDING')
+    db.session.add(task)
+    db.session.commit()
+    return project.id, task.id
+
+
+class TestEditableExportPipeline:
+    """可编辑导出流水线测试"""
+    
+    def test_mineru_runs_concurrently_with_backgrounds(self, app, project_with_images, tmp_path):
+        """测试 MinerU 解析与背景生成并行，且按页序生成全部幻灯片"""
+        from models import Task
+        from services.file_service import FileService
+        from services.task_manager import export_editable_pptx_task
+        from pptx import Presentation
+        
+        project_id, task_id = project_with_images
+        mineru_started = threading.Event()
+        overlapped = []
+        
+        def fake_parse_file(self, file_path, filename):
+            mineru_started.set()
+            _write_fake_mineru_result(os.path.join(app.config['UPLOAD_FOLDER'], 'mineru_files', 'extract-1'), 3)
+            return 'batch-1', '# md', 'extract-1', None, 0
+        
+        def fake_clean_background(original_image_path, ai_service, aspect_ratio='16:9', resolution='2K'):
+            # 串行执行时 MinerU 尚未开始，这里会等待超时
+            overlapped.append(mineru_started.wait(timeout=5))
+            path = str(tmp_path / f'bg_{len(overlapped)}.png')
+            Image.new('RGB', (1920, 1080), color='white').save(path)
+            return path
+        
+        with patch.dict(app.config, {'MINERU_TOKEN': 'test-token'}), \
+             patch('services.file_parser_service.FileParserService.parse_file', fake_parse_file), \
+             patch('services.export_service.ExportService.generate_clean_background', side_effect=fake_clean_background), \
+             patch('services.ai_service_manager.get_ai_service'):
+            export_editable_pptx_task(task_id, project_id, 'deck', None,
+                                      FileService(app.config['UPLOAD_FOLDER']), max_workers=3, app=app)
+        
+        task = Task.query.get(task_id)
+        assert task.status == 'COMPLETED', task.error_message
+        assert overlapped == [True, True, True]
+        
+        output = os.path.join(app.config['UPLOAD_FOLDER'], project_id, 'exports', 'deck.pptx')
+        prs = Presentation(output)
+        assert len(prs.slides) == 3
+        texts = [shape.text_frame.text for slide in prs.slides for shape in slide.shapes if shape.has_text_frame]
+        assert texts == ['Slide 0 title', 'Slide 1 title', 'Slide 2 title']
+        # 临时背景图片已清理
+        assert not list(tmp_path.glob('bg_*.png'))
+    
+    def test_mineru_failure_fails_task(self, app, project_with_images):
+        """测试 MinerU 失败时任务失败"""
+        from models import Task
+        from services.file_service import FileService
+        from services.task_manager import export_editable_pptx_task
+        
+        project_id, task_id = project_with_images
+        
+        def failing_parse_file(self, file_path, filename):
+            return None, None, None, 'MinerU unavailable', 0
+        
+        with patch.dict(app.config, {'MINERU_TOKEN': 'test-token'}), \
+             patch('services.file_parser_service.FileParserService.parse_file', failing_parse_file), \
+             patch('services.export_service.ExportService.generate_clean_background', return_value=None), \
+             patch('services.ai_service_manager.get_ai_service'):
+            export_editable_pptx_task(task_id, project_id, 'deck', None,
+                                      FileService(app.config['UPLOAD_FOLDER']), max_workers=2, app=app)
+        
+        task = Task.query.get(task_id)
+        assert task.status == 'FAILED'
+        assert 'MinerU unavailable' in task.error_message
+    
+    def test_background_that_fails_to_cache_is_cleaned_up(self, app, project_with_images, tmp_path):
+        """测试干净背景移入缓存失败时回退原图，临时背景仍被删除"""
+        from models import db, Task, Page, PageImageVersion
+        from services.file_service import FileService
+        from services.task_manager import export_editable_pptx_task
+        
+        project_id, task_id = project_with_images
+        for page in Page.query.filter_by(project_id=project_id).all():
+            db.session.add(PageImageVersion(page_id=page.id, image_path=page.generated_image_path,
+                                            version_number=1, is_current=True))
+        db.session.commit()
+        
+        def fake_parse_file(self, file_path, filename):
+            _write_fake_mineru_result(os.path.join(app.config['UPLOAD_FOLDER'], 'mineru_files', 'extract-1'), 3)
+            return 'batch-1', '# md', 'extract-1', None, 0
+        
+        def fake_clean_background(original_image_path, ai_service, aspect_ratio='16:9', resolution='2K'):
+            path = str(tmp_path / f'bg_{os.path.basename(original_image_path)}')
+            Image.new('RGB', (1920, 1080), color='white').save(path)
+            return path
+        
+        with patch.dict(app.config, {'MINERU_TOKEN': 'test-token'}), \
+             patch('services.file_parser_service.FileParserService.parse_file', fake_parse_file), \
+             patch('services.export_service.ExportService.generate_clean_background', side_effect=fake_clean_background), \
+             patch.object(FileService, 'save_clean_background', side_effect=OSError('disk full')), \
+             patch('services.ai_service_manager.get_ai_service'):
+            export_editable_pptx_task(task_id, project_id, 'deck', None,
+                                      FileService(app.config['UPLOAD_FOLDER']), max_workers=3, app=app)
+        
+        task = Task.query.get(task_id)
+        assert task.status == 'COMPLETED', task.error_message
+        assert not list(tmp_path.glob('bg_*.png'))
+    
+    def test_repeat_export_reuses_cached_slides(self, app, project_with_images, tmp_path):
+        """测试再次导出复用按图片版本缓存的背景和版面，只重新处理修改过的页面"""
+        from models import db, Task, Page, PageImageVersion
+        from services.export_service import ExportService
+        from services.file_service import FileService
+        from services.task_manager import export_editable_pptx_task
+        from pptx import Presentation
+        
+        project_id, _ = project_with_images
+        upload_folder = app.config['UPLOAD_FOLDER']
+        file_service = FileService(upload_folder)
+        pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
+        for page in pages:
+            db.session.add(PageImageVersion(page_id=page.id, image_path=page.generated_image_path,
+                                            version_number=1, is_current=True))
+        db.session.commit()
+        
+        parsed_page_counts = []
+        background_calls = []
+        create_pdf = ExportService.create_pdf_from_images
+        
+        def recording_create_pdf(image_paths, output_file=None):
+            parsed_page_counts.append(len(image_paths))
+            return create_pdf(image_paths, output_file=output_file)
+        
+        def fake_parse_file(self, file_path, filename):
+            page_count = parsed_page_counts[-1]
+            extract_id = f'extract-cache-{len(parsed_page_counts)}'
+            _write_fake_mineru_result(os.path.join(upload_folder, 'mineru_files', extract_id), page_count,
+                                      title_prefix=f'Run{len(parsed_page_counts)}')
+            return 'batch', '# md', extract_id, None, 0
+        
+        def fake_clean_background(original_image_path, ai_service, aspect_ratio='16:9', resolution='2K'):
+            background_calls.append(original_image_path)
+            path = str(tmp_path / f'bg_{len(background_calls)}.png')
+            Image.new('RGB', (1920, 1080), color='white').save(path)
+            return path
+        
+        def run_export(name):
+            task = Task(project_id=project_id, task_type='EXPORT_EDITABLE_PPTX', status='PENDING')
+            db.session.add(task)
+            db.session.commit()
+            export_editable_pptx_task(task.id, project_id, name, None, file_service, max_workers=3, app=app)
+            db.session.expire_all()
+            task = Task.query.get(task.id)
+            assert task.status == 'COMPLETED', task.error_message
+            prs = Presentation(os.path.join(upload_folder, project_id, 'exports', f'{name}.pptx'))
+            return [shape.text_frame.text for slide in prs.slides for shape in slide.shapes if shape.has_text_frame]
+        
+        with patch.dict(app.config, {'MINERU_TOKEN': 'test-token'}), \
+             patch('services.file_parser_service.FileParserService.parse_file', fake_parse_file), \
+             patch('services.export_service.ExportService.create_pdf_from_images', side_effect=recording_create_pdf), \
+             patch('services.export_service.ExportService.generate_clean_background', side_effect=fake_clean_background), \
+             patch('services.ai_service_manager.get_ai_service'):
+            assert run_export('first') == ['Run1 0 title', 'Run1 1 title', 'Run1 2 title']
+            assert parsed_page_counts == [3]
+            assert len(background_calls) == 3
+            
+            # 再次导出：全部命中缓存
+            assert run_export('second') == ['Run1 0 title', 'Run1 1 title', 'Run1 2 title']
+            assert parsed_page_counts == [3]
+            assert len(background_calls) == 3
+            
+            # 修改第二页图片（新版本）后导出：只重新处理这一页
+            page = pages[1]
+            new_path = f'{project_id}/pages/{page.id}_v2.png'
+            Image.new('RGB', (1920, 1080), color='black').save(os.path.join(upload_folder, new_path))
+            PageImageVersion.query.filter_by(page_id=page.id).update({'is_current': False})
+            db.session.add(PageImageVersion(page_id=page.id, image_path=new_path, version_number=2, is_current=True))
+            page.generated_image_path = new_path
+            db.session.commit()
+            
+            assert run_export('third') == ['Run1 0 title', 'Run2 0 title', 'Run1 2 title']
+            assert parsed_page_counts == [3, 1]
+            assert background_calls[3:] == [file_service.get_absolute_path(new_path)]
+        
+        # 背景已移入导出缓存，不是留在临时目录
+        assert not list(tmp_path.glob('bg_*.png'))
+        version = PageImageVersion.query.filter_by(page_id=pages[1].id, version_number=2).first()
+        assert version.clean_background_path.startswith(f'{project_id}/export_cache/')
+        assert os.path.exists(file_service.get_absolute_path(version.clean_background_path))
+
+
+class TestMinerUBatchParsing:
+    """按页拆分的 MinerU 批量解析测试（本地模拟服务）"""
+    
+    def test_parse_batch_returns_results_as_tasks_finish(self, mock_mineru_server, tmp_path):
+        """测试同一批次中的多个任务各自完成即回调，慢任务不阻塞其他任务"""
+        from services.export_service import ExportService
+        from services.file_parser_service import FileParserService
+        
+        files = []
+        for i in range(3):
+            image_path = str(tmp_path / f'slide_{i}.png')
+            Image.new('RGB', (640, 360), color=(i * 80, 0, 0)).save(image_path)
+            pdf_path = str(tmp_path / f'slide_{i}.pdf')
+            ExportService.create_pdf_from_images([image_path], output_file=pdf_path)
+            files.append((pdf_path, f'slide_{i}.pdf'))
+        mock_mineru_server.slow_files['slide_0.pdf'] = 5
+        
+        storage_dir = str(tmp_path / 'mineru_files')
+        parser = FileParserService(mineru_token='test-token', mineru_api_base=mock_mineru_server.base_url,
+                                   mineru_storage_dir=storage_dir)
+        callbacks = []
+        results = parser.parse_batch(files, on_result=lambda i, extract_id, error: callbacks.append(i))
+        
+        assert len(mock_mineru_server.batches) == 1
+        assert mock_mineru_server.finished_order[-1] == 'slide_0.pdf'
+        assert callbacks[-1] == 0
+        assert sorted(callbacks) == [0, 1, 2]
+        for i, (extract_id, error) in enumerate(results):
+            assert error is None
+            pages = ExportService.load_mineru_pages(os.path.join(storage_dir, extract_id))
+            assert pages[0]['items'][0]['text'] == f'slide_{i} 0 title'
+    
+    def test_per_page_export_merges_layouts_in_slide_order(self, app, project_with_images, mock_mineru_server):
+        """测试 per_page 模式按组提交 MinerU 任务，并按页序合并版面"""
+        from models import Task
+        from services.file_service import FileService
+        from services.task_manager import export_editable_pptx_task
+        from pptx import Presentation
+        
+        project_id, task_id = project_with_images
+        # 第一组（前两页）最慢完成
+        mock_mineru_server.slow_files[f'presentation_{project_id}_0.pdf'] = 4
+        
+        with patch.dict(app.config, {'MINERU_TOKEN': 'test-token', 'MINERU_API_BASE': mock_mineru_server.base_url,
+                                     'MINERU_LAYOUT_MODE': 'per_page', 'MINERU_PAGES_PER_TASK': 2}), \
+             patch('services.export_service.ExportService.generate_clean_background', return_value=None), \
+             patch('services.ai_service_manager.get_ai_service'):
+            export_editable_pptx_task(task_id, project_id, 'deck', None,
+                                      FileService(app.config['UPLOAD_FOLDER']), max_workers=2, app=app)
+        
+        task = Task.query.get(task_id)
+        assert task.status == 'COMPLETED', task.error_message
+        assert task.get_progress()['total'] == 3 + 2 + 1
+        assert list(mock_mineru_server.batches.values()) == [
+            [f'presentation_{project_id}_0.pdf', f'presentation_{project_id}_1.pdf']
+        ]
+        
+        prs = Presentation(os.path.join(app.config['UPLOAD_FOLDER'], project_id, 'exports', 'deck.pptx'))
+        texts = [shape.text_frame.text for slide in prs.slides for shape in slide.shapes if shape.has_text_frame]
+        assert texts == [f'presentation_{project_id}_0 0 title', f'presentation_{project_id}_0 1 title',
+                         f'presentation_{project_id}_1 0 title']
+
+
+class TestEditableSlideSpecs:
+    """可编辑幻灯片版面计算（进程池）测试"""
+    
+    def test_specs_from_process_pool_match_serial_build(self, tmp_path):
+        """测试进程池计算的版面与串行计算一致，组装后文字、表格、图片齐全"""
+        from pptx import Presentation
+        from services.export_service import ExportService
+        
+        images_dir = tmp_path / 'images'
+        images_dir.mkdir()
+        Image.new('RGB', (200, 100), color='green').save(images_dir / 'chart.png')
+        layout = {'page_size': [960, 540], 'items': [
+            {'type': 'title', 'text': '季度报告', 'bbox': [50, 20, 900, 100]},
+            {'type': 'text', 'text': 'Revenue grew 20% year over year', 'bbox': [50, 120, 600, 200]},
+            {'type': 'image', 'img_path': 'images/chart.png', 'bbox': [600, 220, 900, 500]},
+            {'type': 'image', 'img_path': 'images/missing.png', 'bbox': [50, 400, 150, 500]},
+            {'type': 'table', 'img_path': 'images/table.png', 'bbox': [50, 220, 500, 380],
+             'html_table': '<table><tr><th>Q</th><th>Rev</th></tr><tr><td>Q1</td><td>10</td></tr></table>'},
+        ]}
+        layouts = [(str(tmp_path), layout), (str(tmp_path), None), (str(tmp_path), layout)]
+        
+        specs = ExportService.build_editable_slide_specs(layouts, 1920, 1080)
+        serial = [ExportService.build_editable_slide_spec(page_layout, mineru_dir, 1920, 1080)
+                  for mineru_dir, page_layout in layouts]
+        
+        assert specs == serial
+        assert specs[1]['shapes'] == []
+        shapes = {shape['type']: shape for shape in specs[0]['shapes']}
+        assert set(shapes) == {'text', 'image', 'placeholder', 'table'}
+        assert shapes['table']['rows'] == [['Q', 'Rev'], ['Q1', '10']]
+        assert shapes['table']['bbox'] == [100, 440, 1000, 760]
+        # 图片、表格在文字之下
+        assert [shape['type'] for shape in specs[0]['shapes']][-2:] == ['text', 'text']
+        
+        builder = ExportService.create_editable_pptx_builder(1920, 1080)
+        for spec in specs:
+            ExportService.add_editable_slide_from_spec(builder, spec)
+        output = str(tmp_path / 'deck.pptx')
+        ExportService.save_editable_pptx(builder, output)
+        
+        prs = Presentation(output)
+        assert len(prs.slides) == 3
+        first = prs.slides[0]
+        assert any(shape.has_table for shape in first.shapes)
+        texts = [shape.text_frame.text for shape in first.shapes if shape.has_text_frame]
+        assert '季度报告' in texts and '[Image]' in texts
+        title = next(shape for shape in first.shapes if shape.has_text_frame and shape.text_frame.text == '季度报告')
+        assert title.text_frame.paragraphs[0].font.bold
+        assert title.text_frame.paragraphs[0].font.size.pt == specs[0]['shapes'][-2]['font_size']
+    
+    def test_process_pool_is_shared_and_not_forked(self):
+        """测试导出共用一个进程池：不使用 fork 启动，进程数不超过 CPU 核数，损坏后重新创建"""
+        import os
+        from services.process_pool import get_process_pool, shutdown_process_pool
+        
+        pool = get_process_pool()
+        assert get_process_pool() is pool
+        assert pool._mp_context.get_start_method() in ('forkserver', 'spawn')
+        assert pool._max_workers <= (os.cpu_count() or 1)
+        assert pool.submit(os.getpid).result(timeout=60) != os.getpid()
+        
+        pool._broken = 'worker died'
+        try:
+            assert get_process_pool() is not pool
+        finally:
+            pool._broken = False
+            pool.shutdown(wait=True)
+            shutdown_process_pool()
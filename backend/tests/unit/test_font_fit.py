@@ -0,0 +1,63 @@
+"""
+字号计算单元测试
+"""
+
+from utils.font_fit import FontFitter
+from utils.pptx_builder import PPTXBuilder
+
+
+class TestFontFitter:
+    """FontFitter 测试"""
+
+    def test_batch_matches_single_fits(self):
+        """测试整页批量计算与逐个计算结果一致"""
+        fitter = FontFitter()
+        bboxes = [[100, 100, 1200, 220], [50, 120, 600, 400], [0, 0, 400, 300], [0, 0, 30, 20], [0, 0, 5, 5]]
+        texts = ['Quarterly Results', 'Revenue grew 20% year over year in every region ' * 3,
+                 '这是一个很长的中文段落，用来测试换行后的字号计算。' * 3, '12', 'hello']
+        bold = [True, False, False, False, False]
+
+        sizes = fitter.fit_sizes(bboxes, texts, bold).tolist()
+
+        assert sizes == [fitter.fit_size(b, t, is_bold) for b, t, is_bold in zip(bboxes, texts, bold)]
+        assert all(size * 2 == int(size * 2) for size in sizes[:3])  # 0.5pt 步长
+        assert sizes[4] == fitter.min_size  # 放不下任何内容
+
+    def test_fitted_size_is_largest_that_fits(self):
+        """测试求得的字号能放下文本，再大 0.5pt 则放不下"""
+        fitter = FontFitter()
+        bbox, text = [0, 0, 500, 200], 'Revenue grew 20% year over year ' * 4
+        usable_width = 500 * 0.94 / 96 * 72 - 7.2
+        usable_height = 200 * 0.94 / 96 * 72 - 7.2
+        width = fitter.text_width_em(text)
+
+        def fits(size):
+            lines = 1 if width * size <= usable_width else -(-width * size // (usable_width * fitter.WRAP_EFFICIENCY))
+            return lines * size * fitter.LINE_HEIGHT <= usable_height
+
+        size = fitter.fit_size(bbox, text)
+        assert fits(size)
+        assert not fits(size + 0.5)
+
+    def test_glyph_widths_from_font_metrics(self):
+        """测试使用真实字形宽度：窄字符比宽字符窄，全角字符为 1 em，粗体更宽"""
+        fitter = FontFitter()
+
+        assert fitter.text_width_em('iiii') < fitter.text_width_em('MMMM')
+        assert fitter.text_width_em('季度报告') == 4.0
+        assert fitter.text_width_em('Title', bold=True) > fitter.text_width_em('Title')
+        # 同样长度下中文字号更小
+        assert fitter.fit_size([0, 0, 400, 120], '季度营收同比增长' * 2) < \
+            fitter.fit_size([0, 0, 400, 120], 'revenue growth!' * 2)
+
+    def test_pptx_builder_uses_font_fitter(self):
+        """测试 PPTXBuilder 的单个与批量接口"""
+        builder = PPTXBuilder()
+        bboxes = [[100, 100, 1200, 220], [50, 120, 600, 200]]
+        texts = ['Slide title', 'Revenue grew 20% year over year']
+
+        sizes = builder.calculate_font_sizes(bboxes, texts, ['title', None])
+
+        assert sizes == [builder.calculate_font_size(bboxes[0], texts[0], 'title'),
+                         builder.calculate_font_size(bboxes[1], texts[1])]
+        assert builder.MIN_FONT_SIZE <= min(sizes) and max(sizes) <= builder.MAX_FONT_SIZE
@@ -0,0 +1,155 @@
+"""
+页面图片版本号分配单元测试
+"""
+
+import threading
+
+import pytest
+from PIL import Image
+from conftest import assert_success_response
+
+
+@pytest.fixture
+def page_id(client):
+    """一个项目，一个页面（还没有图片版本）"""
+    from models import db, Project, Page
+    project = Project(idea_prompt='版本号', creation_type='idea')
+    db.session.add(project)
+    db.session.flush()
+    page = Page(project_id=project.id, order_index=0)
+    db.session.add(page)
+    db.session.commit()
+    return page.id
+
+
+def _versions(page_id):
+    from models import db, PageImageVersion
+    db.session.expire_all()
+    versions = PageImageVersion.query.filter_by(page_id=page_id).order_by(PageImageVersion.version_number).all()
+    return [(v.version_number, v.is_current) for v in versions]
+
+
+class TestImageVersions:
+    """图片版本号分配与唯一性约束"""
+
+    def test_allocate_image_versions(self, client, page_id):
+        """测试计数器原地递增，多个页面一条语句分配，不存在的页面不返回"""
+        from models import db, Page
+        other = Page(project_id=Page.query.get(page_id).project_id, order_index=1)
+        db.session.add(other)
+        db.session.commit()
+
+        assert Page.allocate_image_versions([page_id]) == {page_id: 1}
+        assert Page.allocate_image_versions([page_id, other.id, 'missing']) == {page_id: 2, other.id: 1}
+        assert Page.allocate_image_versions([]) == {}
+        db.session.commit()
+        db.session.expire_all()
+        assert Page.query.get(page_id).image_version_counter == 2
+
+    def test_concurrent_saves_get_distinct_versions(self, app, page_id):
+        """测试同一页面并发保存图片：版本号互不相同，且只有一个当前版本"""
+        from models import Page
+        from services import FileService
+        from services.task_manager import save_image_with_version
+        file_service = FileService(app.config['UPLOAD_FOLDER'])
+        project_id = Page.query.get(page_id).project_id
+        errors = []
+
+        def save():
+            with app.app_context():
+                try:
+                    save_image_with_version(Image.new('RGB', (16, 9)), project_id, page_id, file_service)
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=save) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        versions = _versions(page_id)
+        assert [number for number, _ in versions] == [1, 2, 3, 4, 5, 6]
+        assert [number for number, current in versions if current] == [6]
+
+    def test_version_numbers_not_reused_after_delete(self, app, page_id):
+        """测试删除最新版本后，新版本号仍然继续递增"""
+        from models import db, Page, PageImageVersion
+        from services import FileService
+        from services.task_manager import save_image_with_version
+        file_service = FileService(app.config['UPLOAD_FOLDER'])
+        project_id = Page.query.get(page_id).project_id
+        for _ in range(2):
+            save_image_with_version(Image.new('RGB', (16, 9)), project_id, page_id, file_service)
+        PageImageVersion.query.filter_by(page_id=page_id, version_number=2).delete()
+        db.session.commit()
+
+        _, version_number = save_image_with_version(Image.new('RGB', (16, 9)), project_id, page_id, file_service)
+
+        assert version_number == 3
+        assert _versions(page_id) == [(1, False), (3, True)]
+
+    def test_duplicate_version_number_rejected(self, client, page_id):
+        """测试同一页面的版本号唯一"""
+        from sqlalchemy.exc import IntegrityError
+        from models import db, PageImageVersion
+        db.session.add(PageImageVersion(page_id=page_id, image_path='a.png', version_number=1))
+        db.session.add(PageImageVersion(page_id=page_id, image_path='b.png', version_number=1))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+    def test_single_current_version_enforced(self, client, page_id):
+        """测试同一页面最多一个当前版本"""
+        from sqlalchemy.exc import IntegrityError
+        from models import db, PageImageVersion
+        db.session.add(PageImageVersion(page_id=page_id, image_path='a.png', version_number=1, is_current=True))
+        db.session.add(PageImageVersion(page_id=page_id, image_path='b.png', version_number=2, is_current=False))
+        db.session.add(PageImageVersion(page_id=page_id, image_path='c.png', version_number=3, is_current=False))
+        db.session.commit()
+
+        db.session.add(PageImageVersion(page_id=page_id, image_path='d.png', version_number=4, is_current=True))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+    def test_clear_current_uses_partial_index(self, client, page_id):
+        """测试取消当前版本的 UPDATE 走部分唯一索引（只定位当前版本这一行）"""
+        from sqlalchemy import event
+        from models import db, PageImageVersion
+        if db.engine.dialect.name != 'sqlite':
+            pytest.skip('query plan checks run on SQLite only')
+        statements = []
+
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('UPDATE page_image_versions'):
+                statements.append((statement, parameters))
+
+        event.listen(db.engine, 'before_cursor_execute', on_execute)
+        try:
+            PageImageVersion.clear_current([page_id])
+            db.session.commit()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', on_execute)
+
+        (statement, parameters), = statements
+        with db.engine.connect() as conn:
+            plan = [row[-1] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+        assert plan == ['SEARCH page_image_versions USING INDEX uq_page_image_versions_current (page_id=?)']
+
+    def test_set_current_version(self, client, page_id):
+        """测试切换当前版本后仍然只有一个当前版本"""
+        from models import db, Page, PageImageVersion
+        project_id = Page.query.get(page_id).project_id
+        for number in (1, 2, 3):
+            db.session.add(PageImageVersion(page_id=page_id, image_path=f'v{number}.png',
+                                            version_number=number, is_current=number == 3))
+        db.session.commit()
+        first = PageImageVersion.query.filter_by(page_id=page_id, version_number=1).one().id
+
+        response = client.post(f'/api/projects/{project_id}/pages/{page_id}/image-versions/{first}/set-current')
+
+        assert_success_response(response)
+        assert _versions(page_id) == [(1, True), (2, False), (3, False)]
+        assert Page.query.get(page_id).generated_image_path == 'v1.png'
@@ -0,0 +1,59 @@
+"""
+JSON 列与任务进度单元测试
+"""
+
+
+class TestJSONColumns:
+    """页面内容 / 任务进度以 JSON 存储"""
+
+    def test_page_content_round_trip(self, client):
+        """测试页面内容以 JSON 读写，中文不转义，None 存为 NULL"""
+        from models import db, Project, Page
+        project = Project(creation_type='idea')
+        db.session.add(project)
+        db.session.flush()
+        page = Page(project_id=project.id, order_index=0)
+        page.set_outline_content({'title': '第一页', 'points': ['要点']})
+        page.set_description_content(None)
+        db.session.add(page)
+        db.session.commit()
+        page_id = page.id
+        db.session.expire_all()
+
+        page = Page.query.get(page_id)
+        assert page.get_outline_content() == {'title': '第一页', 'points': ['要点']}
+        assert page.get_description_content() is None
+        raw = db.session.execute(db.text('SELECT outline_content, description_content FROM pages')).one()
+        assert '第一页' in str(raw[0])
+        assert raw[1] is None
+
+        # 修改 get 返回的对象后再 set 同一个对象，也会写回数据库
+        outline = page.get_outline_content()
+        outline['title'] = '新标题'
+        page.set_outline_content(outline)
+        db.session.commit()
+        db.session.expire_all()
+        assert Page.query.get(page_id).get_outline_content()['title'] == '新标题'
+
+    def test_increment_progress_in_place(self, client):
+        """测试进度计数在数据库中累加，保留其他字段"""
+        from models import db, Project, Task
+        project = Project(creation_type='idea')
+        db.session.add(project)
+        db.session.flush()
+        task = Task(project_id=project.id, task_type='GENERATE_IMAGES')
+        task.set_progress({'total': 5, 'completed': 0, 'failed': 0, 'current_step': '生成中'})
+        empty = Task(project_id=project.id, task_type='GENERATE_IMAGES')
+        db.session.add_all([task, empty])
+        db.session.commit()
+        task_id, empty_id = task.id, empty.id
+
+        Task.increment_progress(task_id, completed=1)
+        Task.increment_progress(task_id, completed=2, failed=1)
+        Task.increment_progress(empty_id, failed=1)
+        db.session.commit()
+        db.session.expire_all()
+
+        assert Task.query.get(task_id).get_progress() == \
+            {'total': 5, 'completed': 3, 'failed': 1, 'current_step': '生成中'}
+        assert Task.query.get(empty_id).get_progress() == {'completed': 0, 'failed': 1}
@@ -0,0 +1,95 @@
+"""
+页面描述共享前缀与 prompt 缓存单元测试
+"""
+
+from unittest.mock import MagicMock
+
+from services.ai_service import AIService, ProjectContext
+from services.ai_providers.text.base import TextProvider
+from services.prompts import get_page_description_prompt
+
+
+class RecordingTextProvider(TextProvider):
+    """记录调用的文本 provider，模拟支持显式缓存的服务"""
+    
+    def __init__(self, supports_cache=True):
+        self.supports_cache = supports_cache
+        self.created = []
+        self.deleted = []
+        self.calls = []
+    
+    def generate_text(self, prompt, thinking_budget=1000):
+        self.calls.append(('full', prompt, None))
+        return 'desc'
+    
+    def create_prompt_cache(self, prefix, ttl_seconds=900):
+        if not self.supports_cache:
+            return None
+        self.created.append(prefix)
+        return 'cachedContents/test'
+    
+    def generate_text_with_prefix(self, prefix, suffix, thinking_budget=1000, cache_name=None):
+        if cache_name:
+            self.calls.append(('cached', suffix, cache_name))
+            return 'desc'
+        return super().generate_text_with_prefix(prefix, suffix, thinking_budget, cache_name)
+    
+    def delete_prompt_cache(self, cache_name):
+        self.deleted.append(cache_name)
+
+
+def _context():
+    return ProjectContext(
+        {'idea_prompt': '人工智能发展史', 'creation_type': 'idea'},
+        [{'filename': 'ref.md', 'content': '参考资料内容 ' * 3000}],
+        reference_token_budget=0
+    )
+
+
+OUTLINE = [{'title': '封面'}, {'title': '起源'}, {'title': '未来'}]
+
+
+class TestPromptPrefixCache:
+    """共享前缀测试"""
+    
+    def test_prefix_cached_once_and_reused(self, app):
+        """测试前缀只缓存一次，每页只发送后缀"""
+        provider = RecordingTextProvider()
+        service = AIService(text_provider=provider, image_provider=MagicMock())
+        context = _context()
+        
+        with app.app_context():
+            prefix = service.prepare_page_description_prefix(context, OUTLINE)
+            for i, page in enumerate(OUTLINE, 1):
+                service.generate_page_description(context, OUTLINE, page, i, prompt_prefix=prefix)
+            service.release_prompt_prefix(prefix)
+        
+        assert len(provider.created) == 1
+        assert [c[0] for c in provider.calls] == ['cached'] * 3
+        assert all('参考资料内容' not in c[1] for c in provider.calls)
+        assert provider.deleted == ['cachedContents/test']
+    
+    def test_uncached_prompt_matches_single_page_prompt(self, app):
+        """测试不支持缓存时前缀+后缀与单页 prompt 完全一致"""
+        provider = RecordingTextProvider(supports_cache=False)
+        service = AIService(text_provider=provider, image_provider=MagicMock())
+        context = _context()
+        
+        with app.app_context():
+            prefix = service.prepare_page_description_prefix(context, OUTLINE)
+            service.generate_page_description(context, OUTLINE, OUTLINE[1], 2, language='zh', prompt_prefix=prefix)
+        
+        assert provider.calls[0][0] == 'full'
+        assert provider.calls[0][1] == get_page_description_prompt(context, OUTLINE, OUTLINE[1], 2, language='zh')
+    
+    def test_small_prefix_not_cached(self, app):
+        """测试前缀过短时不创建缓存"""
+        provider = RecordingTextProvider()
+        service = AIService(text_provider=provider, image_provider=MagicMock())
+        context = ProjectContext({'idea_prompt': '短', 'creation_type': 'idea'})
+        
+        with app.app_context():
+            prefix = service.prepare_page_description_prefix(context, OUTLINE)
+        
+        assert prefix.cache_name is None
+        assert provider.created == []
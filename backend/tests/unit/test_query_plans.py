@@ -0,0 +1,155 @@
+"""
+查询计划回归测试
+
+在已填充数据的数据库上调用各控制器的常用接口，记录执行的 SQL，
+再对每条语句执行 EXPLAIN QUERY PLAN：出现对数据表的全表扫描（不走索引的 SCAN）即失败。
+"""
+
+import os
+import re
+from contextlib import contextmanager
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+from conftest import assert_success_response
+
+
+# SQLite 3.36+ 的计划格式："SCAN pages"（全表扫描）、"SCAN pages USING INDEX ..."、"SEARCH pages USING ..."
+# 自动索引（USING AUTOMATIC INDEX）每次查询都要先扫描全表建索引，同样算作全表扫描
+FULL_SCAN = re.compile(r'^(?:SCAN (\w+)(?: LEFT-JOIN)?$|SEARCH (\w+) USING AUTOMATIC )')
+
+
+@pytest.fixture(autouse=True)
+def sqlite_only(app):
+    """EXPLAIN QUERY PLAN 的输出格式为 SQLite 专用"""
+    from models import db
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            pytest.skip('query plan checks run on SQLite only')
+
+
+@contextmanager
+def captured_statements(engine):
+    """记录执行的 SELECT / UPDATE / DELETE 语句及其参数"""
+    from sqlalchemy import event
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in ('SELECT', 'UPDATE', 'DELETE'):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', on_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', on_execute)
+
+
+def full_table_scans(statements):
+    """返回 [(表名, SQL)]：查询计划中对数据表做全表扫描的语句"""
+    from models import db
+    tables = set(db.metadata.tables)
+    scans = []
+    with db.engine.connect() as conn:
+        for statement, parameters in statements:
+            for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters):
+                match = FULL_SCAN.match(row[-1])
+                table = match and (match.group(1) or match.group(2))
+                # 子查询 / CTE 的扫描不算（例如窗口函数的 ranked 子查询）
+                if table and re.sub(r'_\d+$', '', table) in tables:
+                    scans.append((table, statement))
+    return scans
+
+
+@pytest.fixture
+def seeded(client, app):
+    """两个项目，每个项目有页面、图片版本、素材、参考文件和任务"""
+    from models import db, Project, Page, PageImageVersion, Material, ReferenceFile, Task
+    ids = {}
+    for p in range(2):
+        project = Project(idea_prompt=f'项目{p}', creation_type='idea', status='COMPLETED')
+        db.session.add(project)
+        db.session.flush()
+        for i in range(4):
+            page = Page(project_id=project.id, order_index=i, status='COMPLETED')
+            db.session.add(page)
+            db.session.flush()
+            for version in (1, 2):
+                rel_path = f'{project.id}/pages/{page.id}_v{version}.png'
+                abs_path = os.path.join(app.config['UPLOAD_FOLDER'], rel_path)
+                os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+                Image.new('RGB', (32, 18)).save(abs_path)
+                db.session.add(PageImageVersion(page_id=page.id, image_path=rel_path,
+                                                version_number=version, is_current=version == 2))
+            page.generated_image_path = rel_path
+        for i in range(3):
+            db.session.add(Material(project_id=project.id, filename=f'm{i}.png',
+                                    relative_path=f'materials/m{i}.png', url=f'/files/materials/m{i}.png'))
+            db.session.add(ReferenceFile(project_id=project.id, filename=f'f{i}.pdf', file_path=f'f{i}.pdf',
+                                         file_size=1, file_type='pdf', parse_status='completed',
+                                         markdown_content='# doc'))
+        task = Task(project_id=project.id, task_type='GENERATE_IMAGES', status='COMPLETED')
+        db.session.add(task)
+        db.session.flush()
+        ids.setdefault('project', project.id)
+        ids.setdefault('page', page.id)
+        ids.setdefault('task', task.id)
+    db.session.commit()
+
+    version = PageImageVersion.query.filter_by(page_id=ids['page'], version_number=1).first()
+    ids['version'] = version.id
+    return ids
+
+
+HOT_REQUESTS = [
+    ('GET', '/api/projects'),
+    ('GET', '/api/projects?include=pages'),
+    ('GET', '/api/projects/{project}'),
+    ('GET', '/api/projects/{project}/tasks/{task}'),
+    ('GET', '/api/projects/{project}/pages/{page}/image-versions'),
+    ('POST', '/api/projects/{project}/pages/{page}/image-versions/{version}/set-current'),
+    ('GET', '/api/projects/{project}/materials'),
+    ('GET', '/api/materials?project_id=all'),
+    ('GET', '/api/materials?project_id=none'),
+    ('GET', '/api/reference-files/project/{project}'),
+    ('GET', '/api/reference-files/project/global'),
+    ('GET', '/api/projects/{project}/export/pptx?filename=deck'),
+]
+
+
+class TestQueryPlans:
+    """常用查询不能出现全表扫描"""
+
+    @pytest.mark.parametrize('method,url', HOT_REQUESTS)
+    def test_hot_requests_use_indexes(self, client, app, seeded, method, url):
+        """测试各接口执行的查询都走索引"""
+        from models import db
+        # 超过同步阈值的导出会查找进行中的同类任务，任务本身不执行
+        with patch.dict(app.config, {'SYNC_EXPORT_MAX_PAGES': 1}), \
+             patch('services.task_manager.task_manager.submit_task'), \
+             captured_statements(db.engine) as statements:
+            response = client.open(url.format(**seeded), method=method)
+        assert_success_response(response)
+
+        assert statements
+        assert full_table_scans(statements) == []
+
+    def test_helper_queries_use_indexes(self, client, seeded):
+        """测试不直接对应接口的常用查询（项目参考文件内容、已解析的重复文件）"""
+        from models import db
+        from controllers.project_controller import _get_project_reference_files_content
+        from controllers.reference_file_controller import _find_parsed_duplicate
+        with captured_statements(db.engine) as statements:
+            assert len(_get_project_reference_files_content(seeded['project'])) == 3
+            _find_parsed_duplicate('0' * 64)
+
+        assert full_table_scans(statements) == []
+
+    def test_detects_full_scan(self, client, seeded):
+        """测试检测逻辑本身：没有索引的过滤条件会被识别为全表扫描"""
+        from models import db, Page
+        with captured_statements(db.engine) as statements:
+            Page.query.filter(Page.status == 'COMPLETED').all()
+
+        assert [table for table, _ in full_table_scans(statements)] == ['pages']
@@ -0,0 +1,111 @@
+"""
+参考文件分块与检索单元测试
+"""
+
+from services.reference_index import (
+    chunk_markdown, estimate_tokens, tokenize, ReferenceIndex, EXCERPT_SEPARATOR
+)
+
+
+class TestChunking:
+    """markdown 分块测试"""
+    
+    def test_chunks_respect_token_limit(self):
+        """测试分块大小不超过上限"""
+        markdown = '\n\n'.join(f'段落{i}：' + '内容' * 50 for i in range(40))
+        chunks = chunk_markdown(markdown, max_tokens=200)
+        
+        assert len(chunks) > 1
+        assert all(estimate_tokens(c) <= 200 for c in chunks)
+    
+    def test_heading_starts_new_chunk(self):
+        """测试标题开启新的 chunk"""
+        markdown = "# Intro\n\nhello world\n\n# Details\n\nmore text"
+        chunks = chunk_markdown(markdown, max_tokens=500)
+        
+        assert chunks == ["# Intro\n\nhello world", "# Details\n\nmore text"]
+    
+    def test_oversized_line_is_split(self):
+        """测试没有换行的超长段落会被硬切分"""
+        chunks = chunk_markdown('x' * 10000, max_tokens=100)
+        
+        assert len(chunks) > 1
+        assert ''.join(chunks) == 'x' * 10000
+
+
+class TestTokenize:
+    """分词测试"""
+    
+    def test_cjk_bigrams_and_words(self):
+        """测试中文按二元组、英文按单词切分"""
+        assert tokenize('机器学习 GPU') == ['机器', '器学', '学习', 'gpu']
+
+
+class TestReferenceIndex:
+    """参考内容检索测试"""
+    
+    def test_returns_full_content_within_budget(self):
+        """测试总量在预算内时原样返回"""
+        files = [{'filename': 'a.md', 'content': 'short content'}]
+        
+        assert ReferenceIndex(files).select('anything', 1000) == files
+    
+    def test_selects_relevant_chunks_under_budget(self):
+        """测试超出预算时只选取相关 chunk"""
+        sections = [f"# Section {i}\n\n" + ("filler text about topic%d " % i) * 30 for i in range(20)]
+        sections[13] = "# Quantum\n\nquantum entanglement experiment results " * 3
+        files = [{'filename': 'paper.md', 'content': '\n\n'.join(sections)}]
+        
+        selected = ReferenceIndex(files).select('quantum entanglement', 300)
+        
+        assert len(selected) == 1
+        content = selected[0]['content']
+        assert 'quantum entanglement' in content
+        assert estimate_tokens(content.replace(EXCERPT_SEPARATOR, '')) <= 300
+    
+    def test_uses_precomputed_chunks(self):
+        """测试优先使用解析时保存的 chunk"""
+        files = [{
+            'filename': 'a.md',
+            'content': 'alpha ' * 500 + 'beta ' * 500,
+            'chunks': ['alpha ' * 500, 'beta ' * 500]
+        }]
+        
+        selected = ReferenceIndex(files).select('beta', 700)
+        
+        assert selected[0]['content'] == 'beta ' * 500
+    
+    def test_concurrent_select_builds_index_once(self):
+        """测试多个线程同时首次检索：索引只构建一次，不会读到构建了一半的索引"""
+        import threading
+        import time
+        from unittest.mock import patch
+        from services import reference_index
+        
+        files = [{'filename': 'a.md', 'content': 'alpha ' * 500 + 'beta ' * 500,
+                  'chunks': ['alpha ' * 500, 'beta ' * 500]}]
+        index = ReferenceIndex(files)
+        builds, results, errors = [], [], []
+        
+        class SlowBM25(reference_index.BM25Index):
+            def __init__(self, docs):
+                builds.append(1)
+                time.sleep(0.05)
+                super().__init__(docs)
+        
+        def select():
+            try:
+                results.append(index.select('beta', 700))
+            except Exception as e:
+                errors.append(e)
+        
+        with patch.object(reference_index, 'BM25Index', SlowBM25):
+            threads = [threading.Thread(target=select) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        assert errors == []
+        assert len(builds) == 1
+        assert all(result[0]['content'] == 'beta ' * 500 for result in results)
@@ -0,0 +1,105 @@
+"""
+设置缓存单元测试
+"""
+
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from conftest import assert_success_response
+
+
+@contextmanager
+def captured_selects(engine):
+    """记录执行的 SELECT 语句"""
+    from sqlalchemy import event
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', on_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', on_execute)
+
+
+class TestSettingsCache:
+    """Settings.get_cached 测试"""
+
+    def test_hot_reads_do_not_query_database(self, client):
+        """测试加载一次后，读取输出语言 / 设置不再查询数据库"""
+        from models import db
+        assert client.get('/api/output-language').get_json()['data']['language'] == 'zh'
+
+        with captured_selects(db.engine) as statements:
+            for _ in range(3):
+                assert client.get('/api/output-language').get_json()['data']['language'] == 'zh'
+            assert_success_response(client.get('/api/settings'))
+
+        assert statements == []
+
+    def test_update_invalidates_cache(self, client, app):
+        """测试本进程更新设置后立即生效，版本号加一"""
+        from models import db, Settings
+        assert client.get('/api/settings').get_json()['data']['output_language'] == 'zh'
+
+        # 更新设置会同步到 app.config，测试结束后还原
+        with patch.dict(app.config):
+            response = client.put('/api/settings', json={'output_language': 'en'})
+
+            assert_success_response(response)
+            assert client.get('/api/output-language').get_json()['data']['language'] == 'en'
+            assert client.get('/api/settings').get_json()['data']['output_language'] == 'en'
+        db.session.expire_all()
+        assert Settings.query.get(1).version == 2
+
+    def test_version_change_from_other_process(self, client, app):
+        """测试其他进程更新设置（版本号变化）后，任意请求（不只是设置接口）在确认间隔到期时同步到 app.config"""
+        from models import db, Settings
+        assert client.get('/api/output-language').get_json()['data']['language'] == 'zh'
+        version = Settings.query.get(1).version
+        # 模拟另一个进程直接更新数据库
+        db.session.execute(db.update(Settings).values(output_language='ja', text_model='text-other',
+                                                      version=Settings.version + 1))
+        db.session.commit()
+
+        assert client.get('/api/output-language').get_json()['data']['language'] == 'zh'
+        with patch.dict(app.config, {'SETTINGS_VERSION_CHECK_INTERVAL': 0}), \
+             patch('services.ai_service_manager.refresh_ai_service') as refresh:
+            # 只处理生成 / 导出等请求的进程同样会确认版本号
+            assert_success_response(client.get('/api/projects'))
+
+            # Provider 配置按 SETTINGS_VERSION 缓存：版本号和配置一起更新，并在后台重建 Provider
+            assert app.config['SETTINGS_VERSION'] == version + 1
+            assert app.config['TEXT_MODEL'] == 'text-other'
+            assert app.config['OUTPUT_LANGUAGE'] == 'ja'
+            refresh.assert_called_once()
+            assert client.get('/api/output-language').get_json()['data']['language'] == 'ja'
+
+    def test_unchanged_version_only_reads_version(self, client, app):
+        """测试确认间隔到期但版本号未变时，请求前只查询 version 列，不重新加载整行"""
+        from models import db
+        client.get('/health')
+
+        with patch.dict(app.config, {'SETTINGS_VERSION_CHECK_INTERVAL': 0}), \
+             captured_selects(db.engine) as statements:
+            client.get('/health')
+
+        assert len(statements) == 1
+        assert statements[0].startswith('SELECT settings.version')
+
+    def test_provider_config_resolved_once_per_version(self, app):
+        """测试 Provider 配置按设置版本号缓存，版本号变化后重新解析"""
+        from services.ai_providers import _get_provider_config, clear_provider_config_cache
+        clear_provider_config_cache()
+        with app.app_context(), patch.dict(app.config, {
+            'AI_PROVIDER_FORMAT': 'gemini', 'GOOGLE_API_KEY': 'key-1', 'SETTINGS_VERSION': 1,
+        }):
+            assert _get_provider_config()['api_key'] == 'key-1'
+            app.config['GOOGLE_API_KEY'] = 'key-2'
+            assert _get_provider_config()['api_key'] == 'key-1'
+            app.config['SETTINGS_VERSION'] = 2
+            assert _get_provider_config()['api_key'] == 'key-2'
+        clear_provider_config_cache()
@@ -0,0 +1,166 @@
+"""
+生成任务写缓冲单元测试
+"""
+
+import time
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+
+import pytest
+from PIL import Image
+
+
+@contextmanager
+def counted_commits(engine):
+    """统计数据库提交次数"""
+    from sqlalchemy import event
+    commits = []
+    on_commit = lambda conn: commits.append(conn)  # noqa: E731
+    event.listen(engine, 'commit', on_commit)
+    try:
+        yield commits
+    finally:
+        event.remove(engine, 'commit', on_commit)
+
+
+@pytest.fixture
+def project_pages(client):
+    """一个项目，3 个已有描述的页面（第 1 页已有一个图片版本），一个图片生成任务"""
+    from models import db, Project, Page, PageImageVersion, Task
+    project = Project(idea_prompt='写缓冲', creation_type='idea', status='DESCRIPTIONS_GENERATED')
+    db.session.add(project)
+    db.session.flush()
+    page_ids = []
+    for i in range(3):
+        page = Page(project_id=project.id, order_index=i, status='DESCRIPTION_GENERATED')
+        page.set_outline_content({'title': f'第{i + 1}页', 'points': []})
+        page.set_description_content({'text': f'第{i + 1}页描述'})
+        db.session.add(page)
+        db.session.flush()
+        page_ids.append(page.id)
+    db.session.add(PageImageVersion(page_id=page_ids[0], image_path='old.png', version_number=1, is_current=True))
+    db.session.get(Page, page_ids[0]).image_version_counter = 1
+    task = Task(project_id=project.id, task_type='GENERATE_IMAGES', status='PENDING')
+    task.set_progress({'total': 3, 'completed': 0, 'failed': 0})
+    db.session.add(task)
+    db.session.commit()
+    return project.id, page_ids, task.id
+
+
+class TestTaskWriteBuffer:
+    """TaskWriteBuffer 测试"""
+
+    def test_events_are_coalesced_into_one_transaction(self, app, project_pages):
+        """测试页面状态、图片版本和进度合并为一次提交，同一页面只保留最后的值"""
+        from models import db, Page, PageImageVersion, Task
+        from services.task_writes import TaskWriteBuffer
+        project_id, (first, second, third), task_id = project_pages
+        file_service = MagicMock()
+
+        with counted_commits(db.engine) as commits:
+            with TaskWriteBuffer(app, task_id, file_service=file_service, flush_interval=60, max_events=100) as writes:
+                writes.update_page(first, status='GENERATING')
+                writes.update_page(second, status='GENERATING')
+                writes.add_image_version(project_id, first, 'p1_v2.png', 2)
+                writes.add_progress(completed=1)
+                writes.update_page(second, status='FAILED')
+                writes.add_progress(failed=1)
+
+        assert len(commits) == 1
+        assert writes.flush_count == 1
+        file_service.invalidate_export_cache.assert_called_once_with(project_id)
+
+        db.session.expire_all()
+        assert Page.query.get(first).status == 'COMPLETED'
+        assert Page.query.get(first).generated_image_path == 'p1_v2.png'
+        assert Page.query.get(second).status == 'FAILED'
+        assert Page.query.get(third).status == 'DESCRIPTION_GENERATED'
+        versions = PageImageVersion.query.filter_by(page_id=first).order_by(PageImageVersion.version_number).all()
+        assert [(v.version_number, v.is_current) for v in versions] == [(1, False), (2, True)]
+        assert Task.query.get(task_id).get_progress() == {'total': 3, 'completed': 1, 'failed': 1}
+
+    def test_only_latest_version_in_a_flush_is_current(self, app, project_pages):
+        """测试同一页面在一次刷新中有多个新版本时只有版本号最大的成为当前版本"""
+        from models import db, Page, PageImageVersion
+        from services.task_writes import TaskWriteBuffer
+        project_id, (first, _, _), task_id = project_pages
+
+        with TaskWriteBuffer(app, task_id, flush_interval=60, max_events=100) as writes:
+            writes.add_image_version(project_id, first, 'p1_v3.png', 3)
+            writes.add_image_version(project_id, first, 'p1_v2.png', 2)
+
+        db.session.expire_all()
+        versions = PageImageVersion.query.filter_by(page_id=first).order_by(PageImageVersion.version_number).all()
+        assert [(v.version_number, v.is_current) for v in versions] == [(1, False), (2, False), (3, True)]
+        assert Page.query.get(first).generated_image_path == 'p1_v3.png'
+
+    def test_constraint_violation_is_not_requeued(self, app, project_pages):
+        """测试违反约束的图片版本不会被反复重试，页面状态和进度仍然写入"""
+        from sqlalchemy.exc import IntegrityError
+        from models import db, Page, PageImageVersion, Task
+        from services.task_writes import TaskWriteBuffer
+        project_id, (first, second, _), task_id = project_pages
+
+        writes = TaskWriteBuffer(app, task_id, flush_interval=60, max_events=100)
+        # 版本号 1 已存在（uq page_id + version_number）
+        writes.add_image_version(project_id, first, 'dup.png', 1)
+        writes.update_page(second, status='FAILED')
+        writes.add_progress(failed=1)
+        with pytest.raises(IntegrityError):
+            writes.flush()
+
+        writes.flush()
+        assert writes.flush_count == 1
+
+        db.session.expire_all()
+        versions = PageImageVersion.query.filter_by(page_id=first).all()
+        assert [(v.image_path, v.is_current) for v in versions] == [('old.png', True)]
+        assert Page.query.get(first).generated_image_path != 'dup.png'
+        assert Page.query.get(second).status == 'FAILED'
+        assert Task.query.get(task_id).get_progress() == {'total': 3, 'completed': 0, 'failed': 1}
+
+    def test_flushes_after_max_events(self, app, project_pages):
+        """测试累计事件数达到上限时立即在后台刷新"""
+        from models import db, Page
+        from services.task_writes import TaskWriteBuffer
+        _, (first, second, _), task_id = project_pages
+
+        with TaskWriteBuffer(app, task_id, flush_interval=60, max_events=2) as writes:
+            writes.update_page(first, status='GENERATING')
+            writes.update_page(second, status='GENERATING')
+            deadline = time.time() + 5
+            while writes.flush_count == 0 and time.time() < deadline:
+                time.sleep(0.01)
+            assert writes.flush_count == 1
+
+            db.session.expire_all()
+            assert Page.query.get(first).status == 'GENERATING'
+
+    def test_generate_images_task_uses_buffer(self, app, project_pages):
+        """测试图片生成任务的页面状态、版本和进度经由缓冲区写入"""
+        from models import db, Page, PageImageVersion, Task
+        from services import FileService
+        from services.task_manager import generate_images_task
+        project_id, page_ids, task_id = project_pages
+
+        ai_service = MagicMock()
+        ai_service.flatten_outline.return_value = [{'title': f'第{i + 1}页', 'points': []} for i in range(3)]
+        ai_service.extract_image_urls_from_markdown.return_value = []
+        ai_service.generate_image_prompt.return_value = 'prompt'
+        ai_service.generate_image.return_value = Image.new('RGB', (64, 36))
+        file_service = FileService(app.config['UPLOAD_FOLDER'])
+
+        with counted_commits(db.engine) as commits:
+            generate_images_task(task_id, project_id, ai_service, file_service, outline=[], use_template=False,
+                                 max_workers=3, app=app)
+
+        db.session.expire_all()
+        task = Task.query.get(task_id)
+        assert task.status == 'COMPLETED', task.error_message
+        assert task.get_progress() == {'total': 3, 'completed': 3, 'failed': 0}
+        assert all(Page.query.get(page_id).status == 'COMPLETED' for page_id in page_ids)
+        current = PageImageVersion.query.filter_by(is_current=True).all()
+        assert sorted(v.page_id for v in current) == sorted(page_ids)
+        assert PageImageVersion.query.filter_by(page_id=page_ids[0], is_current=True).one().version_number == 2
+        # 开始（PROCESSING、初始化进度）+ 缓冲区刷新 + 完成（任务、项目状态）
+        assert len(commits) <= 8
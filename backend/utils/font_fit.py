@@ -0,0 +1,177 @@
+"""
+Font fitting - 根据文本框尺寸计算字号
+
+用真实字体的字形宽度（而不是固定的字符宽度比例）估算文本宽度，并对整页的文本框
+用 NumPy 一次性求解：
+
+- 每个字符只测量一次前进宽度（以 em 为单位，与字号无关），字符串宽度为其求和；
+- 全角字符（中日韩等，East Asian Width 为 W/F）按 1 em 计算；
+- 其余字符用 Pillow 测量，默认使用 Pillow 自带的无衬线字体，可指定其他 TrueType 字体；
+- 对“n 行能放下的最大字号”取闭式解，再向下取整到 0.5pt。
+
+行数按 总宽度 / 可用宽度 估算，多行文本的可用宽度乘以 WRAP_EFFICIENCY，为按词换行
+留出余量。
+"""
+import logging
+import threading
+import unicodedata
+from typing import Optional, Sequence
+
+import numpy as np
+from PIL import ImageFont
+
+logger = logging.getLogger(__name__)
+
+# 固定比例估算（无法加载字体时使用，与旧实现一致）
+_FALLBACK_CHAR_WIDTH_EM = 0.55
+
+
+def _is_wide(char: str) -> bool:
+    return unicodedata.east_asian_width(char) in ('W', 'F')
+
+
+class FontFitter:
+    """文本框字号求解器"""
+
+    # 测量字体时使用的字号（越大越精确）
+    MEASURE_SIZE = 1000
+
+    # 行高（字号的倍数）
+    LINE_HEIGHT = 1.2
+
+    # 文本框内边距（PPTXBuilder.add_text_element 设置的 0.05 英寸 × 2）
+    BOX_MARGIN_INCHES = 0.1
+
+    # bbox 每边预留 3%，避免溢出
+    PADDING_RATIO = 0.03
+
+    # 多行文本按词换行造成的每行空白
+    WRAP_EFFICIENCY = 0.92
+
+    # 粗体字形比常规字形宽
+    BOLD_WIDTH_FACTOR = 1.06
+
+    # 1-3 个字符的短文本按高度确定字号（高度的 70%），同时不超过 bbox 宽度
+    SHORT_TEXT_LENGTH = 3
+    SHORT_TEXT_HEIGHT_RATIO = 0.7
+
+    def __init__(self, font_path: Optional[str] = None, min_size: float = 6, max_size: float = 200):
+        """
+        Args:
+            font_path: 用于测量的 TrueType 字体（默认使用 Pillow 自带字体）
+            min_size: 最小字号（pt）
+            max_size: 最大字号（pt）
+        """
+        self.min_size = min_size
+        self.max_size = max_size
+        self._font = self._load_font(font_path)
+        self._advances = {}
+
+    def _load_font(self, font_path: Optional[str]):
+        try:
+            if font_path:
+                return ImageFont.truetype(font_path, self.MEASURE_SIZE)
+            return ImageFont.load_default(size=self.MEASURE_SIZE)
+        except (OSError, ImportError) as e:
+            logger.warning(f"Font metrics unavailable ({e}), falling back to fixed character widths")
+            return None
+
+    def _measure(self, char: str) -> float:
+        """单个字符的前进宽度（em），结果按字符缓存"""
+        if _is_wide(char):
+            advance = 1.0
+        elif self._font is not None:
+            advance = self._font.getlength(char) / self.MEASURE_SIZE
+        else:
+            advance = _FALLBACK_CHAR_WIDTH_EM
+        self._advances[char] = advance
+        return advance
+
+    def text_width_em(self, text: str, bold: bool = False) -> float:
+        """
+        单行排版时文本的宽度（em，即字号为 1pt 时的宽度 pt）
+        """
+        advances = self._advances
+        width = sum(advances.get(char) or self._measure(char) for char in text)
+        return width * self.BOLD_WIDTH_FACTOR if bold else width
+
+    def fit_sizes(
+        self,
+        bboxes: Sequence[Sequence[float]],
+        texts: Sequence[str],
+        bold: Optional[Sequence[bool]] = None,
+        dpi: float = 96
+    ) -> np.ndarray:
+        """
+        批量计算字号（例如一整页的全部文本框）
+
+        Args:
+            bboxes: 文本框 [x0, y0, x1, y1]（像素）
+            texts: 文本内容
+            bold: 是否粗体（默认全部常规）
+            dpi: 像素到英寸的换算 DPI
+
+        Returns:
+            每个文本框的字号（pt）
+        """
+        count = len(texts)
+        if count == 0:
+            return np.zeros(0)
+        bold = bold if bold is not None else [False] * count
+
+        boxes = np.asarray(bboxes, dtype=float).reshape(count, 4)
+        scale = (1 - 2 * self.PADDING_RATIO) / dpi * 72
+        box_width = (boxes[:, 2] - boxes[:, 0]) * scale
+        box_height = (boxes[:, 3] - boxes[:, 1]) * scale
+        usable_width = box_width - self.BOX_MARGIN_INCHES * 72
+        usable_height = box_height - self.BOX_MARGIN_INCHES * 72
+
+        text_width = np.fromiter((self.text_width_em(text, is_bold) for text, is_bold in zip(texts, bold)),
+                                 dtype=float, count=count)
+        lengths = np.fromiter((len(text) for text in texts), dtype=int, count=count)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 单行：宽度和高度都要放下
+            one_line = np.minimum(usable_width / text_width, usable_height / self.LINE_HEIGHT)
+
+            # n 行（n >= 2）：size <= n * W' / w 且 size <= H / (1.2 n)，两者在 n² = H w / (1.2 W') 处相等
+            wrap_width = usable_width * self.WRAP_EFFICIENCY
+            crossover = np.sqrt(usable_height * text_width / (self.LINE_HEIGHT * wrap_width))
+            best = one_line
+            for lines in (np.floor(crossover), np.ceil(crossover)):
+                lines = np.maximum(lines, 2)
+                candidate = np.minimum(lines * wrap_width / text_width, usable_height / (self.LINE_HEIGHT * lines))
+                best = np.fmax(best, candidate)
+
+        sizes = np.floor(np.nan_to_num(best, nan=self.max_size, posinf=self.max_size) * 2) / 2
+
+        # 可用区域为空时只能取最小字号
+        sizes = np.where((usable_width <= 0) | (usable_height <= 0), self.min_size, sizes)
+
+        # 短文本：按高度取字号，不超过 bbox 宽度
+        short = lengths <= self.SHORT_TEXT_LENGTH
+        if short.any():
+            with np.errstate(divide='ignore'):
+                short_sizes = np.minimum(box_height * self.SHORT_TEXT_HEIGHT_RATIO,
+                                         np.where(text_width > 0, box_width / text_width, np.inf))
+            sizes = np.where(short, short_sizes, sizes)
+
+        return np.clip(sizes, self.min_size, self.max_size)
+
+    def fit_size(self, bbox: Sequence[float], text: str, bold: bool = False, dpi: float = 96) -> float:
+        """单个文本框的字号（pt）"""
+        return float(self.fit_sizes([bbox], [text], [bold], dpi)[0])
+
+
+_default_fitter = None
+_default_fitter_lock = threading.Lock()
+
+
+def get_font_fitter() -> FontFitter:
+    """共享的默认 FontFitter（字体只加载一次）"""
+    global _default_fitter
+    if _default_fitter is None:
+        with _default_fitter_lock:
+            if _default_fitter is None:
+                _default_fitter = FontFitter()
+    return _default_fitter
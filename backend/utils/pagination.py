@@ -0,0 +1,72 @@
+"""
+Keyset (cursor) pagination helpers
+
+列表按 (updated_at DESC, id DESC) 排序，游标记录上一页最后一条的 (updated_at, id)，
+下一页只取排在它之后的行：查询走 (updated_at, id) 复合索引，耗时与翻到第几页无关
+（OFFSET 需要先扫描并丢弃前面所有行）。
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+
+
+def encode_cursor(updated_at: datetime, item_id: str) -> str:
+    """编码游标（URL 安全的 base64）"""
+    payload = json.dumps([updated_at.isoformat(), item_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    解码游标
+
+    Raises:
+        ValueError: 游标格式不正确
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        updated_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(updated_at), str(item_id)
+    except (binascii.Error, UnicodeError, ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def parse_limit(value: Optional[str], default: int, maximum: int) -> int:
+    """解析 limit 参数，非法值使用默认值，并限制在 [1, maximum]"""
+    try:
+        limit = int(value) if value is not None else default
+    except (TypeError, ValueError):
+        limit = default
+    return min(max(1, limit), maximum)
+
+
+def paginate_keyset(query, model, limit: int, cursor: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+    """
+    按 (updated_at DESC, id DESC) 取一页
+
+    Args:
+        query: 已加好过滤条件的查询（不要带 order_by / limit / offset）
+        model: 带 updated_at 和 id 列的模型
+        limit: 每页条数
+        cursor: 上一页返回的 next_cursor（None 为第一页）
+
+    Returns:
+        (items, next_cursor)；没有更多数据时 next_cursor 为 None
+
+    Raises:
+        ValueError: 游标格式不正确
+    """
+    if cursor:
+        updated_at, item_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.updated_at, model.id) < tuple_(updated_at, item_id))
+
+    # 多取一条判断是否还有下一页
+    items = query.order_by(model.updated_at.desc(), model.id.desc()).limit(limit + 1).all()
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor(items[-1].updated_at, items[-1].id)
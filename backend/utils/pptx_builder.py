@@ -11,6 +11,8 @@ from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
 from PIL import Image
 from html.parser import HTMLParser
+import numpy as np
+from .font_fit import get_font_fitter
 
 logger = logging.getLogger(__name__)
 
@@ -186,79 +188,41 @@ class PPTXBuilder:
     def calculate_font_size(self, bbox: List[int], text: str, text_level: Any = None, dpi: int = None) -> float:
         """
         Calculate appropriate font size based on bounding box and text content
-        Pure bbox-based calculation without text_level restrictions
+        Uses glyph widths from real font metrics (see utils.font_fit)
         
         Args:
             bbox: Bounding box [x0, y0, x1, y1] in pixels
             text: Text content
-            text_level: Text level (kept for compatibility, not used in calculation)
+            text_level: Text level; titles (1 / 'title') are bold and measured wider
             dpi: DPI for pixel to inch conversion
             
         Returns:
             Font size in points (float for precision)
         """
-        dpi = dpi or self.DEFAULT_DPI
-        
-        # Get bbox dimensions in pixels
-        width_px = bbox[2] - bbox[0]
-        height_px = bbox[3] - bbox[1]
-        
-        # Add small padding to prevent overflow (3% on each side = 6% total reduction)
-        padding_ratio = 0.03
-        width_px = width_px * (1 - 2 * padding_ratio)
-        height_px = height_px * (1 - 2 * padding_ratio)
-        
-        # Convert to inches for PPTX calculations
-        width_in = width_px / dpi
-        height_in = height_px / dpi
-        
-        text_length = len(text)
-        
-        # For very short text (1-3 chars), use height-based sizing
-        if text_length <= 3:
-            # Use 70% of height for single line text
-            estimated_size = height_in * 0.7 * 72  # 72 points per inch
-            return max(self.MIN_FONT_SIZE, min(self.MAX_FONT_SIZE, estimated_size))
-        
-        # Binary search with finer granularity (0.5pt steps)
-        # Start from maximum, work down to find best fit
-        best_size = self.MIN_FONT_SIZE
-        
-        # Use 0.5pt steps for more precision
-        font_sizes = [size / 2.0 for size in range(int(self.MAX_FONT_SIZE * 2), int(self.MIN_FONT_SIZE * 2) - 1, -1)]
+        return float(self.calculate_font_sizes([bbox], [text], [text_level], dpi)[0])
+    
+    def calculate_font_sizes(self, bboxes: List[List[int]], texts: List[str],
+                             text_levels: List[Any] = None, dpi: int = None) -> List[float]:
+        """
+        Calculate font sizes for many text boxes at once (e.g. all texts of a slide)
         
-        for font_size in font_sizes:
-            # Estimate character width (proportional fonts)
-            # For CJK characters (Chinese/Japanese/Korean), use slightly wider ratio
-            has_cjk = any('\u4e00' <= char <= '\u9fff' or '\u3040' <= char <= '\u30ff' for char in text)
-            char_width_ratio = 0.7 if has_cjk else 0.55
-            
-            char_width_pts = font_size * char_width_ratio
-            char_width_in = char_width_pts / 72
-            
-            # Account for text box padding (we set 0.05 inch margins)
-            usable_width = width_in - 0.1  # Left + right margins
-            usable_height = height_in - 0.1  # Top + bottom margins
-            
-            if usable_width <= 0 or usable_height <= 0:
-                continue
-            
-            # Calculate how many characters fit per line
-            chars_per_line = max(1, int(usable_width / char_width_in))
-            
-            # Calculate required lines
-            required_lines = max(1, (text_length + chars_per_line - 1) // chars_per_line)
-            
-            # Line height is typically 1.2x font size
-            line_height_in = (font_size * 1.2) / 72
-            total_height_needed = required_lines * line_height_in
+        Args:
+            bboxes: Bounding boxes [x0, y0, x1, y1] in pixels
+            texts: Text contents
+            text_levels: Text levels (see calculate_font_size)
+            dpi: DPI for pixel to inch conversion
             
-            # If text fits within usable space, this is our size
-            if total_height_needed <= usable_height:
-                best_size = font_size
-                break
-        
-        return best_size
+        Returns:
+            Font sizes in points
+        """
+        fitter = get_font_fitter()
+        text_levels = text_levels or [None] * len(texts)
+        sizes = fitter.fit_sizes(
+            bboxes, texts,
+            bold=[level == 1 or level == 'title' for level in text_levels],
+            dpi=dpi or self.DEFAULT_DPI
+        )
+        return np.clip(sizes, self.MIN_FONT_SIZE, self.MAX_FONT_SIZE).tolist()
     
     def add_text_element(
         self,
@@ -267,7 +231,8 @@ class PPTXBuilder:
         bbox: List[int],
         text_level: Any = None,
         dpi: int = None,
-        align: str = 'left'
+        align: str = 'left',
+        font_size: float = None
     ):
         """
         Add text element to slide
@@ -279,6 +244,7 @@ class PPTXBuilder:
             text_level: Text level (1=title, 2=heading, etc.) or type string
             dpi: DPI for conversion (default: 96)
             align: Text alignment ('left', 'center', 'right')
+            font_size: Precomputed font size in points (default: calculate_font_size)
         """
         dpi = dpi or self.DEFAULT_DPI
         
@@ -295,7 +261,8 @@ class PPTXBuilder:
         text_frame.word_wrap = True
         
         # Set font size (pass original bbox in pixels and dpi)
-        font_size = self.calculate_font_size(bbox, text, text_level, dpi)
+        if font_size is None:
+            font_size = self.calculate_font_size(bbox, text, text_level, dpi)
         paragraph = text_frame.paragraphs[0]
         paragraph.font.size = Pt(font_size)
         
@@ -394,27 +361,30 @@ class PPTXBuilder:
     def add_table_element(
         self,
         slide,
-        html_table: str,
+        html_table: Optional[str],
         bbox: List[int],
-        dpi: int = None
+        dpi: int = None,
+        table_data: List[List[str]] = None
     ):
         """
         Add editable table to slide from HTML table string
         
         Args:
             slide: Target slide
-            html_table: HTML table string
+            html_table: HTML table string (ignored when table_data is given)
             bbox: Bounding box [x0, y0, x1, y1] in pixels
             dpi: DPI for conversion (default: 96)
+            table_data: Already parsed rows of cell texts
         """
         dpi = dpi or self.DEFAULT_DPI
         
         # Parse HTML table
-        try:
-            table_data = HTMLTableParser.parse_html_table(html_table)
-        except Exception as e:
-            logger.error(f"Failed to parse HTML table: {str(e)}")
-            return
+        if table_data is None:
+            try:
+                table_data = HTMLTableParser.parse_html_table(html_table)
+            except Exception as e:
+                logger.error(f"Failed to parse HTML table: {str(e)}")
+                return
         
         if not table_data or not table_data[0]:
             logger.warning("Empty table data")
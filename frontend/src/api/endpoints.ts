@@ -44,16 +44,43 @@ export const uploadTemplate = async (
 };
 
 /**
- * 获取项目列表（历史项目）
+ * 游标分页参数：limit 为每页条数，cursor 为上一页返回的 next_cursor
+ */
+export interface PageParams {
+  limit?: number;
+  cursor?: string;
+}
+
+/**
+ * 游标分页结果：has_more 为 true 时用 next_cursor 请求下一页
  */
-export const listProjects = async (limit?: number, offset?: number): Promise<ApiResponse<{ projects: Project[]; total: number }>> => {
+export interface PageInfo {
+  has_more?: boolean;
+  next_cursor?: string | null;
+}
+
+/**
+ * 获取项目列表（历史项目）
+ * 默认每个项目只返回页面摘要（summary）；includePages 为 true 时返回完整页面数据
+ */
+export const listProjects = async (
+  limit?: number,
+  offset?: number,
+  includePages?: boolean,
+  cursor?: string
+): Promise<ApiResponse<{ projects: Project[]; total: number } & PageInfo>> => {
   const params = new URLSearchParams();
   if (limit !== undefined) params.append('limit', limit.toString());
-  if (offset !== undefined) params.append('offset', offset.toString());
+  if (cursor) {
+    params.append('cursor', cursor);
+  } else if (offset !== undefined) {
+    params.append('offset', offset.toString());
+  }
+  if (includePages) params.append('include', 'pages');
 
   const queryString = params.toString();
   const url = `/api/projects${queryString ? `?${queryString}` : ''}`;
-  const response = await apiClient.get<ApiResponse<{ projects: Project[]; total: number }>>(url);
+  const response = await apiClient.get<ApiResponse<{ projects: Project[]; total: number } & PageInfo>>(url);
   return response.data;
 };
 
@@ -165,6 +192,68 @@ export const generatePageDescription = async (
   return response.data;
 };
 
+/**
+ * 流式生成单页描述（SSE）
+ * 生成过程中通过 onDelta 回调返回增量文本，完成后后端自动保存并返回最新页面数据
+ */
+export const streamPageDescription = async (
+  projectId: string,
+  pageId: string,
+  onDelta: (text: string) => void,
+  forceRegenerate: boolean = false,
+  language?: OutputLanguage
+): Promise<Page> => {
+  const lang = language || await getStoredOutputLanguage();
+  const response = await fetch(
+    `/api/projects/${projectId}/pages/${pageId}/generate/description/stream`,
+    {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ force_regenerate: forceRegenerate, language: lang }),
+    }
+  );
+
+  // 参数校验失败时后端返回普通 JSON 错误
+  if (!response.ok || !response.body) {
+    const data = await response.json().catch(() => null);
+    throw new Error(data?.error?.message || data?.message || `请求失败: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let separatorIndex;
+    while ((separatorIndex = buffer.indexOf('\n\n')) !== -1) {
+      const rawEvent = buffer.slice(0, separatorIndex);
+      buffer = buffer.slice(separatorIndex + 2);
+
+      let eventName = 'message';
+      let eventData = '';
+      for (const line of rawEvent.split('\n')) {
+        if (line.startsWith('event: ')) eventName = line.slice(7);
+        else if (line.startsWith('data: ')) eventData += line.slice(6);
+      }
+      const payload = eventData ? JSON.parse(eventData) : null;
+
+      if (eventName === 'delta') {
+        onDelta(payload.text);
+      } else if (eventName === 'done') {
+        return payload as Page;
+      } else if (eventName === 'error') {
+        throw new Error(payload?.message || '生成描述失败');
+      }
+    }
+  }
+
+  throw new Error('生成描述的连接意外中断');
+};
+
 /**
  * 根据用户要求修改大纲
  * @param projectId 项目ID
@@ -406,27 +495,43 @@ export const getTaskStatus = async (projectId: string, taskId: string): Promise<
 
 // ===== 导出 =====
 
+export interface ExportResult {
+  download_url?: string;
+  download_url_absolute?: string;
+  cached?: boolean;
+  task_id?: string;
+}
+
+/**
+ * 导出档位：archive 原图（默认）/ print 300 DPI / screen 150 DPI（体积最小）
+ */
+export type ExportProfile = 'archive' | 'print' | 'screen';
+
 /**
  * 导出为PPTX
+ * 小文件直接返回下载链接；大文件返回任务ID，需要通过getTaskStatus轮询获取下载链接
  */
 export const exportPPTX = async (
-  projectId: string
-): Promise<ApiResponse<{ download_url: string; download_url_absolute?: string }>> => {
-  const response = await apiClient.get<
-    ApiResponse<{ download_url: string; download_url_absolute?: string }>
-  >(`/api/projects/${projectId}/export/pptx`);
+  projectId: string,
+  profile?: ExportProfile
+): Promise<ApiResponse<ExportResult>> => {
+  const response = await apiClient.get<ApiResponse<ExportResult>>(`/api/projects/${projectId}/export/pptx`, {
+    params: profile ? { profile } : undefined,
+  });
   return response.data;
 };
 
 /**
  * 导出为PDF
+ * 小文件直接返回下载链接；大文件返回任务ID，需要通过getTaskStatus轮询获取下载链接
  */
 export const exportPDF = async (
-  projectId: string
-): Promise<ApiResponse<{ download_url: string; download_url_absolute?: string }>> => {
-  const response = await apiClient.get<
-    ApiResponse<{ download_url: string; download_url_absolute?: string }>
-  >(`/api/projects/${projectId}/export/pdf`);
+  projectId: string,
+  profile?: ExportProfile
+): Promise<ApiResponse<ExportResult>> => {
+  const response = await apiClient.get<ApiResponse<ExportResult>>(`/api/projects/${projectId}/export/pdf`, {
+    params: profile ? { profile } : undefined,
+  });
   return response.data;
 };
 
@@ -501,10 +606,12 @@ export interface Material {
  *   - If 'all': Get all materials via /api/materials?project_id=all
  *   - If 'none': Get global materials (not bound to any project) via /api/materials?project_id=none
  *   - If not provided: Get all materials via /api/materials
+ * @param page 游标分页参数（每页默认 100 条，按更新时间倒序）
  */
 export const listMaterials = async (
-  projectId?: string
-): Promise<ApiResponse<{ materials: Material[]; count: number }>> => {
+  projectId?: string,
+  page?: PageParams
+): Promise<ApiResponse<{ materials: Material[]; count: number } & PageInfo>> => {
   let url: string;
 
   if (!projectId || projectId === 'all') {
@@ -518,7 +625,9 @@ export const listMaterials = async (
     url = `/api/projects/${projectId}/materials`;
   }
 
-  const response = await apiClient.get<ApiResponse<{ materials: Material[]; count: number }>>(url);
+  const response = await apiClient.get<ApiResponse<{ materials: Material[]; count: number } & PageInfo>>(url, {
+    params: page,
+  });
   return response.data;
 };
 
@@ -673,12 +782,15 @@ export const getReferenceFile = async (fileId: string): Promise<ApiResponse<{ fi
 /**
  * 列出项目的参考文件
  * @param projectId 项目ID（'global' 或 'none' 表示列出全局文件）
+ * @param page 游标分页参数（每页默认 100 条，按更新时间倒序）
  */
 export const listProjectReferenceFiles = async (
-  projectId: string
-): Promise<ApiResponse<{ files: ReferenceFile[] }>> => {
-  const response = await apiClient.get<ApiResponse<{ files: ReferenceFile[] }>>(
-    `/api/reference-files/project/${projectId}`
+  projectId: string,
+  page?: PageParams
+): Promise<ApiResponse<{ files: ReferenceFile[] } & PageInfo>> => {
+  const response = await apiClient.get<ApiResponse<{ files: ReferenceFile[] } & PageInfo>>(
+    `/api/reference-files/project/${projectId}`,
+    { params: page }
   );
   return response.data;
 };
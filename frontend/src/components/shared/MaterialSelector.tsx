@@ -39,6 +39,8 @@ export const MaterialSelector: React.FC<MaterialSelectorProps> = ({
   const [selectedMaterials, setSelectedMaterials] = useState<Set<string>>(new Set());
   const [deletingIds, setDeletingIds] = useState<Set<string>>(new Set());
   const [isLoading, setIsLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [isUploading, setIsUploading] = useState(false);
   const [filterProjectId, setFilterProjectId] = useState<string>('all'); // 始终默认显示所有素材
   const [projects, setProjects] = useState<Project[]>([]);
@@ -89,6 +91,7 @@ export const MaterialSelector: React.FC<MaterialSelectorProps> = ({
       const response = await listMaterials(targetProjectId);
       if (response.data?.materials) {
         setMaterials(response.data.materials);
+        setNextCursor(response.data.next_cursor || null);
       }
     } catch (error: any) {
       console.error('加载素材列表失败:', error);
@@ -101,6 +104,28 @@ export const MaterialSelector: React.FC<MaterialSelectorProps> = ({
     }
   };
 
+  const loadMoreMaterials = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      const targetProjectId = filterProjectId === 'all' ? 'all' : filterProjectId === 'none' ? 'none' : filterProjectId;
+      const response = await listMaterials(targetProjectId, { cursor: nextCursor });
+      if (response.data?.materials) {
+        const existingIds = new Set(materials.map(getMaterialKey));
+        setMaterials([...materials, ...response.data.materials.filter((m) => !existingIds.has(getMaterialKey(m)))]);
+        setNextCursor(response.data.next_cursor || null);
+      }
+    } catch (error: any) {
+      console.error('加载更多素材失败:', error);
+      show({
+        message: error?.response?.data?.error?.message || error.message || '加载更多素材失败',
+        type: 'error',
+      });
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   const handleSelectMaterial = (material: Material) => {
     const key = getMaterialKey(material);
     if (multiple) {
@@ -396,6 +421,14 @@ export const MaterialSelector: React.FC<MaterialSelectorProps> = ({
           </div>
           )}
 
+          {nextCursor && materials.length > 0 && (
+            <div className="flex justify-center">
+              <Button variant="ghost" size="sm" onClick={loadMoreMaterials} disabled={isLoadingMore}>
+                {isLoadingMore ? '加载中...' : '加载更多'}
+              </Button>
+            </div>
+          )}
+
           {/* 底部操作 */}
           <div className="pt-4 border-t">
             {/* 保存为模板选项 */}
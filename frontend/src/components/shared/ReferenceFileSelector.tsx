@@ -42,6 +42,8 @@ export const ReferenceFileSelector: React.FC<ReferenceFileSelectorProps> = React
   const [selectedFiles, setSelectedFiles] = useState<Set<string>>(new Set());
   const [deletingIds, setDeletingIds] = useState<Set<string>>(new Set());
   const [isLoading, setIsLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [isUploading, setIsUploading] = useState(false);
   const [parsingIds, setParsingIds] = useState<Set<string>>(new Set());
   const [filterProjectId, setFilterProjectId] = useState<string>('all'); // 始终默认显示所有附件
@@ -85,6 +87,7 @@ export const ReferenceFileSelector: React.FC<ReferenceFileSelectorProps> = React
           
           return Array.from(fileMap.values());
         });
+        setNextCursor(response.data.next_cursor || null);
       }
     } catch (error: any) {
       console.error('加载参考文件列表失败:', error);
@@ -97,6 +100,31 @@ export const ReferenceFileSelector: React.FC<ReferenceFileSelectorProps> = React
     }
   }, [filterProjectId, parsingIds]);
 
+  const loadMoreFiles = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      const targetProjectId = filterProjectId === 'all' ? 'all' : filterProjectId === 'none' ? 'none' : filterProjectId;
+      const response = await listProjectReferenceFiles(targetProjectId, { cursor: nextCursor });
+      if (response.data?.files) {
+        const moreFiles = response.data.files;
+        setFiles(prev => {
+          const existingIds = new Set(prev.map(f => f.id));
+          return [...prev, ...moreFiles.filter(f => !existingIds.has(f.id))];
+        });
+        setNextCursor(response.data.next_cursor || null);
+      }
+    } catch (error: any) {
+      console.error('加载更多参考文件失败:', error);
+      showRef.current({
+        message: error?.response?.data?.error?.message || error.message || '加载更多参考文件失败',
+        type: 'error',
+      });
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     if (isOpen) {
       loadFiles();
@@ -138,6 +166,7 @@ export const ReferenceFileSelector: React.FC<ReferenceFileSelectorProps> = React
           updatedFiles.forEach(uf => fileMap.set(uf.id, uf));
           return Array.from(fileMap.values());
         });
+        setNextCursor(response.data.next_cursor || null);
       }
 
       // 从轮询列表中移除已完成的文件
@@ -581,6 +610,14 @@ export const ReferenceFileSelector: React.FC<ReferenceFileSelectorProps> = React
           )}
         </div>
 
+        {nextCursor && files.length > 0 && (
+          <div className="flex justify-center">
+            <Button variant="ghost" size="sm" onClick={loadMoreFiles} disabled={isLoadingMore}>
+              {isLoadingMore ? '加载中...' : '加载更多'}
+            </Button>
+          </div>
+        )}
+
         {/* 底部操作栏 */}
         <div className="flex items-center justify-between pt-4 border-t border-gray-200">
           <p className="text-xs text-gray-500">
@@ -3,6 +3,30 @@ import type { Project, Task } from '@/types';
 import * as api from '@/api/endpoints';
 import { debounce, normalizeProject, normalizeErrorMessage } from '@/utils';
 
+/**
+ * 轮询导出任务直到完成，返回下载链接
+ */
+const waitForExportTask = async (projectId: string, taskId: string): Promise<string> => {
+  const pollInterval = 2000; // 2秒
+  const maxAttempts = 300; // 最多10分钟
+
+  for (let attempt = 0; attempt < maxAttempts; attempt++) {
+    await new Promise((resolve) => setTimeout(resolve, pollInterval));
+    const task = (await api.getTaskStatus(projectId, taskId)).data;
+    if (task?.status === 'COMPLETED') {
+      const downloadUrl = task.progress?.download_url;
+      if (!downloadUrl) {
+        throw new Error('下载链接获取失败');
+      }
+      return downloadUrl;
+    }
+    if (task?.status === 'FAILED') {
+      throw new Error(task.error_message || '导出失败');
+    }
+  }
+  throw new Error('导出超时，请稍后重试');
+};
+
 interface ProjectState {
   // 状态
   currentProject: Project | null;
@@ -618,7 +642,23 @@ const debouncedUpdatePage = debounce(
       await get().syncProject();
       
       // 传递 force_regenerate=true 以允许重新生成已有描述
-      await api.generatePageDescription(currentProject.id, pageId, true);
+      // 流式生成：边生成边显示部分描述文本
+      let partialText = '';
+      await api.streamPageDescription(currentProject.id, pageId, (delta) => {
+        partialText += delta;
+        const project = get().currentProject;
+        if (!project) return;
+        set({
+          currentProject: {
+            ...project,
+            pages: project.pages.map((p) =>
+              p.id === pageId
+                ? { ...p, description_content: { text: partialText } }
+                : p
+            ),
+          },
+        });
+      }, true);
       
       // 刷新项目数据
       await get().syncProject();
@@ -801,9 +841,11 @@ const debouncedUpdatePage = debounce(
     set({ isGlobalLoading: true, error: null });
     try {
       const response = await api.exportPPTX(currentProject.id);
-      // 优先使用相对路径，避免 Docker 环境下的端口问题
-      const downloadUrl =
-        response.data?.download_url || response.data?.download_url_absolute;
+      const taskId = response.data?.task_id;
+      // 大文件在后台任务中导出，轮询获取下载链接；否则优先使用相对路径，避免 Docker 环境下的端口问题
+      const downloadUrl = taskId
+        ? await waitForExportTask(currentProject.id, taskId)
+        : response.data?.download_url || response.data?.download_url_absolute;
 
       if (!downloadUrl) {
         throw new Error('导出链接获取失败');
@@ -826,9 +868,11 @@ const debouncedUpdatePage = debounce(
     set({ isGlobalLoading: true, error: null });
     try {
       const response = await api.exportPDF(currentProject.id);
-      // 优先使用相对路径，避免 Docker 环境下的端口问题
-      const downloadUrl =
-        response.data?.download_url || response.data?.download_url_absolute;
+      const taskId = response.data?.task_id;
+      // 大文件在后台任务中导出，轮询获取下载链接；否则优先使用相对路径，避免 Docker 环境下的端口问题
+      const downloadUrl = taskId
+        ? await waitForExportTask(currentProject.id, taskId)
+        : response.data?.download_url || response.data?.download_url_absolute;
 
       if (!downloadUrl) {
         throw new Error('导出链接获取失败');
@@ -62,12 +62,26 @@ export interface Project {
   template_image_url?: string; // 后端返回 template_image_url
   template_image_path?: string; // 前端使用的别名
   template_style?: string; // 风格描述文本（无模板模式）
+  description_generation_mode?: 'per_page' | 'batched'; // 页面描述生成模式：逐页 / 批量
   status: ProjectStatus;
   pages: Page[];
+  summary?: ProjectSummary; // 项目列表（非 include=pages）返回的页面摘要
   created_at: string;
   updated_at: string;
 }
 
+// 项目列表中的页面摘要（不包含完整页面数据）
+export interface ProjectSummary {
+  page_count: number;
+  page_status_counts: Record<string, number>;
+  image_count: number;
+  description_count: number;
+  first_page_title: string | null;
+  thumbnail_url: string | null;
+  thumbnail_updated_at: string | null;
+  pages_updated_at: string | null;
+}
+
 // 任务状态
 export type TaskStatus = 'PENDING' | 'RUNNING' | 'COMPLETED' | 'FAILED';
 
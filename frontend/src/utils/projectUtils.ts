@@ -24,6 +24,11 @@ export const getProjectTitle = (project: Project): string => {
     }
   }
   
+  // 项目列表只返回摘要时使用第一页标题
+  if (project.summary?.first_page_title) {
+    return project.summary.first_page_title;
+  }
+  
   // 默认返回未命名项目
   return '未命名项目';
 };
@@ -33,6 +38,9 @@ export const getProjectTitle = (project: Project): string => {
  */
 export const getFirstPageImage = (project: Project): string | null => {
   if (!project.pages || project.pages.length === 0) {
+    if (project.summary?.thumbnail_url) {
+      return getImageUrl(project.summary.thumbnail_url, project.summary.thumbnail_updated_at || undefined);
+    }
     return null;
   }
   
@@ -45,6 +53,24 @@ export const getFirstPageImage = (project: Project): string | null => {
   return null;
 };
 
+/**
+ * 获取页数、有图片的页数和有描述的页数（优先使用完整页面数据，否则使用列表摘要）
+ */
+export const getPageStats = (project: Project): { pageCount: number; imageCount: number; descriptionCount: number } => {
+  if (project.pages && project.pages.length > 0) {
+    return {
+      pageCount: project.pages.length,
+      imageCount: project.pages.filter(p => p.generated_image_path).length,
+      descriptionCount: project.pages.filter(p => p.description_content).length,
+    };
+  }
+  return {
+    pageCount: project.summary?.page_count || 0,
+    imageCount: project.summary?.image_count || 0,
+    descriptionCount: project.summary?.description_count || 0,
+  };
+};
+
 /**
  * 格式化日期
  */
@@ -63,15 +89,14 @@ export const formatDate = (dateString: string): string => {
  * 获取项目状态文本
  */
 export const getStatusText = (project: Project): string => {
-  if (!project.pages || project.pages.length === 0) {
+  const { pageCount, imageCount, descriptionCount } = getPageStats(project);
+  if (pageCount === 0) {
     return '未开始';
   }
-  const hasImages = project.pages.some(p => p.generated_image_path);
-  if (hasImages) {
+  if (imageCount > 0) {
     return '已完成';
   }
-  const hasDescriptions = project.pages.some(p => p.description_content);
-  if (hasDescriptions) {
+  if (descriptionCount > 0) {
     return '待生成图片';
   }
   return '待生成描述';
@@ -95,16 +120,12 @@ export const getProjectRoute = (project: Project): string => {
   const projectId = project.id || project.project_id;
   if (!projectId) return '/';
   
-  if (project.pages && project.pages.length > 0) {
-    const hasImages = project.pages.some(p => p.generated_image_path);
-    if (hasImages) {
-      return `/project/${projectId}/preview`;
-    }
-    const hasDescriptions = project.pages.some(p => p.description_content);
-    if (hasDescriptions) {
-      return `/project/${projectId}/detail`;
-    }
-    return `/project/${projectId}/outline`;
+  const { imageCount, descriptionCount } = getPageStats(project);
+  if (imageCount > 0) {
+    return `/project/${projectId}/preview`;
+  }
+  if (descriptionCount > 0) {
+    return `/project/${projectId}/detail`;
   }
   return `/project/${projectId}/outline`;
 };
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+页面描述生成模式基准测试：逐页（per_page）vs 批量（batched）
+
+对比两种模式的请求次数、输入/输出 token 数（估算）与总耗时。
+默认使用模拟的文本 provider（按 token 数模拟延迟，不消耗额度）；
+加 --live 则使用当前环境变量配置的真实 provider。
+
+用法:
+    python scripts/benchmark_description_modes.py --pages 12 --batch-size 6
+    python scripts/benchmark_description_modes.py --live --pages 8
+"""
+
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# 添加backend目录到Python路径
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+from services.ai_service import AIService, ProjectContext  # noqa: E402
+from services.ai_providers.text.base import TextProvider  # noqa: E402
+from services.reference_index import estimate_tokens  # noqa: E402
+
+SAMPLE_DESCRIPTION = "页面标题：示例标题\n\n页面文字：\n" + "\n".join(f"- 要点{i}：简洁的说明文字内容" for i in range(5))
+
+
+class UsageMeter:
+    """统计请求次数与估算 token 数（线程安全）"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def record(self, prompt: str, output: str):
+        with self.lock:
+            self.requests += 1
+            self.input_tokens += estimate_tokens(prompt)
+            self.output_tokens += estimate_tokens(output)
+
+
+class SimulatedTextProvider(TextProvider):
+    """按输入/输出 token 数模拟延迟的文本 provider"""
+
+    def __init__(self, meter: UsageMeter, base_latency: float, prefill_tps: float, decode_tps: float):
+        self.meter = meter
+        self.base_latency = base_latency
+        self.prefill_tps = prefill_tps
+        self.decode_tps = decode_tps
+
+    def generate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+        page_indices = re.findall(r'^第 (\d+) 页', prompt, flags=re.MULTILINE)
+        if '请只返回一个 JSON 数组' in prompt and page_indices:
+            output = json.dumps(
+                [{'page_index': int(i), 'description': SAMPLE_DESCRIPTION} for i in page_indices],
+                ensure_ascii=False
+            )
+        else:
+            output = SAMPLE_DESCRIPTION
+        time.sleep(self.base_latency
+                   + estimate_tokens(prompt) / self.prefill_tps
+                   + estimate_tokens(output) / self.decode_tps)
+        self.meter.record(prompt, output)
+        return output
+
+
+class MeteredTextProvider(TextProvider):
+    """包装真实 provider 并统计用量"""
+
+    def __init__(self, inner: TextProvider, meter: UsageMeter):
+        self.inner = inner
+        self.meter = meter
+
+    def generate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+        output = self.inner.generate_text(prompt, thinking_budget=thinking_budget)
+        self.meter.record(prompt, output or '')
+        return output
+
+
+def build_inputs(page_count: int, reference_tokens: int):
+    outline = [{'title': f'第{i}部分：主题要点 {i}', 'points': [f'要点{i}-1', f'要点{i}-2']}
+               for i in range(1, page_count + 1)]
+    reference = '\n\n'.join(f'## 章节 {i}\n\n' + '参考资料正文内容，' * 40
+                            for i in range(max(1, reference_tokens // 400)))
+    context = ProjectContext(
+        {'idea_prompt': '生成一份关于人工智能发展历程的PPT', 'creation_type': 'idea'},
+        [{'filename': 'reference.md', 'content': reference}],
+        reference_token_budget=0
+    )
+    return context, outline
+
+
+def run_per_page(service: AIService, context, outline, max_workers: int):
+    prefix = service.prepare_page_description_prefix(context, outline)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(
+                lambda item: service.generate_page_description(context, outline, item[1], item[0],
+                                                               language='zh', prompt_prefix=prefix),
+                enumerate(outline, 1)
+            ))
+    finally:
+        service.release_prompt_prefix(prefix)
+
+
+def run_batched(service: AIService, context, outline, max_workers: int, batch_size: int):
+    prefix = service.prepare_page_description_prefix(context, outline)
+    pages = [{'page_index': i, 'page_outline': page} for i, page in enumerate(outline, 1)]
+    windows = [pages[i:i + batch_size] for i in range(0, len(pages), batch_size)]
+
+    def run_window(window):
+        result = service.generate_page_descriptions_batch(context, outline, window, language='zh',
+                                                          prompt_prefix=prefix)
+        # 与任务中一致：缺失的页面单独重试
+        for page in window:
+            if page['page_index'] not in result:
+                service.generate_page_description(context, outline, page['page_outline'], page['page_index'],
+                                                  language='zh', prompt_prefix=prefix)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(run_window, windows))
+    finally:
+        service.release_prompt_prefix(prefix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-page vs batched description generation')
+    parser.add_argument('--pages', type=int, default=12, help='number of pages in the deck')
+    parser.add_argument('--batch-size', type=int, default=6, help='pages per request in batched mode')
+    parser.add_argument('--max-workers', type=int, default=5, help='parallel requests')
+    parser.add_argument('--reference-tokens', type=int, default=8000, help='size of the simulated reference file')
+    parser.add_argument('--base-latency', type=float, default=1.5, help='simulated per-request latency (s)')
+    parser.add_argument('--prefill-tps', type=float, default=20000, help='simulated prompt tokens/s')
+    parser.add_argument('--decode-tps', type=float, default=80, help='simulated output tokens/s')
+    parser.add_argument('--live', action='store_true', help='use the provider configured in the environment')
+    args = parser.parse_args()
+
+    context, outline = build_inputs(args.pages, args.reference_tokens)
+    live_provider = None
+    if args.live:
+        from services.ai_providers import get_text_provider
+        live_provider = get_text_provider()
+
+    print(f"pages={args.pages} batch_size={args.batch_size} max_workers={args.max_workers} "
+          f"provider={'live' if args.live else 'simulated'}")
+    print(f"{'mode':<10}{'requests':>10}{'input_tok':>12}{'output_tok':>12}{'wall_s':>10}")
+
+    for mode in ('per_page', 'batched'):
+        meter = UsageMeter()
+        if live_provider is not None:
+            provider = MeteredTextProvider(live_provider, meter)
+        else:
+            provider = SimulatedTextProvider(meter, args.base_latency, args.prefill_tps, args.decode_tps)
+        service = AIService(text_provider=provider, image_provider=MagicMock())
+
+        start = time.perf_counter()
+        if mode == 'per_page':
+            run_per_page(service, context, outline, args.max_workers)
+        else:
+            run_batched(service, context, outline, args.max_workers, args.batch_size)
+        elapsed = time.perf_counter() - start
+
+        print(f"{mode:<10}{meter.requests:>10}{meter.input_tokens:>12}{meter.output_tokens:>12}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+字号计算基准测试：旧的逐字号线性扫描 vs FontFitter（逐个 / 整页批量）
+
+输出每千个文本框的耗时，并用同一字体按词换行排版来检查结果：
+溢出率（排版后高度超出文本框的比例）与平均高度填充率。
+
+用法:
+    python scripts/benchmark_font_fit.py --spans 5000
+    python scripts/benchmark_font_fit.py --spans 2000 --per-slide 40
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# 添加backend目录到Python路径
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+from utils.font_fit import FontFitter, _is_wide  # noqa: E402
+
+WORDS = ("revenue growth market share quarterly results strategy customer product platform "
+         "launch roadmap analysis team pipeline 2024 Q3 +20% AI cloud").split()
+CJK = "季度营收增长市场份额战略客户产品平台发布路线图分析团队"
+
+
+def legacy_font_size(bbox, text, dpi=96, min_size=6, max_size=200):
+    """旧实现：固定字符宽度比例，从 200pt 开始每 0.5pt 线性扫描"""
+    width_in = (bbox[2] - bbox[0]) * 0.94 / dpi
+    height_in = (bbox[3] - bbox[1]) * 0.94 / dpi
+    if len(text) <= 3:
+        return max(min_size, min(max_size, height_in * 0.7 * 72))
+    for font_size in [size / 2.0 for size in range(max_size * 2, min_size * 2 - 1, -1)]:
+        has_cjk = any('一' <= char <= '鿿' or '぀' <= char <= 'ヿ' for char in text)
+        char_width_in = font_size * (0.7 if has_cjk else 0.55) / 72
+        usable_width, usable_height = width_in - 0.1, height_in - 0.1
+        if usable_width <= 0 or usable_height <= 0:
+            continue
+        chars_per_line = max(1, int(usable_width / char_width_in))
+        lines = max(1, (len(text) + chars_per_line - 1) // chars_per_line)
+        if lines * font_size * 1.2 / 72 <= usable_height:
+            return font_size
+    return min_size
+
+
+def random_span(rng):
+    """随机生成一个文本框：标题、英文段落或中文段落"""
+    kind = rng.random()
+    if kind < 0.3:
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).title()
+        width, height = rng.randint(600, 1700), rng.randint(60, 160)
+    elif kind < 0.65:
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 60)))
+        width, height = rng.randint(300, 900), rng.randint(80, 400)
+    else:
+        text = ''.join(rng.choice(CJK) for _ in range(rng.randint(6, 80)))
+        width, height = rng.randint(300, 900), rng.randint(60, 400)
+    x, y = rng.randint(0, 200), rng.randint(0, 600)
+    return [x, y, x + width, y + height], text
+
+
+def layout_height(fitter, text, size, bbox, dpi=96):
+    """按词（中文按字）换行后的排版高度与可用高度（pt）"""
+    usable_width = (bbox[2] - bbox[0]) * 0.94 / dpi * 72 - 7.2
+    usable_height = (bbox[3] - bbox[1]) * 0.94 / dpi * 72 - 7.2
+    tokens = list(text) if any(_is_wide(char) for char in text) else text.split(' ')
+    separator = '' if any(_is_wide(char) for char in text) else ' '
+    lines, current = 1, ''
+    for token in tokens:
+        candidate = f'{current}{separator}{token}' if current else token
+        if current and fitter.text_width_em(candidate) * size > usable_width:
+            lines, current = lines + 1, token
+        else:
+            current = candidate
+    return lines * size * 1.2, usable_height
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--spans', type=int, default=5000, help='文本框数量')
+    parser.add_argument('--per-slide', type=int, default=25, help='批量模式下每页的文本框数量')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    spans = [random_span(rng) for _ in range(args.spans)]
+    bboxes = [bbox for bbox, _ in spans]
+    texts = [text for _, text in spans]
+    fitter = FontFitter()
+
+    legacy, legacy_time = timed(lambda: [legacy_font_size(bbox, text) for bbox, text in spans])
+    single, single_time = timed(lambda: [fitter.fit_size(bbox, text) for bbox, text in spans])
+
+    def batched():
+        sizes = []
+        for start in range(0, len(spans), args.per_slide):
+            sizes.extend(fitter.fit_sizes(bboxes[start:start + args.per_slide],
+                                          texts[start:start + args.per_slide]).tolist())
+        return sizes
+    batch, batch_time = timed(batched)
+
+    per_thousand = 1000 / len(spans) * 1000
+    print(f"{len(spans)} spans, {args.per_slide} per slide batch")
+    print(f"{'method':<22}{'ms / 1k spans':>14}{'overflow':>10}{'fill':>8}")
+    for name, sizes, elapsed in (('legacy linear scan', legacy, legacy_time),
+                                 ('FontFitter single', single, single_time),
+                                 ('FontFitter per slide', batch, batch_time)):
+        overflow, fill = 0, 0.0
+        for (bbox, text), size in zip(spans, sizes):
+            height, usable = layout_height(fitter, text, size, bbox)
+            overflow += height > usable + 1e-6
+            fill += min(height / usable, 1.0) if usable > 0 else 0
+        print(f"{name:<22}{elapsed * per_thousand:>14.1f}{overflow / len(spans):>10.1%}{fill / len(spans):>8.1%}")
+
+
+if __name__ == '__main__':
+    main()